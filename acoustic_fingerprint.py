@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Acoustic Fingerprinting
+Finds the same recording across formats: a WAV take and its MP3 and AAC
+exports have different bytes, so BulletproofDeduplicator can't pair them,
+but they share the same spectral landmarks.
+
+A fingerprint is a set of landmark hashes (spectral-peak pairs):
+  - decode to mono at SAMPLE_RATE and take a log-magnitude spectrogram
+  - keep the local maxima of the spectrogram (at most PEAKS_PER_SECOND)
+  - pair each peak with the next FAN_OUT peaks in a short target zone and
+    hash (anchor frequency, target frequency, time delta) into 24 bits,
+    remembering the anchor's time offset
+
+Lossy encoding, resampling and gain changes keep most strong peaks in
+place, and a landmark doesn't depend on anything outside its 2-second
+zone, so an excerpt shares landmarks with the file it was cut from.
+
+Landmarks live in an inverted index (hash -> file, offset) in SQLite. A
+query looks up its hashes and, per file, counts landmarks that agree on a
+single time offset; random collisions scatter across offsets while a real
+match piles up on one. Fingerprinting runs in a process pool.
+
+Usage:
+    index = get_acoustic_index()
+    matches = index.find_containing(clip_path)    # which files contain this audio?
+    groups = index.duplicate_groups(paths)        # dedup UI groups
+"""
+
+import os
+import time
+import wave
+import shutil
+import sqlite3
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+from gdrive_integration import get_metadata_root
+from analysis_cache import content_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Bump when landmark extraction changes so stored fingerprints are redone
+FINGERPRINT_VERSION = "1"
+
+SAMPLE_RATE = 8000
+N_FFT = 1024
+HOP_LENGTH = 256
+# Only the first half hour of very long recordings is fingerprinted
+MAX_SECONDS = 1800
+
+# Peak picking: a peak is the maximum of its (2r+1) x (2r+1) neighbourhood
+PEAK_FREQ_RADIUS = 12
+PEAK_TIME_RADIUS = 6
+PEAKS_PER_SECOND = 30
+PEAK_FLOOR_DB = 60
+
+# Target zone: the next FAN_OUT peaks within MAX_DT frames (~2 s)
+FAN_OUT = 5
+MAX_DT = 63
+MAX_DF = 128
+FREQ_BINS = 512
+
+# Query matching
+MIN_MATCHES = 10
+# Duplicates: share this fraction of the shorter file's landmarks...
+DUPLICATE_MIN_COVERAGE = 0.2
+# ...and have about the same duration (fraction of the longer, plus seconds)
+DURATION_TOLERANCE = 0.05
+DURATION_SLACK_SEC = 1.0
+
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.oga', '.opus',
+                    '.aiff', '.aif', '.wma', '.caf'}
+
+FFMPEG_TIMEOUT_SEC = 300
+
+ACOUSTIC_FINGERPRINT_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS audio_files (
+  file_id INTEGER PRIMARY KEY,
+  file_path TEXT UNIQUE NOT NULL,
+  version TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime REAL NOT NULL,
+  fingerprint TEXT NOT NULL,           -- analysis_cache.content_fingerprint
+  duration REAL NOT NULL,
+  landmarks INTEGER NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS landmarks (
+  hash INTEGER NOT NULL,               -- f1 (9 bits) | f2 (9 bits) | dt (6 bits)
+  file_id INTEGER NOT NULL,
+  offset INTEGER NOT NULL,             -- anchor frame (HOP_LENGTH / SAMPLE_RATE seconds)
+  PRIMARY KEY (hash, file_id, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_landmarks_file ON landmarks(file_id);
+"""
+
+
+def is_audio(file_path: Path) -> bool:
+    return Path(file_path).suffix.lower() in AUDIO_EXTENSIONS
+
+
+# ----------------------------------------------------------------------
+# Decoding
+# ----------------------------------------------------------------------
+
+def _resample(samples: "np.ndarray", rate: int, target: int) -> "np.ndarray":
+    """Box-filter then interpolate; enough for peak positions below target / 2"""
+    if rate == target:
+        return samples
+    factor = rate // target
+    if factor > 1:
+        usable = samples.size - samples.size % factor
+        samples = samples[:usable].reshape(-1, factor).mean(axis=1)
+        rate = rate / factor
+    positions = np.arange(int(samples.size * target / rate)) * (rate / target)
+    return np.interp(positions, np.arange(samples.size), samples)
+
+
+def _decode_wav(audio_path: Path, sample_rate: int, max_seconds: float, offset: float = 0.0) -> "np.ndarray":
+    with wave.open(str(audio_path), "rb") as wav:
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(wav.getsampwidth())
+        if dtype is None:
+            raise ValueError("Unsupported WAV sample width")
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        wav.setpos(min(int(rate * offset), wav.getnframes()))
+        data = np.frombuffer(wav.readframes(int(rate * max_seconds)), dtype=dtype).astype(np.float32)
+    if dtype == np.uint8:
+        data = (data - 128) / 128
+    else:
+        data /= float(np.iinfo(dtype).max)
+    mono = data[:data.size - data.size % channels].reshape(-1, channels).mean(axis=1)
+    return _resample(mono, rate, sample_rate).astype(np.float32)
+
+
+def decode_mono(audio_path: Path, sample_rate: int = SAMPLE_RATE, max_seconds: float = MAX_SECONDS,
+                offset: float = 0.0) -> "np.ndarray":
+    """Mono float samples at sample_rate from offset seconds on (ffmpeg, then librosa, then PCM WAV)"""
+    audio_path = Path(audio_path)
+    if shutil.which("ffmpeg"):
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-ss', str(offset), '-i', str(audio_path), '-t', str(max_seconds),
+             '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', '-'],
+            capture_output=True, timeout=FFMPEG_TIMEOUT_SEC
+        )
+        if result.returncode != 0:
+            raise ValueError(result.stderr.decode(errors="replace").strip()[-300:] or "ffmpeg failed")
+        return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+    if LIBROSA_AVAILABLE:
+        samples, _ = librosa.load(str(audio_path), sr=sample_rate, mono=True, offset=offset, duration=max_seconds)
+        return samples
+    if audio_path.suffix.lower() == ".wav":
+        return _decode_wav(audio_path, sample_rate, max_seconds, offset)
+    raise ValueError("ffmpeg or librosa is required to decode this format")
+
+
+# ----------------------------------------------------------------------
+# Landmarks
+# ----------------------------------------------------------------------
+
+def _max_filter(values: "np.ndarray", radius: int, axis: int) -> "np.ndarray":
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(values, pad, constant_values=-np.inf)
+    return np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=axis).max(axis=-1)
+
+
+def spectral_peaks(samples: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """(frame, frequency bin) of the spectrogram's local maxima, in time order"""
+    if samples.size < N_FFT:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::HOP_LENGTH]
+    magnitude = np.abs(np.fft.rfft(frames * np.hanning(N_FFT), axis=1))[:, :FREQ_BINS]
+    floor = max(float(magnitude.max()) * 10 ** (-PEAK_FLOOR_DB / 20), 1e-3)
+    log_magnitude = np.log(np.maximum(magnitude, 1e-10))
+
+    neighbourhood = _max_filter(_max_filter(log_magnitude, PEAK_FREQ_RADIUS, 1), PEAK_TIME_RADIUS, 0)
+    frame, freq = np.nonzero((log_magnitude == neighbourhood) & (magnitude > floor))
+    if frame.size == 0:
+        return frame, freq
+
+    # Strongest PEAKS_PER_SECOND in each second
+    frames_per_second = SAMPLE_RATE / HOP_LENGTH
+    second = (frame / frames_per_second).astype(np.int64)
+    order = np.lexsort((-log_magnitude[frame, freq], second))
+    second = second[order]
+    rank = np.arange(order.size) - np.searchsorted(second, second)
+    keep = np.sort(order[rank < PEAKS_PER_SECOND])
+    return frame[keep], freq[keep]
+
+
+def landmarks(samples: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """(hash, anchor frame) of every landmark in the samples"""
+    frame, freq = spectral_peaks(samples)
+    hashes, offsets = [], []
+    paired = np.zeros(frame.size, dtype=np.int64)
+    # Peaks are in time order, so the target zone is a run of following peaks
+    for step in range(1, FAN_OUT * 8):
+        if step >= frame.size:
+            break
+        anchor = np.arange(frame.size - step)
+        dt = frame[anchor + step] - frame[anchor]
+        df = freq[anchor + step] - freq[anchor]
+        valid = (dt > 0) & (dt <= MAX_DT) & (np.abs(df) <= MAX_DF) & (paired[anchor] < FAN_OUT)
+        anchor = anchor[valid]
+        paired[anchor] += 1
+        hashes.append((freq[anchor] << 15) | (freq[anchor + step] << 6) | dt[valid])
+        offsets.append(frame[anchor])
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(offsets)
+
+
+def fingerprint_file(audio_path: str) -> Tuple[float, "np.ndarray", "np.ndarray"]:
+    """(duration, hashes, offsets) for a file. Runs in pool workers."""
+    samples = decode_mono(Path(audio_path))
+    hashes, offsets = landmarks(samples)
+    return samples.size / SAMPLE_RATE, hashes, offsets
+
+
+# ----------------------------------------------------------------------
+# Inverted index
+# ----------------------------------------------------------------------
+
+class AcousticFingerprintIndex:
+    """
+    SQLite inverted index of landmark hashes (WAL mode, one connection per
+    thread). Files are keyed by path and refreshed when size or mtime
+    change; each row carries the content fingerprint so byte-identical
+    copies can be told apart from re-encodes.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_workers: Optional[int] = None):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "acoustic_fingerprints.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(ACOUSTIC_FINGERPRINT_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM audio_files WHERE version = ?", (FINGERPRINT_VERSION,)).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _row(self, file_path: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM audio_files WHERE file_path = ?", (file_path,)).fetchone()
+        return dict(row) if row else None
+
+    def _fresh_row(self, file_path: Path) -> Tuple[Optional[os.stat_result], Optional[Dict[str, Any]]]:
+        """(stat, stored row if still current)"""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None, None
+        row = self._row(str(file_path))
+        if row and row["version"] == FINGERPRINT_VERSION and row["size"] == stat.st_size \
+                and row["mtime"] == stat.st_mtime:
+            return stat, row
+        return stat, None
+
+    def _store(self, file_path: Path, stat: os.stat_result, duration: float,
+               hashes: "np.ndarray", offsets: "np.ndarray") -> Dict[str, Any]:
+        fingerprint = content_fingerprint(file_path, stat)
+        with self._lock, self._connect() as conn:
+            old = conn.execute("SELECT file_id FROM audio_files WHERE file_path = ?", (str(file_path),)).fetchone()
+            if old:
+                conn.execute("DELETE FROM landmarks WHERE file_id = ?", (old[0],))
+            conn.execute(
+                "INSERT OR REPLACE INTO audio_files "
+                "(file_id, file_path, version, size, mtime, fingerprint, duration, landmarks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (old[0] if old else None, str(file_path), FINGERPRINT_VERSION, stat.st_size, stat.st_mtime,
+                 fingerprint, duration, int(hashes.size), time.time())
+            )
+            file_id = conn.execute("SELECT file_id FROM audio_files WHERE file_path = ?", (str(file_path),)).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO landmarks (hash, file_id, offset) VALUES (?, ?, ?)",
+                ((h, file_id, o) for h, o in zip(hashes.tolist(), offsets.tolist()))
+            )
+        return self._row(str(file_path))
+
+    def index_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Stored row for a file, fingerprinting it if new or changed (None if undecodable)"""
+        return self.index_files([file_path]).get(str(file_path))
+
+    def index_files(self, file_paths: Iterable[Path]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """index_file() for a batch, fingerprinting new and changed files in parallel"""
+        if not NUMPY_AVAILABLE:
+            return {str(path): None for path in file_paths}
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending = []
+        for file_path in map(Path, file_paths):
+            stat, row = self._fresh_row(file_path)
+            if row is not None or stat is None:
+                results[str(file_path)] = row
+            else:
+                pending.append((file_path, stat, self._executor().submit(fingerprint_file, str(file_path))))
+
+        for file_path, stat, future in pending:
+            try:
+                duration, hashes, offsets = future.result()
+                results[str(file_path)] = self._store(file_path, stat, duration, hashes, offsets)
+            except Exception as e:
+                logger.warning(f"Could not fingerprint {file_path.name}: {e}")
+                results[str(file_path)] = None
+        return results
+
+    def forget(self, file_path: str):
+        """Drop a path (deleted or moved file)"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT file_id FROM audio_files WHERE file_path = ?", (file_path,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM landmarks WHERE file_id = ?", (row[0],))
+                conn.execute("DELETE FROM audio_files WHERE file_id = ?", (row[0],))
+
+    def prune_missing(self) -> int:
+        """Forget rows whose file no longer exists; returns the number removed"""
+        paths = [row[0] for row in self._connect().execute("SELECT file_path FROM audio_files")]
+        missing = [path for path in paths if not os.path.exists(path)]
+        for path in missing:
+            self.forget(path)
+        return len(missing)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _stored_landmarks(self, file_id: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        rows = self._connect().execute("SELECT hash, offset FROM landmarks WHERE file_id = ?", (file_id,)).fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        return data[:, 0], data[:, 1]
+
+    def _match(self, hashes: "np.ndarray", offsets: "np.ndarray",
+               exclude_file_id: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+        """file_id -> (landmarks agreeing on one time offset, that offset in frames)"""
+        if hashes.size == 0:
+            return {}
+        order = np.argsort(hashes, kind="stable")
+        query_hashes, query_offsets = hashes[order], offsets[order]
+
+        conn = self._connect()
+        unique = np.unique(query_hashes).tolist()
+        rows = []
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            rows += conn.execute(
+                f"SELECT hash, file_id, offset FROM landmarks WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+        if not rows:
+            return {}
+        found = np.array(rows, dtype=np.int64)
+        if exclude_file_id is not None:
+            found = found[found[:, 1] != exclude_file_id]
+
+        # Pair every stored landmark with every query landmark of the same hash
+        lo = np.searchsorted(query_hashes, found[:, 0], "left")
+        counts = np.searchsorted(query_hashes, found[:, 0], "right") - lo
+        row_index = np.repeat(np.arange(found.shape[0]), counts)
+        query_index = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        delta = found[row_index, 2] - query_offsets[query_index]
+        if delta.size == 0:
+            return {}
+
+        # Votes per (file, offset); neighbouring offsets are merged because
+        # encoder delay can shift a re-encode by a fraction of a frame
+        keys, votes = np.unique((found[row_index, 1] << 32) | (delta + (1 << 31)), return_counts=True)
+        following = np.searchsorted(keys, keys + 1)
+        following = np.minimum(following, keys.size - 1)
+        votes = votes + np.where(keys[following] == keys + 1, votes[following], 0)
+
+        best: Dict[int, Tuple[int, int]] = {}
+        for key, count in zip(keys.tolist(), votes.tolist()):
+            file_id = key >> 32
+            if count > best.get(file_id, (0, 0))[0]:
+                best[file_id] = (count, (key & 0xFFFFFFFF) - (1 << 31))
+        return best
+
+    def _describe(self, found: Dict[int, Tuple[int, int]], query_landmarks: int,
+                  min_matches: int) -> List[Dict[str, Any]]:
+        found = {file_id: hit for file_id, hit in found.items() if hit[0] >= min_matches}
+        if not found:
+            return []
+        ids = list(found)
+        rows = {
+            row["file_id"]: row for row in self._connect().execute(
+                f"SELECT file_id, file_path, fingerprint, duration, landmarks FROM audio_files "
+                f"WHERE file_id IN ({','.join('?' * len(ids))})", ids)
+        }
+        matches = []
+        for file_id, (count, offset) in found.items():
+            row = rows.get(file_id)
+            if row is None:
+                continue
+            matches.append({
+                "file_path": row["file_path"],
+                "fingerprint": row["fingerprint"],
+                "duration": row["duration"],
+                "matched_landmarks": count,
+                "coverage": round(count / max(1, min(query_landmarks, row["landmarks"])), 3),
+                # Where the query starts within the matched file
+                "offset_seconds": round(offset * HOP_LENGTH / SAMPLE_RATE, 2),
+            })
+        return sorted(matches, key=lambda m: (-m["matched_landmarks"], m["file_path"]))
+
+    def query_samples(self, samples: "np.ndarray", min_matches: int = MIN_MATCHES) -> List[Dict[str, Any]]:
+        """Indexed files containing this audio (mono, SAMPLE_RATE), best match first"""
+        hashes, offsets = landmarks(np.asarray(samples, dtype=np.float32))
+        return self._describe(self._match(hashes, offsets), int(hashes.size), min_matches)
+
+    def find_containing(self, file_path: Path, min_matches: int = MIN_MATCHES) -> List[Dict[str, Any]]:
+        """
+        Other indexed files that contain the audio of file_path (an excerpt
+        or a re-encode), best match first. Each match has file_path,
+        fingerprint, duration, matched_landmarks, coverage and
+        offset_seconds. The query file itself is not indexed.
+        """
+        file_path = Path(file_path)
+        _, row = self._fresh_row(file_path)
+        if row is not None:
+            hashes, offsets = self._stored_landmarks(row["file_id"])
+            found = self._match(hashes, offsets, exclude_file_id=row["file_id"])
+        else:
+            _, hashes, offsets = fingerprint_file(str(file_path))
+            found = self._match(hashes, offsets)
+        return self._describe(found, int(hashes.size), min_matches)
+
+    def duplicate_groups(self, file_paths: Iterable[Path]) -> List[Dict[str, Any]]:
+        """
+        Group recordings of the same audio among file_paths (different
+        format, bitrate or sample rate), in the dedup UI's group format.
+        Excerpts are not duplicates: durations must agree. Byte-identical
+        copies (same fingerprint) are left to the exact duplicate scan.
+        """
+        rows = {path: row for path, row in self.index_files(file_paths).items() if row}
+        by_id = {row["file_id"]: row for row in rows.values()}
+        parent = {path: path for path in rows}
+
+        def find(path):
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        shortfall: Dict[str, float] = {}
+        for path, row in rows.items():
+            hashes, offsets = self._stored_landmarks(row["file_id"])
+            for other_id, (count, _) in self._match(hashes, offsets, exclude_file_id=row["file_id"]).items():
+                other = by_id.get(other_id)
+                if other is None or other["fingerprint"] == row["fingerprint"] or count < MIN_MATCHES:
+                    continue
+                coverage = count / max(1, min(row["landmarks"], other["landmarks"]))
+                longer = max(row["duration"], other["duration"])
+                if coverage < DUPLICATE_MIN_COVERAGE or \
+                        abs(row["duration"] - other["duration"]) > longer * DURATION_TOLERANCE + DURATION_SLACK_SEC:
+                    continue
+                root_a, root_b = find(path), find(other["file_path"])
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                shortfall[path] = max(shortfall.get(path, 0), round(1 - min(1.0, coverage), 3))
+
+        members = defaultdict(list)
+        for path in rows:
+            members[find(path)].append(path)
+
+        groups = []
+        for paths in members.values():
+            if len({rows[p]["fingerprint"] for p in paths}) < 2:
+                continue
+            # Largest (usually lossless) copy first
+            paths.sort(key=lambda p: rows[p]["size"], reverse=True)
+            groups.append({
+                "group_id": f"acoustic-{rows[paths[0]]['fingerprint'][:16]}",
+                "match": "near_duplicate",
+                "kind": "audio",
+                # Fraction of landmarks the least similar copy did not share
+                "max_distance": max(shortfall.get(p, 0) for p in paths),
+                "total_size": sum(rows[p]["size"] for p in paths),
+                "files": [
+                    {
+                        "path": p,
+                        "name": Path(p).name,
+                        "size": rows[p]["size"],
+                        "modified": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(rows[p]["mtime"])),
+                    }
+                    for p in paths
+                ],
+            })
+        groups.sort(key=lambda g: g["total_size"], reverse=True)
+        return groups
+
+
+_acoustic_index: Optional[AcousticFingerprintIndex] = None
+_acoustic_index_lock = threading.Lock()
+
+
+def get_acoustic_index() -> AcousticFingerprintIndex:
+    """Shared AcousticFingerprintIndex for the metadata root"""
+    global _acoustic_index
+    with _acoustic_index_lock:
+        if _acoustic_index is None:
+            _acoustic_index = AcousticFingerprintIndex()
+        return _acoustic_index
@@ -26,7 +26,6 @@ import logging
 import hashlib
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-import queue
 
 # Import existing system components
 project_dir = Path(__file__).parent
@@ -39,13 +38,17 @@ from bulletproof_deduplication import BulletproofDeduplicator
 from gdrive_integration import get_ai_organizer_root, get_metadata_root, GoogleDriveIntegration
 from easy_rollback_system import EasyRollbackSystem
 from staging_monitor import StagingMonitor
+from staging_snapshot import StagingSnapshot, default_staging_areas
+from file_event_pipeline import FileEventPipeline
+from analysis_cache import content_fingerprint
 
 class AdaptiveFileHandler(FileSystemEventHandler):
     """File system event handler with learning capabilities"""
     
     def __init__(self, monitor):
         self.monitor = monitor
-        self.event_queue = queue.Queue()
+        # Shared, debounced pipeline (see FileEventPipeline)
+        self.event_pipeline = monitor.event_pipeline
         
     def on_moved(self, event):
         """Handle file move events - learn from user actions"""
@@ -58,7 +61,7 @@ class AdaptiveFileHandler(FileSystemEventHandler):
             # Also queue as generic folder_created for other subsystems? 
             # Probably not needed if we handle sync.
         else:
-            self.event_queue.put({
+            self.event_pipeline.submit({
                 'type': 'moved',
                 'src_path': event.src_path,
                 'dest_path': event.dest_path,
@@ -70,13 +73,13 @@ class AdaptiveFileHandler(FileSystemEventHandler):
         Handle file OR folder creation
         """
         if event.is_directory:
-            self.event_queue.put({
+            self.event_pipeline.submit({
                 'type': 'folder_created',
                 'path': event.src_path,
                 'timestamp': datetime.now()
             })
         else:
-            self.event_queue.put({
+            self.event_pipeline.submit({
                 'type': 'created',
                 'path': event.src_path,
                 'timestamp': datetime.now()
@@ -85,7 +88,7 @@ class AdaptiveFileHandler(FileSystemEventHandler):
     def on_modified(self, event):
         """Handle file modification events"""
         if not event.is_directory:
-            self.event_queue.put({
+            self.event_pipeline.submit({
                 'type': 'modified',
                 'path': event.src_path,
                 'timestamp': datetime.now()
@@ -124,11 +127,23 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
         self.deduplicator = BulletproofDeduplicator(str(self.base_dir))
         self.rollback_system = EasyRollbackSystem()
         self.staging_monitor = StagingMonitor(str(self.base_dir))
+        # Triage reads classifications from the snapshot database; keep it current from events
+        self.staging_snapshot = StagingSnapshot(default_staging_areas(Path(self.base_dir)))
         
         # File system watchers
         self.observers = {}
         self.file_handlers = {}
-        self.event_processing_queue = queue.Queue()
+
+        # Watchdog events are debounced per path and processed by a small worker
+        # pool, each worker keeping its own DB connections open
+        self.event_pipeline = FileEventPipeline(
+            self._process_event_batch,
+            open_worker_resources=self._open_event_connections,
+            close_worker_resources=self._close_event_connections,
+            workers=int(os.getenv("MONITOR_EVENT_WORKERS", "2")),
+            debounce_sec=float(os.getenv("MONITOR_EVENT_DEBOUNCE_SEC", "0.5")),
+            on_overflow=self._rescan_after_overflow
+        )
         
         # Emergency detection
         self.emergency_thresholds = {
@@ -149,6 +164,8 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
         
         # Adaptive rules database
         self.rules_db_path = get_metadata_root() / "databases" / "adaptive_rules.db"
+        # Content hashes of files seen by the monitor, to tell real edits from touches
+        self.db_path = get_metadata_root() / "databases" / "adaptive_processed_files.db"
         self._init_adaptive_database()
         
         # Load existing adaptive rules
@@ -245,6 +262,15 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
     def _init_adaptive_database(self):
         """Initialize database for adaptive rules and learning"""
         self.rules_db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS processed_files (
+                    file_path TEXT PRIMARY KEY,
+                    file_hash TEXT,
+                    updated_at TEXT
+                )
+            """)
         
         with sqlite3.connect(self.rules_db_path) as conn:
             # Adaptive rules table
@@ -411,48 +437,61 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
         self.threads['maintenance_cycle'].start()
 
     def _process_file_events(self):
-        """Process file system events and learn from user actions"""
-        
-        while self.running:
-            try:
-                # Collect events from all handlers
-                events_to_process = []
-                
-                for handler in self.file_handlers.values():
-                    while not handler.event_queue.empty():
-                        try:
-                            event = handler.event_queue.get_nowait()
-                            events_to_process.append(event)
-                        except queue.Empty:
-                            break
-                
-                if events_to_process:
-                    # OPTIMIZATION: Reuse database connection for batch processing
-                    # We open connections to both rules DB and processed files DB to prevent N+1 overhead
-                    try:
-                        with sqlite3.connect(self.rules_db_path) as rules_conn, \
-                             sqlite3.connect(self.db_path) as processed_conn, \
-                             sqlite3.connect(self.staging_monitor.db_path) as staging_conn:
-
-                            # Process collected events
-                            for event in events_to_process:
-                                self._learn_from_file_event(
-                                    event,
-                                    db_connection=rules_conn,
-                                    processed_db_connection=processed_conn,
-                                    staging_db_connection=staging_conn
-                                )
-                    except Exception as db_err:
-                        self.logger.error(f"Database error in event loop: {db_err}")
-                        # Fallback to individual processing if batch fails
-                        for event in events_to_process:
-                            self._learn_from_file_event(event)
-                
-                time.sleep(10)  # Check every 10 seconds
-                
-            except Exception as e:
-                self.logger.error(f"Error processing file events: {e}")
-                time.sleep(30)
+        """Dispatch debounced file system events to the worker pool until the monitor stops"""
+        self.event_pipeline.run(should_run=lambda: self.running)
+
+    def _open_event_connections(self) -> Dict[str, sqlite3.Connection]:
+        """Long-lived connections for one event worker thread"""
+        return {
+            "rules": sqlite3.connect(self.rules_db_path, timeout=30),
+            "processed": sqlite3.connect(self.db_path, timeout=30),
+            "staging": sqlite3.connect(self.staging_monitor.db_path, timeout=30)
+        }
+
+    def _close_event_connections(self, connections: Dict[str, sqlite3.Connection]):
+        for conn in connections.values():
+            conn.close()
+
+    def _process_event_batch(self, events: List[Dict[str, Any]], connections: Optional[Dict[str, sqlite3.Connection]]):
+        """Learn from one batch of coalesced events (runs on an event worker)"""
+        for event in events:
+            self._update_staging_snapshot(event)
+
+        if not connections:
+            for event in events:
+                self._learn_from_file_event(event)
+            return
+
+        rules_conn, processed_conn, staging_conn = connections["rules"], connections["processed"], connections["staging"]
+        # One transaction per batch on each connection
+        with rules_conn, processed_conn, staging_conn:
+            for event in events:
+                self._learn_from_file_event(
+                    event,
+                    db_connection=rules_conn,
+                    processed_db_connection=processed_conn,
+                    staging_db_connection=staging_conn
+                )
+
+    def _update_staging_snapshot(self, event: Dict[str, Any]):
+        """Mark new/changed staging files for background classification; drop moved-away ones"""
+        try:
+            if event['type'] == 'moved':
+                self.staging_snapshot.forget(event['src_path'])
+                self.staging_snapshot.note_file(event['dest_path'])
+            elif event['type'] in ('created', 'modified'):
+                self.staging_snapshot.note_file(event['path'])
+        except Exception as e:
+            self.logger.warning(f"Could not update staging snapshot: {e}")
+
+    def _rescan_after_overflow(self):
+        """Events were dropped during a burst; pick the files up with a directory scan instead"""
+        def rescan():
+            self.staging_snapshot.request_refresh(reconcile=True)
+            for dir_info in list(self.watch_directories.values()):
+                self._scan_directory(dir_info, dir_info.get("priority", "custom"))
+
+        threading.Thread(target=rescan, name="event-overflow-rescan", daemon=True).start()
 
     def _learn_from_file_event(self, event: Dict[str, Any],
                               db_connection: Optional[sqlite3.Connection] = None,
@@ -550,6 +589,10 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
                     self.logger.info(f"✨ Sidecar Follower: Moved metadata for {src_file.name}")
                 except Exception as sidecar_error:
                     self.logger.warning(f"⚠️ Failed to move sidecar for {src_file.name}: {sidecar_error}")
+
+            # ...and point any transcription still running at the new location
+            from transcription_queue import get_transcription_queue
+            get_transcription_queue().relocate(src_file, dest_file)
             
         except Exception as e:
             self.logger.error(f"Error learning from file move: {e}")
@@ -1450,35 +1493,33 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
         return count
 
     def _needs_reindexing(self, file_obj: Path, db_connection: Optional[sqlite3.Connection] = None) -> bool:
-        """Check if file needs re-indexing"""
-        # Simple check - could be more sophisticated
+        """
+        Whether a modified file's content changed since the monitor last saw
+        it. The current hash is recorded either way; a first sighting only
+        records it.
+        """
         try:
-            current_hash = self._get_file_hash(file_obj)
-            
-            if db_connection:
-                cursor = db_connection.execute(
-                    "SELECT file_hash FROM processed_files WHERE file_path = ?",
-                    (str(file_obj),)
+            current_hash = content_fingerprint(file_obj)
+            conn = db_connection or sqlite3.connect(self.db_path, timeout=30)
+            try:
+                row = conn.execute(
+                    "SELECT file_hash FROM processed_files WHERE file_path = ?", (str(file_obj),)
+                ).fetchone()
+                if row and row[0] == current_hash:
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO processed_files (file_path, file_hash, updated_at) VALUES (?, ?, ?)",
+                    (str(file_obj), current_hash, datetime.now().isoformat())
                 )
-                result = cursor.fetchone()
-                
-                if result and result[0] != current_hash:
-                    return True
-            else:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute(
-                        "SELECT file_hash FROM processed_files WHERE file_path = ?",
-                        (str(file_obj),)
-                    )
-                    result = cursor.fetchone()
-
-                    if result and result[0] != current_hash:
-                        return True
-            
-        except:
-            pass
-        
-        return False
+                if db_connection is None:
+                    conn.commit()
+            finally:
+                if db_connection is None:
+                    conn.close()
+            return row is not None
+        except (OSError, sqlite3.Error) as e:
+            self.logger.debug(f"Could not check {file_obj} for re-indexing: {e}")
+            return False
 
     def get_adaptive_stats(self) -> Dict[str, Any]:
         """Get adaptive monitoring statistics"""
@@ -1503,7 +1544,8 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
                 "threads_running": len([t for t in self.threads.values() if t.is_alive()]),
                 "last_pattern_discovery": last_pattern,
                 "last_emergency_check": last_emergency
-            }
+            },
+            "event_pipeline": dict(self.event_pipeline.stats, pending=self.event_pipeline.pending_count)
         }
 
     def stop_adaptive_monitoring(self):
@@ -1520,6 +1562,8 @@ class AdaptiveBackgroundMonitor(EnhancedBackgroundMonitor):
                 observer.join()
             except:
                 pass
+
+        self.event_pipeline.stop()
         
         # Save learning data
         self.learning_system.save_all_data()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache
+Content-addressed store for expensive analyzer results (Gemini vision,
+audio transcription/spectral analysis, semantic text analysis).
+
+Entries are keyed by a fast content fingerprint of the file plus the
+analyzer name, analyzer version and a hash of the prompt inputs, so moving
+or renaming a file - the very thing the organizer does - keeps its cached
+analysis. All analyzers share one indexed SQLite store; when it grows past
+max_bytes the least recently used entries are evicted.
+
+Fingerprint: blake2b over the file size plus the whole content for small
+files, or three 64 KB samples (head, middle, tail) for large ones. That
+reads at most 192 KB per file, whatever its size.
+
+Usage:
+    cache = get_analysis_cache()
+    key = cache.file_key(path, "vision.image", "1", prompt=prompt_inputs)
+    result = cache.get(key)
+    if result is None:
+        result = expensive_analysis(path)
+        cache.put(key, "vision.image", result)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_BYTES = 64 * 1024
+# Files up to this size are hashed in full
+FULL_HASH_MAX_BYTES = 1024 * 1024
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction trims the store to this fraction of max_bytes so it doesn't run on every put
+EVICT_TARGET_RATIO = 0.9
+
+# Remembered fingerprints (path, size, mtime, inode) -> fingerprint
+_FINGERPRINT_MEMO_SIZE = 8192
+
+ANALYSIS_CACHE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS analysis_cache (
+  cache_key TEXT PRIMARY KEY,          -- sha256 of analyzer, version, fingerprint, prompt hash
+  analyzer TEXT NOT NULL,
+  result TEXT NOT NULL,                -- JSON
+  size_bytes INTEGER NOT NULL,
+  created_at REAL NOT NULL,
+  last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache(last_access);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_analyzer ON analysis_cache(analyzer);
+"""
+
+_fingerprint_memo: "OrderedDict[tuple, str]" = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+
+def content_fingerprint(file_path: Path, stat: Optional[os.stat_result] = None) -> str:
+    """Fast content fingerprint of a file (raises OSError if unreadable)"""
+    file_path = Path(file_path)
+    stat = stat or file_path.stat()
+    memo_key = (str(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    with _fingerprint_lock:
+        fingerprint = _fingerprint_memo.get(memo_key)
+        if fingerprint is not None:
+            _fingerprint_memo.move_to_end(memo_key)
+            return fingerprint
+
+    size = stat.st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(file_path, "rb") as f:
+        if size <= FULL_HASH_MAX_BYTES:
+            digest.update(f.read())
+        else:
+            for offset in (0, (size - SAMPLE_BYTES) // 2, size - SAMPLE_BYTES):
+                f.seek(offset)
+                digest.update(f.read(SAMPLE_BYTES))
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprint_memo[memo_key] = fingerprint
+        if len(_fingerprint_memo) > _FINGERPRINT_MEMO_SIZE:
+            _fingerprint_memo.popitem(last=False)
+    return fingerprint
+
+
+def text_fingerprint(text: str) -> str:
+    """Content fingerprint for analyzers that receive text rather than a file"""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=20).hexdigest()
+
+
+def make_cache_key(fingerprint: str, analyzer: str, version: str, prompt: str = "") -> str:
+    """Cache key for one analyzer/prompt applied to one piece of content"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{analyzer}\0{version}\0{fingerprint}\0{prompt_hash}".encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed, size-bounded LRU cache of JSON analysis results
+    (WAL mode, one connection per thread).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "analysis_cache.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(ANALYSIS_CACHE_SCHEMA_SQL)
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM analysis_cache").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def file_key(self, file_path: Path, analyzer: str, version: str, prompt: str = "") -> Optional[str]:
+        """Cache key for a file's content, or None if the file can't be read"""
+        try:
+            fingerprint = content_fingerprint(Path(file_path))
+        except OSError:
+            return None
+        return make_cache_key(fingerprint, analyzer, version, prompt)
+
+    def text_key(self, text: str, analyzer: str, version: str, prompt: str = "") -> str:
+        """Cache key for a piece of text"""
+        return make_cache_key(text_fingerprint(text), analyzer, version, prompt)
+
+    # ------------------------------------------------------------------
+    # Reads / writes
+    # ------------------------------------------------------------------
+
+    def get(self, cache_key: Optional[str], max_age_days: Optional[float] = None) -> Optional[Any]:
+        """Cached result for cache_key (None on a miss or if older than max_age_days)"""
+        if not cache_key:
+            return None
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result, created_at FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if max_age_days is not None and now - row[1] > max_age_days * 86400:
+                    self._delete(conn, cache_key)
+                    return None
+                conn.execute("UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Analysis cache read failed: {e}")
+            return None
+
+    def put(self, cache_key: Optional[str], analyzer: str, result: Any) -> bool:
+        """Store a JSON-serialisable result; returns False if it couldn't be stored"""
+        if not cache_key:
+            return False
+        try:
+            payload = json.dumps(result, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Analysis result for {analyzer} is not cacheable: {e}")
+            return False
+
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                old = conn.execute(
+                    "SELECT size_bytes FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache "
+                    "(cache_key, analyzer, result, size_bytes, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, analyzer, payload, size, now, now)
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                if self._total_bytes > self.max_bytes:
+                    self._evict(conn)
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache write failed: {e}")
+            return False
+
+    def _delete(self, conn: sqlite3.Connection, cache_key: str):
+        with self._lock:
+            row = conn.execute("SELECT size_bytes FROM analysis_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (cache_key,))
+                self._total_bytes -= row[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the store is under the target size"""
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        evicted = 0
+        cursor = conn.execute("SELECT cache_key, size_bytes FROM analysis_cache ORDER BY last_access")
+        doomed = []
+        for cache_key, size in cursor:
+            if self._total_bytes <= target:
+                break
+            doomed.append((cache_key,))
+            self._total_bytes -= size
+            evicted += 1
+        cursor.close()
+        conn.executemany("DELETE FROM analysis_cache WHERE cache_key = ?", doomed)
+        logger.info(f"Evicted {evicted} analysis cache entries")
+
+    def invalidate(self, analyzer: Optional[str] = None) -> int:
+        """Drop every entry (or every entry of one analyzer); returns the number removed"""
+        with self._lock, self._connect() as conn:
+            if analyzer:
+                removed = conn.execute("DELETE FROM analysis_cache WHERE analyzer = ?", (analyzer,)).rowcount
+            else:
+                removed = conn.execute("DELETE FROM analysis_cache").rowcount
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM analysis_cache").fetchone()[0]
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts per analyzer and total size"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT analyzer, COUNT(*) FROM analysis_cache GROUP BY analyzer").fetchall()
+        return {
+            "entries": {analyzer: count for analyzer, count in rows},
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Shared AnalysisCache for the metadata root"""
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = AnalysisCache()
+        return _analysis_cache
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Execution Layer for AI File Organizer API
+Routes blocking service calls off the event loop onto bounded, per-workload pools
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from request_scheduler import INTERACTIVE, BACKGROUND, request_priority
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when a workload's queue is full and the request is shed"""
+
+    def __init__(self, workload: str, retry_after: int):
+        super().__init__(f"{workload} workload is at capacity")
+        self.workload = workload
+        self.retry_after = retry_after
+
+
+class ExecutionTimeout(Exception):
+    """Raised when a call exceeds its workload timeout"""
+
+    def __init__(self, workload: str, timeout: float):
+        super().__init__(f"{workload} call exceeded {timeout:.0f}s")
+        self.workload = workload
+        self.timeout = timeout
+
+
+@dataclass
+class WorkloadConfig:
+    """Sizing for one workload pool"""
+    max_workers: int
+    max_queue: int  # calls allowed to wait beyond the running ones
+    timeout: float  # seconds the caller waits before giving up
+    retry_after: int = 5  # Retry-After hint sent with 503s
+    priority: int = INTERACTIVE  # remote model calls made by this workload (request_scheduler)
+
+
+# Separate pools keep a flood of slow classifications from starving searches,
+# and keep all of them away from the event loop that serves /health.
+# Someone is waiting on search and classification, so their Gemini/OpenAI
+# calls go ahead of background backfill in the shared rate limit.
+DEFAULT_WORKLOADS: Dict[str, WorkloadConfig] = {
+    "search": WorkloadConfig(max_workers=4, max_queue=32, timeout=30.0, retry_after=2),
+    "classification": WorkloadConfig(max_workers=2, max_queue=16, timeout=120.0, retry_after=10),
+    # Thumbnails, posters, preview clips and waveforms rendered on first view
+    "preview": WorkloadConfig(max_workers=2, max_queue=64, timeout=120.0, retry_after=2),
+    "maintenance": WorkloadConfig(max_workers=1, max_queue=4, timeout=600.0, retry_after=30, priority=BACKGROUND),
+}
+
+
+class WorkloadExecutor:
+    """
+    A bounded thread pool with admission control.
+
+    At most max_workers + max_queue calls are admitted at once; anything
+    beyond that is rejected immediately with ExecutorOverloaded instead of
+    piling up behind slow work. A caller that times out stops waiting, but
+    its call keeps the slot until it actually finishes, so shedding stays
+    accurate when the backend is slow.
+    """
+
+    def __init__(self, name: str, config: WorkloadConfig):
+        self.name = name
+        self.config = config
+        self._pool = ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix=f"api-{name}")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"submitted": 0, "completed": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.config.max_workers + self.config.max_queue
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats["rejected"] += 1
+                raise ExecutorOverloaded(self.name, self.config.retry_after)
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["completed"] += 1
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with request_priority(self.config.priority):
+            return fn(*args, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on this pool and await its result"""
+        self._admit()
+        try:
+            future = self._pool.submit(self._call, fn, *args, **kwargs)
+        except RuntimeError:
+            # Pool already shut down
+            with self._lock:
+                self._in_flight -= 1
+            raise ExecutorOverloaded(self.name, self.config.retry_after)
+        future.add_done_callback(self._release)
+
+        timeout = timeout if timeout is not None else self.config.timeout
+        try:
+            # shield: a timed-out caller must not cancel work already running
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.stats["timed_out"] += 1
+            logger.warning(f"{self.name} call {getattr(fn, '__name__', fn)} timed out after {timeout:.0f}s")
+            raise ExecutionTimeout(self.name, timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.config.max_workers,
+                "max_queue": self.config.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.config.max_workers),
+                **self.stats
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: Dict[str, WorkloadExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _config_from_env(name: str, config: WorkloadConfig) -> WorkloadConfig:
+    """Allow API_<WORKLOAD>_WORKERS / _QUEUE / _TIMEOUT overrides"""
+    prefix = f"API_{name.upper()}_"
+    return WorkloadConfig(
+        max_workers=int(os.getenv(prefix + "WORKERS", config.max_workers)),
+        max_queue=int(os.getenv(prefix + "QUEUE", config.max_queue)),
+        timeout=float(os.getenv(prefix + "TIMEOUT", config.timeout)),
+        retry_after=config.retry_after,
+        priority=config.priority
+    )
+
+
+def get_executor(workload: str) -> WorkloadExecutor:
+    """Return the shared executor for a workload, creating it on first use"""
+    with _executors_lock:
+        executor = _executors.get(workload)
+        if executor is None:
+            if workload not in DEFAULT_WORKLOADS:
+                raise ValueError(f"Unknown workload: {workload}")
+            executor = WorkloadExecutor(workload, _config_from_env(workload, DEFAULT_WORKLOADS[workload]))
+            _executors[workload] = executor
+        return executor
+
+
+async def run_blocking(workload: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """Await a blocking call on the named workload pool"""
+    return await get_executor(workload).run(fn, *args, timeout=timeout, **kwargs)
+
+
+def get_execution_status() -> Dict[str, Dict[str, Any]]:
+    """Per-workload queue depth and counters"""
+    with _executors_lock:
+        executors = dict(_executors)
+    return {name: executor.get_status() for name, executor in executors.items()}
+
+
+def shutdown_executors(wait: bool = False):
+    """Stop all workload pools (called on application shutdown)"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
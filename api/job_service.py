@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Job Service for AI File Organizer API
+Persistent background jobs with progress events, cancellation, resumability
+and paginated results (SQLite-backed, local metadata storage)
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from gdrive_integration import get_metadata_root
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+# Event logs of finished jobs are kept this long (summaries and results stay)
+EVENT_RETENTION_DAYS = 7
+PRUNE_INTERVAL_SEC = 3600
+
+JOBS_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  params TEXT NOT NULL,                -- JSON
+  coalesce_key TEXT NOT NULL,
+  status TEXT NOT NULL,                -- queued, running, succeeded, failed, cancelled
+  completed INTEGER NOT NULL DEFAULT 0,
+  total INTEGER,
+  message TEXT,
+  result TEXT,                         -- JSON summary returned by the handler
+  error TEXT,
+  checkpoint TEXT,                     -- JSON state saved by resumable handlers
+  cancel_requested INTEGER NOT NULL DEFAULT 0,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL,
+  started_at TEXT,
+  finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_coalesce ON jobs(coalesce_key, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+
+CREATE TABLE IF NOT EXISTS job_events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  job_id TEXT NOT NULL,
+  ts TEXT NOT NULL,
+  type TEXT NOT NULL,                  -- status, progress, results
+  data TEXT NOT NULL                   -- JSON
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id);
+
+CREATE TABLE IF NOT EXISTS job_results (
+  job_id TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  item TEXT NOT NULL,                  -- JSON
+  PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress and results"""
+
+    def __init__(self, service: "JobService", job_id: str, params: Dict[str, Any], checkpoint: Optional[Dict[str, Any]]):
+        self.service = service
+        self.job_id = job_id
+        self.params = params
+        self.checkpoint = checkpoint or {}
+        self._last_progress = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.service._is_cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the user cancelled this job"""
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+    def progress(self, completed: Optional[int] = None, total: Optional[int] = None,
+                 message: Optional[str] = None, force: bool = False):
+        """Report progress (throttled so tight loops don't hammer the database)"""
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.service.progress_interval_sec:
+            return
+        self._last_progress = now
+        self.service._update_progress(self.job_id, completed, total, message)
+
+    def add_results(self, items: List[Dict[str, Any]]):
+        """Append result items (retrievable page by page while the job runs)"""
+        self.service._append_results(self.job_id, items)
+
+    def replace_results(self, items: List[Dict[str, Any]]):
+        """Replace all result items, e.g. with a final sorted list"""
+        self.service._append_results(self.job_id, items, replace=True)
+
+    def result_count(self) -> int:
+        """Number of result items stored so far"""
+        return self.service.result_count(self.job_id)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Result items stored so far (used to resume interrupted work)"""
+        return self.service.get_results(self.job_id, offset=0, limit=None)["items"]
+
+    def save_checkpoint(self, state: Dict[str, Any]):
+        """Persist handler state so an interrupted job can pick up where it left off"""
+        self.checkpoint = state
+        self.service._save_checkpoint(self.job_id, state)
+
+
+class JobService:
+    """
+    Runs registered job handlers on a small worker pool.
+
+    Jobs, their progress events and their results live in SQLite, so the
+    browser can disconnect and come back, and jobs interrupted by a restart
+    are re-queued by resume_interrupted(). Submitting a job while an
+    identical one (same kind and params) is still active returns the
+    existing job instead of starting a second run.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_workers: int = 2, progress_interval_sec: float = 0.25):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "jobs.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.progress_interval_sec = progress_interval_sec
+
+        self._handlers: Dict[str, Callable[..., Dict[str, Any]]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-job")
+        self._submit_lock = threading.Lock()
+        self._local = threading.local()
+        self._last_prune = 0.0
+        # Jobs handed to this process's pool; anything else active was left by a previous process
+        self._owned: Set[str] = set()
+
+        with self._connect() as conn:
+            conn.executescript(JOBS_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat(timespec="milliseconds")
+
+    # ------------------------------------------------------------------
+    # Registration and submission
+    # ------------------------------------------------------------------
+
+    def register(self, kind: str, handler: Callable[..., Dict[str, Any]]):
+        """
+        Register a handler: handler(ctx, **params) -> result summary dict.
+        Handlers should call ctx.check_cancelled() between units of work.
+        """
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, coalesce: bool = True) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a job.
+
+        Returns:
+            (job, created) - created is False when an identical active job was reused
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+
+        params = params or {}
+        coalesce_key = f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+
+        with self._submit_lock:
+            conn = self._connect()
+            if coalesce:
+                row = conn.execute(
+                    f"SELECT id FROM jobs WHERE coalesce_key = ? AND status IN ({','.join('?' * len(ACTIVE_STATES))}) "
+                    "ORDER BY created_at LIMIT 1",
+                    (coalesce_key, *ACTIVE_STATES)
+                ).fetchone()
+                if row:
+                    return self.get_job(row["id"]), False
+
+            job_id = uuid.uuid4().hex[:16]
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, params, coalesce_key, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                    (job_id, kind, json.dumps(params, default=str), coalesce_key, self._now())
+                )
+                self._add_event(conn, job_id, "status", {"status": "queued"})
+            self._owned.add(job_id)
+
+        self._pool.submit(self._run, job_id)
+        logger.info(f"Queued {kind} job {job_id}")
+        return self.get_job(job_id), True
+
+    def resume_interrupted(self) -> int:
+        """
+        Re-queue jobs that were queued or running when a previous process
+        stopped. Jobs submitted by this process are left alone, so calling
+        this after requests have started submitting work is safe.
+        """
+        conn = self._connect()
+        resumed = 0
+        with self._submit_lock:
+            rows = conn.execute(
+                f"SELECT id, kind FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATES))}) ORDER BY created_at",
+                ACTIVE_STATES
+            ).fetchall()
+
+            for row in rows:
+                if row["id"] in self._owned:
+                    continue
+                self._owned.add(row["id"])
+                if row["kind"] not in self._handlers:
+                    self._finish(row["id"], "failed", error="No handler registered after restart")
+                    continue
+                with conn:
+                    conn.execute("UPDATE jobs SET status = 'queued' WHERE id = ?", (row["id"],))
+                    self._add_event(conn, row["id"], "status", {"status": "queued", "resumed": True})
+                self._pool.submit(self._run, row["id"])
+                resumed += 1
+
+        if resumed:
+            logger.info(f"Resumed {resumed} interrupted jobs")
+        self.prune_events()
+        return resumed
+
+    def prune_events(self, max_age_days: float = EVENT_RETENTION_DAYS) -> int:
+        """Delete the event logs of jobs that finished more than max_age_days ago"""
+        self._last_prune = time.monotonic()
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="milliseconds")
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE status IN "
+                f"({','.join('?' * len(TERMINAL_STATES))}) AND finished_at < ?)",
+                (*TERMINAL_STATES, cutoff)
+            )
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} job events older than {max_age_days} days")
+        return cursor.rowcount
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Request cancellation. Queued jobs are cancelled immediately; running
+        jobs stop at their handler's next check_cancelled().
+        """
+        conn = self._connect()
+        job = self.get_job(job_id)
+        if not job or job["status"] in TERMINAL_STATES:
+            return job
+
+        with conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            self._add_event(conn, job_id, "status", {"status": job["status"], "cancel_requested": True})
+
+        if job["status"] == "queued":
+            self._finish(job_id, "cancelled", message="Cancelled before it started")
+        return self.get_job(job_id)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        total = row["total"]
+        completed = row["completed"]
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "params": json.loads(row["params"]),
+            "progress": {
+                "completed": completed,
+                "total": total,
+                "percent": round(completed / total * 100, 1) if total else None,
+                "message": row["message"]
+            },
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "cancel_requested": bool(row["cancel_requested"]),
+            "result_count": self.result_count(row["id"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+
+    def result_count(self, job_id: str) -> int:
+        """Number of result items stored for a job"""
+        return self._connect().execute("SELECT COUNT(*) FROM job_results WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM jobs WHERE 1 = 1"
+        params: List[Any] = []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._row_to_job(row) for row in self._connect().execute(query, params)]
+
+    def get_results(self, job_id: str, offset: int = 0, limit: Optional[int] = 100) -> Dict[str, Any]:
+        """One page of result items"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT item FROM job_results WHERE job_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+            (job_id, -1 if limit is None else limit, offset)
+        ).fetchall()
+        total = self.result_count(job_id)
+        items = [json.loads(row["item"]) for row in rows]
+        next_offset = offset + len(items)
+        return {
+            "items": items,
+            "offset": offset,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None
+        }
+
+    def get_events(self, job_id: str, after_id: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """Events after a given event id (for SSE streaming and polling)"""
+        rows = self._connect().execute(
+            "SELECT id, ts, type, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit)
+        ).fetchall()
+        return [{"id": row["id"], "ts": row["ts"], "type": row["type"], "data": json.loads(row["data"])} for row in rows]
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _add_event(self, conn: sqlite3.Connection, job_id: str, event_type: str, data: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO job_events (job_id, ts, type, data) VALUES (?, ?, ?, ?)",
+            (job_id, self._now(), event_type, json.dumps(data, default=str))
+        )
+
+    def _is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connect().execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _update_progress(self, job_id: str, completed: Optional[int], total: Optional[int], message: Optional[str]):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET completed = COALESCE(?, completed), total = COALESCE(?, total), "
+                "message = COALESCE(?, message) WHERE id = ?",
+                (completed, total, message, job_id)
+            )
+            self._add_event(conn, job_id, "progress", {"completed": completed, "total": total, "message": message})
+
+    def _append_results(self, job_id: str, items: List[Dict[str, Any]], replace: bool = False):
+        conn = self._connect()
+        with conn:
+            if replace:
+                conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                start = 0
+            else:
+                start = conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM job_results WHERE job_id = ?", (job_id,)
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO job_results (job_id, seq, item) VALUES (?, ?, ?)",
+                [(job_id, start + i, json.dumps(item, default=str)) for i, item in enumerate(items)]
+            )
+            self._add_event(conn, job_id, "results", {"added": len(items), "total": start + len(items)})
+
+    def _save_checkpoint(self, job_id: str, state: Dict[str, Any]):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE jobs SET checkpoint = ? WHERE id = ?", (json.dumps(state, default=str), job_id))
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None, message: Optional[str] = None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, message = COALESCE(?, message), finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error, message, self._now(), job_id)
+            )
+            self._add_event(conn, job_id, "status", {"status": status, "error": error})
+        self._owned.discard(job_id)
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL_SEC:
+            self.prune_events()
+
+    def _run(self, job_id: str):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?), attempts = attempts + 1 "
+                "WHERE id = ? AND status = 'queued'",
+                (self._now(), job_id)
+            )
+            if cursor.rowcount == 0:
+                # Cancelled (or picked up elsewhere) before we got to it
+                return
+            self._add_event(conn, job_id, "status", {"status": "running"})
+
+        row = conn.execute("SELECT kind, params, checkpoint FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        ctx = JobContext(self, job_id, json.loads(row["params"]),
+                         json.loads(row["checkpoint"]) if row["checkpoint"] else None)
+
+        try:
+            ctx.check_cancelled()
+            result = self._handlers[row["kind"]](ctx, **ctx.params)
+            if ctx.cancelled:
+                self._finish(job_id, "cancelled", result=result, message="Cancelled")
+            else:
+                self._finish(job_id, "succeeded", result=result, message="Complete")
+        except JobCancelled:
+            self._finish(job_id, "cancelled", message="Cancelled")
+        except Exception as e:
+            logger.error(f"{row['kind']} job {job_id} failed: {e}", exc_info=True)
+            self._finish(job_id, "failed", error=str(e))
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work; running jobs are resumed on next start"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -6,10 +6,12 @@ Provides rollback operations for file management
 
 import logging
 import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from easy_rollback_system import EasyRollbackSystem, FileOperation
+from bulk_undo_engine import BulkUndoEngine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,14 +23,44 @@ class RollbackService:
 
     def __init__(self):
         """Initialize RollbackService with EasyRollbackSystem"""
+        self._undo_engine: Optional[BulkUndoEngine] = None
+        self._undo_result: Optional[Dict[str, Any]] = None
+        self._undo_lock = threading.Lock()
+
         try:
             self.rollback_system = EasyRollbackSystem()
             logger.info("RollbackService initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize RollbackService: {e}")
             self.rollback_system = None
+            return
+
+        # Keep the live operations table small; older entries move to the archive
+        try:
+            archived = self.rollback_system.archive_old_operations()
+            if archived:
+                logger.info(f"Archived {archived} old rollback operations")
+        except Exception as e:
+            logger.warning(f"Failed to archive old rollback operations: {e}")
+
+    @staticmethod
+    def encode_cursor(operation: Dict[str, Any]) -> str:
+        """Build an opaque keyset cursor from the last operation of a page"""
+        return f"{operation['timestamp']}|{operation['operation_id']}"
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+        """Parse a cursor produced by encode_cursor (None if absent or malformed)"""
+        if not cursor:
+            return None
+        timestamp, _, operation_id = cursor.rpartition("|")
+        try:
+            return timestamp, int(operation_id)
+        except ValueError:
+            return None
 
-    def get_operations(self, days: int = 7, today_only: bool = False, search: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_operations(self, days: int = 7, today_only: bool = False, search: Optional[str] = None,
+                       limit: int = 200, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get file operations that can be rolled back
 
@@ -36,21 +68,31 @@ class RollbackService:
             days: Number of days to look back (default: 7)
             today_only: Only show today's operations
             search: Optional search term to filter operations
+            limit: Maximum number of operations to return (page size)
+            cursor: Keyset cursor from encode_cursor() of the previous page's last item
 
         Returns:
-            List of file operations as dictionaries
+            List of file operations as dictionaries, newest first
         """
         if not self.rollback_system:
             return []
 
         try:
-            # Get operations from rollback system
-            operations = self.rollback_system.show_recent_operations(days=days, today_only=today_only)
+            before = self.decode_cursor(cursor)
+
+            # Filtering and paging happen in SQL against indexed columns
+            if search:
+                operations = self.rollback_system.search_operations(
+                    search, days=days, today_only=today_only, limit=limit, before=before
+                )
+            else:
+                operations = self.rollback_system.show_recent_operations(
+                    days=days, today_only=today_only, limit=limit, before=before
+                )
 
             # Convert to dict format for API response
-            result = []
-            for op in operations:
-                op_dict = {
+            return [
+                {
                     "operation_id": op.rollback_id,
                     "timestamp": op.timestamp,
                     "operation_type": op.operation_type,
@@ -63,23 +105,24 @@ class RollbackService:
                     "notes": op.notes,
                     "google_drive_id": op.google_drive_id
                 }
-
-                # Apply search filter if provided
-                if search:
-                    search_lower = search.lower()
-                    if (search_lower in op.original_filename.lower() or
-                        search_lower in op.new_filename.lower() or
-                        search_lower in op.original_path.lower()):
-                        result.append(op_dict)
-                else:
-                    result.append(op_dict)
-
-            return result
+                for op in operations
+            ]
 
         except Exception as e:
             logger.error(f"Error getting operations: {e}")
             return []
 
+    def count_operations(self, days: int = 7, today_only: bool = False) -> int:
+        """Count operations in a day window without loading them"""
+        if not self.rollback_system:
+            return 0
+
+        try:
+            return self.rollback_system.count_operations(days=days, today_only=today_only)
+        except Exception as e:
+            logger.error(f"Error counting operations: {e}")
+            return 0
+
     def undo_operation(self, operation_id: int) -> Dict[str, Any]:
         """
         Undo a specific file operation
@@ -110,7 +153,7 @@ class RollbackService:
 
     def undo_today(self) -> Dict[str, Any]:
         """
-        Undo all operations from today (emergency rollback)
+        Undo all operations from today (emergency rollback), blocking until done
 
         Returns:
             Dict with success status, count, and message
@@ -133,6 +176,76 @@ class RollbackService:
                 "count": 0
             }
 
+    def plan_undo_today(self) -> Dict[str, Any]:
+        """
+        Dry run: plan today's rollback without touching any files
+
+        Returns:
+            Plan summary with operation, conflict and wave counts and an estimated duration
+        """
+        if not self.rollback_system:
+            return {"success": False, "message": "Rollback system not available", "plan": None}
+
+        try:
+            plan = BulkUndoEngine(self.rollback_system).plan_today()
+            return {
+                "success": True,
+                "message": f"{len(plan.steps)} operations can be undone (~{plan.estimated_seconds:.1f}s)",
+                "plan": plan.summary()
+            }
+        except Exception as e:
+            logger.error(f"Error planning today's rollback: {e}")
+            return {"success": False, "message": f"Failed to plan rollback: {str(e)}", "plan": None}
+
+    def run_undo_today(self, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       should_cancel: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Plan and execute today's rollback, blocking until done.
+
+        Runs as a background job (see JobService); progress is visible via
+        get_undo_progress() and on_progress while it runs. Operations not
+        reached before a cancellation stay active, so re-running resumes.
+
+        Returns:
+            Dict with success status, count, message and the plan summary
+        """
+        if not self.rollback_system:
+            return {"success": False, "message": "Rollback system not available", "count": 0}
+
+        engine = BulkUndoEngine(self.rollback_system)
+        plan = engine.plan_today()
+
+        if not plan.steps:
+            return {
+                "success": False,
+                "message": "No active operations from today to undo",
+                "count": 0,
+                "plan": plan.summary()
+            }
+
+        engine.begin(plan)
+        with self._undo_lock:
+            self._undo_engine = engine
+            self._undo_result = None
+
+        result = engine.execute(plan, on_progress=on_progress, should_cancel=should_cancel)
+        result["plan"] = plan.summary()
+        with self._undo_lock:
+            self._undo_result = result
+        return result
+
+    def get_undo_progress(self) -> Dict[str, Any]:
+        """
+        Progress of the most recent background rollback
+
+        Returns:
+            Dict with progress counters and, once finished, the final result
+        """
+        with self._undo_lock:
+            if not self._undo_engine:
+                return {"progress": BulkUndoEngine._new_progress("idle"), "result": None}
+            return {"progress": self._undo_engine.get_progress(), "result": self._undo_result}
+
     def record_operation(
         self,
         operation_type: str,
@@ -9,17 +9,18 @@ import os
 import shutil
 import subprocess
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, TYPE_CHECKING
 import datetime as dt_module
 
-from taxonomy_service import TaxonomyService
-from google_drive_auth import GoogleDriveAuth
-from unified_librarian import UnifiedLibrarian
 from gdrive_integration import get_ai_organizer_root, get_metadata_root
-from hierarchical_organizer import HierarchicalOrganizer
 from security_utils import validate_path_within_base
-from universal_adaptive_learning import UniversalAdaptiveLearning
+
+# UnifiedLibrarian pulls in the classifiers (Gemini, vision, embeddings); it is
+# imported on first use so the API can serve /health before it loads
+if TYPE_CHECKING:
+    from unified_librarian import UnifiedLibrarian
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,42 +31,57 @@ class SystemService:
     """Service class for system-related operations"""
 
     # Class-level shared instance to avoid re-initialization
-    _librarian_instance: Optional[UnifiedLibrarian] = None
+    _librarian_instance: Optional["UnifiedLibrarian"] = None
+    _librarian_lock = threading.Lock()
     _initialization_error: Optional[str] = None
     _initialized: bool = False
     
     # Injected dependencies
     _background_monitor = None
+    _status_aggregator = None
     _last_orchestration_stats = {"last_run": None, "files_processed": 0}
 
     def __init__(self):
-        """Initialize SystemService with lazy UnifiedLibrarian loading"""
-        if SystemService._librarian_instance is None:
-            try:
-                logger.info("Initializing SystemService (orchestration mode)...")
-                # UnifiedLibrarian.get_instance() handles all the heavy lifting
-                SystemService._librarian_instance = UnifiedLibrarian.get_instance()
-                logger.info("UnifiedLibrarian instance linked to SystemService")
-            except Exception as e:
-                SystemService._initialization_error = str(e)
-                logger.error(f"Failed to link UnifiedLibrarian: {e}")
-                SystemService._librarian_instance = None
+        """Initialize SystemService; the UnifiedLibrarian is loaded on first use by get_librarian()"""
+        pass
 
     @classmethod
     def set_monitor(cls, monitor):
         """Inject the background monitor instance"""
         cls._background_monitor = monitor
+        if cls._status_aggregator:
+            cls._status_aggregator.invalidate("monitor")
+
+    @classmethod
+    def set_status_aggregator(cls, aggregator):
+        """Inject the status aggregator so state changes refresh the cached snapshot"""
+        cls._status_aggregator = aggregator
 
     @classmethod
     def update_orchestration_status(cls, stats: Dict[str, Any]):
         """Update the last orchestration run stats"""
         cls._last_orchestration_stats = stats
+        if cls._status_aggregator:
+            cls._status_aggregator.invalidate("orchestration")
 
     @classmethod
-    def get_librarian(cls) -> Optional[UnifiedLibrarian]:
-        """Get the singleton UnifiedLibrarian instance"""
+    def get_librarian(cls) -> Optional["UnifiedLibrarian"]:
+        """Get the singleton UnifiedLibrarian instance, loading it on first use"""
         if cls._librarian_instance is None:
-             cls._librarian_instance = UnifiedLibrarian.get_instance()
+            # Startup warm-up, the status refresher and the first request may all get here at once
+            with cls._librarian_lock:
+                if cls._librarian_instance is None:
+                    from unified_librarian import UnifiedLibrarian
+                    try:
+                        logger.info("Initializing SystemService (orchestration mode)...")
+                        # UnifiedLibrarian.get_instance() handles all the heavy lifting
+                        cls._librarian_instance = UnifiedLibrarian.get_instance()
+                        cls._initialization_error = None
+                        logger.info("UnifiedLibrarian instance linked to SystemService")
+                    except Exception as e:
+                        cls._initialization_error = str(e)
+                        logger.error(f"Failed to link UnifiedLibrarian: {e}")
+                        raise
         return cls._librarian_instance
 
     def _ensure_initialized(self):
@@ -75,6 +91,10 @@ class SystemService:
     def get_status(self) -> Dict[str, Any]:
         """
         Get unified system status (Backend + Monitor + Orchestration)
+
+        Recomputes every component; the API serves the cached snapshot from
+        StatusAggregator instead, which calls the collectors below on their
+        own cadences.
         
         Returns:
             Dict matching the unified status shape
@@ -82,40 +102,47 @@ class SystemService:
         # Ensure core services
         self._ensure_initialized()
 
-        backend_status = "ok"
-        monitor_info = None
-        orchestration_info = self._last_orchestration_stats
+        monitor_info = self.collect_monitor_status()
 
-        # Pull monitor stats
-        if self._background_monitor:
-            try:
-                monitor_stats = self._background_monitor.status()
-                # Handle both dict access and direct attribute access depending on implementation
-                active_rules = len(getattr(self._background_monitor, "adaptive_rules", []))
-                
-                monitor_info = {
-                    "watching_paths": len(monitor_stats.get("watch_directories", {})),
-                    "status": "active" if monitor_stats.get("running") else "paused",
-                    "rules_loaded": active_rules,
-                    "stats": {
-                        "processed_files": monitor_stats.get("processed_files", 0),
-                        "errors_24h": monitor_stats.get("errors_24h", 0),
-                        "last_scan": monitor_stats.get("last_scan")
-                    }
-                }
-            except Exception as e:
-                logger.error(f"Error getting monitor stats: {e}")
-                backend_status = "degraded"
-                monitor_info = None
-        else:
-            monitor_info = {
+        return {
+            "backend_status": "ok" if monitor_info is not None else "degraded",
+            "monitor": monitor_info,
+            "orchestration": self.collect_orchestration_status(),
+            "disk_space": self.get_disk_space(),
+            "google_drive": self.collect_google_drive_status()
+        }
+
+    def collect_monitor_status(self) -> Optional[Dict[str, Any]]:
+        """Background monitor summary (None when the monitor errors)"""
+        if not self._background_monitor:
+            return {
                 "watching_paths": 0,
                 "status": "offline",
                 "rules_loaded": 0,
                 "stats": {"processed_files": 0, "errors_24h": 0, "last_scan": None}
             }
 
-        # Get Google Drive status
+        try:
+            monitor_stats = self._background_monitor.status()
+            # Handle both dict access and direct attribute access depending on implementation
+            active_rules = len(getattr(self._background_monitor, "adaptive_rules", []))
+            
+            return {
+                "watching_paths": len(monitor_stats.get("watch_directories", {})),
+                "status": "active" if monitor_stats.get("running") else "paused",
+                "rules_loaded": active_rules,
+                "stats": {
+                    "processed_files": monitor_stats.get("processed_files", 0),
+                    "errors_24h": monitor_stats.get("errors_24h", 0),
+                    "last_scan": monitor_stats.get("last_scan")
+                }
+            }
+        except Exception as e:
+            logger.error(f"Error getting monitor stats: {e}")
+            return None
+
+    def collect_google_drive_status(self) -> Dict[str, Any]:
+        """Google Drive connection and quota (auth and quota API calls)"""
         gdrive_status = {
             "connected": False,
             "user_name": None,
@@ -141,10 +168,10 @@ class SystemService:
             except Exception as e:
                 logger.error(f"Error getting Google Drive status: {e}")
 
-        # DEBUG LOGGING for Status Issue
-        logger.info(f"SystemStatus Debug - Sending Google Drive Status: {gdrive_status}")
+        return gdrive_status
 
-        # Orchestration Status (Read from shared JSON)
+    def collect_orchestration_status(self) -> Dict[str, Any]:
+        """Orchestration status (read from shared JSON)"""
         orchestration_info = {
             "last_run": None,
             "files_processed": 0,
@@ -167,13 +194,7 @@ class SystemService:
             # Fallback to in-memory if file read fails (though likely stale)
             orchestration_info["status"] = "error"
 
-        return {
-            "backend_status": backend_status,
-            "monitor": monitor_info,
-            "orchestration": orchestration_info,
-            "disk_space": self.get_disk_space(),
-            "google_drive": gdrive_status
-        }
+        return orchestration_info
 
     def get_disk_space(self) -> Dict[str, Any]:
         """
@@ -401,8 +422,10 @@ class TriageService:
 
     def __init__(self, rollback_service=None):
         """Initialize TriageService with classification engine and rollback service"""
+        from hierarchical_organizer import HierarchicalOrganizer
+
         # Use components from UnifiedLibrarian to ensure singleton consistency
-        librarian = UnifiedLibrarian.get_instance()
+        librarian = SystemService.get_librarian()
         
         # Initialize with AI Organizer root directory
         self.base_dir = get_ai_organizer_root()
@@ -416,21 +439,16 @@ class TriageService:
         # Store rollback service for operation tracking
         self.rollback_service = rollback_service
 
+        # Indexed review queue shared with the classifier
+        from review_queue import get_review_queue
+        self.review_queue = get_review_queue()
+
         # Access learning system from orchestrator (shared logic)
         self.learning_system = librarian.classifier.learning_system
 
         # Common staging areas where unorganized files are found
-        self.staging_areas = [
-            Path.home() / "Downloads",
-            Path.home() / "Desktop",
-            self.base_dir / "99_TEMP_PROCESSING" / "Downloads_Staging",
-            self.base_dir / "99_TEMP_PROCESSING" / "Desktop_Staging",
-            self.base_dir / "99_TEMP_PROCESSING" / "Manual_Review",
-            self.base_dir / "99_STAGING_EMERGENCY",  # Emergency staging for bulk file dumps
-            self.base_dir / "00_INBOX_STAGING",  # New Primary Input Queue
-            # Add iCloud Staging
-            Path.home() / "Library/Mobile Documents/com~apple~CloudDocs/Documents/GDRIVE_STAGING"
-        ]
+        from staging_snapshot import StagingSnapshot, default_staging_areas
+        self.staging_areas = default_staging_areas(self.base_dir)
 
         # Security: Validate all staging areas are within allowed base directories
         # This prevents path traversal if staging areas ever become user-configurable
@@ -450,11 +468,33 @@ class TriageService:
         self.staging_areas = validated_staging_areas
         logger.info(f"TriageService initialized with {len(self.staging_areas)} validated staging areas")
 
+        # Staging files are classified in the background as they appear or change;
+        # triage only reads the stored results
+        self.staging_snapshot = StagingSnapshot(self.staging_areas)
+        if self.classifier is not None:
+            self.staging_snapshot.attach_classifier(self._classify_for_snapshot)
+
+    def _classify_for_snapshot(self, file_path: Path) -> tuple:
+        """Background classification of one staging file -> (category, confidence, reasoning)"""
+        result = self.classifier.classify_file(file_path)
+
+        # Extract stats safely
+        if isinstance(result, dict):
+            conf = result.get('confidence', 0.0)
+            cat = result.get('category', 'unknown')
+            rsn = result.get('reasoning', [])
+        else:
+            conf = getattr(result, 'confidence', 0.0)
+            cat = getattr(result, 'category', 'unknown')
+            rsn = getattr(result, 'reasoning', [])
+        return cat, conf, str(rsn)
+
 
     def get_files_for_review(self) -> List[Dict[str, Any]]:
         """
         Get files requiring triage/review.
-        Prioritizes the Adaptive Review Queue, then falls back to live scanning of Staging Areas.
+        Prioritizes the Adaptive Review Queue, then low-confidence files from the staging snapshot.
+        Pure read: staging files are classified in the background, never here.
         """
         if self.classifier is None:
             logger.error("Classification engine not available - returning empty list")
@@ -466,97 +506,62 @@ class TriageService:
             
             # 1. READ QUEUE (V3 Priority)
             # ------------------------------------------------------------------
+            # One indexed page, least confident first; only that page is stat'ed
             try:
-                queue_path = get_metadata_root() / "review_queue.jsonl"
-                if queue_path.exists():
-                    logger.debug(f"Reading from Review Queue: {queue_path}")
-                    with open(queue_path, 'r') as f:
-                        for line in f:
-                            if not line.strip(): continue
-                            try:
-                                item = json.loads(line)
-                                path_str = item.get('path', '')
-                                if not path_str: continue
-
-                                file_path = Path(path_str)
-                                if not file_path.exists():
-                                    continue
-                                
-                                # Convert Queue Item -> Triage Interface
-                                files_for_review.append({
-                                    "file_id": item.get('queue_id', str(hash(str(file_path)))),
-                                    "file_name": file_path.name,
-                                    "file_path": str(file_path),
-                                    "classification": {
-                                        # Use 'current_category' from queue (latest state)
-                                        "category": item.get("current_category", "unknown"),
-                                        "confidence": item.get("confidence", 0.0),
-                                        "reasoning": item.get("reasoning", "Flagged for review by Adaptive System"),
-                                        "needs_review": True
-                                    },
-                                    "status": "pending_review",
-                                    "source": "queue"
-                                })
-                            except Exception as e:
-                                logger.warning(f"Skipping malformed queue line: {e}")
+                page = self.review_queue.list_pending(limit=200)
+                for item in page["items"]:
+                    file_path = Path(item["file_path"])
+                    files_for_review.append({
+                        "file_id": item["queue_id"],
+                        "file_name": file_path.name,
+                        "file_path": str(file_path),
+                        "classification": {
+                            "category": item.get("category") or "unknown",
+                            "confidence": item.get("confidence", 0.0),
+                            "reasoning": item.get("reasoning") or "Flagged for review by Adaptive System",
+                            "needs_review": True
+                        },
+                        "status": "pending_review",
+                        "source": "queue"
+                    })
             except Exception as e:
                 logger.error(f"Error reading review queue: {e}")
 
-            # 2. FAILBACK SCAN (V2 Legacy/Hybrid)
+            # 2. STAGING SNAPSHOT (V2 Legacy/Hybrid)
             # ------------------------------------------------------------------
-            # If queue is empty (or < 20 items), scan staging areas for new files
+            # Low-confidence staging files, classified in the background as they
+            # appeared or changed. Reading them never triggers classification.
             if len(files_for_review) < 200:
-                logger.debug("Queue low/empty - scanning staging areas for new files...")
                 confidence_threshold = 0.60 # Triage threshold
-                queued_paths = {f['file_path'] for f in files_for_review}
-                
-                for area in self.staging_areas:
-                    if len(files_for_review) >= 200: break
-                    if not area.exists(): continue
-                    
-                    try:
-                        # Scan recent files
-                        for file_path in area.iterdir():
-                            if len(files_for_review) >= 200: break
-                            
-                            # Filter obvious junk
-                            if not file_path.is_file() or file_path.name.startswith('.'): continue
-                            if str(file_path) in queued_paths: continue
-                            if file_path.stat().st_size > 100 * 1024 * 1024: continue # Skip >100MB
-                            
-                            try:
-                                # Quick Classification
-                                result = self.classifier.classify_file(file_path)
-                                
-                                # Extract stats safely
-                                if isinstance(result, dict):
-                                    conf = result.get('confidence', 0.0)
-                                    cat = result.get('category', 'unknown')
-                                    rsn = result.get('reasoning', [])
-                                else:
-                                    conf = getattr(result, 'confidence', 0.0)
-                                    cat = getattr(result, 'category', 'unknown')
-                                    rsn = getattr(result, 'reasoning', [])
-
-                                # If low confidence, add to review list
-                                if conf < confidence_threshold:
-                                    files_for_review.append({
-                                        "file_id": str(hash(str(file_path))),
-                                        "file_name": file_path.name,
-                                        "file_path": str(file_path),
-                                        "classification": {
-                                            "category": cat,
-                                            "confidence": round(conf, 2),
-                                            "reasoning": str(rsn),
-                                            "needs_review": True
-                                        },
-                                        "status": "pending_review",
-                                        "source": "scan"
-                                    })
-                            except Exception as e:
-                                continue # Skip file on error
-                    except Exception as e:
-                        logger.warning(f"Error scanning staging area {area}: {e}")
+                try:
+                    # Over-fetch so files already in the queue don't shorten the page
+                    rows = self.staging_snapshot.low_confidence(confidence_threshold, limit=400)
+                    queued_paths = {f['file_path'] for f in files_for_review}
+                    queued_paths |= self.review_queue.pending_paths(row["file_path"] for row in rows)
+
+                    for row in rows:
+                        if len(files_for_review) >= 200: break
+                        if row["file_path"] in queued_paths: continue
+
+                        file_path = Path(row["file_path"])
+                        files_for_review.append({
+                            "file_id": str(hash(str(file_path))),
+                            "file_name": file_path.name,
+                            "file_path": str(file_path),
+                            "classification": {
+                                "category": row["category"] or "unknown",
+                                "confidence": round(row["confidence"], 2),
+                                "reasoning": row["reasoning"] or "",
+                                "needs_review": True
+                            },
+                            "status": "pending_review",
+                            "source": "scan"
+                        })
+                except Exception as e:
+                    logger.warning(f"Error reading staging snapshot: {e}")
+
+                # Pick up anything new without making this request wait for it
+                self.staging_snapshot.request_refresh()
 
             logger.info(f"Returning {len(files_for_review)} items for Triage")
             
@@ -579,6 +584,8 @@ class TriageService:
         """
         logger.info("Manual scan for triage files triggered via API.")
         try:
+            # Rescan staging areas in the background; results show up on the next read
+            self.staging_snapshot.request_refresh(reconcile=True)
             files = self.get_files_for_review()
             return {
                 "status": "success",
@@ -594,7 +601,10 @@ class TriageService:
                 "error": str(e)
             }
 
-    def scan_custom_folder(self, folder_path: str) -> Dict[str, Any]:
+    def scan_custom_folder(self, folder_path: str,
+                           on_file: Optional[Callable[[Dict[str, Any], int], None]] = None,
+                           should_cancel: Optional[Callable[[], bool]] = None,
+                           completed: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Scan a custom folder for files needing review (any folder, not just staging areas).
 
@@ -603,6 +613,9 @@ class TriageService:
 
         Args:
             folder_path: Absolute path to the folder to scan
+            on_file: Called with each classified file entry and the number of files scanned so far
+            should_cancel: Checked before each file; the scan stops early when it returns True
+            completed: Entries from an interrupted run of the same scan; those files are not reclassified
 
         Returns:
             Dictionary with status, message, files_found count, and files list
@@ -651,15 +664,20 @@ class TriageService:
                 '.ipynb', '.json', '.csv', '.xlsx'
             }
 
-            files_for_review = []
+            files_for_review = list(completed or [])
+            already_classified = {entry["file_path"] for entry in files_for_review}
             confidence_threshold = 0.60  # ADHD-friendly threshold
 
             # Scan folder recursively for files
             logger.info(f"Scanning {folder_path} recursively for supported files...")
-            file_count = 0
+            file_count = len(files_for_review)
             total_scanned = 0
 
             for file_path in folder.rglob('*'):
+                if should_cancel and should_cancel():
+                    logger.info(f"Custom folder scan cancelled after {file_count} files")
+                    break
+
                 # Skip directories and hidden files
                 if not file_path.is_file() or file_path.name.startswith('.'):
                     continue
@@ -687,6 +705,9 @@ class TriageService:
                     logger.info(f"Reached limit of 50 files for custom folder scan")
                     break
 
+                if str(file_path) in already_classified:
+                    continue
+
                 try:
                     # Use the unified classification service for intelligent content analysis
                     result = self.classifier.classify_file(file_path)
@@ -698,7 +719,7 @@ class TriageService:
 
                     # Include ALL files (not just low confidence) for custom folder scan
                     # This allows user to review and organize entire folders
-                    files_for_review.append({
+                    entry = {
                         "file_id": str(hash(str(file_path))),
                         "file_name": file_path.name,
                         "file_path": str(file_path),
@@ -709,8 +730,11 @@ class TriageService:
                             "needs_review": confidence < confidence_threshold
                         },
                         "status": "pending_review" if confidence < confidence_threshold else "ready"
-                    })
+                    }
+                    files_for_review.append(entry)
                     file_count += 1
+                    if on_file:
+                        on_file(entry, total_scanned)
 
                 except Exception as e:
                     logger.warning(f"Error classifying {file_path}: {e}")
@@ -840,6 +864,9 @@ class TriageService:
 
             # --- Get the intelligent classification result from UnifiedClassificationService ---
             classification_result = self.classifier.classify_file(file_obj)
+            # Audio classified before its local transcript finished; the transcript
+            # follows the file to its new sidecar (see relocate below)
+            transcript_job = self.classifier.pending_transcript(file_obj)
 
             # Handle both dict and object result formats
             if isinstance(classification_result, dict):
@@ -912,6 +939,13 @@ class TriageService:
                 
                 logger.info(f"Successfully moved and renamed file to: {new_file_path}")
 
+                # A transcript still being written follows the file to its new sidecar
+                try:
+                    from transcription_queue import get_transcription_queue
+                    get_transcription_queue().relocate(Path(original_full_path), new_file_path)
+                except Exception as e:
+                    logger.warning(f"Failed to relocate pending transcript: {e}")
+
                 # Record operation in rollback system for easy undo
                 if self.rollback_service:
                     try:
@@ -960,6 +994,12 @@ class TriageService:
                 except Exception as e:
                     logger.warning(f"Failed to save metadata sidecar: {e}")
 
+            # The user has decided; close any review items for the original path
+            try:
+                self.review_queue.resolve_path(str(file_obj))
+            except Exception as e:
+                logger.warning(f"Failed to resolve review queue item: {e}")
+
             # --- Record Learning Event for Adaptive Learning System ---
             try:
                 # Determine media type from file extension
@@ -1006,13 +1046,16 @@ class TriageService:
             except Exception as e:
                 logger.warning(f"Failed to record learning event: {e}")
 
-            return {
+            response = {
                 "status": "success",
                 "message": f"File '{original_name}' organized with hierarchical structure.",
                 "new_path": str(new_file_path),
                 "user_decision": confirmed_category,
                 "hierarchy": hierarchy_metadata
             }
+            if transcript_job is not None and not transcript_job.done():
+                response["transcript_status"] = "pending"
+            return response
 
         except Exception as e:
             logger.error(f"Error classifying and moving file '{file_path}': {e}", exc_info=True)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Phased Startup for AI File Organizer API
+Brings heavy subsystems up after the server is already answering requests,
+and tracks a readiness flag for each one
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupRegistry:
+    """
+    Readiness flags for subsystems started in the background.
+
+    Subsystems are declared up front (so /health can list what is still
+    pending) and started with run(), which executes the blocking init on a
+    worker thread and records its state, duration and any error. A failed
+    subsystem does not stop the ones after it.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._subsystems: Dict[str, Dict[str, Any]] = {
+            name: {"state": PENDING, "error": None, "ready_at": None, "duration_ms": None}
+            for name in names
+        }
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._subsystems.setdefault(name, {"state": PENDING, "error": None, "ready_at": None, "duration_ms": None})
+            self._subsystems[name].update(fields)
+
+    async def run(self, name: str, init: Callable[[], Any]) -> Optional[Any]:
+        """Run a blocking init function off the event loop and record the outcome"""
+        self._set(name, state=STARTING, error=None)
+        started = time.monotonic()
+        try:
+            result = await asyncio.to_thread(init)
+        except asyncio.CancelledError:
+            self._set(name, state=PENDING)
+            raise
+        except Exception as e:
+            self._set(name, state=FAILED, error=str(e), duration_ms=round((time.monotonic() - started) * 1000))
+            logger.error(f"❌ {name} failed to start: {e}")
+            return None
+
+        self._set(name, state=READY, ready_at=datetime.now().isoformat(timespec="seconds"),
+                  duration_ms=round((time.monotonic() - started) * 1000))
+        logger.info(f"✅ {name} ready ({self._subsystems[name]['duration_ms']} ms)")
+        return result
+
+    def is_ready(self, name: str) -> bool:
+        with self._lock:
+            return self._subsystems.get(name, {}).get("state") == READY
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            subsystems = {name: dict(info) for name, info in self._subsystems.items()}
+        return {
+            "ready": all(info["state"] == READY for info in subsystems.values()),
+            "uptime_sec": round(time.monotonic() - self._created, 1),
+            "subsystems": subsystems
+        }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Status Aggregator for AI File Organizer API
+Refreshes each system status component on its own cadence into an immutable
+snapshot, so /api/system/status is a dictionary lookup instead of a recompute
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between refreshes of each component
+DEFAULT_CADENCES = {
+    "monitor": 5.0,
+    "orchestration": 10.0,
+    "disk_space": 30.0,
+    "google_drive": float(os.getenv("STATUS_DRIVE_INTERVAL_SEC", "300")),  # auth + quota API calls
+}
+
+# Shown until a component's first refresh completes
+PENDING_VALUES = {
+    "monitor": {
+        "watching_paths": 0,
+        "status": "offline",
+        "rules_loaded": 0,
+        "stats": {"processed_files": 0, "errors_24h": 0, "last_scan": None}
+    },
+    "orchestration": {"last_run": None, "files_processed": 0, "files_moved": 0, "status": "idle"},
+    "disk_space": {"free_gb": 0, "total_gb": 0, "percent_used": 0, "status": "unknown"},
+    "google_drive": {"connected": False, "user_name": None, "quota_used_gb": 0, "quota_total_gb": 0},
+}
+
+
+class StatusAggregator:
+    """
+    Background status collector.
+
+    Each component (monitor, orchestration, disk_space, google_drive) has a
+    collector and a refresh cadence. A single daemon thread refreshes
+    whichever components are due and publishes a new snapshot; readers only
+    ever see complete snapshots. Every change is also recorded as a delta
+    with a monotonically increasing version for push subscribers.
+    """
+
+    def __init__(self, system_service, cadences: Optional[Dict[str, float]] = None, max_deltas: int = 256):
+        self.collectors: Dict[str, Callable[[], Any]] = {
+            "monitor": system_service.collect_monitor_status,
+            "orchestration": system_service.collect_orchestration_status,
+            "disk_space": system_service.get_disk_space,
+            "google_drive": system_service.collect_google_drive_status,
+        }
+        self.cadences = dict(DEFAULT_CADENCES, **(cadences or {}))
+
+        self._values: Dict[str, Any] = dict(PENDING_VALUES)
+        self._updated_at: Dict[str, Optional[float]] = {name: None for name in self.collectors}
+        self._next_due: Dict[str, float] = {name: 0.0 for name in self.collectors}
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._version = 0
+        self._deltas: deque = deque(maxlen=max_deltas)
+        self._snapshot: Mapping[str, Any] = self._build_snapshot()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def invalidate(self, component: Optional[str] = None):
+        """Refresh a component (or all) on the next loop instead of waiting for its cadence"""
+        with self._lock:
+            for name in ([component] if component else self.collectors):
+                self._next_due[name] = 0.0
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_due()
+            with self._lock:
+                sleep_for = max(0.05, min(self._next_due.values()) - time.monotonic())
+            self._wake.wait(timeout=sleep_for)
+            self._wake.clear()
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh_due(self, force: bool = False) -> List[str]:
+        """Collect every component whose cadence has elapsed; returns the names that changed"""
+        now = time.monotonic()
+        with self._lock:
+            due = [name for name, at in self._next_due.items() if force or at <= now]
+            for name in due:
+                self._next_due[name] = now + self.cadences[name]
+
+        changed = []
+        for name in due:
+            try:
+                value = self.collectors[name]()
+            except Exception as e:
+                logger.error(f"Status collector {name} failed: {e}")
+                value = None if name == "monitor" else self._values[name]
+
+            with self._lock:
+                self._updated_at[name] = time.time()
+                is_changed = value != self._values[name]
+                if is_changed:
+                    self._values[name] = value
+                    changed.append(name)
+
+            # Publish per component so a slow collector (Drive) doesn't hold back the others
+            self._publish({name: value} if is_changed else {})
+        return changed
+
+    def _build_snapshot(self) -> Mapping[str, Any]:
+        freshness = {
+            name: {
+                "updated_at": datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts else None,
+                "refresh_interval_sec": self.cadences[name]
+            }
+            for name, ts in self._updated_at.items()
+        }
+        return MappingProxyType({
+            "backend_status": "ok" if self._values["monitor"] is not None else "degraded",
+            "monitor": self._values["monitor"],
+            "orchestration": self._values["orchestration"],
+            "disk_space": self._values["disk_space"],
+            "google_drive": self._values["google_drive"],
+            "freshness": freshness,
+            "version": self._version
+        })
+
+    def _publish(self, changed: Dict[str, Any]):
+        with self._lock:
+            if changed:
+                self._version += 1
+                delta = dict(changed)
+                if "monitor" in changed:
+                    delta["backend_status"] = "ok" if changed["monitor"] is not None else "degraded"
+                self._deltas.append((self._version, delta))
+            # Freshness timestamps move on every refresh, even without a change
+            self._snapshot = self._build_snapshot()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self) -> Mapping[str, Any]:
+        """Latest complete snapshot (read-only mapping; never mutated after publish)"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot["version"]
+
+    def deltas_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Changes published after `version`, oldest first.
+        Returns None when the subscriber fell too far behind and needs a full snapshot.
+        """
+        with self._lock:
+            if version >= self._version:
+                return []
+            if not self._deltas or self._deltas[0][0] > version + 1:
+                return None
+            return [{"version": v, "changes": delta} for v, delta in self._deltas if v > version]
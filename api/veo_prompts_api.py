@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import sqlite3
 import json
+import asyncio
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -19,6 +20,7 @@ from gemini_vision_adapter import (
     analyze_and_learn
 )
 from api.resolve_service import resolve_instance
+from request_scheduler import get_request_scheduler, request_priority, DailyQuotaExceeded, INTERACTIVE
 
 logger = logging.getLogger(__name__)
 
@@ -253,7 +255,13 @@ async def reanalyze_clip(clip_id: int, request: ReanalyzeRequest = ReanalyzeRequ
         file_path = original_prompt['file_path']
         if not Path(file_path).exists():
             raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
-        result = analyze_and_learn(file_path)
+        # Wait for the Gemini slot on the loop, then analyze on a worker thread
+        try:
+            with request_priority(INTERACTIVE):
+                async with get_request_scheduler().reserve("gemini"):
+                    result = await asyncio.to_thread(analyze_and_learn, file_path)
+        except DailyQuotaExceeded as e:
+            raise HTTPException(status_code=429, detail=str(e))
         learning_result = result['learning']
         learning_input = LearningPromptInput(**learning_result['prompt_input'])
         new_prompt_id = insert_veo_prompt(learning_input, event_id=learning_result.get('event_id'))
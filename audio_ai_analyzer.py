@@ -234,8 +234,12 @@ class AudioAIAnalyzer:
             
             conn.commit()
     
-    def analyze_audio_file(self, file_path: Path) -> AudioAnalysis:
-        """Perform comprehensive audio analysis"""
+    def analyze_audio_file(self, file_path: Path, features: Optional[Dict[str, Any]] = None) -> AudioAnalysis:
+        """
+        Perform comprehensive audio analysis. Spectral features come from the
+        shared AudioFeatureEngine (stored by content); pass features from
+        engine.analyze_many() to analyze a batch without re-extracting.
+        """
         
         if not file_path.exists():
             raise FileNotFoundError(f"Audio file not found: {file_path}")
@@ -259,21 +263,23 @@ class AudioAIAnalyzer:
         )
         
         try:
-            # Load audio file
-            if LIBROSA_AVAILABLE:
-                y, sr = librosa.load(str(file_path), sr=None)
-                analysis.sample_rate = sr
-                analysis.duration_seconds = len(y) / sr
-                analysis.channels = 1  # librosa loads as mono by default
+            if features is None and LIBROSA_AVAILABLE:
+                from audio_features import get_audio_feature_engine
+                features = get_audio_feature_engine().analyze(file_path)
+            
+            if features:
+                analysis.sample_rate = features.get('sample_rate') or 0
+                analysis.duration_seconds = features['duration']
+                analysis.channels = 1  # features are extracted from a mono downmix
                 
                 # Perform detailed audio analysis
-                self._analyze_audio_characteristics(analysis, y, sr)
-                self._classify_content_type(analysis, y, sr)
-                self._extract_speech_features(analysis, y, sr)
-                self._extract_music_features(analysis, y, sr)
+                self._analyze_audio_characteristics(analysis, features)
+                self._classify_content_type(analysis, features)
+                self._extract_speech_features(analysis, features)
+                self._extract_music_features(analysis, features)
                 
             else:
-                print("⚠️  librosa not available - using basic analysis")
+                print("⚠️  Spectral features unavailable - using basic analysis")
                 self._basic_audio_analysis(analysis)
             
             # Generate creative tags and suggestions
@@ -287,17 +293,14 @@ class AudioAIAnalyzer:
         
         return analysis
     
-    def _analyze_audio_characteristics(self, analysis: AudioAnalysis, y: np.ndarray, sr: int):
+    def _analyze_audio_characteristics(self, analysis: AudioAnalysis, features: Dict[str, Any]):
         """Analyze technical audio characteristics"""
         
         # Dynamic range analysis
-        rms = librosa.feature.rms(y=y)[0]
-        dynamic_range = np.max(rms) - np.min(rms[rms > 0])
-        analysis.dynamic_range = float(dynamic_range)
+        analysis.dynamic_range = float(features['rms_max'] - features['rms_min'])
         
         # Noise estimation
-        spectral_flatness = librosa.feature.spectral_flatness(y=y)[0]
-        analysis.noise_level = float(np.mean(spectral_flatness))
+        analysis.noise_level = float(features['spectral_flatness_mean'])
         
         # Quality assessment based on multiple factors
         if analysis.sample_rate >= 44100 and analysis.dynamic_range > 0.1 and analysis.noise_level < 0.5:
@@ -313,15 +316,15 @@ class AudioAIAnalyzer:
         print(f"   📊 Dynamic range: {analysis.dynamic_range:.3f}")
         print(f"   🔊 Noise level: {analysis.noise_level:.3f}")
     
-    def _classify_content_type(self, analysis: AudioAnalysis, y: np.ndarray, sr: int):
-        """Classify audio content type using librosa analysis"""
+    def _classify_content_type(self, analysis: AudioAnalysis, spectral: Dict[str, Any]):
+        """Classify audio content type from the extracted spectral features"""
         
         filename_lower = analysis.file_path.name.lower()
         best_match = "unknown"
         best_score = 0.0
         
         # Extract audio features for classification
-        features = self._extract_classification_features(y, sr)
+        features = self._extract_classification_features(spectral)
         
         for content_type, criteria in self.content_classifiers.items():
             score = 0.0
@@ -361,31 +364,19 @@ class AudioAIAnalyzer:
         
         print(f"   🎭 Content type: {analysis.content_type} (confidence: {analysis.confidence_score:.2f})")
     
-    def _extract_classification_features(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
-        """Extract features for content type classification"""
+    def _extract_classification_features(self, spectral: Dict[str, Any]) -> Dict[str, Any]:
+        """Speech/music heuristics for content type classification"""
         
         features = {}
         
-        # Spectral features
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        
-        # Zero crossing rate (speech indicator)
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
-        
-        # Tempo and rhythm
-        try:
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-            features['tempo'] = float(tempo)
-            features['rhythmic_strength'] = len(beats) / (len(y) / sr) if len(y) > 0 else 0
-        except:
-            features['tempo'] = None
-            features['rhythmic_strength'] = 0.0
+        # Tempo and rhythm (beats per analyzed second)
+        analyzed = spectral.get('analyzed_duration') or 0
+        features['tempo'] = spectral['bpm'] or None
+        features['rhythmic_strength'] = spectral['beat_count'] / analyzed if analyzed > 0 else 0.0
         
         # Speech vs music heuristics
-        zcr_mean = np.mean(zcr)
-        spectral_centroid_mean = np.mean(spectral_centroids)
+        zcr_mean = spectral['zero_crossing_rate_mean']
+        spectral_centroid_mean = spectral['spectral_centroid_mean']
         
         # Speech typically has higher ZCR and lower spectral centroid
         if zcr_mean > 0.1 and spectral_centroid_mean < 3000:
@@ -405,50 +396,24 @@ class AudioAIAnalyzer:
         
         features['speech_ratio'] = speech_score
         features['music_ratio'] = music_score
-        features['mfcc_mean'] = np.mean(mfccs, axis=1).tolist()
         
         return features
     
-    def _extract_speech_features(self, analysis: AudioAnalysis, y: np.ndarray, sr: int):
+    def _extract_speech_features(self, analysis: AudioAnalysis, features: Dict[str, Any]):
         """Extract speech-specific features"""
         
         if analysis.content_type in ['interview', 'voice_sample', 'scene_audio']:
             analysis.has_speech = True
             
-            # Voice activity detection using energy
-            hop_length = 512
-            frame_length = 2048
-            
-            # Compute short-time energy
-            energy = librosa.feature.rms(y=y, hop_length=hop_length, frame_length=frame_length)[0]
-            
-            # Find speech segments (simple energy-based VAD)
-            energy_threshold = np.percentile(energy, 30)  # Bottom 30% is likely silence
-            speech_frames = energy > energy_threshold
-            
-            # Convert frame indices to time segments
-            frame_times = librosa.frames_to_time(np.arange(len(speech_frames)), sr=sr, hop_length=hop_length)
-            speech_segments = []
-            
-            in_speech = False
-            start_time = 0
-            
-            for i, is_speech in enumerate(speech_frames):
-                if is_speech and not in_speech:
-                    start_time = frame_times[i]
-                    in_speech = True
-                elif not is_speech and in_speech:
-                    end_time = frame_times[i]
-                    if end_time - start_time > 0.5:  # Minimum 0.5 second segments
-                        speech_segments.append((float(start_time), float(end_time)))
-                    in_speech = False
-            
-            analysis.speech_segments = speech_segments
+            # Energy-based voice activity over the analyzed slice
+            analysis.speech_segments = [tuple(segment) for segment in features['speech_segments']]
+            speech_segments = analysis.speech_segments
             
             # Estimate number of speakers (very basic)
-            if len(speech_segments) > 0:
+            analyzed = features.get('analyzed_duration') or analysis.duration_seconds
+            if len(speech_segments) > 0 and analyzed > 0:
                 total_speech_time = sum(end - start for start, end in speech_segments)
-                speech_density = total_speech_time / analysis.duration_seconds
+                speech_density = total_speech_time / analyzed
                 
                 if speech_density > 0.8:
                     analysis.estimated_speakers = 1  # Monologue
@@ -458,17 +423,15 @@ class AudioAIAnalyzer:
                     analysis.estimated_speakers = min(3, max(1, len(speech_segments) // 5))
             
             # Speech clarity (based on spectral clarity)
-            spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-            
-            clarity_score = 1.0 - (np.std(spectral_centroid) / np.mean(spectral_centroid))
+            centroid_mean = features['spectral_centroid_mean']
+            clarity_score = 1.0 - (features['spectral_centroid_std'] / centroid_mean) if centroid_mean > 0 else 0.0
             analysis.speech_clarity = max(0.0, min(1.0, clarity_score))
             
             print(f"   🗣️  Speech segments: {len(analysis.speech_segments)}")
             print(f"   👥 Estimated speakers: {analysis.estimated_speakers}")
             print(f"   🎙️  Speech clarity: {analysis.speech_clarity:.2f}")
     
-    def _extract_music_features(self, analysis: AudioAnalysis, y: np.ndarray, sr: int):
+    def _extract_music_features(self, analysis: AudioAnalysis, features: Dict[str, Any]):
         """Extract music-specific features"""
         
         if analysis.content_type in ['music', 'scene_audio']:
@@ -476,23 +439,20 @@ class AudioAIAnalyzer:
             
             try:
                 # Tempo detection
-                tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-                analysis.tempo = float(tempo)
+                analysis.tempo = float(features['bpm'])
                 
                 # Key estimation (basic)
-                chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-                chroma_mean = np.mean(chroma, axis=1)
-                key_index = np.argmax(chroma_mean)
+                key_index = int(np.argmax(features['chroma_mean']))
                 key_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
                 analysis.key = key_names[key_index]
                 
                 # Energy and danceability
-                rms = librosa.feature.rms(y=y)[0]
-                analysis.energy = float(np.mean(rms))
+                analysis.energy = float(features['rms_energy_mean'])
                 
                 # Danceability (simplified - based on tempo and rhythm consistency)
                 if 90 <= analysis.tempo <= 150:  # Dance tempo range
-                    beat_consistency = 1.0 - (np.std(np.diff(beats)) / np.mean(np.diff(beats))) if len(beats) > 1 else 0.0
+                    interval_cv = features.get('beat_interval_cv')
+                    beat_consistency = 1.0 - interval_cv if interval_cv is not None else 0.0
                     analysis.danceability = min(1.0, max(0.0, beat_consistency * analysis.energy * 2))
                 else:
                     analysis.danceability = 0.2
@@ -641,8 +601,43 @@ class AudioAIAnalyzer:
         
         analysis.importance_score = max(0.0, min(1.0, score))
     
+    def queue_transcription(self, analysis: AudioAnalysis):
+        """
+        Queue local Whisper transcription without waiting; the job sets
+        analysis.transcription when it finishes. None when there is no
+        speech or no local model (use transcribe_audio instead).
+        """
+        if not analysis.has_speech:
+            return None
+        
+        from transcription_queue import get_transcription_queue
+        transcription_queue = get_transcription_queue()
+        if not transcription_queue.model_available():
+            return None
+        
+        def store(job):
+            if not job.cancelled() and not job.exception() and job.result():
+                analysis.transcription = job.result()
+        
+        job = transcription_queue.submit(analysis.file_path)
+        job.add_done_callback(store)
+        return job
+    
     def transcribe_audio(self, analysis: AudioAnalysis, language: str = "en-US") -> Optional[str]:
-        """Transcribe speech to text if speech recognition is available"""
+        """Transcribe speech to text (local Whisper queue, else speech recognition)"""
+        
+        job = self.queue_transcription(analysis)
+        if job is not None:
+            print(f"   🎙️  Transcribing with local Whisper...")
+            try:
+                transcript = job.result()
+            except Exception as e:
+                print(f"   ⚠️  Local transcription failed: {e}")
+                transcript = None
+            if transcript:
+                analysis.transcription = transcript
+                print(f"   ✅ Transcription successful: {len(transcript)} characters")
+                return transcript
         
         if not SPEECH_RECOGNITION_AVAILABLE or not analysis.has_speech:
             return None
@@ -744,6 +739,30 @@ class AudioAIAnalyzer:
             print(f"❌ Error saving analysis: {e}")
             return False
     
+    def find_same_recordings(self, file_path: Path) -> List[Dict[str, Any]]:
+        """
+        Other analyzed files that contain this recording, in any format
+        (acoustic fingerprint). Indexes file_path so later queries find it.
+        """
+        try:
+            from acoustic_fingerprint import get_acoustic_index
+
+            index = get_acoustic_index()
+            index.index_file(file_path)
+            return index.find_containing(file_path)
+        except Exception as e:
+            print(f"⚠️  Acoustic fingerprint lookup failed: {e}")
+            return []
+    
+    def find_duplicate_recordings(self, file_paths: List[Path]) -> List[Dict[str, Any]]:
+        """Groups of the same recording exported in different formats among file_paths"""
+        try:
+            from acoustic_fingerprint import get_acoustic_index
+            return get_acoustic_index().duplicate_groups(file_paths)
+        except Exception as e:
+            print(f"⚠️  Acoustic duplicate scan failed: {e}")
+            return []
+    
     def _calculate_file_hash(self, file_path: Path) -> str:
         """Calculate MD5 hash of file for change detection"""
         try:
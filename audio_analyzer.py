@@ -77,8 +77,7 @@ class AudioAnalyzer:
         if openai_api_key and OPENAI_AVAILABLE:
             self.client = OpenAI(api_key=openai_api_key)
         
-        # Local Whisper initialization
-        self.local_whisper = None
+        # Local Whisper runs in the transcription queue's worker, which loads the model
         self.use_local_whisper = FASTER_WHISPER_AVAILABLE
         
         # Learning system files
@@ -102,6 +101,22 @@ class AudioAnalyzer:
         self.folder_map = self.build_dynamic_folder_map()
         self.audio_extensions = {'.mp3', '.wav', '.aiff', '.m4a', '.flac', '.ogg', '.wma'}
 
+        # Content-addressed cache for transcripts
+        from analysis_cache import get_analysis_cache
+        self.analysis_cache = get_analysis_cache()
+
+        # Local transcription runs in a background worker, cached by content
+        from transcription_queue import get_transcription_queue
+        self.transcription_queue = get_transcription_queue()
+
+        # Spectral features are extracted in a process pool and stored by content
+        from audio_features import get_audio_feature_engine
+        self.feature_engine = get_audio_feature_engine()
+
+        # OpenAI calls share one cross-process rate limit
+        from request_scheduler import get_request_scheduler
+        self.scheduler = get_request_scheduler()
+
         # Remote Powerhouse Config
         self.remote_enabled = False
         self.remote_ip = ""
@@ -258,113 +273,95 @@ class AudioAnalyzer:
         Returns:
             Dictionary with spectral features including BPM, energy, brightness, etc.
         """
-        if not LIBROSA_AVAILABLE:
-            return {
-                'success': False,
-                'error': 'librosa not available',
-                'bpm': 0,
-                'energy_level': 0.0,
-                'spectral_features': {}
-            }
+        return self.analyze_audio_spectral_batch([file_path], max_duration)[str(file_path)]
 
-        try:
-            # Smart sampling: Analyze the middle of the track for better representation
-            total_duration = librosa.get_duration(path=str(file_path))
-            
-            offset = 0.0
-            if total_duration > max_duration:
-                # Start from the middle (minus half duration to center it)
-                offset = (total_duration - max_duration) / 2
-                print(f"🎵 Analyzying {max_duration}s slice from {offset:.1f}s (Total: {total_duration:.1f}s)")
-            
-            # Load audio file from calculated offset
-            y, sr = librosa.load(str(file_path), offset=offset, duration=max_duration, sr=None)
-
-            # Detect BPM (tempo)
-            tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-            bpm = float(tempo)
-
-            # Calculate spectral features
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-            zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
-
-            # Calculate RMS energy
-            rms = librosa.feature.rms(y=y)[0]
-
-            # Separate harmonic and percussive components
-            y_harmonic, y_percussive = librosa.effects.hpss(y)
-
-            # Calculate harmonic/percussive ratio
-            harmonic_energy = np.sum(y_harmonic ** 2)
-            percussive_energy = np.sum(y_percussive ** 2)
-            total_energy = harmonic_energy + percussive_energy
-            harmonic_ratio = harmonic_energy / total_energy if total_energy > 0 else 0
-
-            # Determine brightness (high frequency content)
-            brightness = float(np.mean(spectral_centroids))
-            brightness_normalized = min(1.0, brightness / 4000.0)  # Normalize to 0-1
-
-            # Determine texture based on spectral features
-            texture = self._determine_texture(
-                spectral_bandwidth=np.mean(spectral_bandwidth),
-                zero_crossing_rate=np.mean(zero_crossing_rate),
-                harmonic_ratio=harmonic_ratio
-            )
-
-            # Calculate energy level (0.0 to 1.0)
-            energy_level = float(np.mean(rms))
-            energy_level_normalized = min(1.0, energy_level * 10)  # Normalize
+    def analyze_audio_spectral_batch(self, file_paths: List[Path], max_duration: int = 120) -> Dict[str, Dict[str, Any]]:
+        """
+        analyze_audio_spectral for many files, extracted in parallel across
+        cores by the shared feature engine (features are stored by content).
 
-            # Calculate energy level as 0-10 scale
-            energy_level_scale = int(energy_level_normalized * 10)
+        Returns:
+            {str(path): spectral result} for every input path
+        """
+        if not LIBROSA_AVAILABLE:
+            return {str(path): self._spectral_failure('librosa not available') for path in file_paths}
 
-            # Determine mood based on spectral features
-            mood = self._determine_mood_from_spectral(
-                bpm=bpm,
-                energy_level=energy_level_normalized,
-                brightness=brightness_normalized,
-                harmonic_ratio=harmonic_ratio
-            )
+        features_by_path = self.feature_engine.analyze_many(file_paths, max_duration)
+        results = {}
+        for path, features in features_by_path.items():
+            if features is None:
+                results[path] = self._spectral_failure(f"Could not analyze {Path(path).name}")
+            else:
+                results[path] = self._interpret_spectral(features, max_duration)
+        return results
 
-            # Determine content type (music vs SFX vs voice)
-            content_type = self._determine_content_type(
-                harmonic_ratio=harmonic_ratio,
-                zero_crossing_rate=np.mean(zero_crossing_rate),
-                spectral_centroid=brightness
-            )
+    def _spectral_failure(self, error: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error,
+            'bpm': 0,
+            'energy_level': 0.0,
+            'spectral_features': {}
+        }
 
-            return {
-                'success': True,
-                'bpm': bpm,
-                'energy_level': energy_level_normalized,
-                'energy_level_scale': energy_level_scale,
-                'mood': mood,
-                'content_type': content_type,
-                'spectral_features': {
-                    'brightness': brightness,
-                    'brightness_normalized': brightness_normalized,
-                    'texture': texture,
-                    'harmonic_ratio': harmonic_ratio,
-                    'spectral_centroid_mean': float(np.mean(spectral_centroids)),
-                    'spectral_rolloff_mean': float(np.mean(spectral_rolloff)),
-                    'spectral_bandwidth_mean': float(np.mean(spectral_bandwidth)),
-                    'zero_crossing_rate_mean': float(np.mean(zero_crossing_rate)),
-                    'rms_energy_mean': float(np.mean(rms))
-                },
-                'analysis_duration': max_duration
-            }
+    def _interpret_spectral(self, features: Dict[str, float], max_duration: int) -> Dict[str, Any]:
+        """Turn raw engine features into BPM, energy, mood, texture and content type"""
+        bpm = features['bpm']
+        harmonic_ratio = features['harmonic_ratio']
+        zero_crossing_rate = features['zero_crossing_rate_mean']
+
+        # Determine brightness (high frequency content)
+        brightness = features['spectral_centroid_mean']
+        brightness_normalized = min(1.0, brightness / 4000.0)  # Normalize to 0-1
+
+        # Determine texture based on spectral features
+        texture = self._determine_texture(
+            spectral_bandwidth=features['spectral_bandwidth_mean'],
+            zero_crossing_rate=zero_crossing_rate,
+            harmonic_ratio=harmonic_ratio
+        )
+
+        # Calculate energy level (0.0 to 1.0)
+        energy_level_normalized = min(1.0, features['rms_energy_mean'] * 10)  # Normalize
+
+        # Calculate energy level as 0-10 scale
+        energy_level_scale = int(energy_level_normalized * 10)
+
+        # Determine mood based on spectral features
+        mood = self._determine_mood_from_spectral(
+            bpm=bpm,
+            energy_level=energy_level_normalized,
+            brightness=brightness_normalized,
+            harmonic_ratio=harmonic_ratio
+        )
+
+        # Determine content type (music vs SFX vs voice)
+        content_type = self._determine_content_type(
+            harmonic_ratio=harmonic_ratio,
+            zero_crossing_rate=zero_crossing_rate,
+            spectral_centroid=brightness
+        )
 
-        except Exception as e:
-            print(f"Spectral analysis failed for {file_path.name}: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'bpm': 0,
-                'energy_level': 0.0,
-                'spectral_features': {}
-            }
+        return {
+            'success': True,
+            'bpm': bpm,
+            'energy_level': energy_level_normalized,
+            'energy_level_scale': energy_level_scale,
+            'mood': mood,
+            'content_type': content_type,
+            'spectral_features': {
+                'brightness': brightness,
+                'brightness_normalized': brightness_normalized,
+                'texture': texture,
+                'harmonic_ratio': float(harmonic_ratio),
+                'spectral_centroid_mean': features['spectral_centroid_mean'],
+                'spectral_rolloff_mean': features['spectral_rolloff_mean'],
+                'spectral_bandwidth_mean': features['spectral_bandwidth_mean'],
+                'zero_crossing_rate_mean': zero_crossing_rate,
+                'rms_energy_mean': features['rms_energy_mean']
+            },
+            'analysis_duration': max_duration
+        }
 
     def _determine_texture(self, spectral_bandwidth: float, zero_crossing_rate: float, harmonic_ratio: float) -> str:
         """Determine audio texture based on spectral features"""
@@ -482,43 +479,50 @@ class AudioAnalyzer:
         
         return len(intersection) / len(union) if union else 0.0
 
-    def _init_local_whisper(self):
-        """Lazy initialization of the local Whisper model"""
-        if self.local_whisper is None and self.use_local_whisper:
-            try:
-                print("🧠 Loading local faster-whisper model (base)...")
-                # Using 'base' for a good balance of speed and accuracy on Mac
-                # device="cpu" is safest, compute_type="int8" for efficiency
-                self.local_whisper = WhisperModel("base", device="cpu", compute_type="int8")
-                print("✅ Local Whisper model loaded.")
-            except Exception as e:
-                print(f"⚠️ Failed to load local Whisper model: {e}")
-                self.use_local_whisper = False
-        return self.local_whisper
+    def _local_whisper_available(self) -> bool:
+        """Whether the transcription queue can run local Whisper (the model loads in its worker)"""
+        if self.use_local_whisper and not self.transcription_queue.model_available():
+            print("⚠️ Local Whisper model unavailable")
+            self.use_local_whisper = False
+        return self.use_local_whisper
+
+    def queue_transcription(self, file_path: Path, project_context: Optional[str] = None):
+        """
+        Queue local transcription and return the TranscriptionJob without
+        waiting. Segments stream into the file's sidecar as they finish;
+        job.result() is the transcript (None if local Whisper is unavailable).
+        """
+        return self.transcription_queue.submit(file_path, project_context)
 
     def transcribe_audio(self, file_path: Path, project_context: Optional[str] = None) -> Optional[str]:
         """
         Transcribe audio using local faster-whisper with OpenAI fallback.
-        Returns the full transcript or None if failed.
+        Returns the full transcript or None if failed. Transcripts are cached
+        by content, so a moved or renamed file is not transcribed again.
         """
-        # 1. Try local transcription first
-        if self.use_local_whisper:
+        cached = self.transcription_queue.cached(file_path, project_context)
+        if cached is not None:
+            return cached
+
+        # 1. Local transcription (VAD-chunked, batched) through the queue
+        if self._local_whisper_available():
             try:
-                model = self._init_local_whisper()
-                if model:
-                    print(f"🎙️  Transcribing LOCALLY with faster-whisper: {file_path.name}")
-                    
-                    # initial_prompt helps with context
-                    initial_prompt = project_context if project_context else None
-                    
-                    segments, info = model.transcribe(str(file_path), initial_prompt=initial_prompt, beam_size=5)
-                    
-                    transcript = "".join([segment.text for segment in segments])
-                    return transcript.strip()
+                print(f"🎙️  Transcribing LOCALLY with faster-whisper: {file_path.name}")
+                transcript = self.queue_transcription(file_path, project_context).result()
+                if transcript is not None:
+                    return transcript
             except Exception as e:
                 print(f"⚠️ Local transcription failed: {e}. Falling back to API.")
 
         # 2. Fallback to OpenAI API
+        transcript = self._transcribe_api(file_path, project_context)
+        if transcript:
+            self.analysis_cache.put(self.transcription_queue.cache_key(file_path, project_context),
+                                    "audio.transcript", {'transcript': transcript})
+        return transcript
+
+    def _transcribe_api(self, file_path: Path, project_context: Optional[str] = None) -> Optional[str]:
+        """Transcribe the whole file with the OpenAI Whisper API"""
         if not self.client:
             return None
 
@@ -531,7 +535,8 @@ class AudioAnalyzer:
                 prompt = f"Context: {project_context}. Character names and specific terminology should be prioritized."
 
             with open(file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
+                transcript = self.scheduler.call(
+                    "openai", self.client.audio.transcriptions.create,
                     model="whisper-1", 
                     file=audio_file,
                     prompt=prompt,
@@ -543,28 +548,25 @@ class AudioAnalyzer:
             return None
 
     def _retry_openai_call(self, func, *args, max_retries=3, initial_delay=2, **kwargs):
-        """Execute an OpenAI call with exponential backoff for rate limits"""
-        import time
-        import random
+        """
+        Execute an OpenAI call under the shared "openai" rate limit, with
+        exponential backoff for rate limits (the backoff applies to every
+        process using the bucket)
+        """
         from openai import RateLimitError
-        
-        retries = 0
-        while retries <= max_retries:
-            try:
-                return func(*args, **kwargs)
-            except RateLimitError as e:
-                if retries == max_retries:
-                    raise
-                
-                # Exponential backoff with jitter
-                delay = initial_delay * (2 ** retries) + random.uniform(0, 1)
-                print(f"⚠️ Rate limited. Retrying in {delay:.2f}s (Attempt {retries + 1}/{max_retries})...")
-                time.sleep(delay)
-                retries += 1
-            except Exception as e:
-                # Other errors shouldn't necessarily be retried the same way
-                print(f"❌ OpenAI Call Error: {e}")
-                raise
+
+        try:
+            return self.scheduler.call_with_backoff(
+                "openai", func, *args,
+                is_rate_limited=lambda e: isinstance(e, RateLimitError),
+                max_retries=max_retries, initial_delay=initial_delay, **kwargs
+            )
+        except RateLimitError:
+            raise
+        except Exception as e:
+            # Other errors shouldn't necessarily be retried the same way
+            print(f"❌ OpenAI Call Error: {e}")
+            raise
     
     def build_adaptive_prompt(self, file_path: Path, metadata: Dict[str, str], transcript: Optional[str] = None) -> str:
         """Build a prompt that learns from previous classifications"""
@@ -735,11 +737,41 @@ Return response as JSON:
             print("Warning: No AI backend available (OpenAI missing & Remote disabled).")
             return None
         
-        metadata = self.get_audio_metadata(file_path)
-        
         # 1. New: High-Fidelity Transcription with Context
         transcript = self.transcribe_audio(file_path, project_context=project_context)
-        
+        return self._classify_with_transcript(file_path, transcript)
+
+    def classify_audio_file_deferred(self, file_path: Path, user_description: str = "",
+                                     project_context: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        Classify without waiting for local transcription.
+
+        Returns (classification, job). A transcript that isn't cached yet is
+        queued for the local model and the file is classified right away
+        (transcript_status "pending"); job is that TranscriptionJob, whose
+        result lands in the file's sidecar. Without a local model the API
+        transcribes inline as in classify_audio_file, and job is None.
+        """
+        if not self.client and not self.remote_enabled:
+            print("Warning: No AI backend available (OpenAI missing & Remote disabled).")
+            return None, None
+
+        job = None
+        transcript = self.transcription_queue.cached(file_path, project_context)
+        if transcript is None:
+            if self._local_whisper_available():
+                job = self.queue_transcription(file_path, project_context)
+            else:
+                transcript = self.transcribe_audio(file_path, project_context=project_context)
+
+        classification = self._classify_with_transcript(file_path, transcript)
+        if classification is not None and job is not None:
+            classification['transcript_status'] = 'pending'
+        return classification, job
+
+    def _classify_with_transcript(self, file_path: Path, transcript: Optional[str]) -> Optional[Dict[str, Any]]:
+        metadata = self.get_audio_metadata(file_path)
+
         # 2. Build prompt with transcript context
         prompt = self.build_adaptive_prompt(file_path, metadata, transcript)
         
@@ -802,6 +834,7 @@ Return response as JSON:
             # Inject transcript into classification for sidecar persistence
             if transcript:
                 classification['transcript'] = transcript
+            classification['transcript_status'] = 'complete' if transcript else 'unavailable'
 
             # Learn from this classification
             self.learn_from_classification(file_path, classification)
@@ -4,6 +4,7 @@ Command Line Interface for Audio AI Analysis
 Easy-to-use commands for analyzing and organizing audio files with full AudioAI integration
 """
 
+import os
 import sys
 import argparse
 import json
@@ -14,6 +15,7 @@ project_dir = Path(__file__).parent
 sys.path.insert(0, str(project_dir))
 
 from audio_ai_analyzer import AudioAIAnalyzer
+from audio_features import AudioFeatureEngine, get_audio_feature_engine
 
 def analyze_audio(file_path: str, transcribe: bool = False, show_details: bool = False):
     """Analyze a single audio file with full AudioAI capabilities"""
@@ -89,6 +91,13 @@ def analyze_audio(file_path: str, transcribe: bool = False, show_details: bool =
         if analysis.project_context and analysis.project_context != "unassigned":
             print(f"\n🎬 Project Context: {analysis.project_context}")
         
+        # Same recording elsewhere in the library
+        same_recordings = analyzer.find_same_recordings(file_path)
+        if same_recordings:
+            print(f"\n🔁 Same Audio Found In:")
+            for match in same_recordings[:5]:
+                print(f"   • {Path(match['file_path']).name} (at {match['offset_seconds']:.1f}s)")
+        
         # Organization suggestion
         print(f"\n📋 Organization Suggestion:")
         if analysis.content_type == 'interview':
@@ -112,8 +121,13 @@ def analyze_audio(file_path: str, transcribe: bool = False, show_details: bool =
         print(f"❌ Analysis failed: {e}")
         return None
 
-def analyze_directory(directory: str, recursive: bool = True, transcribe: bool = False):
-    """Analyze all audio files in a directory"""
+def analyze_directory(directory: str, recursive: bool = True, transcribe: bool = False,
+                      workers: int = None):
+    """
+    Analyze all audio files in a directory. Spectral features are extracted
+    by the AudioFeatureEngine's process pool (stored by content, so re-runs
+    are free); classification, transcription and saving stay here.
+    """
     
     print("📁 Directory Audio Analysis")
     print("=" * 60)
@@ -151,15 +165,29 @@ def analyze_directory(directory: str, recursive: bool = True, transcribe: bool =
     content_types = {}
     total_duration = 0
     
+    engine = AudioFeatureEngine(max_workers=workers) if workers else get_audio_feature_engine()
+    print(f"⚙️  Workers: {engine.max_workers}")
+    
+    # Local transcription runs in the background while analysis continues
+    transcriptions = []
+    
+    features = engine.analyze_many(audio_files)
+    if workers:
+        engine.shutdown()
     for i, audio_file in enumerate(audio_files, 1):
         print(f"\n📄 [{i}/{len(audio_files)}] {audio_file.name}")
         
         try:
-            analysis = analyzer.analyze_audio_file(audio_file)
+            # Files the engine couldn't decode get the basic analysis
+            analysis = analyzer.analyze_audio_file(audio_file, features=features[str(audio_file)] or {})
             
             # Try transcription if requested
             if transcribe and analysis.has_speech:
-                analyzer.transcribe_audio(analysis)
+                job = analyzer.queue_transcription(analysis)
+                if job is not None:
+                    transcriptions.append((analysis, job))
+                else:
+                    analyzer.transcribe_audio(analysis)
             
             # Save analysis
             success = analyzer.save_analysis(analysis)
@@ -179,6 +207,20 @@ def analyze_directory(directory: str, recursive: bool = True, transcribe: bool =
         except Exception as e:
             failed += 1
             print(f"   ❌ Error: {str(e)[:50]}...")
+
+    if transcriptions:
+        print(f"\n🎙️  Waiting for {len(transcriptions)} transcriptions...")
+        for analysis, job in transcriptions:
+            try:
+                job.result()
+            except Exception as e:
+                print(f"   ⚠️  {analysis.file_path.name}: {str(e)[:50]}")
+                continue
+            if analysis.transcription:
+                analyzer.save_analysis(analysis)
+        from transcription_queue import get_transcription_queue
+        stats = get_transcription_queue().get_statistics()
+        print(f"   ⚡ {stats['audio_seconds'] / 60:.1f} min of audio at {stats['realtime_factor']:.1f}x realtime")
     
     # Summary
     print(f"\n📊 Analysis Summary:")
@@ -190,6 +232,12 @@ def analyze_directory(directory: str, recursive: bool = True, transcribe: bool =
         print(f"\n🎭 Content Types Found:")
         for content_type, count in sorted(content_types.items(), key=lambda x: x[1], reverse=True):
             print(f"   {content_type}: {count} files")
+    
+    duplicate_groups = analyzer.find_duplicate_recordings(audio_files)
+    if duplicate_groups:
+        print(f"\n🔁 Same Recording in Several Formats:")
+        for group in duplicate_groups:
+            print(f"   {', '.join(f['name'] for f in group['files'])}")
 
 def show_audio_stats():
     """Show statistics from all analyzed audio files"""
@@ -371,6 +419,7 @@ Examples:
   # Analyze directory
   audio_cli.py directory /Users/user/Audio
   audio_cli.py directory /Users/user/Downloads --transcribe
+  audio_cli.py directory /Volumes/Music --workers 8
   
   # Search analyzed audio
   audio_cli.py search "consciousness"
@@ -394,6 +443,7 @@ Examples:
     dir_parser.add_argument('directory', help='Directory to analyze')
     dir_parser.add_argument('--no-recursive', action='store_true', help="Don't analyze subdirectories")
     dir_parser.add_argument('--transcribe', action='store_true', help='Include speech transcription')
+    dir_parser.add_argument('--workers', type=int, help='Parallel analysis processes (default: all cores)')
     
     # Search audio files
     search_parser = subparsers.add_parser('search', help='Search analyzed audio files')
@@ -417,7 +467,7 @@ Examples:
         analyze_audio(args.file_path, args.transcribe, args.details)
         
     elif args.command == 'directory':
-        analyze_directory(args.directory, not args.no_recursive, args.transcribe)
+        analyze_directory(args.directory, not args.no_recursive, args.transcribe, args.workers)
         
     elif args.command == 'search':
         search_audio(args.query, args.type, args.limit)
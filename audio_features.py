@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Audio Features
+Spectral features for audio classification, computed once per file and
+cheaply enough to run over a whole music library.
+
+Per file the engine:
+  - decodes a max_duration slice from the middle of the track, resampled
+    to ANALYSIS_SR and downmixed to mono in the decoder
+  - takes one STFT (N_FFT / HOP_LENGTH) and derives centroid, rolloff,
+    bandwidth, flatness, RMS, chroma, the onset envelope for tempo and the
+    harmonic ratio from that same spectrogram
+  - estimates the harmonic ratio by median-filtering the mel spectrogram
+    instead of running full HPSS on the STFT and inverting both parts.
+    The kernel is calibrated against librosa.effects.hpss at 44.1 kHz, so
+    the ratio tracks full HPSS (within 0.08 on the calibration signals in
+    tests/test_audio_features.py) and the thresholds that interpret it
+    still hold
+
+Files fan out over a process pool. Raw features are persisted in a SQLite
+feature store keyed by content fingerprint, so renamed or moved files and
+re-runs are free; interpreting them (mood, texture, content type) is left
+to the caller.
+
+Usage:
+    engine = get_audio_feature_engine()
+    features = engine.analyze(path, max_duration=120)       # dict or None
+    features = engine.analyze_many(paths, max_duration=30)  # {path: dict or None}
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import librosa
+    import numpy as np
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+from analysis_cache import content_fingerprint
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+# Bump when feature extraction changes so stored features are recomputed
+ENGINE_VERSION = "2"
+
+ANALYSIS_SR = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+# (time frames, mel bands) median filter lengths for the harmonic ratio:
+# ~0.39 s, as long as librosa.effects.hpss's 31 frames at 44.1 kHz
+HARMONIC_KERNEL = (17, 31)
+# Voice activity: frames above this RMS percentile, runs longer than this
+SPEECH_ENERGY_PERCENTILE = 30
+SPEECH_MIN_SEGMENT_SEC = 0.5
+
+DEFAULT_MAX_DURATION = 120
+
+AUDIO_FEATURES_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS audio_features (
+  fingerprint TEXT NOT NULL,           -- analysis_cache.content_fingerprint
+  engine_version TEXT NOT NULL,
+  max_duration INTEGER NOT NULL,
+  features TEXT NOT NULL,              -- JSON
+  created_at REAL NOT NULL,
+  PRIMARY KEY (fingerprint, engine_version, max_duration)
+);
+"""
+
+
+def extract_features(audio_path: str, max_duration: int = DEFAULT_MAX_DURATION) -> Dict[str, float]:
+    """
+    Spectral features of the middle max_duration seconds of a file.
+    Runs in pool workers, so it takes and returns plain values.
+    """
+    total_duration = librosa.get_duration(path=audio_path)
+    offset = max(0.0, (total_duration - max_duration) / 2)
+    y, sr = librosa.load(audio_path, sr=ANALYSIS_SR, mono=True, offset=offset, duration=max_duration)
+    if y.size == 0:
+        raise ValueError("No audio samples decoded")
+
+    S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    power = S ** 2
+    centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
+    rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr)[0]
+    bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr)[0]
+    flatness = librosa.feature.spectral_flatness(S=S)[0]
+    rms = librosa.feature.rms(S=S, frame_length=N_FFT)[0]
+    zcr = librosa.feature.zero_crossing_rate(y, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+    chroma = librosa.feature.chroma_stft(S=power, sr=sr)
+
+    # Unnormalised filters, so every FFT bin's energy counts once as in full HPSS
+    mel = librosa.feature.melspectrogram(S=power, sr=sr, n_mels=N_MELS, norm=None)
+    onset_envelope = librosa.onset.onset_strength(S=librosa.power_to_db(mel), sr=sr, hop_length=HOP_LENGTH)
+    tempo, beats = librosa.beat.beat_track(onset_envelope=onset_envelope, sr=sr, hop_length=HOP_LENGTH)
+    intervals = np.diff(beats)
+
+    # HPSS on 128 mel bands rather than 1025 FFT bins; the energy split is
+    # what the classifier needs, not the separated signals
+    harmonic, percussive = librosa.decompose.hpss(mel, kernel_size=HARMONIC_KERNEL)
+    harmonic_energy = float(np.sum(harmonic))
+    total_energy = harmonic_energy + float(np.sum(percussive))
+
+    try:
+        native_sr = int(librosa.get_samplerate(audio_path))
+    except Exception:
+        native_sr = 0
+
+    return {
+        'bpm': float(np.atleast_1d(tempo)[0]),
+        'beat_count': int(len(beats)),
+        'beat_interval_cv': float(np.std(intervals) / np.mean(intervals)) if len(intervals) > 1 else None,
+        'spectral_centroid_mean': float(np.mean(centroid)),
+        'spectral_centroid_std': float(np.std(centroid)),
+        'spectral_rolloff_mean': float(np.mean(rolloff)),
+        'spectral_bandwidth_mean': float(np.mean(bandwidth)),
+        'spectral_flatness_mean': float(np.mean(flatness)),
+        'zero_crossing_rate_mean': float(np.mean(zcr)),
+        'rms_energy_mean': float(np.mean(rms)),
+        'rms_max': float(np.max(rms)),
+        'rms_min': float(np.min(rms[rms > 0])) if np.any(rms > 0) else 0.0,
+        'chroma_mean': [float(v) for v in np.mean(chroma, axis=1)],
+        'speech_segments': speech_segments(rms, sr, offset),
+        'harmonic_ratio': harmonic_energy / total_energy if total_energy > 0 else 0.0,
+        'duration': float(total_duration),
+        'analyzed_duration': float(y.size / sr),
+        'offset': float(offset),
+        'sample_rate': native_sr,
+    }
+
+
+def speech_segments(rms: "np.ndarray", sr: int, offset: float = 0.0) -> list:
+    """(start, end) seconds of the louder stretches of an RMS envelope (simple energy VAD)"""
+    if rms.size == 0:
+        return []
+    active = rms > np.percentile(rms, SPEECH_ENERGY_PERCENTILE)
+    times = librosa.frames_to_time(np.arange(rms.size + 1), sr=sr, hop_length=HOP_LENGTH)
+    segments = []
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], active, [False]]).astype(np.int8)))
+    for start, end in zip(edges[::2], edges[1::2]):
+        if times[end] - times[start] > SPEECH_MIN_SEGMENT_SEC:
+            segments.append([round(offset + float(times[start]), 2), round(offset + float(times[end]), 2)])
+    return segments
+
+
+class AudioFeatureStore:
+    """SQLite store of extracted features (WAL mode, one connection per thread)"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "audio_features.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(AUDIO_FEATURES_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def get(self, fingerprint: str, max_duration: int) -> Optional[Dict[str, float]]:
+        row = self._connect().execute(
+            "SELECT features FROM audio_features WHERE fingerprint = ? AND engine_version = ? AND max_duration = ?",
+            (fingerprint, ENGINE_VERSION, int(max_duration))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint: str, max_duration: int, features: Dict[str, float]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO audio_features (fingerprint, engine_version, max_duration, features, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, ENGINE_VERSION, int(max_duration), json.dumps(features), time.time())
+            )
+
+    def count(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM audio_features WHERE engine_version = ?", (ENGINE_VERSION,)).fetchone()[0]
+
+
+class AudioFeatureEngine:
+    """
+    Extracts and stores spectral features. Extraction runs in a process
+    pool, so a batch uses every core and decoder memory stays out of the caller.
+    """
+
+    def __init__(self, store: Optional[AudioFeatureStore] = None, max_workers: Optional[int] = None):
+        self.store = store or AudioFeatureStore()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.stats = {"extracted": 0, "store_hits": 0, "failed": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def analyze(self, audio_path: Path, max_duration: int = DEFAULT_MAX_DURATION) -> Optional[Dict[str, float]]:
+        """Features for one file (None if it can't be read or decoded)"""
+        return self.analyze_many([audio_path], max_duration)[str(Path(audio_path))]
+
+    def analyze_many(self, audio_paths: Iterable[Path],
+                     max_duration: int = DEFAULT_MAX_DURATION) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Features for a batch, extracting misses in parallel. Files with the
+        same content are extracted once. Keys are str(Path(path)).
+        """
+        results: Dict[str, Optional[Dict[str, float]]] = {}
+        pending: Dict[str, Any] = {}
+        waiting: Dict[str, list] = {}
+        for audio_path in map(Path, audio_paths):
+            try:
+                fingerprint = content_fingerprint(audio_path)
+            except OSError as e:
+                logger.warning(f"Cannot read {audio_path.name}: {e}")
+                results[str(audio_path)] = None
+                continue
+            if fingerprint in waiting:
+                waiting[fingerprint].append(str(audio_path))
+                continue
+            stored = self.store.get(fingerprint, max_duration)
+            if stored is not None:
+                self.stats["store_hits"] += 1
+                results[str(audio_path)] = stored
+                continue
+            if not LIBROSA_AVAILABLE:
+                results[str(audio_path)] = None
+                continue
+            waiting[fingerprint] = [str(audio_path)]
+            pending[fingerprint] = self._executor().submit(extract_features, str(audio_path), max_duration)
+
+        for fingerprint, future in pending.items():
+            try:
+                features = future.result()
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"Spectral analysis failed for {Path(waiting[fingerprint][0]).name}: {e}")
+                features = None
+            else:
+                self.stats["extracted"] += 1
+                self.store.put(fingerprint, max_duration, features)
+            for path in waiting[fingerprint]:
+                results[path] = features
+        return results
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+
+_audio_feature_engine: Optional[AudioFeatureEngine] = None
+_audio_feature_engine_lock = threading.Lock()
+
+
+def get_audio_feature_engine() -> AudioFeatureEngine:
+    """Shared AudioFeatureEngine backed by the shared feature store"""
+    global _audio_feature_engine
+    with _audio_feature_engine_lock:
+        if _audio_feature_engine is None:
+            _audio_feature_engine = AudioFeatureEngine()
+        return _audio_feature_engine
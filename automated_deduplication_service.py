@@ -18,7 +18,7 @@ import time
 import threading
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Set, Optional, Any, Tuple
+from typing import Callable, Dict, List, Set, Optional, Any, Tuple
 import sqlite3
 import json
 import logging
@@ -118,6 +118,8 @@ class AutomatedDeduplicationService:
         self.monitoring_active = False
         self.monitoring_threads = {}
         self.threat_queue = []
+        # Monitor threads append while a cleanup job drains
+        self._threat_lock = threading.Lock()
         
         # Initialize database
         self._init_service_database()
@@ -347,7 +349,8 @@ class AutomatedDeduplicationService:
                 for directory in high_risk_dirs:
                     if directory.exists():
                         threats = self._scan_directory_for_threats(directory, "real_time")
-                        self.threat_queue.extend(threats)
+                        with self._threat_lock:
+                            self.threat_queue.extend(threats)
                 
                 time.sleep(self.config["scan_intervals"]["real_time"])
                 
@@ -373,7 +376,8 @@ class AutomatedDeduplicationService:
                 for directory in monitored_dirs:
                     if directory.exists():
                         threats = self._scan_directory_for_threats(directory, "proactive")
-                        self.threat_queue.extend(threats)
+                        with self._threat_lock:
+                            self.threat_queue.extend(threats)
                 
                 # Trigger emergency intervention if needed
                 if len(self.threat_queue) > self.config["emergency_threshold"]:
@@ -417,18 +421,39 @@ class AutomatedDeduplicationService:
                     time.sleep(10)
                     continue
                 
-                # Process threats in order of severity
-                self.threat_queue.sort(key=lambda t: (t.severity, t.threat_score), reverse=True)
-                
-                while self.threat_queue:
-                    threat = self.threat_queue.pop(0)
-                    self._handle_threat(threat)
-                    time.sleep(1)  # Brief pause between threat handling
+                self.process_queued_threats()
                 
             except Exception as e:
                 self.logger.error(f"Error processing threats: {e}")
                 time.sleep(30)
 
+    def process_queued_threats(self, on_progress: Optional[Callable[[int, int], None]] = None,
+                               should_cancel: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Handle the queued threats once, most severe first. on_progress(handled, total)
+        is called after each one; should_cancel() is checked before each, and threats
+        not reached stay queued. Returns the number handled.
+        """
+        # Process threats in order of severity
+        with self._threat_lock:
+            self.threat_queue.sort(key=lambda t: (t.severity, t.threat_score), reverse=True)
+        handled = 0
+
+        while not (should_cancel and should_cancel()):
+            with self._threat_lock:
+                if not self.threat_queue:
+                    break
+                threat = self.threat_queue.pop(0)
+                # Threats queued by the monitor meanwhile count towards the total
+                total = handled + 1 + len(self.threat_queue)
+            self._handle_threat(threat)
+            handled += 1
+            if on_progress:
+                on_progress(handled, total)
+            time.sleep(1)  # Brief pause between threat handling
+
+        return handled
+
     def _scan_directory_for_threats(self, directory: Path, scan_type: str) -> List[DuplicationThreat]:
         """Scan directory for duplication threats"""
         
@@ -847,7 +872,8 @@ class AutomatedDeduplicationService:
         self.stats["emergency_interventions"] += 1
         
         # Clear threat queue after emergency intervention
-        self.threat_queue.clear()
+        with self._threat_lock:
+            self.threat_queue.clear()
 
     def _get_recent_operations(self, days: int = 7, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -989,6 +1015,8 @@ class AutomatedDeduplicationService:
                 safety_threshold=confidence_threshold
             )
 
+            near_duplicate_groups = self.find_near_duplicate_groups(scan_dir)
+
             # Format findings for report
             report = {
                 "status": "success",
@@ -1002,7 +1030,8 @@ class AutomatedDeduplicationService:
                     "total_duplicates": scan_results.get("duplicates_found", 0),
                     "safe_to_delete": scan_results.get("safe_to_delete", 0),
                     "space_recoverable_mb": scan_results.get("space_recoverable", 0) / (1024 * 1024),
-                    "groups": scan_results.get("groups", [])
+                    "groups": scan_results.get("groups", []),
+                    "near_duplicate_groups": near_duplicate_groups
                 },
                 "errors": scan_results.get("errors", []),
                 "note": "DRY-RUN mode - No files were modified or deleted"
@@ -1019,6 +1048,44 @@ class AutomatedDeduplicationService:
                 "message": str(e)
             }
 
+    def find_near_duplicate_groups(self, directory: Path) -> List[Dict[str, Any]]:
+        """
+        Groups of visually similar images/videos (re-exports, resized or
+        re-encoded copies) and of the same recording in different audio
+        formats under directory. Perceptual hashes and acoustic fingerprints
+        are stored, so only new or changed files are decoded on a rescan.
+        """
+        try:
+            paths = [
+                Path(entry.path if isinstance(entry, os.DirEntry) else entry)
+                for entry, _ in self.deduplicator._fast_scan(directory)
+            ]
+        except Exception as e:
+            self.logger.warning(f"Near-duplicate scan failed: {e}")
+            return []
+
+        groups = []
+        try:
+            from perceptual_hash import get_perceptual_hash_store, media_kind
+
+            store = get_perceptual_hash_store()
+            store.prune_missing()
+            groups += store.near_duplicate_groups(p for p in paths if media_kind(p))
+        except Exception as e:
+            self.logger.warning(f"Near-duplicate scan failed: {e}")
+
+        try:
+            from acoustic_fingerprint import get_acoustic_index, is_audio
+
+            index = get_acoustic_index()
+            index.prune_missing()
+            groups += index.duplicate_groups(p for p in paths if is_audio(p))
+        except Exception as e:
+            self.logger.warning(f"Acoustic duplicate scan failed: {e}")
+
+        groups.sort(key=lambda g: g["total_size"], reverse=True)
+        return groups
+
 # Testing and CLI interface
 def main():
     """Command line interface for automated deduplication service"""
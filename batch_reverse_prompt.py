@@ -3,21 +3,49 @@ Phase 3b · Batch Reverse Prompt Processor
 -----------------------------------------
 Discovers and processes multiple video clips, generating VEO JSONs,
 continuity data, and a project-level manifest.
+
+Runs are resumable: every finished clip is appended to a journal
+(<input_dir>/.metadata/batch_reverse_prompt.jsonl) as it completes, and
+clips whose content fingerprint is already journaled are not sent to the
+API again. The manifest is rebuilt from the clips finished so far and
+rewritten atomically while the batch runs, so batch_manifest.json is
+always a valid (possibly partial) manifest.
+
+Concurrency adapts: one clip in flight to start, one more per clean
+completion, halved when the API pushes back, and never more than the
+shared "gemini" rate bucket can serve at the observed clip latency. A
+rate-limited clip waits out its own exponential delay (or the API's
+Retry-After) before it is tried again; a clip that hits the daily quota
+is left unjournaled for the next run.
 """
 
 from __future__ import annotations
-import argparse, concurrent.futures, logging, os, json, time
+import argparse, concurrent.futures, heapq, logging, math, os, json, random, re, time
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Deque, List, Dict, Any, Optional, Tuple
 
 from veo_prompt_generator import VEOPromptGenerator
 from continuity_analyzer import analyze_continuity
 from manifest_builder import build_manifest
+from analysis_cache import content_fingerprint
+from request_scheduler import DEFAULT_BUCKETS, DailyQuotaExceeded
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 
+JOURNAL_NAME = "batch_reverse_prompt.jsonl"
+MANIFEST_NAME = "batch_manifest.json"
+# Partial manifests are rewritten at most this often (and always at the end)
+MANIFEST_INTERVAL_SEC = 2.0
+# Rate-limited clips are retried later in the same run, up to this many tries,
+# after RETRY_DELAY_SEC, doubling per attempt (unless the API says how long)
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SEC = 5.0
+# Reverse prompts go through VisionAnalyzer, which draws from this bucket
+RATE_BUCKET = "gemini"
+
 # Initialize VEO generator globally
 _veo_generator = None
 
@@ -38,6 +66,34 @@ def discover_videos(path: str, recursive: bool = True) -> List[Path]:
     return [p for p in base.iterdir() if p.suffix.lower() in exts]
 
 
+def _is_rate_limited(error: Exception) -> bool:
+    message = str(error).lower()
+    return (isinstance(error, DailyQuotaExceeded) or "429" in message or "rate limit" in message
+            or "quota" in message or "resource exhausted" in message or "resource_exhausted" in message)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait (Retry-After header or message), if any"""
+    seconds = getattr(error, "retry_after", None)
+    if seconds is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        seconds = headers.get("Retry-After") or headers.get("retry-after")
+    if seconds is None:
+        match = re.search(r"retry(?:[ -]after| in)\s*:?\s*(\d+(?:\.\d+)?)\s*s", str(error), re.IGNORECASE)
+        seconds = match.group(1) if match else None
+    try:
+        return max(0.0, float(seconds)) if seconds is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Wait before retry number `attempt` of a rate-limited clip"""
+    if retry_after is not None:
+        return retry_after
+    return RETRY_DELAY_SEC * (2 ** (attempt - 1)) * (1 + random.random() / 4)
+
+
 def process_video(video_path: Path) -> Dict[str, Any]:
     """Process a single video through the reverse-prompt generator."""
     try:
@@ -50,25 +106,187 @@ def process_video(video_path: Path) -> Dict[str, Any]:
         }
     except Exception as e:
         logger.exception(f"Error processing {video_path}: {e}")
-        return {"path": str(video_path), "error": str(e)}
+        result = {"path": str(video_path), "error": str(e)}
+        if _is_rate_limited(e):
+            result["rate_limited"] = True
+            if isinstance(e, DailyQuotaExceeded) or "daily" in str(e).lower():
+                result["quota_exceeded"] = True
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                result["retry_after"] = retry_after
+        return result
+
+
+def clip_fingerprint(video_path: Path) -> Optional[str]:
+    """Content fingerprint of a clip (None if it can't be read)"""
+    try:
+        return content_fingerprint(video_path)
+    except OSError:
+        return None
+
+
+class BatchJournal:
+    """
+    Append-only JSONL record of finished clips, flushed to disk as each
+    clip completes. Successful clips are remembered by content
+    fingerprint; failed ones are retried on the next run.
+    """
+
+    def __init__(self, path: Path, resume: bool = True):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = ""
+        if resume and self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crashed run
+                    self._remember(entry.get("fingerprint"), entry.get("result", {}))
+        self._file = open(self.path, "a" if resume else "w")
+        if line and not line.endswith("\n"):
+            self._file.write("\n")
+
+    def _remember(self, fingerprint: Optional[str], result: Dict[str, Any]):
+        if fingerprint and "error" not in result:
+            self.done[fingerprint] = result
+
+    def record(self, fingerprint: Optional[str], result: Dict[str, Any]):
+        self._file.write(json.dumps({"fingerprint": fingerprint, "result": result, "finished_at": time.time()}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._remember(fingerprint, result)
 
+    def close(self):
+        self._file.close()
 
-def run_batch(input_dir: str, workers: int = 3) -> Dict[str, Any]:
+
+class AdaptiveConcurrency:
+    """
+    Clips allowed in flight: +1 per clean completion, halved when the API
+    rate-limits us, capped by max_workers and by how many clips the rate
+    bucket can keep busy at the observed latency (Little's law).
+    """
+
+    def __init__(self, max_workers: int, rate_per_minute: float):
+        self.max_workers = max(1, max_workers)
+        self.rate_per_sec = rate_per_minute / 60.0
+        self.limit = 1
+        self.latency: Optional[float] = None  # moving average, seconds per clip
+
+    def ceiling(self) -> int:
+        if self.latency is None:
+            return self.max_workers
+        # One more than the bucket can serve, so a token never waits for a clip
+        return max(1, min(self.max_workers, math.ceil(self.rate_per_sec * self.latency) + 1))
+
+    def succeeded(self, seconds: float):
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        self.limit = min(self.limit + 1, self.ceiling())
+
+    def throttled(self):
+        self.limit = max(1, self.limit // 2)
+
+
+def write_manifest(manifest: Dict[str, Any], path: Path):
+    """Replace the manifest file atomically, so readers never see half of one."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run_batch(input_dir: str, workers: int = 3, resume: bool = True,
+              manifest_path: Optional[str] = None, recursive: bool = True) -> Dict[str, Any]:
     """Main entry point for batch execution."""
     start = time.time()
-    videos = discover_videos(input_dir)
+    # Sorted, so continuity is computed between neighbouring clips
+    videos = sorted(discover_videos(input_dir, recursive=recursive))
     logger.info(f"Discovered {len(videos)} video(s)")
 
-    results: List[Dict[str, Any]] = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
-        for r in ex.map(process_video, videos):
-            results.append(r)
+    base = Path(input_dir).expanduser()
+    out_path = Path(manifest_path) if manifest_path else base / MANIFEST_NAME
+    journal = BatchJournal(base / ".metadata" / JOURNAL_NAME, resume=resume)
+    concurrency = AdaptiveConcurrency(workers, DEFAULT_BUCKETS[RATE_BUCKET].rate_per_minute)
+
+    # Results by discovery index, so the manifest keeps clip order
+    results: Dict[int, Dict[str, Any]] = {}
+    todo: Deque[Tuple[int, Path, Optional[str], int]] = deque()
+    for index, video in enumerate(videos):
+        fingerprint = clip_fingerprint(video)
+        if fingerprint in journal.done:
+            results[index] = dict(journal.done[fingerprint], path=str(video))
+        else:
+            todo.append((index, video, fingerprint, 1))
+    if results:
+        logger.info(f"Resuming: {len(results)} clip(s) already processed")
+
+    def publish() -> Dict[str, Any]:
+        ordered = [results[i] for i in sorted(results)]
+        manifest = build_manifest(ordered, analyze_continuity(ordered))
+        manifest["batch"] = {
+            "processed": len(results),
+            "failed": sum(1 for r in ordered if "error" in r),
+            "remaining": len(videos) - len(results),
+        }
+        write_manifest(manifest, out_path)
+        return manifest
+
+    running: Dict[concurrent.futures.Future, Tuple[int, Path, Optional[str], int, float]] = {}
+    # Rate-limited clips waiting out their retry delay: (ready_at, index, video, fingerprint, attempt)
+    delayed: List[Tuple[float, int, Path, Optional[str], int]] = []
+    quota_exhausted = False
+    last_publish = time.time()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency.max_workers) as ex:
+            while running or ((todo or delayed) and not quota_exhausted):
+                while delayed and delayed[0][0] <= time.time():
+                    todo.append(heapq.heappop(delayed)[1:])
+                while todo and not quota_exhausted and len(running) < concurrency.limit:
+                    index, video, fingerprint, attempt = todo.popleft()
+                    if fingerprint in journal.done:
+                        # Same content as a clip finished earlier in this run
+                        results[index] = dict(journal.done[fingerprint], path=str(video))
+                        continue
+                    running[ex.submit(process_video, video)] = (index, video, fingerprint, attempt, time.time())
+
+                wake = max(0.0, delayed[0][0] - time.time()) if delayed and not quota_exhausted else None
+                if not running:
+                    if wake is not None:
+                        time.sleep(wake)
+                    continue
+                done, _ = concurrent.futures.wait(running, timeout=wake,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index, video, fingerprint, attempt, submitted = running.pop(future)
+                    result = future.result()
+                    if result.get("rate_limited"):
+                        concurrency.throttled()
+                        if result.get("quota_exceeded"):
+                            # Not a failure of the clip: it stays unprocessed for the next run
+                            quota_exhausted = True
+                            continue
+                        if attempt < MAX_ATTEMPTS:
+                            delay = retry_delay(attempt, result.get("retry_after"))
+                            logger.info(f"{video.name} rate limited; retrying in {delay:.1f}s")
+                            heapq.heappush(delayed, (time.time() + delay, index, video, fingerprint, attempt + 1))
+                            continue
+                    elif "error" not in result:
+                        concurrency.succeeded(time.time() - submitted)
+                    journal.record(fingerprint, result)
+                    results[index] = result
 
-    # Compute continuity across sorted list
-    continuity_data = analyze_continuity(results)
+                if time.time() - last_publish >= MANIFEST_INTERVAL_SEC:
+                    publish()
+                    last_publish = time.time()
+    finally:
+        journal.close()
 
-    # Build manifest
-    manifest = build_manifest(results, continuity_data)
+    if quota_exhausted:
+        logger.warning(f"Daily API quota reached; {len(videos) - len(results)} clip(s) left for the next run")
+    manifest = publish()
     elapsed = round(time.time() - start, 2)
     logger.info(f"Batch complete in {elapsed}s with {len(results)} clips.")
     return manifest
@@ -77,12 +295,13 @@ def run_batch(input_dir: str, workers: int = 3) -> Dict[str, Any]:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Batch Reverse Prompt Processor")
     parser.add_argument("input_dir", help="Folder containing videos")
-    parser.add_argument("--workers", type=int, default=3)
-    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--workers", type=int, default=3,
+                        help="Most clips in flight (fewer while the API rate limit allows less)")
+    parser.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=True,
+                        help="Include videos in subfolders (default); --no-recursive scans only the top level")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Reprocess every clip instead of skipping journaled ones")
     args = parser.parse_args()
 
-    manifest = run_batch(args.input_dir, workers=args.workers)
-    out_path = Path(args.input_dir) / "batch_manifest.json"
-    with open(out_path, "w") as f:
-        json.dump(manifest, f, indent=2)
-    logger.info(f"✅ Manifest written to {out_path}")
+    run_batch(args.input_dir, workers=args.workers, resume=not args.no_resume, recursive=args.recursive)
+    logger.info(f"✅ Manifest written to {Path(args.input_dir) / MANIFEST_NAME}")
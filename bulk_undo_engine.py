@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Bulk Undo Engine - fast recovery from large automatic file moves
+Part of the Easy Rollback System.
+
+Undoing an orchestration run one operation at a time (one DB connection
+and a round of filesystem probing per file) is far too slow when a run
+moved thousands of files. This engine:
+
+- Builds a dependency-ordered plan: operations are undone newest first and
+  any two steps touching the same path are placed in successive "waves",
+  so chains like A→B→C unwind as C→B→A.
+- Detects collisions up front (a restore target that is already occupied)
+  and never overwrites files.
+- Executes each wave's same-volume renames in parallel with a bounded
+  worker pool; cross-volume moves and Google Drive renames run serially.
+- Commits status updates to the rollback DB in batches.
+- Supports dry-run planning with a time estimate and exposes live progress.
+
+Usage:
+    engine = BulkUndoEngine(rollback_system)
+    plan = engine.plan_today()
+    print(plan.summary())             # dry run
+    result = engine.execute(plan)     # or run in a thread and poll engine.progress
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Any, Callable
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Rough per-step costs used for dry-run estimates
+RENAME_SECONDS = 0.002              # metadata-only rename on the same volume
+GDRIVE_RENAME_SECONDS = 0.5         # one Drive API round trip
+COPY_BYTES_PER_SECOND = 100 * 1024 * 1024  # cross-volume copy throughput
+
+
+@dataclass
+class UndoStep:
+    """A single file restore in an undo plan"""
+    operation_id: int
+    timestamp: str
+    source: str                     # where the file is now
+    target: str                     # where it goes back to
+    details: Dict[str, Any] = field(default_factory=dict)
+    google_drive_id: Optional[str] = None
+    wave: int = 0
+    same_volume: bool = True
+    size_bytes: int = 0
+    status: str = "pending"         # pending, executed, failed, conflict, missing
+    error: Optional[str] = None
+
+
+@dataclass
+class UndoPlan:
+    """Dependency-ordered set of undo steps"""
+    steps: List[UndoStep]
+    conflicts: List[UndoStep]
+    missing: List[UndoStep]
+    waves: int
+    estimated_seconds: float
+    created_at: str
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-friendly summary for dry runs and the API"""
+        return {
+            "operations_to_undo": len(self.steps),
+            "conflicts": len(self.conflicts),
+            "missing": len(self.missing),
+            "waves": self.waves,
+            "estimated_seconds": round(self.estimated_seconds, 2),
+            "created_at": self.created_at,
+            "conflict_details": [
+                {"operation_id": s.operation_id, "source": s.source, "target": s.target, "error": s.error}
+                for s in self.conflicts[:50]
+            ]
+        }
+
+
+class BulkUndoEngine:
+    """
+    Plans and executes bulk rollbacks against the rollback database.
+    """
+
+    def __init__(self, rollback_system, max_workers: int = 8, status_batch_size: int = 200):
+        self.rollback_system = rollback_system
+        self.db_path = rollback_system.db_path
+        self.max_workers = max_workers
+        self.status_batch_size = status_batch_size
+
+        self._lock = threading.Lock()
+        self.progress: Dict[str, Any] = self._new_progress("idle")
+
+    @staticmethod
+    def _new_progress(state: str) -> Dict[str, Any]:
+        return {
+            "state": state,          # idle, planning, running, completed, cancelled, failed
+            "total": 0,
+            "completed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "conflicts": 0,
+            "missing": 0,
+            "current_wave": 0,
+            "waves": 0,
+            "estimated_seconds": 0.0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Snapshot of the current progress"""
+        with self._lock:
+            progress = dict(self.progress)
+        progress["percent"] = round(progress["completed"] / progress["total"] * 100, 1) if progress["total"] else 0.0
+        return progress
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def plan_today(self) -> UndoPlan:
+        """Plan the undo of every active operation recorded today"""
+        today = datetime.now().date()
+        return self.plan_range(today.isoformat(), (today + timedelta(days=1)).isoformat())
+
+    def plan_range(self, start: str, end: Optional[str] = None) -> UndoPlan:
+        """Plan the undo of every active operation with start <= timestamp < end"""
+
+        query = "SELECT id, timestamp, action, src_path, dst_path, details FROM file_operations WHERE timestamp >= ?"
+        params: List[Any] = [start]
+        if end:
+            query += " AND timestamp < ?"
+            params.append(end)
+        # Newest first: later moves must be undone before the moves they built on
+        query += " ORDER BY timestamp DESC, id DESC"
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        candidates = []
+        for op_id, timestamp, action, src_path, dst_path, details_json in rows:
+            # Parent entries from start_operation() have no paths
+            if not src_path or not dst_path or src_path == dst_path:
+                continue
+
+            details = {}
+            if details_json:
+                try:
+                    details = json.loads(details_json)
+                except json.JSONDecodeError:
+                    pass
+
+            if details.get("rollback_status") == "executed":
+                continue
+
+            candidates.append(UndoStep(
+                operation_id=op_id,
+                timestamp=timestamp,
+                source=dst_path,
+                target=src_path,
+                details=details,
+                google_drive_id=details.get("google_drive_id")
+            ))
+
+        return self._build_plan(candidates)
+
+    def _build_plan(self, candidates: List[UndoStep]) -> UndoPlan:
+        """
+        Order candidate steps (given newest first) into waves and detect collisions.
+
+        The filesystem is simulated as steps are accepted: `filled` holds paths
+        an earlier step will have written, `vacated` paths it will have emptied.
+        """
+
+        filled = set()
+        vacated = set()
+        last_wave: Dict[str, int] = {}
+
+        steps, conflicts, missing = [], [], []
+
+        def will_exist(path: str) -> bool:
+            if path in filled:
+                return True
+            if path in vacated:
+                return False
+            return os.path.lexists(path)
+
+        for step in candidates:
+            if step.google_drive_id:
+                # Drive renames happen remotely; order them but skip local checks
+                step.wave = max(last_wave.get(step.source, 0), last_wave.get(step.target, 0)) + 1
+                last_wave[step.source] = last_wave[step.target] = step.wave
+                steps.append(step)
+                continue
+
+            if not will_exist(step.source):
+                step.status = "missing"
+                step.error = f"File not found at {step.source}"
+                missing.append(step)
+                continue
+
+            if will_exist(step.target):
+                step.status = "conflict"
+                step.error = f"Restore target already exists: {step.target}"
+                conflicts.append(step)
+                continue
+
+            step.wave = max(last_wave.get(step.source, 0), last_wave.get(step.target, 0)) + 1
+            last_wave[step.source] = last_wave[step.target] = step.wave
+
+            filled.add(step.target)
+            vacated.discard(step.target)
+            vacated.add(step.source)
+            filled.discard(step.source)
+
+            step.same_volume = self._same_volume(step.source, step.target)
+            if not step.same_volume:
+                try:
+                    step.size_bytes = os.path.getsize(step.source)
+                except OSError:
+                    step.size_bytes = 0
+
+            steps.append(step)
+
+        steps.sort(key=lambda s: s.wave)
+        waves = max((s.wave for s in steps), default=0)
+
+        return UndoPlan(
+            steps=steps,
+            conflicts=conflicts,
+            missing=missing,
+            waves=waves,
+            estimated_seconds=self._estimate_seconds(steps),
+            created_at=datetime.now().isoformat(timespec="seconds")
+        )
+
+    @staticmethod
+    def _existing_ancestor(path: Path) -> Path:
+        """Closest existing directory at or above path"""
+        for candidate in [path, *path.parents]:
+            if candidate.exists():
+                return candidate
+        return Path(path.anchor or "/")
+
+    def _same_volume(self, source: str, target: str) -> bool:
+        """True if a plain rename can move source to target"""
+        try:
+            source_dev = os.stat(source).st_dev
+            target_dev = os.stat(self._existing_ancestor(Path(target).parent)).st_dev
+            return source_dev == target_dev
+        except OSError:
+            return False
+
+    def _estimate_seconds(self, steps: List[UndoStep]) -> float:
+        """Estimate wall time: parallel renames per wave plus serial copies and Drive calls"""
+        per_wave: Dict[int, Dict[str, float]] = {}
+        for step in steps:
+            wave = per_wave.setdefault(step.wave, {"renames": 0, "serial": 0.0})
+            if step.google_drive_id:
+                wave["serial"] += GDRIVE_RENAME_SECONDS
+            elif step.same_volume:
+                wave["renames"] += 1
+            else:
+                wave["serial"] += RENAME_SECONDS + step.size_bytes / COPY_BYTES_PER_SECOND
+
+        total = 0.0
+        for wave in per_wave.values():
+            parallel_rounds = -(-int(wave["renames"]) // self.max_workers)
+            total += parallel_rounds * RENAME_SECONDS + wave["serial"]
+        return total
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def begin(self, plan: UndoPlan):
+        """Reset progress for a plan (called by execute; callers may call it early for polling)"""
+        with self._lock:
+            self.progress = self._new_progress("running")
+            self.progress.update({
+                "total": len(plan.steps),
+                "conflicts": len(plan.conflicts),
+                "missing": len(plan.missing),
+                "waves": plan.waves,
+                "estimated_seconds": round(plan.estimated_seconds, 2),
+                "started_at": datetime.now().isoformat(timespec="seconds")
+            })
+
+    def execute(self, plan: UndoPlan, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                should_cancel: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Execute a plan wave by wave.
+
+        Args:
+            plan: Plan from plan_today/plan_range
+            on_progress: Called with a progress snapshot after each wave
+            should_cancel: Checked between waves; remaining waves are skipped
+                (and stay active, so a later run picks them up) when it returns True
+
+        Returns:
+            Dict in the same shape as EasyRollbackSystem.undo_today_operations
+        """
+
+        self.begin(plan)
+        pending_updates: List[UndoStep] = []
+        cancelled = False
+
+        try:
+            with sqlite3.connect(self.db_path) as conn, \
+                 ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-undo") as executor:
+
+                waves: Dict[int, List[UndoStep]] = {}
+                for step in plan.steps:
+                    waves.setdefault(step.wave, []).append(step)
+
+                for wave_number in sorted(waves):
+                    if should_cancel and should_cancel():
+                        cancelled = True
+                        break
+
+                    with self._lock:
+                        self.progress["current_wave"] = wave_number
+
+                    wave_steps = waves[wave_number]
+                    renames = [s for s in wave_steps if s.same_volume and not s.google_drive_id]
+                    serial = [s for s in wave_steps if not s.same_volume or s.google_drive_id]
+
+                    # Steps within a wave touch disjoint paths, so renames can run concurrently
+                    for step in executor.map(self._execute_rename, renames):
+                        self._record_step(step, pending_updates, conn)
+
+                    for step in serial:
+                        self._record_step(self._execute_serial(step), pending_updates, conn)
+
+                    if on_progress:
+                        on_progress(self.get_progress())
+
+                # Remember why conflicting/missing steps were not undone
+                for step in plan.conflicts + plan.missing:
+                    pending_updates.append(step)
+                self._flush_status_updates(conn, pending_updates)
+
+        except Exception as e:
+            logger.error(f"Bulk undo failed: {e}")
+            with self._lock:
+                self.progress["state"] = "failed"
+                self.progress["error"] = str(e)
+                self.progress["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            return {
+                'success': False,
+                'message': f"Bulk undo failed: {e}",
+                'count': self.progress["succeeded"],
+                'failed': self.progress["failed"]
+            }
+
+        with self._lock:
+            self.progress["state"] = "cancelled" if cancelled else "completed"
+            self.progress["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            succeeded = self.progress["succeeded"]
+            failed = self.progress["failed"]
+
+        skipped = len(plan.conflicts) + len(plan.missing)
+        message = f"Rolled back {succeeded} operations, {failed} failed"
+        if skipped:
+            message += f", {skipped} skipped ({len(plan.conflicts)} conflicts, {len(plan.missing)} missing)"
+        if cancelled:
+            message += " (cancelled; remaining operations are still active)"
+
+        return {
+            'success': succeeded > 0,
+            'message': message,
+            'count': succeeded,
+            'failed': failed,
+            'conflicts': len(plan.conflicts),
+            'missing': len(plan.missing)
+        }
+
+    def _record_step(self, step: UndoStep, pending_updates: List[UndoStep], conn: sqlite3.Connection):
+        """Update progress and flush DB status updates every status_batch_size steps"""
+        with self._lock:
+            self.progress["completed"] += 1
+            if step.status == "executed":
+                self.progress["succeeded"] += 1
+            else:
+                self.progress["failed"] += 1
+
+        pending_updates.append(step)
+        if len(pending_updates) >= self.status_batch_size:
+            self._flush_status_updates(conn, pending_updates)
+
+    def _flush_status_updates(self, conn: sqlite3.Connection, pending_updates: List[UndoStep]):
+        """Write rollback status for a batch of steps in one transaction"""
+        if not pending_updates:
+            return
+
+        now = datetime.now().isoformat()
+        rows = []
+        for step in pending_updates:
+            details = dict(step.details)
+            details['rollback_status'] = step.status
+            details['rollback_timestamp'] = now
+            if step.error:
+                details['rollback_error'] = step.error
+            rows.append((json.dumps(details), step.operation_id))
+
+        conn.executemany("UPDATE file_operations SET details = ? WHERE id = ?", rows)
+        conn.commit()
+        pending_updates.clear()
+
+    def _execute_rename(self, step: UndoStep) -> UndoStep:
+        """Same-volume restore via os.rename (never overwrites)"""
+        try:
+            target = Path(step.target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                raise FileExistsError(f"Restore target already exists: {target}")
+            os.rename(step.source, target)
+            step.status = "executed"
+        except Exception as e:
+            step.status = "failed"
+            step.error = str(e)
+        return step
+
+    def _execute_serial(self, step: UndoStep) -> UndoStep:
+        """Cross-volume move or Google Drive rename"""
+        if step.google_drive_id:
+            operation = self.rollback_system._row_to_operation(
+                (step.operation_id, step.timestamp, "move", step.target, step.source, 0.0, json.dumps(step.details))
+            )
+            result = self.rollback_system._rollback_google_drive_operation(operation)
+            step.status = "executed" if result['success'] else "failed"
+            step.error = result.get('error')
+            return step
+
+        try:
+            target = Path(step.target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                raise FileExistsError(f"Restore target already exists: {target}")
+            shutil.move(step.source, str(target))
+            step.status = "executed"
+        except Exception as e:
+            step.status = "failed"
+            step.error = str(e)
+        return step
@@ -153,17 +153,30 @@ class ADHDFriendlyConfidenceSystem:
         with open(self.config_file, 'w') as f:
             json.dump(self.user_config, f, indent=2)
 
-    def determine_confidence_level(self, file_path: str, context: Dict[str, Any] = None) -> ConfidenceLevel:
+    def _new_decision_batch(self) -> Dict[str, Any]:
+        """
+        State shared by the decisions in one batch: the time-based level is
+        evaluated once, disk usage once per volume and folder overflow once
+        per folder.
+        """
+        return {"time_level": self._get_time_based_level(), "disk": {}, "overflow": {}}
+
+    def determine_confidence_level(self, file_path: str, context: Dict[str, Any] = None,
+                                   batch: Optional[Dict[str, Any]] = None,
+                                   learned_prediction: Optional[Dict[str, Any]] = None) -> ConfidenceLevel:
         """
         Determine appropriate confidence level for a file based on multiple factors
         
         Args:
             file_path: Path to the file
             context: Additional context about the file
+            batch: Shared state from _new_decision_batch() when deciding many files
+            learned_prediction: Precomputed learning system prediction for the file
             
         Returns:
             Appropriate confidence level
         """
+        batch = batch if batch is not None else self._new_decision_batch()
         
         # Start with default level
         default_level_name = self.user_config.get("default_level", "SMART")
@@ -180,22 +193,22 @@ class ADHDFriendlyConfidenceSystem:
             current_level = file_type_level
         
         # Factor 3: Time-based adjustment
-        time_level = self._get_time_based_level()
+        time_level = batch["time_level"]
         if time_level:
             current_level = self._combine_levels(current_level, time_level)
         
         # Factor 4: Emergency override
-        if self._check_emergency_conditions(file_path, context):
+        if self._check_emergency_conditions(file_path, context, batch):
             self.logger.info(f"Emergency conditions detected - overriding to ALWAYS level")
             return ConfidenceLevel.ALWAYS
         
         # Factor 5: Learning system adjustment
         if self.user_config.get("learning_enabled", True):
-            learned_level = self._get_learned_level(file_path, context)
+            learned_level = self._get_learned_level(file_path, context, learned_prediction)
             if learned_level:
                 current_level = self._combine_levels(current_level, learned_level)
         
-        self.logger.info(f"Determined confidence level for {Path(file_path).name}: {current_level.name}")
+        self.logger.debug(f"Determined confidence level for {Path(file_path).name}: {current_level.name}")
         return current_level
 
     def _get_location_based_level(self, file_path: str) -> Optional[ConfidenceLevel]:
@@ -235,11 +248,13 @@ class ADHDFriendlyConfidenceSystem:
         
         return None
 
-    def _get_learned_level(self, file_path: str, context: Dict[str, Any] = None) -> Optional[ConfidenceLevel]:
+    def _get_learned_level(self, file_path: str, context: Dict[str, Any] = None,
+                           prediction: Optional[Dict[str, Any]] = None) -> Optional[ConfidenceLevel]:
         """Get confidence level based on learned patterns"""
         
         # Get prediction from learning system
-        prediction = self.learning_system.predict_user_action(file_path, context)
+        if prediction is None:
+            prediction = self.learning_system.predict_user_action(file_path, context)
         
         if not prediction or prediction["confidence"] < 0.3:
             return None
@@ -260,11 +275,12 @@ class ADHDFriendlyConfidenceSystem:
         """Combine two confidence levels (take the more conservative one)"""
         return min(level1, level2, key=lambda x: x.value)
 
-    def _check_emergency_conditions(self, file_path: str, context: Dict[str, Any] = None) -> bool:
+    def _check_emergency_conditions(self, file_path: str, context: Dict[str, Any] = None,
+                                    batch: Optional[Dict[str, Any]] = None) -> bool:
         """Check if emergency conditions require immediate action"""
         
         # Check disk space
-        if self._check_disk_space_emergency(file_path):
+        if self._check_disk_space_emergency(file_path, batch["disk"] if batch else None):
             return True
         
         # Check for duplicate crisis
@@ -272,19 +288,27 @@ class ADHDFriendlyConfidenceSystem:
             return True
         
         # Check for overflow conditions
-        if self._check_overflow_emergency(file_path):
+        if self._check_overflow_emergency(file_path, batch["overflow"] if batch else None):
             return True
         
         return False
 
-    def _check_disk_space_emergency(self, file_path: str) -> bool:
-        """Check if disk space is critically low"""
+    def _check_disk_space_emergency(self, file_path: str, cache: Optional[Dict[Any, bool]] = None) -> bool:
+        """Check if disk space is critically low (cache: results per volume for a batch)"""
         try:
             import shutil
-            total, used, free = shutil.disk_usage(Path(file_path).parent)
+            parent = Path(file_path).parent
+            volume = os.stat(parent).st_dev if cache is not None else None
+            if volume is not None and volume in cache:
+                return cache[volume]
+
+            total, used, free = shutil.disk_usage(parent)
             usage_ratio = used / total
             
-            return usage_ratio >= self.emergency_triggers["disk_space_critical"]
+            critical = usage_ratio >= self.emergency_triggers["disk_space_critical"]
+            if volume is not None:
+                cache[volume] = critical
+            return critical
         except:
             return False
 
@@ -295,12 +319,18 @@ class ADHDFriendlyConfidenceSystem:
         
         return context["duplicate_count"] >= self.emergency_triggers["duplicate_crisis"]
 
-    def _check_overflow_emergency(self, file_path: str) -> bool:
-        """Check for folder overflow conditions"""
+    def _check_overflow_emergency(self, file_path: str, cache: Optional[Dict[str, bool]] = None) -> bool:
+        """Check for folder overflow conditions (cache: results per folder for a batch)"""
         parent_dir = Path(file_path).parent
+        if cache is not None:
+            key = str(parent_dir)
+            if key not in cache:
+                cache[key] = self._check_overflow_emergency(file_path)
+            return cache[key]
         
         try:
-            file_count = len(list(parent_dir.iterdir()))
+            with os.scandir(parent_dir) as it:
+                file_count = sum(1 for _ in it)
             
             # Check for downloads overflow
             if "downloads" in str(parent_dir).lower():
@@ -332,13 +362,56 @@ class ADHDFriendlyConfidenceSystem:
         Returns:
             ConfidenceDecision with instructions for handling
         """
-        
+        return self._decide(file_path, predicted_action, system_confidence, context, self._new_decision_batch())
+
+    def make_confidence_decisions(self, items: List[Dict[str, Any]]) -> List[ConfidenceDecision]:
+        """
+        Batch version of make_confidence_decision (same decisions, in input order).
+
+        Args:
+            items: Dicts with file_path, predicted_action, system_confidence and optional context
+
+        Per-batch work is shared: one time-of-day evaluation, one disk check per
+        volume, one overflow count per folder and a single batched learning
+        system prediction for all files.
+        """
+        batch = self._new_decision_batch()
+
+        learned_predictions = [None] * len(items)
+        if self.user_config.get("learning_enabled", True) and items:
+            learned_predictions = self.learning_system.predict_user_actions(
+                [item["file_path"] for item in items],
+                [item.get("context") for item in items]
+            )
+
+        decisions = [
+            self._decide(
+                item["file_path"],
+                item.get("predicted_action") or {},
+                item.get("system_confidence", 0.0),
+                item.get("context"),
+                batch,
+                learned_prediction
+            )
+            for item, learned_prediction in zip(items, learned_predictions)
+        ]
+        self.logger.info(f"Made {len(decisions)} confidence decisions "
+                         f"({sum(1 for d in decisions if d.requires_user_input)} need user input)")
+        return decisions
+
+    def _decide(self,
+                file_path: str,
+                predicted_action: Dict[str, Any],
+                system_confidence: float,
+                context: Optional[Dict[str, Any]],
+                batch: Dict[str, Any],
+                learned_prediction: Optional[Dict[str, Any]] = None) -> ConfidenceDecision:
         # Determine confidence level
-        confidence_level = self.determine_confidence_level(file_path, context)
+        confidence_level = self.determine_confidence_level(file_path, context, batch, learned_prediction)
         threshold_config = self.thresholds[confidence_level]
         
-        # Check for emergency override
-        emergency_prevention = self._check_emergency_conditions(file_path, context)
+        # Check for emergency override (disk/overflow results are reused from the batch)
+        emergency_prevention = self._check_emergency_conditions(file_path, context, batch)
         
         if emergency_prevention and self.user_config.get("emergency_override_enabled", True):
             self.logger.warning(f"Emergency override activated for {Path(file_path).name}")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Derivative Cache
+Content-addressed, size-capped disk store for files derived from originals:
+downscaled images for the vision model, thumbnails, preview clips.
+
+A derivative is keyed like an analysis result (analysis_cache.make_cache_key)
+- content fingerprint of the original, kind, pipeline version and the
+parameters that shape the output - so it survives the original being moved
+or renamed. Files live under <root>/<key[:2]>/<key>.<ext>; a SQLite index
+(WAL mode) tracks their size and last access so the store can evict the
+least recently used files once it grows past max_bytes.
+
+Usage:
+    cache = get_derivative_cache()
+    key = cache.file_key(path, "image.vision", "1", params="1536")
+    derived = cache.get(key)
+    if derived is None:
+        target = cache.reserve(key, ".jpg")
+        render(path, target)                 # write the derivative to target
+        derived = cache.commit(key, "image.vision", target)
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from gdrive_integration import get_metadata_root
+from analysis_cache import content_fingerprint, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Eviction trims the store to this fraction of max_bytes so it doesn't run on every commit
+EVICT_TARGET_RATIO = 0.9
+
+DERIVATIVE_CACHE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS derivatives (
+  cache_key TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  file_name TEXT NOT NULL,             -- relative to the cache root
+  size_bytes INTEGER NOT NULL,
+  created_at REAL NOT NULL,
+  last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_derivatives_last_access ON derivatives(last_access);
+CREATE INDEX IF NOT EXISTS idx_derivatives_kind ON derivatives(kind);
+"""
+
+
+class DerivativeCache:
+    """
+    Size-bounded LRU store of derived files (SQLite index in WAL mode,
+    one connection per thread).
+    """
+
+    def __init__(self, root: Optional[Path] = None, db_path: Optional[Path] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else get_metadata_root() / "derivatives"
+        self.root.mkdir(parents=True, exist_ok=True)
+        if db_path:
+            self.db_path = Path(db_path)
+        elif root:
+            self.db_path = self.root / "derivatives.db"
+        else:
+            self.db_path = get_metadata_root() / "databases" / "derivatives.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(DERIVATIVE_CACHE_SCHEMA_SQL)
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM derivatives").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def file_key(self, file_path: Path, kind: str, version: str, params: str = "") -> Optional[str]:
+        """Key for a derivative of a file's content, or None if the file can't be read"""
+        try:
+            fingerprint = content_fingerprint(Path(file_path))
+        except OSError:
+            return None
+        return make_cache_key(fingerprint, kind, version, params)
+
+    def _relative_name(self, cache_key: str, suffix: str) -> str:
+        return f"{cache_key[:2]}/{cache_key}{suffix}"
+
+    # ------------------------------------------------------------------
+    # Reads / writes
+    # ------------------------------------------------------------------
+
+    def get(self, cache_key: Optional[str]) -> Optional[Path]:
+        """Path of a stored derivative (None on a miss)"""
+        if not cache_key:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT file_name FROM derivatives WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                path = self.root / row[0]
+                if not path.exists():
+                    # Removed behind our back
+                    self._delete(conn, cache_key)
+                    return None
+                conn.execute("UPDATE derivatives SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key))
+            return path
+        except sqlite3.Error as e:
+            logger.warning(f"Derivative cache read failed: {e}")
+            return None
+
+    def reserve(self, cache_key: str, suffix: str) -> Path:
+        """
+        Temporary path to write a new derivative to. It may be written from
+        another process; pass it to commit() once complete.
+        """
+        final = self.root / self._relative_name(cache_key, suffix)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        return final.with_name(f".{final.stem}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}")
+
+    def commit(self, cache_key: str, kind: str, written: Path) -> Optional[Path]:
+        """Move a file written to a reserve()d path into the store and index it"""
+        written = Path(written)
+        suffix = written.suffix
+        name = self._relative_name(cache_key, suffix)
+        final = self.root / name
+        try:
+            os.replace(written, final)
+            size = final.stat().st_size
+        except OSError as e:
+            logger.warning(f"Could not store derivative {kind}: {e}")
+            written.unlink(missing_ok=True)
+            return None
+
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                old = conn.execute(
+                    "SELECT size_bytes FROM derivatives WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO derivatives "
+                    "(cache_key, kind, file_name, size_bytes, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, kind, name, size, now, now)
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                if self._total_bytes > self.max_bytes:
+                    self._evict(conn, keep=cache_key)
+        except sqlite3.Error as e:
+            logger.warning(f"Derivative cache index update failed: {e}")
+        return final
+
+    def put_bytes(self, cache_key: str, kind: str, data: bytes, suffix: str) -> Optional[Path]:
+        """Store an in-memory derivative"""
+        target = self.reserve(cache_key, suffix)
+        target.write_bytes(data)
+        return self.commit(cache_key, kind, target)
+
+    def _delete(self, conn: sqlite3.Connection, cache_key: str):
+        with self._lock:
+            row = conn.execute(
+                "SELECT file_name, size_bytes FROM derivatives WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM derivatives WHERE cache_key = ?", (cache_key,))
+                (self.root / row[0]).unlink(missing_ok=True)
+                self._total_bytes -= row[1]
+
+    def _evict(self, conn: sqlite3.Connection, keep: Optional[str] = None):
+        """Delete least recently used files until the store is under the target size"""
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        cursor = conn.execute("SELECT cache_key, file_name, size_bytes FROM derivatives ORDER BY last_access")
+        doomed = []
+        for cache_key, file_name, size in cursor:
+            if self._total_bytes <= target:
+                break
+            if cache_key == keep:
+                continue
+            doomed.append((cache_key,))
+            (self.root / file_name).unlink(missing_ok=True)
+            self._total_bytes -= size
+        cursor.close()
+        conn.executemany("DELETE FROM derivatives WHERE cache_key = ?", doomed)
+        logger.info(f"Evicted {len(doomed)} derivative files")
+
+    def invalidate(self, kind: Optional[str] = None) -> int:
+        """Drop every derivative (or every derivative of one kind); returns the number removed"""
+        with self._lock, self._connect() as conn:
+            if kind:
+                rows = conn.execute("SELECT file_name FROM derivatives WHERE kind = ?", (kind,)).fetchall()
+                conn.execute("DELETE FROM derivatives WHERE kind = ?", (kind,))
+            else:
+                rows = conn.execute("SELECT file_name FROM derivatives").fetchall()
+                conn.execute("DELETE FROM derivatives")
+            for (file_name,) in rows:
+                (self.root / file_name).unlink(missing_ok=True)
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM derivatives").fetchone()[0]
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """File counts per kind and total size"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT kind, COUNT(*) FROM derivatives GROUP BY kind").fetchall()
+        return {
+            "entries": {kind: count for kind, count in rows},
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_derivative_cache: Optional[DerivativeCache] = None
+_derivative_cache_lock = threading.Lock()
+
+
+def get_derivative_cache() -> DerivativeCache:
+    """Shared DerivativeCache for the metadata root"""
+    global _derivative_cache
+    with _derivative_cache_lock:
+        if _derivative_cache is None:
+            _derivative_cache = DerivativeCache()
+        return _derivative_cache
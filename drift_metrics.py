@@ -6,58 +6,86 @@ Focuses on: "Are we failing to classify?"
 """
 
 import json
+import time
 import logging
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, List
 
 from gdrive_integration import get_metadata_root
+from metrics_store import MetricsStore, MetricPoint, DAY
 
 logger = logging.getLogger(__name__)
 
+DECISIONS_SERIES = "librarian.decisions"
+UNSORTED_SERIES = "librarian.unsorted"
+FALLBACK_STUB_SERIES = "librarian.fallback_stub"
+
 class DriftMonitor:
     def __init__(self):
-        self.metrics_file = get_metadata_root() / "librarian_metrics.json"
+        self.metrics_file = get_metadata_root() / "librarian_metrics.json"  # legacy, imported once
+        self.store = MetricsStore(get_metadata_root() / "databases" / "metrics.db")
+        self._import_legacy_metrics()
         
     def log_decision(self, decision): # Type hinted as PolicyDecision, but using duck typing to avoid circular import if needed
         """
         Log a decision to track drift.
         Drift = High % of "Uncertain" or "Fallback" decisions.
+        Appends to the metrics store (O(1)) instead of rewriting a JSON file.
         """
         try:
-            metrics = self._load_metrics()
-            
-            today = datetime.now().strftime("%Y-%m-%d")
-            if today not in metrics:
-                metrics[today] = {"total": 0, "unsorted": 0, "fallback_stub": 0}
-            
-            metrics[today]["total"] += 1
+            points = [MetricPoint(DECISIONS_SERIES)]
             
             # Check for drift indicators
             if "Uncertain" in str(decision.target_path) or decision.action == "review":
-                metrics[today]["unsorted"] += 1
+                points.append(MetricPoint(UNSORTED_SERIES))
             
             # Check for generic fallback stub (simple heuristic)
             if "Document" in decision.suggested_filename and decision.category_id == "unknown":
-                 metrics[today]["fallback_stub"] += 1
+                points.append(MetricPoint(FALLBACK_STUB_SERIES))
                  
-            self._save_metrics(metrics)
+            self.store.record_many(points)
             
         except Exception as e:
             logger.warning(f"Failed to log drift metrics: {e}")
 
-    def _load_metrics(self) -> Dict:
-        if self.metrics_file.exists():
-            try:
-                with open(self.metrics_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+    def get_daily_metrics(self, days: int = 30) -> Dict[str, Dict[str, int]]:
+        """
+        Daily decision counts, keyed by UTC date like the legacy JSON file:
+        {"2024-05-01": {"total": 12, "unsorted": 3, "fallback_stub": 0}}
+        """
+        since = time.time() - days * DAY
+        daily: Dict[str, Dict[str, int]] = {}
+        for key, series in (("total", DECISIONS_SERIES), ("unsorted", UNSORTED_SERIES),
+                            ("fallback_stub", FALLBACK_STUB_SERIES)):
+            for bucket in self.store.buckets(series, resolution=DAY, since=since):
+                day = datetime.fromtimestamp(bucket["bucket_start"], tz=timezone.utc).strftime("%Y-%m-%d")
+                daily.setdefault(day, {"total": 0, "unsorted": 0, "fallback_stub": 0})[key] = bucket["count"]
+        return daily
 
-    def _save_metrics(self, metrics: Dict):
+    def get_drift_rate(self, days: int = 7) -> float:
+        """Share of decisions in the window that ended up unsorted"""
+        since = time.time() - days * DAY
+        total = self.store.totals(DECISIONS_SERIES, since=since)["count"]
+        unsorted = self.store.totals(UNSORTED_SERIES, since=since)["count"]
+        return unsorted / total if total else 0.0
+
+    def _import_legacy_metrics(self):
+        """Move counts from librarian_metrics.json into the store, then retire the file"""
+        if not self.metrics_file.exists():
+            return
         try:
-            with open(self.metrics_file, 'w') as f:
-                json.dump(metrics, f, indent=2)
-        except:
-            pass
+            with open(self.metrics_file, 'r') as f:
+                metrics = json.load(f)
+
+            points: List[MetricPoint] = []
+            for day, counts in metrics.items():
+                ts = datetime.strptime(day, "%Y-%m-%d").replace(hour=12, tzinfo=timezone.utc).timestamp()
+                for key, series in (("total", DECISIONS_SERIES), ("unsorted", UNSORTED_SERIES),
+                                    ("fallback_stub", FALLBACK_STUB_SERIES)):
+                    points.extend(MetricPoint(series, ts=ts) for _ in range(int(counts.get(key, 0))))
+
+            self.store.record_many(points)
+            self.metrics_file.rename(self.metrics_file.with_suffix(".json.imported"))
+        except Exception as e:
+            logger.warning(f"Failed to import legacy drift metrics: {e}")
@@ -23,22 +23,20 @@ Created by: Claude AI Assistant
 import os
 import sqlite3
 import json
+import importlib.util
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 import argparse
 
 # Import centralized configuration root
 from gdrive_integration import get_metadata_root
 
-try:
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
-    from google_drive_auth import GoogleDriveAuth
-    GOOGLE_DRIVE_AVAILABLE = True
-except ImportError:
-    GOOGLE_DRIVE_AVAILABLE = False
+# The Google API client is slow to import and only needed for Drive rollbacks,
+# so check for it here and import it where it is used
+GOOGLE_DRIVE_AVAILABLE = importlib.util.find_spec("googleapiclient") is not None
+if not GOOGLE_DRIVE_AVAILABLE:
     print("⚠️  Google Drive API not available. Local rollback only.")
 
 # ==============================================================================
@@ -56,10 +54,29 @@ CREATE TABLE IF NOT EXISTS file_operations (
   details TEXT                         -- JSON: {"category": "...", "notes": "..."}
 );
 CREATE INDEX IF NOT EXISTS idx_file_operations_time ON file_operations(timestamp);
-CREATE INDEX IF NOT EXISTS idx_file_operations_src ON file_operations(src_path);
-CREATE INDEX IF NOT EXISTS idx_file_operations_dst ON file_operations(dst_path);
+-- Path lookups are always bounded by time (e.g. was_ai_operation), so index both together
+DROP INDEX IF EXISTS idx_file_operations_src;
+DROP INDEX IF EXISTS idx_file_operations_dst;
+CREATE INDEX IF NOT EXISTS idx_file_operations_src_time ON file_operations(src_path, timestamp);
+CREATE INDEX IF NOT EXISTS idx_file_operations_dst_time ON file_operations(dst_path, timestamp);
+
+-- Old operations are moved here so the live table stays small
+CREATE TABLE IF NOT EXISTS file_operations_archive (
+  id INTEGER PRIMARY KEY,              -- same id as in file_operations
+  timestamp TEXT NOT NULL,
+  action TEXT NOT NULL,
+  src_path TEXT,
+  dst_path TEXT,
+  confidence REAL,
+  details TEXT,
+  archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_file_operations_archive_time ON file_operations_archive(timestamp);
 """
 
+# Operations older than this are moved to file_operations_archive
+ARCHIVE_AFTER_DAYS = 90
+
 def ensure_rollback_db() -> Path:
     """
     Ensure rollback database exists with proper schema.
@@ -149,6 +166,7 @@ class EasyRollbackSystem:
         
         if GOOGLE_DRIVE_AVAILABLE:
             try:
+                from google_drive_auth import GoogleDriveAuth
                 self.gdrive_auth = GoogleDriveAuth.get_instance()
                 # Don't auto-authenticate - only when needed
             except Exception as e:
@@ -179,15 +197,18 @@ class EasyRollbackSystem:
         """Get path to rollback database (for debug logging compatibility)"""
         return self.rollback_db
 
-    def was_ai_operation(self, file_path: str) -> bool:
+    def was_ai_operation(self, file_path: str, window_seconds: int = 60) -> bool:
         """Check if a file was recently moved/renamed by the AI (within last 60s)"""
         try:
             with sqlite3.connect(self.rollback_db) as conn:
-                cutoff = (datetime.now() - timedelta(seconds=60)).isoformat(timespec="seconds")
-                cursor = conn.execute(
-                    "SELECT id FROM file_operations WHERE (src_path = ? OR dst_path = ?) AND timestamp > ?",
-                    (str(file_path), str(file_path), cutoff)
-                )
+                cutoff = (datetime.now() - timedelta(seconds=window_seconds)).isoformat(timespec="seconds")
+                # Two bounded probes on the (path, timestamp) indexes instead of an OR scan
+                cursor = conn.execute("""
+                    SELECT 1 FROM file_operations WHERE src_path = ? AND timestamp > ?
+                    UNION ALL
+                    SELECT 1 FROM file_operations WHERE dst_path = ? AND timestamp > ?
+                    LIMIT 1
+                """, (str(file_path), cutoff, str(file_path), cutoff))
                 return cursor.fetchone() is not None
         except Exception:
             return False
@@ -237,86 +258,142 @@ class EasyRollbackSystem:
             self.rollback_db.parent.mkdir(parents=True, exist_ok=True)
         
         with sqlite3.connect(self.rollback_db) as conn:
-            # Create table if it doesn't exist (using centralized schema)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS file_operations (
-                  id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  timestamp TEXT NOT NULL,
-                  action TEXT NOT NULL,
-                  src_path TEXT,
-                  dst_path TEXT,
-                  confidence REAL,
-                  details TEXT
-                );
-            """)
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_operations_time ON file_operations(timestamp);")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_operations_src ON file_operations(src_path);")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_operations_dst ON file_operations(dst_path);")
+            # Create tables and indexes (using centralized schema)
+            conn.executescript(ROLLBACK_SCHEMA_SQL)
+    
+    def _time_range(self, days: int = 7, today_only: bool = False) -> Tuple[str, Optional[str]]:
+        """
+        Translate a day window into [start, end) ISO timestamp bounds.
+        
+        Comparing the raw timestamp column (instead of DATE(timestamp)) lets
+        SQLite use idx_file_operations_time.
+        """
+        if today_only:
+            today = datetime.now().date()
+            return today.isoformat(), (today + timedelta(days=1)).isoformat()
+        
+        since_date = (datetime.now() - timedelta(days=days)).date()
+        return since_date.isoformat(), None
+    
+    def _row_to_operation(self, row) -> FileOperation:
+        """Map a file_operations row to a FileOperation"""
+        # Map columns from file_operations schema:
+        # [0]=id, [1]=timestamp, [2]=action, [3]=src_path, [4]=dst_path, [5]=confidence, [6]=details
+        
+        details = {}
+        if len(row) > 6 and row[6]:
+            try:
+                details = json.loads(row[6])
+            except:
+                pass
+        
+        # Extract fields from details or columns
+        original_filename = Path(row[3]).name if row[3] else "unknown"
+        new_filename = Path(row[4]).name if row[4] else "unknown"
+        new_location = str(Path(row[4]).parent) if row[4] else ""
+        
+        return FileOperation(
+            rollback_id=row[0],
+            timestamp=row[1],
+            operation_type=row[2],
+            original_path=row[3] if row[3] else '',
+            original_filename=original_filename,
+            new_filename=new_filename,
+            new_location=new_location,
+            confidence=row[5] if row[5] else 0.0,
+            status='active', # file_operations doesn't track status yet, assume active
+            google_drive_id=details.get('google_drive_id'),
+            notes=details.get('notes', '')
+        )
     
-    def show_recent_operations(self, days: int = 7, today_only: bool = False) -> List[FileOperation]:
-        """Show recent file operations that can be rolled back"""
+    def show_recent_operations(self, days: int = 7, today_only: bool = False, limit: Optional[int] = 200,
+                               before: Optional[Tuple[str, int]] = None) -> List[FileOperation]:
+        """
+        Show recent file operations that can be rolled back
+        
+        Results are newest first. Pass the (timestamp, id) of the last
+        operation of a page as `before` to fetch the next page (keyset
+        pagination, so deep pages cost the same as the first one).
+        """
+        
+        start, end = self._time_range(days, today_only)
+        
+        query = "SELECT * FROM file_operations WHERE timestamp >= ?"
+        params: List[Any] = [start]
+        
+        if end:
+            query += " AND timestamp < ?"
+            params.append(end)
+        
+        if before:
+            query += " AND (timestamp < ? OR (timestamp = ? AND id < ?))"
+            params.extend([before[0], before[0], before[1]])
+        
+        query += " ORDER BY timestamp DESC, id DESC"
+        
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
         
         with sqlite3.connect(self.rollback_db) as conn:
-            if today_only:
-                # Show only today's operations
-                today = datetime.now().strftime('%Y-%m-%d')
-                cursor = conn.execute("""
-                    SELECT * FROM file_operations 
-                    WHERE DATE(timestamp) = ?
-                    ORDER BY timestamp DESC
-                    LIMIT 200
-                """, (today,))
-            else:
-                # Show operations from last N days
-                if days >= 30:
-                    # Show all operations for large day ranges
-                    cursor = conn.execute("""
-                        SELECT * FROM file_operations 
-                        ORDER BY timestamp DESC
-                    """)
-                else:
-                    since_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-                    cursor = conn.execute("""
-                        SELECT * FROM file_operations 
-                        WHERE DATE(timestamp) >= ?
-                        ORDER BY timestamp DESC
-                        LIMIT 200
-                    """, (since_date,))
-            
-            operations = []
-            for row in cursor.fetchall():
-                # Map columns from file_operations schema:
-                # [0]=id, [1]=timestamp, [2]=action, [3]=src_path, [4]=dst_path, [5]=confidence, [6]=details
-                
-                details = {}
-                if len(row) > 6 and row[6]:
-                    try:
-                        details = json.loads(row[6])
-                    except:
-                        pass
-                
-                # Extract fields from details or columns
-                original_filename = Path(row[3]).name if row[3] else "unknown"
-                new_filename = Path(row[4]).name if row[4] else "unknown"
-                new_location = str(Path(row[4]).parent) if row[4] else ""
-                
-                op = FileOperation(
-                    rollback_id=row[0],
-                    timestamp=row[1],
-                    operation_type=row[2],
-                    original_path=row[3] if row[3] else '',
-                    original_filename=original_filename,
-                    new_filename=new_filename,
-                    new_location=new_location,
-                    confidence=row[5] if row[5] else 0.0,
-                    status='active', # file_operations doesn't track status yet, assume active
-                    google_drive_id=details.get('google_drive_id'),
-                    notes=details.get('notes', '')
-                )
-                operations.append(op)
+            cursor = conn.execute(query, params)
+            operations = [self._row_to_operation(row) for row in cursor.fetchall()]
         
         return operations
     
+    def count_operations(self, days: int = 7, today_only: bool = False) -> int:
+        """Count operations in a day window using the timestamp index"""
+        
+        start, end = self._time_range(days, today_only)
+        
+        with sqlite3.connect(self.rollback_db) as conn:
+            if end:
+                cursor = conn.execute(
+                    "SELECT COUNT(*) FROM file_operations WHERE timestamp >= ? AND timestamp < ?",
+                    (start, end)
+                )
+            else:
+                cursor = conn.execute("SELECT COUNT(*) FROM file_operations WHERE timestamp >= ?", (start,))
+            return cursor.fetchone()[0]
+    
+    def archive_old_operations(self, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = 5000) -> int:
+        """
+        Move operations older than `older_than_days` into file_operations_archive.
+        
+        Works in batches so a first run on a large log never holds the write
+        lock for long. Archived operations stay searchable but can no longer
+        be undone from the UI.
+        
+        Returns:
+            Number of operations archived
+        """
+        
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).date().isoformat()
+        archived_at = datetime.now().isoformat(timespec="seconds")
+        total = 0
+        
+        with sqlite3.connect(self.rollback_db) as conn:
+            while True:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM file_operations WHERE timestamp < ? ORDER BY timestamp LIMIT ?",
+                    (cutoff, batch_size)
+                )]
+                if not ids:
+                    break
+                
+                placeholders = ",".join("?" * len(ids))
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO file_operations_archive
+                    (id, timestamp, action, src_path, dst_path, confidence, details, archived_at)
+                    SELECT id, timestamp, action, src_path, dst_path, confidence, details, ?
+                    FROM file_operations WHERE id IN ({placeholders})
+                """, [archived_at, *ids])
+                conn.execute(f"DELETE FROM file_operations WHERE id IN ({placeholders})", ids)
+                conn.commit()
+                total += len(ids)
+        
+        return total
+    
     def display_operations_friendly(self, operations: List[FileOperation]):
         """Display operations in an ADHD-friendly format"""
         
@@ -409,23 +486,7 @@ class EasyRollbackSystem:
                 except:
                     pass
 
-            original_filename = Path(row[3]).name if row[3] else "unknown"
-            new_filename = Path(row[4]).name if row[4] else "unknown"
-            new_location = str(Path(row[4]).parent) if row[4] else ""
-
-            operation = FileOperation(
-                rollback_id=row[0],
-                timestamp=row[1],
-                operation_type=row[2],
-                original_path=row[3] if row[3] else '',
-                original_filename=original_filename,
-                new_filename=new_filename,
-                new_location=new_location,
-                confidence=row[5] if row[5] else 0.0,
-                status='active', # file_operations doesn't track status yet
-                google_drive_id=details.get('google_drive_id'),
-                notes=details.get('notes', '')
-            )
+            operation = self._row_to_operation(row)
         
         # Check if already rolled back (need to implement status tracking in file_operations)
         # For now, we trust the user's intent to undo
@@ -473,6 +534,7 @@ class EasyRollbackSystem:
                 'success': False,
                 'error': 'Google Drive API not available'
             }
+        from googleapiclient.errors import HttpError
         
         try:
             # Authenticate if needed
@@ -542,53 +604,68 @@ class EasyRollbackSystem:
             'error': f"Could not find file '{operation.new_filename}' to rollback"
         }
     
-    def undo_today_operations(self) -> Dict[str, Any]:
-        """Undo all operations from today"""
+    def undo_today_operations(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Undo all operations from today (dependency-ordered, batched)"""
+        
+        from bulk_undo_engine import BulkUndoEngine
         
-        today_ops = self.show_recent_operations(today_only=True)
-        active_ops = [op for op in today_ops if op.status == 'active']
+        engine = BulkUndoEngine(self)
+        plan = engine.plan_today()
+        
+        if dry_run:
+            return {
+                'success': True,
+                'message': f"Would roll back {len(plan.steps)} operations (~{plan.estimated_seconds:.1f}s)",
+                'count': 0,
+                'plan': plan.summary()
+            }
         
-        if not active_ops:
+        if not plan.steps:
             return {
                 'success': True,
                 'message': 'No active operations from today to undo',
                 'count': 0
             }
         
-        print(f"🔄 ROLLING BACK {len(active_ops)} OPERATIONS FROM TODAY")
-        
-        success_count = 0
-        failed_count = 0
-        
-        for op in active_ops:
-            result = self.undo_operation(op.rollback_id)
-            if result['success']:
-                success_count += 1
-            else:
-                failed_count += 1
+        print(f"🔄 ROLLING BACK {len(plan.steps)} OPERATIONS FROM TODAY ({plan.waves} waves)")
         
-        return {
-            'success': success_count > 0,
-            'message': f"Rolled back {success_count} operations, {failed_count} failed",
-            'count': success_count,
-            'failed': failed_count
-        }
+        return engine.execute(plan)
     
-    def search_operations(self, search_term: str) -> List[FileOperation]:
-        """Search for operations by filename"""
+    def search_operations(self, search_term: str, days: int = 30, limit: Optional[int] = 200,
+                          before: Optional[Tuple[str, int]] = None,
+                          include_archived: bool = False, today_only: bool = False) -> List[FileOperation]:
+        """Search for operations by filename or location (newest first, keyset paginated)"""
+        
+        start, end = self._time_range(days, today_only)
+        escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        
+        tables = ["file_operations"] + (["file_operations_archive"] if include_archived else [])
+        selects = []
+        params: List[Any] = []
+        
+        for table in tables:
+            select = f"""
+                SELECT id, timestamp, action, src_path, dst_path, confidence, details FROM {table}
+                WHERE timestamp >= ?
+                  AND (src_path LIKE ? ESCAPE '\\' OR dst_path LIKE ? ESCAPE '\\')
+            """
+            params.extend([start, pattern, pattern])
+            if end:
+                select += " AND timestamp < ?"
+                params.append(end)
+            if before:
+                select += " AND (timestamp < ? OR (timestamp = ? AND id < ?))"
+                params.extend([before[0], before[0], before[1]])
+            selects.append(select)
+        
+        query = " UNION ALL ".join(selects) + " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
         
-        all_operations = self.show_recent_operations(days=30)  # Search last 30 days
-        
-        search_lower = search_term.lower()
-        matching_ops = []
-        
-        for op in all_operations:
-            if (search_lower in op.original_filename.lower() or 
-                search_lower in op.new_filename.lower() or
-                search_lower in op.new_location.lower()):
-                matching_ops.append(op)
-        
-        return matching_ops
+        with sqlite3.connect(self.rollback_db) as conn:
+            return [self._row_to_operation(row) for row in conn.execute(query, params).fetchall()]
     
     def create_gui_interface(self):
         """Create a simple GUI for non-technical users"""
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+File Event Pipeline
+
+Debounces and coalesces watchdog events per path, then hands them to a small,
+bounded pool of worker threads. Replaces drain-and-sleep polling: a file drop
+is picked up as soon as it has been quiet for the debounce window, and a burst
+(e.g. unzipping thousands of files) is absorbed in a bounded pending map and
+processed in batches instead of as one giant serial pass.
+
+Usage:
+    pipeline = FileEventPipeline(process_batch, open_worker_resources=open_dbs)
+    threading.Thread(target=pipeline.run, daemon=True).start()
+    pipeline.submit({'type': 'created', 'path': '/Users/me/Downloads/a.pdf', 'timestamp': datetime.now()})
+"""
+
+import time
+import heapq
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A created file that is then modified is still just a new file
+_MERGED_TYPES = {
+    ("created", "modified"): "created",
+    ("modified", "created"): "created",
+}
+
+
+def event_key(event: Dict[str, Any]) -> Tuple:
+    """Coalescing key: moves are kept per (src, dest); everything else per (type group, path)"""
+    if event["type"] == "moved":
+        return ("moved", event["src_path"], event["dest_path"])
+    if event["type"] == "folder_created":
+        return ("folder", event["path"])
+    return ("file", event["path"])
+
+
+class FileEventPipeline:
+    """
+    Debounced, coalescing event queue with a bounded worker pool.
+
+    - submit() never blocks the watchdog thread. Events for the same path
+      merge while pending (created + modified -> created, repeated modifies
+      -> one), and a move drops pending work for its source path.
+    - An event is dispatched once its path has been quiet for debounce_sec,
+      or max_delay_sec after it was first seen, whichever comes first.
+    - At most max_pending paths are held; beyond that new events are dropped
+      and on_overflow() is called once the backlog drains so the caller can
+      rescan instead.
+    - Workers each open their resources (e.g. SQLite connections) once via
+      open_worker_resources() and reuse them for every batch.
+    - A path is never processed by two workers at the same time.
+    """
+
+    def __init__(self,
+                 process_batch: Callable[[List[Dict[str, Any]], Any], None],
+                 open_worker_resources: Optional[Callable[[], Any]] = None,
+                 close_worker_resources: Optional[Callable[[Any], None]] = None,
+                 workers: int = 2,
+                 debounce_sec: float = 0.5,
+                 max_delay_sec: float = 5.0,
+                 max_batch: int = 100,
+                 max_pending: int = 50000,
+                 on_overflow: Optional[Callable[[], None]] = None):
+        self.process_batch = process_batch
+        self.open_worker_resources = open_worker_resources
+        self.close_worker_resources = close_worker_resources
+        self.workers = max(1, workers)
+        self.debounce_sec = debounce_sec
+        self.max_delay_sec = max_delay_sec
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.on_overflow = on_overflow
+
+        # key -> {"event", "first_seen", "last_seen", "seq"}, in arrival order
+        self._pending: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        # (due, seq, key) min-heap; an item is stale unless its seq is the entry's current one
+        self._due: List[Tuple[float, int, Tuple]] = []
+        self._seq = 0
+        self._in_flight = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._overflowed = False
+
+        # Small hand-off queue: when workers are busy the dispatcher waits and
+        # events keep coalescing in _pending instead of piling up here
+        self._batches: "queue.Queue[Optional[List[Tuple[Tuple, Dict[str, Any]]]]]" = queue.Queue(maxsize=self.workers)
+        self._worker_threads: List[threading.Thread] = []
+
+        self.stats = {"received": 0, "coalesced": 0, "dropped": 0, "processed": 0, "batches": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Producer side (watchdog threads)
+    # ------------------------------------------------------------------
+
+    def submit(self, event: Dict[str, Any]):
+        now = time.monotonic()
+        key = event_key(event)
+        with self._cond:
+            self.stats["received"] += 1
+
+            if event["type"] == "moved":
+                # The source no longer exists; pending create/modify work for it is moot
+                if self._pending.pop(("file", event["src_path"]), None) is not None:
+                    self.stats["coalesced"] += 1
+
+            entry = self._pending.get(key)
+            if entry is not None:
+                previous = entry["event"]["type"]
+                merged_type = _MERGED_TYPES.get((previous, event["type"]), event["type"])
+                entry["event"] = dict(event, type=merged_type)
+                due = self._due_time(entry)
+                entry["last_seen"] = now
+                new_due = self._due_time(entry)
+                if new_due != due:
+                    self._schedule(key, entry, new_due)
+                self.stats["coalesced"] += 1
+            elif len(self._pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                self._overflowed = True
+                return
+            else:
+                entry = self._pending[key] = {"event": event, "first_seen": now, "last_seen": now}
+                self._schedule(key, entry, self._due_time(entry))
+            self._cond.notify()
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Dispatcher
+    # ------------------------------------------------------------------
+
+    def _due_time(self, entry: Dict[str, Any]) -> float:
+        return min(entry["last_seen"] + self.debounce_sec, entry["first_seen"] + self.max_delay_sec)
+
+    def _schedule(self, key: Tuple, entry: Dict[str, Any], due: float):
+        """Push a heap item for key, superseding any earlier one (caller holds _cond)"""
+        self._seq += 1
+        entry["seq"] = self._seq
+        heapq.heappush(self._due, (due, self._seq, key))
+
+    def _take_ready(self, now: float) -> Tuple[List[Tuple[Tuple, Dict[str, Any]]], Optional[float]]:
+        """Pop up to max_batch ready events; also return seconds until the next one is ready"""
+        ready = []
+        while self._due and self._due[0][0] <= now:
+            _, seq, key = heapq.heappop(self._due)
+            entry = self._pending.get(key)
+            if entry is None or entry["seq"] != seq:
+                continue
+            if key in self._in_flight:
+                # Rescheduled by the worker when the path's current batch finishes
+                continue
+            ready.append((key, self._pending.pop(key)["event"]))
+            self._in_flight.add(key)
+            if len(ready) >= self.max_batch:
+                return ready, 0.0
+        return ready, (self._due[0][0] - now if self._due else None)
+
+    def run(self, should_run: Callable[[], bool] = lambda: True):
+        """Dispatch loop; blocks until stop() is called or should_run() turns false"""
+        self._start_workers()
+        try:
+            while should_run():
+                with self._cond:
+                    if self._stopping:
+                        break
+                    batch, next_ready = self._take_ready(time.monotonic())
+                    if not batch:
+                        if not self._pending and self._overflowed:
+                            self._overflowed = False
+                            overflowed = True
+                        else:
+                            overflowed = False
+                            # Wake on new events, at the next debounce deadline, or to recheck should_run
+                            self._cond.wait(timeout=min(next_ready if next_ready is not None else 1.0, 1.0))
+                if batch:
+                    self._batches.put(batch)
+                elif overflowed and self.on_overflow:
+                    logger.warning(f"File event backlog overflowed ({self.stats['dropped']} dropped); rescanning")
+                    try:
+                        self.on_overflow()
+                    except Exception as e:
+                        logger.error(f"Overflow handler failed: {e}")
+        finally:
+            self._stop_workers()
+            # Events still pending are kept for the next run()
+            with self._cond:
+                self._stopping = False
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _start_workers(self):
+        self._worker_threads = [
+            threading.Thread(target=self._worker, name=f"file-events-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self._worker_threads:
+            thread.start()
+
+    def _stop_workers(self):
+        for _ in self._worker_threads:
+            self._batches.put(None)
+        for thread in self._worker_threads:
+            thread.join(timeout=10)
+        self._worker_threads = []
+
+    def _worker(self):
+        resources = None
+        if self.open_worker_resources:
+            try:
+                resources = self.open_worker_resources()
+            except Exception as e:
+                logger.error(f"File event worker could not open its resources: {e}")
+
+        try:
+            while True:
+                batch = self._batches.get()
+                if batch is None:
+                    break
+                try:
+                    self.process_batch([event for _, event in batch], resources)
+                    with self._cond:
+                        self.stats["processed"] += len(batch)
+                        self.stats["batches"] += 1
+                except Exception as e:
+                    logger.error(f"Error processing file event batch: {e}")
+                    with self._cond:
+                        self.stats["errors"] += 1
+                finally:
+                    with self._cond:
+                        for key, _ in batch:
+                            self._in_flight.discard(key)
+                            # Events for this path that arrived meanwhile may now be ready
+                            entry = self._pending.get(key)
+                            if entry is not None:
+                                self._schedule(key, entry, self._due_time(entry))
+                        self._cond.notify()
+        finally:
+            if resources is not None and self.close_worker_resources:
+                try:
+                    self.close_worker_resources(resources)
+                except Exception as e:
+                    logger.warning(f"Error closing file event worker resources: {e}")
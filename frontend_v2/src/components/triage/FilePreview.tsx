@@ -1,5 +1,6 @@
 import { useMemo } from 'react'
 import MediaPreview from './MediaPreview'
+import ImagePreview from './ImagePreview'
 import DocumentPreview from './DocumentPreview'
 import JsonSidecarViewer from './JsonSidecarViewer'
 
@@ -12,6 +13,7 @@ export default function FilePreview({ filePath, fileName }: FilePreviewProps) {
     const fileType = useMemo(() => {
         const ext = fileName.split('.').pop()?.toLowerCase()
 
+        if (['jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp', 'tif', 'tiff', 'heic'].includes(ext || '')) return 'image'
         if (['mp4', 'mov', 'avi', 'mkv', 'webm'].includes(ext || '')) return 'video'
         if (['mp3', 'wav', 'm4a', 'flac', 'ogg'].includes(ext || '')) return 'audio'
         if (['pdf'].includes(ext || '')) return 'pdf'
@@ -27,7 +29,9 @@ export default function FilePreview({ filePath, fileName }: FilePreviewProps) {
     return (
         <div className="mb-6">
             <div className="mb-4">
-                {fileType === 'video' || fileType === 'audio' ? (
+                {fileType === 'image' ? (
+                    <ImagePreview filePath={filePath} fileName={fileName} />
+                ) : fileType === 'video' || fileType === 'audio' ? (
                     <MediaPreview filePath={filePath} fileType={fileType} />
                 ) : (
                     <DocumentPreview
@@ -0,0 +1,37 @@
+import { useState } from 'react'
+
+interface ImagePreviewProps {
+    filePath: string
+    fileName: string
+}
+
+export default function ImagePreview({ filePath, fileName }: ImagePreviewProps) {
+    const [error, setError] = useState(false)
+
+    // Server-rendered thumbnails (cached by content) instead of the full-size original
+    const thumbnailUrl = (size: number) =>
+        `/api/previews/thumbnail?path=${encodeURIComponent(filePath)}&size=${size}`
+
+    if (error) {
+        return (
+            <div className="w-full h-48 bg-black/20 rounded-lg flex items-center justify-center text-white/50 text-sm">
+                Image preview not available.
+            </div>
+        )
+    }
+
+    return (
+        <div className="w-full bg-black/40 rounded-xl overflow-hidden border border-white/10 flex justify-center">
+            <img
+                src={thumbnailUrl(320)}
+                srcSet={`${thumbnailUrl(320)} 320w, ${thumbnailUrl(1024)} 1024w`}
+                sizes="(max-width: 640px) 320px, 1024px"
+                alt={fileName}
+                loading="lazy"
+                decoding="async"
+                className="max-h-96 object-contain"
+                onError={() => setError(true)}
+            />
+        </div>
+    )
+}
@@ -1,5 +1,6 @@
 import { useState, useRef, useEffect } from 'react'
 import { Play, Pause, Volume2, VolumeX } from 'lucide-react'
+import type { WaveformResponse } from '../../types/api'
 
 interface MediaPreviewProps {
     filePath: string
@@ -11,6 +12,7 @@ export default function MediaPreview({ filePath, fileType }: MediaPreviewProps)
     const [isMuted, setIsMuted] = useState(false)
     const [progress, setProgress] = useState(0)
     const [error, setError] = useState<string | null>(null)
+    const [peaks, setPeaks] = useState<number[]>([])
 
     const mediaRef = useRef<HTMLVideoElement | HTMLAudioElement>(null)
     const MAX_AUDIO_DURATION = 15 // seconds
@@ -18,6 +20,27 @@ export default function MediaPreview({ filePath, fileType }: MediaPreviewProps)
     // Construct the streaming URL
     // Use encodeURIComponent to handle spaces and special characters in paths
     const mediaUrl = `/api/files/content?path=${encodeURIComponent(filePath)}`
+    // Videos play a short low-bitrate preview clip; the original is never downloaded
+    const videoPreviewUrl = `/api/previews/video?path=${encodeURIComponent(filePath)}`
+    const posterUrl = `/api/previews/poster?path=${encodeURIComponent(filePath)}`
+
+    useEffect(() => {
+        if (fileType !== 'audio') return
+        let cancelled = false
+
+        fetch(`/api/previews/waveform?path=${encodeURIComponent(filePath)}`)
+            .then((response) => (response.ok ? response.json() : null))
+            .then((data: WaveformResponse | null) => {
+                if (!cancelled && data) setPeaks(data.peaks)
+            })
+            .catch(() => {
+                // The waveform is decoration; the player still works without it
+            })
+
+        return () => {
+            cancelled = true
+        }
+    }, [filePath, fileType])
 
     useEffect(() => {
         const media = mediaRef.current
@@ -84,10 +107,29 @@ export default function MediaPreview({ filePath, fileType }: MediaPreviewProps)
                     </div>
                     <div className="flex-1">
                         <div className="text-xs text-white/50 mb-1">Audio Preview</div>
+                        {peaks.length > 0 && (
+                            <svg
+                                className="w-full h-10 mb-2 text-primary"
+                                viewBox={`0 0 ${peaks.length} 100`}
+                                preserveAspectRatio="none"
+                            >
+                                {peaks.map((peak, index) => (
+                                    <rect
+                                        key={index}
+                                        x={index}
+                                        y={50 - peak * 50}
+                                        width={0.8}
+                                        height={Math.max(1, peak * 100)}
+                                        fill="currentColor"
+                                    />
+                                ))}
+                            </svg>
+                        )}
                         <audio
                             controls
+                            preload="none"
                             className="w-full h-8"
-                            src={`/api/files/content?path=${encodeURIComponent(filePath)}`}
+                            src={mediaUrl}
                         >
                             Your browser does not support the audio element.
                         </audio>
@@ -110,7 +152,9 @@ export default function MediaPreview({ filePath, fileType }: MediaPreviewProps)
             {fileType === 'video' ? (
                 <video
                     ref={mediaRef as React.RefObject<HTMLVideoElement>}
-                    src={mediaUrl}
+                    src={videoPreviewUrl}
+                    poster={posterUrl}
+                    preload="none"
                     className="w-full aspect-video object-contain bg-black"
                     onClick={togglePlay}
                 />
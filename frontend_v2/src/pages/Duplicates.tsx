@@ -1,14 +1,15 @@
 import { useState, useEffect } from 'react'
-import { Copy, Trash2, FileCheck, AlertCircle, FolderOpen, HardDrive, CheckCircle2, Info } from 'lucide-react'
+import { Copy, Trash2, FileCheck, AlertCircle, FolderOpen, HardDrive, CheckCircle2, Info, Images } from 'lucide-react'
 import { toast } from 'sonner'
 import { api } from '../services/api'
-import type { DuplicateGroup, SystemStatus } from '../types/api'
+import type { DuplicateGroup, NearDuplicateGroup, SystemStatus } from '../types/api'
 import { formatPath } from '../lib/utils'
 import { useQuery } from '@tanstack/react-query'
 
 
 export default function Duplicates() {
   const [duplicateGroups, setDuplicateGroups] = useState<DuplicateGroup[]>([])
+  const [nearDuplicateGroups, setNearDuplicateGroups] = useState<NearDuplicateGroup[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [isScanning, setIsScanning] = useState(false)
   const [selectedKeepIndex, setSelectedKeepIndex] = useState<Record<string, number>>({})
@@ -33,6 +34,7 @@ export default function Duplicates() {
       setIsScanning(true)
       const response = await api.getDuplicates()
       setDuplicateGroups(response.groups)
+      setNearDuplicateGroups(response.near_duplicate_groups)
 
       // Initialize selected keep index for each group (default to first file)
       const initialSelections: Record<string, number> = {}
@@ -295,6 +297,56 @@ export default function Duplicates() {
         </div>
       )}
 
+      {/* Near-Duplicate Groups (visually similar, different bytes) */}
+      {nearDuplicateGroups.length > 0 && (
+        <div className="space-y-4">
+          <div>
+            <h2 className="text-xl font-semibold text-white">Similar Images, Videos & Recordings</h2>
+            <p className="text-white/60 mt-1 text-sm">
+              Same picture or recording at a different resolution or format. Review these by hand; they are never cleaned automatically.
+            </p>
+          </div>
+          {nearDuplicateGroups.map((group) => (
+            <div
+              key={group.group_id}
+              className="bg-white/[0.07] backdrop-blur-xl border border-white/10 rounded-2xl p-6 shadow-glass animate-fade-in"
+            >
+              <div className="flex items-center gap-3 mb-4">
+                <div className="p-2 bg-primary/20 rounded-lg">
+                  <Images size={20} className="text-primary" />
+                </div>
+                <div>
+                  <div className="text-sm font-semibold text-white">
+                    {group.files.length} similar {group.kind === 'video' ? 'videos' : group.kind === 'audio' ? 'recordings' : 'images'}
+                  </div>
+                  <div className="text-xs text-white/60">
+                    Total size: {formatFileSize(group.total_size)} • Largest copy listed first
+                  </div>
+                </div>
+              </div>
+              <div className="space-y-2">
+                {group.files.map((file) => (
+                  <div key={file.path} className="p-3 rounded-lg border-2 bg-white/5 border-white/10">
+                    <div className="flex items-center gap-2 mb-1">
+                      <FolderOpen size={14} className="text-white/60 flex-shrink-0" />
+                      <div className="text-sm font-medium text-white truncate">{getFileName(file.path)}</div>
+                    </div>
+                    <div className="text-xs text-white/40 font-mono truncate">
+                      {formatPath(file.path, driveRoot)}
+                    </div>
+                    <div className="flex items-center gap-3 mt-1 text-xs text-white/60">
+                      <span>{formatFileSize(file.size)}</span>
+                      <span>•</span>
+                      <span>{formatDate(file.modified)}</span>
+                    </div>
+                  </div>
+                ))}
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+
       {/* Info Box */}
       <div className="bg-white/[0.07] backdrop-blur-xl border border-white/10 rounded-2xl p-4 shadow-glass">
         <div className="flex items-start gap-3">
@@ -302,6 +354,8 @@ export default function Duplicates() {
           <div className="text-sm text-white/70">
             <strong className="text-white">How it works:</strong> Duplicates are identified by identical file content (SHA-256 hash).
             Select which copy to keep, and the others will be safely moved to the rollback system.
+            Similar images and videos are matched by perceptual hash, and the same recording in different
+            audio formats by acoustic fingerprint; these are only listed for review.
             You can undo any operation from Settings → Rollback.
           </div>
         </div>
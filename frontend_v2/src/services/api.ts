@@ -24,7 +24,53 @@ import type {
 
 const API_BASE = 'http://localhost:8000'
 
+const JOB_TERMINAL_STATES = ['succeeded', 'failed', 'cancelled']
+
 export const api = {
+  // ===== Background Jobs =====
+
+  getJob: async (jobId: string) => {
+    const response = await fetch(`${API_BASE}/api/jobs/${jobId}`)
+    if (!response.ok) throw new Error('Failed to fetch job')
+    const json = await response.json()
+    return json.data
+  },
+
+  cancelJob: async (jobId: string) => {
+    const response = await fetch(`${API_BASE}/api/jobs/${jobId}/cancel`, { method: 'POST' })
+    if (!response.ok) throw new Error('Failed to cancel job')
+    const json = await response.json()
+    return json.data
+  },
+
+  // Fetch every result page of a job
+  getAllJobResults: async (jobId: string) => {
+    const items: any[] = []
+    let offset: number | null = 0
+    while (offset !== null) {
+      const response = await fetch(`${API_BASE}/api/jobs/${jobId}/results?offset=${offset}&limit=500`)
+      if (!response.ok) throw new Error('Failed to fetch job results')
+      const json = await response.json()
+      items.push(...json.data.items)
+      offset = json.data.next_offset
+    }
+    return items
+  },
+
+  // Poll a background job until it finishes; resolves with the finished job
+  waitForJob: async (jobId: string, onProgress?: (job: any) => void, intervalMs: number = 1000) => {
+    while (true) {
+      const job = await api.getJob(jobId)
+      onProgress?.(job)
+
+      if (JOB_TERMINAL_STATES.includes(job.status)) {
+        if (job.status === 'failed') throw new Error(job.error || 'Job failed')
+        return job
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+  },
+
   getSystemStatus: async (): Promise<SystemStatus> => {
     const response = await fetch(`${API_BASE}/api/system/status`)
     if (!response.ok) throw new Error('Failed to fetch system status')
@@ -56,6 +102,25 @@ export const api = {
     }
   },
 
+  // Push channel for system status: full snapshot first, then only changed components.
+  // Returns an unsubscribe function.
+  subscribeSystemStatus: (onStatus: (status: any) => void) => {
+    const source = new EventSource(`${API_BASE}/api/system/status/stream`)
+    let current: any = null
+
+    source.addEventListener('snapshot', (event) => {
+      current = JSON.parse((event as MessageEvent).data)
+      onStatus(current)
+    })
+    source.addEventListener('delta', (event) => {
+      const delta = JSON.parse((event as MessageEvent).data)
+      current = { ...current, ...delta.changes, version: delta.version }
+      onStatus(current)
+    })
+
+    return () => source.close()
+  },
+
   getLearningStats: async (): Promise<LearningStats> => {
     const response = await fetch(`${API_BASE}/api/settings/learning-stats`)
     if (!response.ok) throw new Error('Failed to fetch learning stats')
@@ -147,8 +212,9 @@ export const api = {
 
     // Support multiple backend response formats for robustness
     const groups = json.groups || json.data?.service_stats?.groups || json.data?.findings?.groups || []
+    const near_duplicate_groups = json.near_duplicate_groups || json.data?.findings?.near_duplicate_groups || []
 
-    return { groups }
+    return { groups, near_duplicate_groups }
   },
 
   cleanDuplicates: async (groupId: string, keepIndex: number) => {
@@ -160,7 +226,11 @@ export const api = {
       body: JSON.stringify({ group_id: groupId, keep_index: keepIndex }),
     })
     if (!response.ok) throw new Error('Failed to clean duplicates')
-    return await response.json()
+
+    // Cleanup runs as a background job
+    const accepted = await response.json()
+    const job = await api.waitForJob(accepted.job_id)
+    return job.result
   },
 
   // Monitor Status endpoint
@@ -216,7 +286,7 @@ export const api = {
     return await response.json()
   },
 
-  undoToday: async () => {
+  undoToday: async (onProgress?: (progress: any) => void) => {
     const response = await fetch(`${API_BASE}/api/rollback/undo-today`, {
       method: 'POST',
     })
@@ -226,7 +296,25 @@ export const api = {
       throw new Error(error.detail || 'Failed to undo today\'s operations')
     }
 
-    return await response.json()
+    // The rollback runs as a background job; poll until it finishes
+    const accepted = await response.json()
+    const job = await api.waitForJob(accepted.job_id, (job) => onProgress?.(job.progress))
+    const result = job.result || {}
+    if (job.status === 'succeeded' && result.success === false && !result.count) {
+      throw new Error(result.message || 'Failed to undo today\'s operations')
+    }
+    return { ...result, status: job.status, count: result.count || 0 }
+  },
+
+  planUndoToday: async () => {
+    const response = await fetch(`${API_BASE}/api/rollback/undo-today?dry_run=true`, {
+      method: 'POST',
+    })
+
+    if (!response.ok) throw new Error('Failed to plan rollback')
+
+    const json = await response.json()
+    return json.data.plan
   },
 
   classifyFile: async (filePath: string, confirmedCategory: string, project?: string, episode?: string) => {
@@ -265,7 +353,7 @@ export const api = {
     return await response.json()
   },
 
-  scanCustomFolder: async (folderPath: string) => {
+  scanCustomFolder: async (folderPath: string, onProgress?: (job: any) => void) => {
     const response = await fetch(`${API_BASE}/api/triage/scan_folder`, {
       method: 'POST',
       headers: {
@@ -281,7 +369,13 @@ export const api = {
       throw new Error(error.detail || 'Failed to scan folder')
     }
 
-    return await response.json()
+    // The scan runs as a background job; wait for it, then page in the files
+    const accepted = await response.json()
+    const job = await api.waitForJob(accepted.job_id, onProgress)
+    if (job.result?.status === 'error') throw new Error(job.result.message)
+
+    const files = await api.getAllJobResults(accepted.job_id)
+    return { ...job.result, files, job_id: accepted.job_id }
   },
 
   searchFiles: async (query: string) => {
@@ -135,8 +135,20 @@ export interface DuplicateGroup {
   total_size: number
 }
 
+export interface NearDuplicateGroup extends DuplicateGroup {
+  match: 'near_duplicate'
+  kind: 'image' | 'video' | 'audio'
+  max_distance: number
+}
+
+export interface WaveformResponse {
+  duration: number
+  peaks: number[]
+}
+
 export interface DuplicatesResponse {
   groups: DuplicateGroup[]
+  near_duplicate_groups: NearDuplicateGroup[]
 }
 
 export interface MonitorStatus {
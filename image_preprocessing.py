@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Image Preprocessing
+Turns originals into the small images the vision model actually needs,
+without fully decoding multi-hundred-megapixel photos in the caller.
+
+Each analysis type has a target size (IMAGE_TARGETS). For a target the
+pipeline decodes as little as it can:
+  - an embedded EXIF thumbnail, when it is already big enough
+  - JPEG draft mode, which decodes at 1/2, 1/4 or 1/8 scale straight from
+    the DCT coefficients
+  - the smallest sufficient page of a pyramidal TIFF
+then downscales, applies the EXIF orientation and flattens alpha onto
+white. Images that would still decode to more than MAX_DECODE_PIXELS are
+refused (ImageTooLarge) rather than allowed to balloon memory.
+
+Rendering runs in a process pool and the result is stored as a JPEG in the
+derivative cache, keyed by content fingerprint, so each original is
+decoded at most once per target size.
+
+Usage:
+    preprocessor = get_image_preprocessor()
+    image = preprocessor.load(path, "vision")           # PIL image, <= 1536px
+    derived = preprocessor.prepare_many(paths, "ocr")   # {path: derived JPEG path}
+
+Benchmark:
+    python image_preprocessing.py --benchmark ~/Pictures/Exports --purpose vision
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import argparse
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    from PIL import Image, ExifTags
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+from derivative_cache import DerivativeCache, get_derivative_cache
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering changes so stale derivatives are not reused
+PIPELINE_VERSION = "1"
+
+# Largest image (after draft/page selection) the pipeline will decode:
+# ~240 MB as RGB
+MAX_DECODE_PIXELS = 80_000_000
+
+
+@dataclass
+class ImageTarget:
+    """Output size and JPEG quality for one analysis type"""
+    max_dimension: int
+    quality: int = 90
+
+
+# Scene analysis doesn't gain from more than 2x2 Gemini tiles (768px each);
+# text extraction keeps more resolution for small print.
+IMAGE_TARGETS: Dict[str, ImageTarget] = {
+    "vision": ImageTarget(max_dimension=1536, quality=90),
+    "ocr": ImageTarget(max_dimension=3072, quality=92),
+    # Triage UI thumbnails (preview_service)
+    "thumbnail_small": ImageTarget(max_dimension=160, quality=75),
+    "thumbnail": ImageTarget(max_dimension=320, quality=80),
+    "preview": ImageTarget(max_dimension=1024, quality=82),
+}
+
+_EXIF_ORIENTATION = 0x0112
+_EXIF_THUMBNAIL_OFFSET = 0x0201
+_EXIF_THUMBNAIL_LENGTH = 0x0202
+
+
+class ImageTooLarge(Exception):
+    """Raised when an image can't be reduced below MAX_DECODE_PIXELS before decoding"""
+
+    def __init__(self, path: str, size: Tuple[int, int]):
+        super().__init__(f"{Path(path).name} would decode to {size[0]}x{size[1]} pixels")
+        self.path = path
+        self.size = size
+
+    def __reduce__(self):
+        # Raised in pool workers, so it must survive pickling
+        return ImageTooLarge, (self.path, self.size)
+
+
+def _orientation(img: "Image.Image") -> int:
+    try:
+        return int(img.getexif().get(_EXIF_ORIENTATION, 1))
+    except Exception:
+        return 1
+
+
+def _exif_thumbnail(img: "Image.Image", max_dimension: int) -> Optional["Image.Image"]:
+    """Embedded EXIF thumbnail if it covers max_dimension"""
+    raw = img.info.get("exif")
+    if not raw:
+        return None
+    try:
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset, length = ifd1.get(_EXIF_THUMBNAIL_OFFSET), ifd1.get(_EXIF_THUMBNAIL_LENGTH)
+        if not offset or not length:
+            return None
+        # Offsets are relative to the TIFF header that follows "Exif\0\0"
+        base = 6 if raw.startswith(b"Exif\x00\x00") else 0
+        thumbnail = Image.open(io.BytesIO(raw[base + offset:base + offset + length]))
+        if max(thumbnail.size) < max_dimension:
+            return None
+        # Cameras often letterbox 3:2 photos into a 4:3 thumbnail
+        if abs(thumbnail.width / thumbnail.height - img.width / img.height) > 0.02:
+            return None
+        thumbnail.load()
+        return thumbnail
+    except Exception:
+        return None
+
+
+def _smallest_sufficient_page(img: "Image.Image", max_dimension: int):
+    """For pyramidal TIFFs, seek to the smallest page still >= max_dimension"""
+    best_frame, best_pixels = 0, img.width * img.height
+    for frame in range(1, getattr(img, "n_frames", 1)):
+        img.seek(frame)
+        if max(img.size) >= max_dimension and img.width * img.height < best_pixels:
+            best_frame, best_pixels = frame, img.width * img.height
+    img.seek(best_frame)
+
+
+def _flatten(img: "Image.Image") -> "Image.Image":
+    """RGB or L, with any transparency composited onto white (Gemini ignores alpha)"""
+    if img.mode == "P" and "transparency" in img.info:
+        img = img.convert("RGBA")
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img.convert("RGBA"), mask=img.getchannel("A"))
+        return background
+    if img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    return img
+
+
+def decode_image(image_path: str, max_dimension: int, max_pixels: int = MAX_DECODE_PIXELS) -> "Image.Image":
+    """
+    Decode an image at no more than about twice max_dimension and return it
+    downscaled to fit max_dimension, upright, as RGB or L.
+    """
+    with Image.open(image_path) as img:
+        orientation = _orientation(img)
+
+        decoded = _exif_thumbnail(img, max_dimension)
+        if decoded is None:
+            if img.format == "JPEG":
+                img.draft(img.mode if img.mode in ("RGB", "L") else None, (max_dimension, max_dimension))
+            elif img.format == "TIFF":
+                _smallest_sufficient_page(img, max_dimension)
+            if img.width * img.height > max_pixels:
+                raise ImageTooLarge(image_path, img.size)
+            decoded = img
+
+        if decoded.mode not in ("RGB", "L", "RGBA", "LA"):
+            # Palette, 1-bit, CMYK and 16-bit modes don't resample well (or at all)
+            decoded = _flatten(decoded)
+        # reducing_gap lets PIL reduce() by an integer factor before resampling
+        decoded.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    transpose = {
+        2: Image.Transpose.FLIP_LEFT_RIGHT, 3: Image.Transpose.ROTATE_180,
+        4: Image.Transpose.FLIP_TOP_BOTTOM, 5: Image.Transpose.TRANSPOSE,
+        6: Image.Transpose.ROTATE_270, 7: Image.Transpose.TRANSVERSE,
+        8: Image.Transpose.ROTATE_90,
+    }.get(orientation)
+    if transpose is not None:
+        decoded = decoded.transpose(transpose)
+    return _flatten(decoded)
+
+
+def _init_decode_worker():
+    """
+    Pool initializer. PIL refuses to even open images above MAX_IMAGE_PIXELS,
+    which are exactly the ones draft mode and page selection shrink; workers
+    rely on decode_image's MAX_DECODE_PIXELS check instead.
+    """
+    Image.MAX_IMAGE_PIXELS = None
+
+
+def render_image(image_path: str, max_dimension: int, target_path: str, quality: int = 90) -> Tuple[int, int]:
+    """Process-pool entry point: decode, downscale and write a JPEG derivative"""
+    img = decode_image(image_path, max_dimension)
+    img.save(target_path, "JPEG", quality=quality, optimize=True)
+    return img.size
+
+
+class ImagePreprocessor:
+    """
+    Renders and caches downscaled images per analysis type. Rendering runs
+    in a process pool, so decode memory spikes never land in the caller.
+    """
+
+    def __init__(self, cache: Optional[DerivativeCache] = None, max_workers: Optional[int] = None):
+        self.cache = cache or get_derivative_cache()
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self.stats = {"rendered": 0, "cache_hits": 0, "failed": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_decode_worker)
+            return self._pool
+
+    def cache_key(self, image_path: Path, purpose: str = "vision") -> str:
+        """Cache key of the derived JPEG, without rendering it (raises FileNotFoundError)"""
+        target = IMAGE_TARGETS[purpose]
+        key = self.cache.file_key(image_path, f"image.{purpose}", PIPELINE_VERSION,
+                                  f"{target.max_dimension}:{target.quality}")
+        if key is None:
+            raise FileNotFoundError(str(image_path))
+        return key
+
+    def _lookup(self, image_path: Path, purpose: str) -> Tuple[Optional[str], Optional[Path]]:
+        key = self.cache_key(image_path, purpose)
+        derived = self.cache.get(key)
+        if derived is not None:
+            self.stats["cache_hits"] += 1
+        return key, derived
+
+    def _submit(self, image_path: Path, purpose: str, key: str):
+        target = IMAGE_TARGETS[purpose]
+        reserved = self.cache.reserve(key, ".jpg")
+        future = self._executor().submit(
+            render_image, str(image_path), target.max_dimension, str(reserved), target.quality)
+        return reserved, future
+
+    def _collect(self, image_path: Path, purpose: str, key: str, reserved: Path, future) -> Path:
+        try:
+            future.result()
+        except Exception:
+            self.stats["failed"] += 1
+            reserved.unlink(missing_ok=True)
+            raise
+        self.stats["rendered"] += 1
+        derived = self.cache.commit(key, f"image.{purpose}", reserved)
+        if derived is None:
+            raise OSError(f"Could not store preprocessed {image_path.name}")
+        return derived
+
+    def prepare(self, image_path: Path, purpose: str = "vision") -> Path:
+        """
+        Path of the derived JPEG for an analysis type, rendering it on a
+        miss. Raises ImageTooLarge, FileNotFoundError or the decoder's error.
+        """
+        image_path = Path(image_path)
+        key, derived = self._lookup(image_path, purpose)
+        if derived is not None:
+            return derived
+        reserved, future = self._submit(image_path, purpose, key)
+        return self._collect(image_path, purpose, key, reserved, future)
+
+    def prepare_many(self, image_paths: Iterable[Path], purpose: str = "vision") -> Dict[str, Optional[Path]]:
+        """prepare() for a batch, rendering misses in parallel (None for failures)"""
+        results: Dict[str, Optional[Path]] = {}
+        pending = []
+        for image_path in map(Path, image_paths):
+            try:
+                key, derived = self._lookup(image_path, purpose)
+            except OSError as e:
+                logger.warning(f"Cannot preprocess {image_path.name}: {e}")
+                results[str(image_path)] = None
+                continue
+            if derived is not None:
+                results[str(image_path)] = derived
+            else:
+                pending.append((image_path, key, *self._submit(image_path, purpose, key)))
+
+        for image_path, key, reserved, future in pending:
+            try:
+                results[str(image_path)] = self._collect(image_path, purpose, key, reserved, future)
+            except Exception as e:
+                logger.warning(f"Preprocessing failed for {image_path.name}: {e}")
+                results[str(image_path)] = None
+        return results
+
+    def load(self, image_path: Path, purpose: str = "vision") -> "Image.Image":
+        """Derived image for an analysis type, opened and loaded"""
+        derived = self.prepare(image_path, purpose)
+        with Image.open(derived) as img:
+            img.load()
+            return img.copy()
+
+    def shutdown(self, wait: bool = True):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+
+_image_preprocessor: Optional[ImagePreprocessor] = None
+_image_preprocessor_lock = threading.Lock()
+
+
+def get_image_preprocessor() -> ImagePreprocessor:
+    """Shared ImagePreprocessor backed by the shared derivative cache"""
+    global _image_preprocessor
+    with _image_preprocessor_lock:
+        if _image_preprocessor is None:
+            _image_preprocessor = ImagePreprocessor()
+        return _image_preprocessor
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def _legacy_load(image_path: str) -> Tuple[int, int]:
+    """The previous VisionAnalyzer._load_image: full decode, LANCZOS to 3072px"""
+    img = Image.open(image_path)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    if max(img.size) > 3072:
+        ratio = 3072 / max(img.size)
+        img = img.resize(tuple(int(dim * ratio) for dim in img.size), Image.Resampling.LANCZOS)
+    img.load()
+    return img.size
+
+
+def _peak_rss_mb(who: int) -> float:
+    import resource
+    peak = resource.getrusage(who).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark(directory: Path, purpose: str = "vision", workers: Optional[int] = None) -> Dict[str, Any]:
+    """Throughput of the old in-process load vs. the pipeline on the images in a directory"""
+    import resource
+    import tempfile
+
+    paths = [p for p in sorted(Path(directory).rglob("*"))
+             if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".webp", ".bmp"}]
+    if not paths:
+        raise ValueError(f"No images in {directory}")
+
+    started = time.perf_counter()
+    for path in paths:
+        try:
+            _legacy_load(str(path))
+        except Exception as e:
+            logger.warning(f"Legacy load failed for {path.name}: {e}")
+    legacy_sec = time.perf_counter() - started
+    legacy_rss = _peak_rss_mb(resource.RUSAGE_SELF)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        preprocessor = ImagePreprocessor(DerivativeCache(root=Path(scratch)), max_workers=workers)
+        started = time.perf_counter()
+        results = preprocessor.prepare_many(paths, purpose)
+        pipeline_sec = time.perf_counter() - started
+        started = time.perf_counter()
+        preprocessor.prepare_many(paths, purpose)
+        cached_sec = time.perf_counter() - started
+        preprocessor.shutdown()
+
+    return {
+        "images": len(paths),
+        "failed": sum(1 for derived in results.values() if derived is None),
+        "legacy_images_per_sec": round(len(paths) / legacy_sec, 2),
+        "pipeline_images_per_sec": round(len(paths) / pipeline_sec, 2),
+        "cached_images_per_sec": round(len(paths) / cached_sec, 2),
+        "legacy_peak_rss_mb": round(legacy_rss, 1),
+        "worker_peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        "workers": preprocessor.max_workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image preprocessing for vision analysis")
+    parser.add_argument("--benchmark", metavar="DIR", required=True, help="Directory of images to benchmark")
+    parser.add_argument("--purpose", choices=sorted(IMAGE_TARGETS), default="vision")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    for name, value in benchmark(Path(args.benchmark).expanduser(), args.purpose, args.workers).items():
+        print(f"{name:>26}: {value}")
+
+
+if __name__ == "__main__":
+    main()
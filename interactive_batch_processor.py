@@ -23,8 +23,10 @@ import sqlite3
 import json
 import logging
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import re
 
 # Import existing system components
@@ -36,6 +38,7 @@ from confidence_system import ADHDFriendlyConfidenceSystem, ConfidenceLevel
 from content_extractor import ContentExtractor
 from gdrive_integration import get_ai_organizer_root, get_metadata_root
 from easy_rollback_system import EasyRollbackSystem
+from minhash_lsh import MinHasher, LSHIndex
 
 @dataclass
 class FilePreview:
@@ -105,6 +108,13 @@ class InteractiveBatchProcessor:
             "similarity_threshold": 0.7,    # Similarity threshold for grouping
             "auto_process_threshold": 0.85, # Confidence for automatic processing
             "keyword_limit": 10,            # Maximum keywords per file
+            "minhash_permutations": 128,    # MinHash signature length
+            "lsh_bands": 32,                # LSH bands (rows per band = permutations / bands)
+            "lsh_min_files": 200,           # Below this, compare all pairs exhaustively
+            "preview_workers": 4,           # Worker threads generating previews
+            "first_screen_files": 50,       # Files grouped before start_batch_session returns
+            "stream_chunk_files": 500,      # Files per progressively streamed chunk
+            "signature_cache_size": 20000,  # MinHash signatures kept in memory
             "group_by_preferences": [
                 "duplicates",
                 "similar_content", 
@@ -117,9 +127,22 @@ class InteractiveBatchProcessor:
         # Content preview cache
         self.preview_cache = {}
         
+        # MinHash signatures of content keywords, keyed by (path, mtime, size)
+        # so edited files get a fresh signature; least recently used are evicted
+        self.minhasher = MinHasher(num_perm=self.config["minhash_permutations"])
+        self.content_signatures: "OrderedDict[Tuple[str, str, float], Tuple[int, ...]]" = OrderedDict()
+        self._signature_lock = threading.Lock()
+        
         # Active batch sessions
         self.active_sessions = {}
         
+        # Per-thread content index connections for preview workers; each
+        # session's pool registers its connections in that session's list
+        self._worker_local = threading.local()
+        
+        # The learning system isn't thread-safe; concurrent sessions take turns
+        self._prediction_lock = threading.Lock()
+        
         # Statistics
         self.stats = {
             "batches_processed": 0,
@@ -154,6 +177,11 @@ class InteractiveBatchProcessor:
                 )
             """)
             
+            # Migrate older caches: MinHash signatures live next to the preview
+            existing_columns = {row[1] for row in conn.execute("PRAGMA table_info(file_previews)")}
+            if "minhash_signature" not in existing_columns:
+                conn.execute("ALTER TABLE file_previews ADD COLUMN minhash_signature TEXT")
+            
             # Batch sessions
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS batch_sessions (
@@ -202,13 +230,19 @@ class InteractiveBatchProcessor:
             
             conn.commit()
 
-    def start_batch_session(self, source_directory: str, session_name: str = None) -> str:
+    def start_batch_session(self, source_directory: str, session_name: str = None, wait: bool = False) -> str:
         """
         Start a new batch processing session
         
+        Previews are generated in a worker pool in the background. The first
+        screen of files is grouped as soon as its previews exist, so this
+        returns quickly; the rest are grouped in one pass over the whole
+        session once every preview is in.
+        
         Args:
             source_directory: Directory to process
             session_name: Optional name for the session
+            wait: Block until every preview has been generated and grouped
             
         Returns:
             Session ID
@@ -227,58 +261,266 @@ class InteractiveBatchProcessor:
         if not files_found:
             raise ValueError(f"No processable files found in {source_directory}")
         
+        # Keep related files (same folder, numbered copies) in the same streamed chunk
+        files_found.sort(key=lambda p: (str(p.parent), p.name.lower()))
+        
         self.logger.info(f"Starting batch session {session_id} with {len(files_found)} files")
         
-        # Create file previews
-        file_previews = []
+        session_data = {
+            "session_id": session_id,
+            "session_name": session_name or f"Batch_{datetime.now().strftime('%Y%m%d_%H%M')}",
+            "start_time": datetime.now(),
+            "source_directory": str(source_path),
+            "total_files": len(files_found),
+            "file_previews": [],
+            "batch_groups": [],
+            "current_group_index": 0,
+            "processed_groups": [],
+            "pending_operations": [],
+            "user_decisions": [],
+            "status": "generating_previews",
+            "preview_progress": {
+                "total": len(files_found),
+                "completed": 0,
+                "cached": 0,
+                "failed": 0,
+                "chunks_grouped": 0
+            },
+            "groups_ready": threading.Condition()
+        }
+        
+        self.active_sessions[session_id] = session_data
+        
+        worker = threading.Thread(
+            target=self._generate_session_previews,
+            args=(session_id, files_found),
+            name=f"batch-previews-{session_id}",
+            daemon=True
+        )
+        worker.start()
+        
+        # Return as soon as the first screen is ready (or everything, if asked to wait)
+        with session_data["groups_ready"]:
+            session_data["groups_ready"].wait_for(
+                lambda: session_data["status"] != "generating_previews" or
+                        (not wait and session_data["preview_progress"]["chunks_grouped"] > 0)
+            )
+        
+        if session_data["status"] == "failed":
+            raise RuntimeError(f"Batch session initialization failed: {session_data.get('error')}")
+        
+        self.logger.info(f"Batch session {session_id} ready with {len(session_data['batch_groups'])} groups so far")
+        
+        return session_id
+
+    def _generate_session_previews(self, session_id: str, files_found: List[Path]):
+        """
+        Background preview generation for a session.
+        
+        Cached previews (matched on path, size and mtime) are returned without
+        touching the pool; misses are fanned out to worker threads. The first
+        screen and every later chunk are grouped as soon as their previews are
+        available, with likely duplicates kept in the same chunk. Similar-content
+        groups after the first screen stay open across chunks (later files find
+        them through a session-wide LSH index) and are released once full or
+        when generation finishes.
+        """
+        
+        session = self.active_sessions[session_id]
+        progress = session["preview_progress"]
+        condition = session["groups_ready"]
+        
+        # Bucket files by duplicate key so copies always land in the same chunk
+        buckets: Dict[Any, List[Path]] = {}
+        for file_path in files_found:
+            key = self._duplicate_key_for_path(file_path)
+            buckets.setdefault(key if key is not None else file_path, []).append(file_path)
+        
+        chunks: List[List[Path]] = [[]]
+        limit = self.config["first_screen_files"]
+        for bucket in buckets.values():
+            if chunks[-1] and len(chunks[-1]) + len(bucket) > limit:
+                chunks.append([])
+                limit = self.config["stream_chunk_files"]
+            chunks[-1].extend(bucket)
+        
+        # Open similar-content groups, keyed by their first file, for later chunks to join
+        seed_index = LSHIndex(num_perm=self.config["minhash_permutations"], bands=self.config["lsh_bands"])
+        open_groups: Dict[str, BatchGroup] = {}
+        
+        # Content index connections opened by this session's preview workers
+        worker_connections: List[sqlite3.Connection] = []
         
-        # OPTIMIZATION: Reuse database connection for batch processing
-        # This prevents N+1 connection overhead (opens 1 connection instead of 2*N)
         try:
-            with sqlite3.connect(self.batch_db_path) as conn:
-                # Also reuse content index connection
-                content_db_path = self.content_extractor.db_path
-                with sqlite3.connect(content_db_path) as content_conn:
-                    for file_path in files_found:
-                        preview = self._generate_file_preview(
-                            file_path,
-                            db_connection=conn,
-                            content_db_connection=content_conn
-                        )
+            # All batch DB access stays on this thread; workers only use content DB connections
+            with sqlite3.connect(self.batch_db_path) as conn, \
+                 ThreadPoolExecutor(max_workers=self.config["preview_workers"],
+                                    thread_name_prefix=f"preview-{session_id}",
+                                    initializer=self._init_preview_worker,
+                                    initargs=(worker_connections,)) as executor:
+                
+                # Short-circuit cached previews and queue every miss up front so
+                # the pool keeps working ahead while earlier chunks are grouped
+                submitted = []
+                for chunk in chunks:
+                    cached = []
+                    futures = {}
+                    for file_path in chunk:
+                        file_hash = self._calculate_file_hash(file_path)
+                        cached_preview = self._get_cached_preview(str(file_path), file_hash, conn)
+                        if cached_preview:
+                            self.stats["preview_cache_hits"] += 1
+                            cached.append(cached_preview)
+                            with condition:
+                                progress["cached"] += 1
+                                progress["completed"] += 1
+                        else:
+                            # Workers extract content; predictions are made per chunk in one batch
+                            futures[executor.submit(self._build_file_preview, file_path, None, False)] = (file_path, file_hash)
+                    submitted.append((cached, futures))
+                
+                for chunk_index, (cached, futures) in enumerate(submitted):
+                    chunk_previews = list(cached)
+                    built = []
+                    
+                    for future in as_completed(futures):
+                        file_path, file_hash = futures[future]
+                        try:
+                            preview = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Error generating preview for {file_path}: {e}")
+                            preview = None
+                        
                         if preview:
-                            file_previews.append(preview)
-
-                # Group files intelligently (CPU bound, no DB)
-                batch_groups = self._create_intelligent_groups(file_previews)
-
-                # Create session
-                session_data = {
-                    "session_id": session_id,
-                    "session_name": session_name or f"Batch_{datetime.now().strftime('%Y%m%d_%H%M')}",
-                    "start_time": datetime.now(),
-                    "source_directory": str(source_path),
-                    "total_files": len(files_found),
-                    "file_previews": file_previews,
-                    "batch_groups": batch_groups,
-                    "current_group_index": 0,
-                    "processed_groups": [],
-                    "pending_operations": [],
-                    "user_decisions": [],
-                    "status": "active"
-                }
-
-                self.active_sessions[session_id] = session_data
-
+                            built.append((preview, file_hash))
+                        
+                        with condition:
+                            progress["completed"] += 1
+                            if not preview:
+                                progress["failed"] += 1
+                    
+                    self._predict_previews([preview for preview, _ in built])
+                    for preview, file_hash in built:
+                        signature = self._get_content_signature(preview)
+                        self._cache_preview(preview.file_path, file_hash, preview, conn, signature=signature)
+                        chunk_previews.append(preview)
+                    conn.commit()
+                    
+                    # Group every chunk as it arrives (CPU bound, no DB); the
+                    # first screen is released whole so there's something to review
+                    if chunk_index == 0:
+                        chunk_groups = self._create_intelligent_groups(chunk_previews)
+                    else:
+                        chunk_groups = self._group_streamed_chunk(chunk_previews, seed_index, open_groups)
+                    
+                    with condition:
+                        session["file_previews"].extend(chunk_previews)
+                        session["batch_groups"].extend(chunk_groups)
+                        progress["chunks_grouped"] += 1
+                        condition.notify_all()
+                
+                if open_groups:
+                    with condition:
+                        session["batch_groups"].extend(open_groups.values())
+                        condition.notify_all()
+                
                 # Record session in database (reusing connection)
-                self._record_batch_session(session_data, db_connection=conn)
-
+                self._record_batch_session(session, db_connection=conn)
+            
+            self._close_worker_connections(worker_connections)
+            
+            with condition:
+                session["status"] = "active"
+                condition.notify_all()
+            
+            self.logger.info(f"Batch session {session_id} created with {len(session['batch_groups'])} groups")
+            
         except Exception as e:
             self.logger.error(f"Error in batch session initialization: {e}")
-            raise
+            self._close_worker_connections(worker_connections)
+            with condition:
+                session["status"] = "failed"
+                session["error"] = str(e)
+                condition.notify_all()
+
+    def _group_streamed_chunk(self, chunk_previews: List[FilePreview], seed_index: LSHIndex,
+                              open_groups: Dict[str, BatchGroup]) -> List[BatchGroup]:
+        """
+        Group one streamed chunk and return the groups ready for review.
         
-        self.logger.info(f"Batch session {session_id} created with {len(batch_groups)} groups")
+        Content files similar to the first file of an open similar-content
+        group join it; the rest are grouped within the chunk. New similar-content
+        groups stay open (and indexed) until they reach max_batch_size.
+        """
         
-        return session_id
+        if "similar_content" not in self.config["group_by_preferences"]:
+            return self._create_intelligent_groups(chunk_previews)
+        
+        # Copies grouped as duplicates in this chunk take priority over similarity
+        duplicate_keys = defaultdict(int)
+        if "duplicates" in self.config["group_by_preferences"]:
+            for fp in chunk_previews:
+                if fp.duplicate_indicator:
+                    duplicate_keys[self._duplicate_key(fp.file_name, fp.file_size_mb)[1]] += 1
+        
+        ready = []
+        remaining = []
+        for fp in chunk_previews:
+            signature = self._get_content_signature(fp)
+            if signature is None or (fp.duplicate_indicator and
+                                     duplicate_keys[self._duplicate_key(fp.file_name, fp.file_size_mb)[1]] > 1):
+                remaining.append(fp)
+                continue
+            
+            seed_path = next((key for key in sorted(seed_index.query(signature))
+                              if key in open_groups and
+                              self._calculate_content_similarity(open_groups[key].file_previews[0], fp) >= self.config["similarity_threshold"]),
+                             None)
+            if seed_path is None:
+                remaining.append(fp)
+                continue
+            
+            group = open_groups[seed_path]
+            group.file_previews.append(fp)
+            group.batch_size = len(group.file_previews)
+            if group.batch_size >= self.config["max_batch_size"]:
+                ready.append(open_groups.pop(seed_path))
+        
+        for group in self._create_intelligent_groups(remaining):
+            seed = group.file_previews[0]
+            signature = self._get_content_signature(seed)
+            if group.group_type == "similar_content" and signature and group.batch_size < self.config["max_batch_size"]:
+                seed_index.insert(seed.file_path, signature)
+                open_groups[seed.file_path] = group
+            else:
+                ready.append(group)
+        
+        return ready
+
+    def iter_batch_groups(self, session_id: str):
+        """Yield a session's groups as they are formed, until preview generation finishes"""
+        
+        if session_id not in self.active_sessions:
+            raise ValueError(f"Session {session_id} not found")
+        
+        session = self.active_sessions[session_id]
+        condition = session["groups_ready"]
+        index = 0
+        
+        while True:
+            with condition:
+                condition.wait_for(
+                    lambda: index < len(session["batch_groups"]) or session["status"] != "generating_previews"
+                )
+                new_groups = session["batch_groups"][index:]
+                finished = session["status"] != "generating_previews"
+            
+            for group in new_groups:
+                yield group
+            index += len(new_groups)
+            
+            if finished and not new_groups:
+                return
 
     def get_session_overview(self, session_id: str) -> Dict[str, Any]:
         """Get overview of batch session"""
@@ -288,17 +530,27 @@ class InteractiveBatchProcessor:
         
         session = self.active_sessions[session_id]
         
+        with session["groups_ready"]:
+            preview_progress = dict(session["preview_progress"])
+            total_groups = len(session["batch_groups"])
+            status = session["status"]
+        
         return {
             "session_id": session_id,
             "session_name": session["session_name"],
             "source_directory": session["source_directory"],
             "total_files": session["total_files"],
-            "total_groups": len(session["batch_groups"]),
+            "total_groups": total_groups,
             "current_group": session["current_group_index"],
             "processed_groups": len(session["processed_groups"]),
             "pending_operations": len(session["pending_operations"]),
-            "status": session["status"],
-            "progress_percent": (len(session["processed_groups"]) / len(session["batch_groups"]) * 100) if session["batch_groups"] else 0
+            "status": status,
+            "progress_percent": (len(session["processed_groups"]) / total_groups * 100) if total_groups else 0,
+            "previews_generated": preview_progress["completed"],
+            "preview_cache_hits": preview_progress["cached"],
+            "preview_failures": preview_progress["failed"],
+            "preview_progress_percent": (preview_progress["completed"] / preview_progress["total"] * 100) if preview_progress["total"] else 100,
+            "generation_complete": status != "generating_previews"
         }
 
     def get_next_group_for_review(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -309,15 +561,23 @@ class InteractiveBatchProcessor:
         
         session = self.active_sessions[session_id]
         
+        # Wait for the next group if previews are still streaming in
+        with session["groups_ready"]:
+            session["groups_ready"].wait_for(
+                lambda: session["current_group_index"] < len(session["batch_groups"]) or
+                        session["status"] != "generating_previews"
+            )
+        
         if session["current_group_index"] >= len(session["batch_groups"]):
             return None  # No more groups
         
         current_group = session["batch_groups"][session["current_group_index"]]
         
         # Check if this group can be processed automatically
-        if (current_group.confidence_level in [ConfidenceLevel.ALWAYS] or
-            (current_group.confidence_level == ConfidenceLevel.SMART and 
-             max(fp.confidence_score for fp in current_group.file_previews) >= self.config["auto_process_threshold"])):
+        if ((current_group.confidence_level in [ConfidenceLevel.ALWAYS] or
+             (current_group.confidence_level == ConfidenceLevel.SMART and 
+              max(fp.confidence_score for fp in current_group.file_previews) >= self.config["auto_process_threshold"])) and
+                self._confidence_allows_automatic(current_group)):
             
             # Process automatically
             self._process_group_automatically(session_id, current_group)
@@ -329,6 +589,23 @@ class InteractiveBatchProcessor:
         
         return group_data
 
+    def _confidence_allows_automatic(self, group: BatchGroup) -> bool:
+        """
+        Ask the confidence system about every file in the group with one batched
+        call; the group is only processed automatically if no file needs the user.
+        """
+        with self._prediction_lock:
+            decisions = self.confidence_system.make_confidence_decisions([
+                {
+                    "file_path": fp.file_path,
+                    "predicted_action": {"target_category": fp.predicted_category},
+                    "system_confidence": fp.confidence_score,
+                    "context": {"content_keywords": fp.content_keywords}
+                }
+                for fp in group.file_previews
+            ])
+        return not any(decision.requires_user_input for decision in decisions)
+
     def process_user_decision(self, session_id: str, group_id: str, user_decision: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process user decision for a group
@@ -405,67 +682,11 @@ class InteractiveBatchProcessor:
                 return cached_preview
             
             # Generate new preview
-            stat_info = file_path.stat()
+            preview = self._build_file_preview(file_path, content_db_connection)
             
-            # Extract content
-            content_preview = ""
-            content_keywords = []
-            content_summary = ""
-            
-            try:
-                if file_path.suffix.lower() in ['.txt', '.md', '.py', '.js', '.css', '.html']:
-                    # Read text files directly
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read(self.config["preview_length"] * 2)
-                        content_preview = content[:self.config["preview_length"]]
-                        content_keywords = self._extract_keywords(content)
-                        content_summary = self._generate_content_summary(content)
-                
-                elif file_path.suffix.lower() in ['.pdf', '.docx', '.doc', '.pages', '.rtf']:
-                    # Use content extractor for documents
-                    extraction_result = self.content_extractor.extract_content(file_path, db_connection=content_db_connection)
-                    if extraction_result['success']:
-                        content = extraction_result['text']
-                        content_preview = content[:self.config["preview_length"]]
-                        content_keywords = self._extract_keywords(content)
-                        content_summary = self._generate_content_summary(content)
-                
-            except Exception as e:
-                self.logger.warning(f"Could not extract content from {file_path}: {e}")
-            
-            # Get prediction from learning system
-            prediction = self.learning_system.predict_user_action(
-                str(file_path), 
-                {"content_keywords": content_keywords}
-            )
-            
-            predicted_category = prediction.get("predicted_action", {}).get("target_category", "unknown")
-            confidence_score = prediction.get("confidence", 0.0)
-            
-            # Check for similar files
-            similar_files = self._find_similar_files(file_path, content_keywords)
-            
-            # Check for duplicates
-            duplicate_indicator = self._is_likely_duplicate(file_path)
-            
-            preview = FilePreview(
-                file_path=str(file_path),
-                file_name=file_path.name,
-                file_size_mb=stat_info.st_size / (1024 * 1024),
-                file_type=file_path.suffix.lower(),
-                creation_date=datetime.fromtimestamp(stat_info.st_ctime),
-                modification_date=datetime.fromtimestamp(stat_info.st_mtime),
-                content_preview=content_preview,
-                content_keywords=content_keywords,
-                content_summary=content_summary,
-                predicted_category=predicted_category,
-                confidence_score=confidence_score,
-                similar_files=similar_files,
-                duplicate_indicator=duplicate_indicator
-            )
-            
-            # Cache the preview
-            self._cache_preview(str(file_path), file_hash, preview, db_connection)
+            # Cache the preview together with its MinHash signature
+            signature = self._get_content_signature(preview)
+            self._cache_preview(str(file_path), file_hash, preview, db_connection, signature=signature)
             
             return preview
             
@@ -473,6 +694,113 @@ class InteractiveBatchProcessor:
             self.logger.error(f"Error generating preview for {file_path}: {e}")
             return None
 
+    def _init_preview_worker(self, session_connections: List[sqlite3.Connection]):
+        """Pool initializer: connections this thread opens belong to its session"""
+        self._worker_local.session_connections = session_connections
+
+    def _get_worker_content_connection(self) -> sqlite3.Connection:
+        """Long-lived content index connection for the current preview worker thread"""
+        conn = getattr(self._worker_local, "content_conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.content_extractor.db_path, timeout=30, check_same_thread=False)
+            self._worker_local.content_conn = conn
+            # list.append is atomic; the session closes these after its pool has shut down
+            getattr(self._worker_local, "session_connections", []).append(conn)
+        return conn
+
+    def _close_worker_connections(self, connections: List[sqlite3.Connection]):
+        """Commit and close a session's preview worker connections (its pool has shut down)"""
+        for conn in connections:
+            try:
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Error closing preview worker connection: {e}")
+
+    def _build_file_preview(self, file_path: Path, content_db_connection: Optional[sqlite3.Connection] = None,
+                            predict: bool = True) -> FilePreview:
+        """
+        Build a fresh preview (content extraction and prediction); safe to run in
+        worker threads. With predict=False the prediction is left to the caller
+        (see _predict_previews).
+        """
+        
+        if content_db_connection is None:
+            content_db_connection = self._get_worker_content_connection()
+        
+        stat_info = file_path.stat()
+        
+        # Extract content
+        content_preview = ""
+        content_keywords = []
+        content_summary = ""
+        
+        try:
+            if file_path.suffix.lower() in ['.txt', '.md', '.py', '.js', '.css', '.html']:
+                # Read text files directly
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read(self.config["preview_length"] * 2)
+                    content_preview = content[:self.config["preview_length"]]
+                    content_keywords = self._extract_keywords(content)
+                    content_summary = self._generate_content_summary(content)
+            
+            elif file_path.suffix.lower() in ['.pdf', '.docx', '.doc', '.pages', '.rtf']:
+                # Use content extractor for documents
+                extraction_result = self.content_extractor.extract_content(file_path, db_connection=content_db_connection)
+                if extraction_result['success']:
+                    content = extraction_result['text']
+                    content_preview = content[:self.config["preview_length"]]
+                    content_keywords = self._extract_keywords(content)
+                    content_summary = self._generate_content_summary(content)
+            
+        except Exception as e:
+            self.logger.warning(f"Could not extract content from {file_path}: {e}")
+        
+        # Check for similar files
+        similar_files = self._find_similar_files(file_path, content_keywords)
+        
+        # Check for duplicates
+        duplicate_indicator = self._is_likely_duplicate(file_path)
+        
+        preview = FilePreview(
+            file_path=str(file_path),
+            file_name=file_path.name,
+            file_size_mb=stat_info.st_size / (1024 * 1024),
+            file_type=file_path.suffix.lower(),
+            creation_date=datetime.fromtimestamp(stat_info.st_ctime),
+            modification_date=datetime.fromtimestamp(stat_info.st_mtime),
+            content_preview=content_preview,
+            content_keywords=content_keywords,
+            content_summary=content_summary,
+            predicted_category="unknown",
+            confidence_score=0.0,
+            similar_files=similar_files,
+            duplicate_indicator=duplicate_indicator
+        )
+        
+        if predict:
+            self._predict_previews([preview])
+        return preview
+
+    def _predict_previews(self, previews: List[FilePreview]):
+        """
+        Fill in predicted category and confidence for a batch of previews with
+        one batched learning system call. The learning system isn't
+        thread-safe, so concurrent sessions take turns.
+        """
+        if not previews:
+            return
+        
+        with self._prediction_lock:
+            predictions = self.learning_system.predict_user_actions(
+                [preview.file_path for preview in previews],
+                [{"content_keywords": preview.content_keywords} for preview in previews]
+            )
+        
+        for preview, prediction in zip(previews, predictions):
+            preview.predicted_category = prediction.get("predicted_action", {}).get("target_category", "unknown")
+            preview.confidence_score = prediction.get("confidence", 0.0)
+
     def _create_intelligent_groups(self, file_previews: List[FilePreview]) -> List[BatchGroup]:
         """Create intelligent groups of similar files"""
         
@@ -546,10 +874,7 @@ class InteractiveBatchProcessor:
         name_size_groups = defaultdict(list)
         
         for fp in duplicate_candidates:
-            # Create a key based on base filename and size
-            base_name = re.sub(r'[\s\-_]*\([0-9]+\)|[\s\-_]*copy[\s\-_]*[0-9]*', '', fp.file_name.lower())
-            size_key = f"{fp.file_size_mb:.1f}mb"
-            key = f"{base_name}_{size_key}"
+            base_name, key = self._duplicate_key(fp.file_name, fp.file_size_mb)
             name_size_groups[key].append(fp)
         
         # Create groups for sets with multiple files
@@ -576,6 +901,17 @@ class InteractiveBatchProcessor:
         
         return groups
 
+    def _duplicate_key(self, file_name: str, file_size_mb: float) -> Tuple[str, str]:
+        """(base filename, key) with copy markers stripped; likely duplicates share the key"""
+        base_name = re.sub(r'[\s\-_]*\([0-9]+\)|[\s\-_]*copy[\s\-_]*[0-9]*', '', file_name.lower())
+        return base_name, f"{base_name}_{file_size_mb:.1f}mb"
+
+    def _duplicate_key_for_path(self, file_path: Path) -> Optional[str]:
+        try:
+            return self._duplicate_key(file_path.name, file_path.stat().st_size / (1024 * 1024))[1]
+        except OSError:
+            return None
+
     def _group_by_similar_content(self, file_previews: List[FilePreview]) -> List[BatchGroup]:
         """Group files with similar content"""
         
@@ -587,29 +923,11 @@ class InteractiveBatchProcessor:
         if len(content_files) < 2:
             return groups
         
-        # Calculate content similarity matrix
-        similarity_groups = []
-        processed = set()
-        
-        for i, fp1 in enumerate(content_files):
-            if fp1.file_path in processed:
-                continue
-            
-            similar_files = [fp1]
-            processed.add(fp1.file_path)
-            
-            for j, fp2 in enumerate(content_files[i+1:], i+1):
-                if fp2.file_path in processed:
-                    continue
-                
-                similarity = self._calculate_content_similarity(fp1, fp2)
-                
-                if similarity >= self.config["similarity_threshold"]:
-                    similar_files.append(fp2)
-                    processed.add(fp2.file_path)
-            
-            if len(similar_files) > 1:
-                similarity_groups.append(similar_files)
+        # Small batches are cheap to compare pairwise; large ones go through LSH
+        if len(content_files) < self.config["lsh_min_files"]:
+            similarity_groups = self._find_similar_content_exhaustive(content_files)
+        else:
+            similarity_groups = self._find_similar_content_lsh(content_files)
         
         # Create batch groups
         for i, file_list in enumerate(similarity_groups):
@@ -638,6 +956,80 @@ class InteractiveBatchProcessor:
         
         return groups
 
+    def _find_similar_content_exhaustive(self, content_files: List[FilePreview]) -> List[List[FilePreview]]:
+        """Greedy similarity grouping comparing every pair of files (O(n²))"""
+        
+        similarity_groups = []
+        processed = set()
+        
+        for i, fp1 in enumerate(content_files):
+            if fp1.file_path in processed:
+                continue
+            
+            similar_files = [fp1]
+            processed.add(fp1.file_path)
+            
+            for fp2 in content_files[i+1:]:
+                if fp2.file_path in processed:
+                    continue
+                
+                similarity = self._calculate_content_similarity(fp1, fp2)
+                
+                if similarity >= self.config["similarity_threshold"]:
+                    similar_files.append(fp2)
+                    processed.add(fp2.file_path)
+            
+            if len(similar_files) > 1:
+                similarity_groups.append(similar_files)
+        
+        return similarity_groups
+
+    def _find_similar_content_lsh(self, content_files: List[FilePreview]) -> List[List[FilePreview]]:
+        """
+        Same greedy grouping as the exhaustive pass, but each file is only
+        compared against its LSH candidates. Candidates are verified with
+        exact Jaccard similarity, so LSH only decides which pairs get checked.
+        """
+        
+        index = LSHIndex(num_perm=self.config["minhash_permutations"], bands=self.config["lsh_bands"])
+        position = {}
+        signatures = []
+        
+        for i, fp in enumerate(content_files):
+            signature = self._get_content_signature(fp)
+            signatures.append(signature)
+            position[fp.file_path] = i
+            index.insert(fp.file_path, signature)
+        
+        similarity_groups = []
+        processed = set()
+        
+        for i, fp1 in enumerate(content_files):
+            if fp1.file_path in processed:
+                continue
+            
+            similar_files = [fp1]
+            processed.add(fp1.file_path)
+            
+            # Visit candidates in original order so results match the exhaustive pass
+            candidates = sorted(position[key] for key in index.query(signatures[i]) if position[key] > i)
+            
+            for j in candidates:
+                fp2 = content_files[j]
+                if fp2.file_path in processed:
+                    continue
+                
+                similarity = self._calculate_content_similarity(fp1, fp2)
+                
+                if similarity >= self.config["similarity_threshold"]:
+                    similar_files.append(fp2)
+                    processed.add(fp2.file_path)
+            
+            if len(similar_files) > 1:
+                similarity_groups.append(similar_files)
+        
+        return similarity_groups
+
     def _group_by_file_type(self, file_previews: List[FilePreview]) -> List[BatchGroup]:
         """Group files by file type"""
         
@@ -983,7 +1375,7 @@ class InteractiveBatchProcessor:
             if db_connection:
                 # Use provided connection
                 cursor = db_connection.execute("""
-                    SELECT preview_data FROM file_previews 
+                    SELECT preview_data, minhash_signature FROM file_previews 
                     WHERE file_path = ? AND file_hash = ?
                 """, (file_path, file_hash))
                 
@@ -1001,12 +1393,13 @@ class InteractiveBatchProcessor:
                     
                     # Convert back to FilePreview object
                     preview = FilePreview(**preview_data)
+                    self._restore_content_signature(preview, result[1])
                     return preview
             else:
                 # Create new connection
                 with sqlite3.connect(self.batch_db_path) as conn:
                     cursor = conn.execute("""
-                        SELECT preview_data FROM file_previews
+                        SELECT preview_data, minhash_signature FROM file_previews
                         WHERE file_path = ? AND file_hash = ?
                     """, (file_path, file_hash))
 
@@ -1024,46 +1417,50 @@ class InteractiveBatchProcessor:
 
                         # Convert back to FilePreview object
                         preview = FilePreview(**preview_data)
+                        self._restore_content_signature(preview, result[1])
                         return preview
         except Exception as e:
             self.logger.error(f"Error getting cached preview: {e}")
         
         return None
 
-    def _cache_preview(self, file_path: str, file_hash: str, preview: FilePreview, db_connection: Optional[sqlite3.Connection] = None):
+    def _cache_preview(self, file_path: str, file_hash: str, preview: FilePreview, db_connection: Optional[sqlite3.Connection] = None, signature: Optional[Tuple[int, ...]] = None):
         """Cache file preview"""
         try:
             preview_data = asdict(preview)
             # Convert datetime objects to ISO strings
             preview_data['creation_date'] = preview.creation_date.isoformat()
             preview_data['modification_date'] = preview.modification_date.isoformat()
+            serialized_signature = MinHasher.serialize(signature) if signature else None
 
             if db_connection:
                 # Use provided connection
                 db_connection.execute("""
                     INSERT OR REPLACE INTO file_previews 
-                    (file_path, file_hash, preview_data, generated_time, last_accessed)
-                    VALUES (?, ?, ?, ?, ?)
+                    (file_path, file_hash, preview_data, generated_time, last_accessed, minhash_signature)
+                    VALUES (?, ?, ?, ?, ?, ?)
                 """, (
                     file_path,
                     file_hash, 
                     json.dumps(preview_data),
                     datetime.now().isoformat(),
-                    datetime.now().isoformat()
+                    datetime.now().isoformat(),
+                    serialized_signature
                 ))
             else:
                 # Create new connection
                 with sqlite3.connect(self.batch_db_path) as conn:
                     conn.execute("""
                         INSERT OR REPLACE INTO file_previews
-                        (file_path, file_hash, preview_data, generated_time, last_accessed)
-                        VALUES (?, ?, ?, ?, ?)
+                        (file_path, file_hash, preview_data, generated_time, last_accessed, minhash_signature)
+                        VALUES (?, ?, ?, ?, ?, ?)
                     """, (
                         file_path,
                         file_hash,
                         json.dumps(preview_data),
                         datetime.now().isoformat(),
-                        datetime.now().isoformat()
+                        datetime.now().isoformat(),
+                        serialized_signature
                     ))
                     conn.commit()
         except Exception as e:
@@ -1113,6 +1510,38 @@ class InteractiveBatchProcessor:
         ]
         return any(indicator in filename for indicator in duplicate_indicators)
 
+    def _signature_key(self, preview: FilePreview) -> Tuple[str, str, float]:
+        """Cache key for a preview's signature; cached previews carry ISO date strings"""
+        mtime = preview.modification_date
+        if isinstance(mtime, datetime):
+            mtime = mtime.isoformat()
+        return preview.file_path, mtime, preview.file_size_mb
+
+    def _remember_content_signature(self, key: Tuple[str, str, float], signature: Tuple[int, ...]):
+        with self._signature_lock:
+            self.content_signatures[key] = signature
+            self.content_signatures.move_to_end(key)
+            while len(self.content_signatures) > self.config["signature_cache_size"]:
+                self.content_signatures.popitem(last=False)
+
+    def _get_content_signature(self, preview: FilePreview) -> Optional[Tuple[int, ...]]:
+        """Get (or compute and remember) the MinHash signature of a preview's keywords"""
+        key = self._signature_key(preview)
+        with self._signature_lock:
+            signature = self.content_signatures.get(key)
+            if signature is not None:
+                self.content_signatures.move_to_end(key)
+        if signature is None and preview.content_keywords:
+            signature = self.minhasher.signature(preview.content_keywords)
+            self._remember_content_signature(key, signature)
+        return signature
+
+    def _restore_content_signature(self, preview: FilePreview, serialized: Optional[str]):
+        """Load a persisted MinHash signature for a cached preview"""
+        signature = MinHasher.deserialize(serialized)
+        if signature and len(signature) == self.minhasher.num_perm:
+            self._remember_content_signature(self._signature_key(preview), signature)
+
     def _calculate_content_similarity(self, fp1: FilePreview, fp2: FilePreview) -> float:
         """Calculate content similarity between two files"""
         if not fp1.content_keywords or not fp2.content_keywords:
@@ -1450,6 +1879,8 @@ def main():
             
             overview = processor.get_session_overview(session_id)
             print(f"📊 Total files: {overview['total_files']}, Groups: {overview['total_groups']}")
+            print(f"🔄 Previews: {overview['previews_generated']}/{overview['total_files']} "
+                  f"({overview['preview_cache_hits']} cached)")
             
         except Exception as e:
             print(f"❌ Error starting batch session: {e}")
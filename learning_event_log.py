@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Learning Event Log
+Append-only, segmented storage for UniversalAdaptiveLearning.
+
+Each learning event, and each pattern or preference it creates or changes,
+is appended as one pickled record to the current log segment, so persisting
+is O(new records) instead of re-pickling the whole history. Once enough
+records have accumulated the full state is written as a compact snapshot
+and the segments it covers are deleted. Startup loads the snapshot and
+replays only the segments written after it.
+
+Layout (inside the log directory):
+    snapshot.pkl            {"covered_segment": n, "events": [...], "patterns": {...}, "preferences": {...}}
+    segment-00000042.log    pickled (kind, record) tuples, kind in {"event", "pattern", "preference"}
+
+Usage:
+    log = LearningEventLog(learning_dir / "event_log")
+    state = log.load()                     # None if nothing has been stored yet
+    log.append("event", learning_event)
+    log.sync()
+    if log.needs_compaction:
+        log.write_snapshot({"events": events, "patterns": patterns, "preferences": preferences})
+"""
+
+import os
+import re
+import pickle
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RECORD_KINDS = ("event", "pattern", "preference")
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{8})\.log$")
+
+
+class LearningEventLog:
+    """
+    Segmented append-only log plus snapshot.
+
+    A new segment is started on every open (a torn record at the end of the
+    previous one is never appended to) and whenever the current segment
+    exceeds segment_max_bytes.
+    """
+
+    def __init__(self, log_dir: Path, segment_max_bytes: int = 4 * 1024 * 1024,
+                 compact_after_records: int = 5000):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshot_file = self.log_dir / "snapshot.pkl"
+        self.segment_max_bytes = segment_max_bytes
+        self.compact_after_records = compact_after_records
+
+        self._lock = threading.RLock()
+        self._segment = None
+        self._segment_seq = 0
+        self._covered_segment = 0
+        self.records_since_snapshot = 0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.log_dir / f"segment-{seq:08d}.log"
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        segments = []
+        for path in self.log_dir.iterdir():
+            match = _SEGMENT_RE.match(path.name)
+            if match:
+                segments.append((int(match.group(1)), path))
+        return sorted(segments)
+
+    def _read_segment(self, path: Path) -> Iterator[Tuple[str, Any]]:
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    kind, record = pickle.load(f)
+                except EOFError:
+                    return
+                except Exception as e:
+                    # Torn write at the end of a segment (crash mid-append)
+                    logger.warning(f"Stopping replay of {path.name} at a damaged record: {e}")
+                    return
+                yield kind, record
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Snapshot plus replayed tail segments, or None if nothing is stored.
+        The result also lists the pattern/preference ids touched by the tail
+        ("tail_pattern_ids", "tail_preference_ids").
+        """
+        with self._lock:
+            state = None
+            if self.snapshot_file.exists():
+                try:
+                    with open(self.snapshot_file, "rb") as f:
+                        state = pickle.load(f)
+                except Exception as e:
+                    logger.warning(f"Could not load learning snapshot: {e}")
+
+            segments = self._segments()
+            if state is None and not segments:
+                return None
+
+            state = state or {"covered_segment": 0, "events": [], "patterns": {}, "preferences": {}}
+            self._covered_segment = state.get("covered_segment", 0)
+            tail_patterns, tail_preferences = set(), set()
+            seen_events = {event.event_id for event in state["events"]}
+
+            for seq, path in segments:
+                if seq <= self._covered_segment:
+                    continue
+                for kind, record in self._read_segment(path):
+                    self.records_since_snapshot += 1
+                    if kind == "event":
+                        if record.event_id not in seen_events:
+                            seen_events.add(record.event_id)
+                            state["events"].append(record)
+                    elif kind == "pattern":
+                        state["patterns"][record.pattern_id] = record
+                        tail_patterns.add(record.pattern_id)
+                    elif kind == "preference":
+                        state["preferences"][record.preference_id] = record
+                        tail_preferences.add(record.preference_id)
+
+            self._segment_seq = max([self._covered_segment] + [seq for seq, _ in segments])
+            state["tail_pattern_ids"] = tail_patterns
+            state["tail_preference_ids"] = tail_preferences
+            return state
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def _open_next_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_seq += 1
+        self._segment = open(self._segment_path(self._segment_seq), "ab")
+
+    def append(self, kind: str, record: Any):
+        """Append one record; it reaches the OS immediately and disk on sync()"""
+        if kind not in RECORD_KINDS:
+            raise ValueError(f"Unknown learning log record kind: {kind}")
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_max_bytes:
+                self._open_next_segment()
+            pickle.dump((kind, record), self._segment, protocol=pickle.HIGHEST_PROTOCOL)
+            self._segment.flush()
+            self.records_since_snapshot += 1
+
+    def sync(self):
+        """fsync the current segment"""
+        with self._lock:
+            if self._segment is not None:
+                os.fsync(self._segment.fileno())
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.records_since_snapshot >= self.compact_after_records
+
+    # ------------------------------------------------------------------
+    # Snapshot / compaction
+    # ------------------------------------------------------------------
+
+    def write_snapshot(self, state: Dict[str, Any]):
+        """
+        Write the full state as the new snapshot and delete every segment it
+        covers. state holds "events", "patterns" and "preferences".
+        """
+        with self._lock:
+            # Everything appended so far is in `state`; later appends go to a new segment
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            covered = self._segment_seq
+
+            snapshot = {
+                "covered_segment": covered,
+                "events": list(state["events"]),
+                "patterns": dict(state["patterns"]),
+                "preferences": dict(state["preferences"]),
+            }
+            temp_fd, temp_path = tempfile.mkstemp(dir=self.log_dir, suffix=".tmp")
+            try:
+                with os.fdopen(temp_fd, "wb") as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.snapshot_file)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+
+            self._covered_segment = covered
+            self.records_since_snapshot = 0
+            for seq, path in self._segments():
+                if seq <= covered:
+                    try:
+                        path.unlink()
+                    except OSError as e:
+                        logger.warning(f"Could not remove compacted segment {path.name}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
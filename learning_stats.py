@@ -14,7 +14,11 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import json
+import time
 from collections import defaultdict
+from metrics_store import MetricsStore, MetricPoint, DAY
+
+CORRECTIONS_SERIES = "learning.corrections"
 
 project_dir = Path(__file__).parent
 sys.path.insert(0, str(project_dir))
@@ -35,6 +39,10 @@ class LearningStatsTracker:
         # Database for learning statistics
         self.db_path = self.stats_dir / "learning_tracking.db"
         self._init_learning_db()
+
+        # Correction counts are rolled up here so accuracy reads O(buckets)
+        self.metrics = MetricsStore(get_metadata_root() / "databases" / "metrics.db")
+        self._backfill_correction_metrics()
         
         # Load metadata database path
         self.metadata_db = get_metadata_root() / "metadata_tracking.db"
@@ -129,36 +137,56 @@ class LearningStatsTracker:
                 file_path_obj.suffix.lower(), correction_reason
             ))
             conn.commit()
+
+        self.metrics.record(CORRECTIONS_SERIES, value=original_confidence,
+                            dims={"original_category": original_category})
         
         # Check for learning milestones
         self._check_learning_milestones()
     
+    def _backfill_correction_metrics(self):
+        """Seed the correction rollups once from corrections recorded before the metrics store"""
+        if not self.metrics.is_empty(CORRECTIONS_SERIES):
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT original_category, original_confidence, correction_date
+                FROM classification_corrections
+            """).fetchall()
+        self.metrics.record_many(
+            MetricPoint(CORRECTIONS_SERIES, value=confidence or 0.0,
+                        dims={"original_category": category},
+                        ts=datetime.fromisoformat(date).timestamp())
+            for category, confidence, date in rows
+        )
+    
     def calculate_accuracy_metrics(self, days_back: int = 7) -> Dict[str, Any]:
         """Calculate accuracy metrics for recent classifications"""
         
         cutoff_date = (datetime.now() - timedelta(days=days_back)).isoformat()
         
-        # Get recent classifications from metadata
+        # Aggregate recent classifications in SQL instead of loading every row
         with sqlite3.connect(self.metadata_db) as conn:
-            df_metadata = pd.read_sql_query("""
-                SELECT ai_category, confidence_score, classification_method, 
-                       processing_mode, file_type, indexed_date, file_path
+            rows = conn.execute("""
+                SELECT ai_category, COUNT(*), AVG(confidence_score),
+                       SUM(confidence_score >= 0.9),
+                       SUM(confidence_score >= 0.7 AND confidence_score < 0.9),
+                       SUM(confidence_score < 0.7)
                 FROM file_metadata
                 WHERE indexed_date > ?
                 AND ai_category != 'Classification_Failed'
-                ORDER BY indexed_date DESC
-            """, conn, params=[cutoff_date])
-        
-        # Get corrections in same period
-        with sqlite3.connect(self.db_path) as conn:
-            df_corrections = pd.read_sql_query("""
-                SELECT file_path, original_category, corrected_category, 
-                       original_confidence, correction_date, correction_type
-                FROM classification_corrections
-                WHERE correction_date > ?
-            """, conn, params=[cutoff_date])
+                GROUP BY ai_category
+            """, (cutoff_date,)).fetchall()
+        
+        # Corrections in the same period come from the metrics rollups
+        corrections_by_category = {
+            category: stats["count"]
+            for category, stats in self.metrics.totals_by(
+                CORRECTIONS_SERIES, "original_category", since=time.time() - days_back * DAY
+            ).items()
+        }
         
-        if df_metadata.empty:
+        if not rows:
             return {
                 'total_classifications': 0,
                 'accuracy_rate': 0.0,
@@ -168,23 +196,24 @@ class LearningStatsTracker:
             }
         
         # Calculate metrics
-        total_classifications = len(df_metadata)
-        total_corrections = len(df_corrections)
+        total_classifications = sum(row[1] for row in rows)
+        total_corrections = sum(corrections_by_category.values())
         accuracy_rate = max(0, (total_classifications - total_corrections) / total_classifications) if total_classifications > 0 else 0
-        avg_confidence = df_metadata['confidence_score'].mean()
+        avg_confidence = sum(row[1] * (row[2] or 0) for row in rows) / total_classifications
         
         # Break down by category groups
         category_accuracy = {}
         for group_name, categories in self.category_groups.items():
-            group_files = df_metadata[df_metadata['ai_category'].isin(categories)]
-            if not group_files.empty:
-                group_corrections = df_corrections[df_corrections['original_category'].isin(categories)]
-                group_accuracy = max(0, (len(group_files) - len(group_corrections)) / len(group_files))
+            group_rows = [row for row in rows if row[0] in categories]
+            group_files = sum(row[1] for row in group_rows)
+            if group_files:
+                group_corrections = sum(corrections_by_category.get(category, 0) for category in categories)
+                group_accuracy = max(0, (group_files - group_corrections) / group_files)
                 category_accuracy[group_name] = {
-                    'files': len(group_files),
-                    'corrections': len(group_corrections),
+                    'files': group_files,
+                    'corrections': group_corrections,
                     'accuracy': group_accuracy,
-                    'avg_confidence': group_files['confidence_score'].mean()
+                    'avg_confidence': sum(row[1] * (row[2] or 0) for row in group_rows) / group_files
                 }
         
         metrics = {
@@ -195,9 +224,9 @@ class LearningStatsTracker:
             'period_days': days_back,
             'category_breakdown': category_accuracy,
             'confidence_distribution': {
-                'high_90plus': len(df_metadata[df_metadata['confidence_score'] >= 0.9]),
-                'medium_70_90': len(df_metadata[(df_metadata['confidence_score'] >= 0.7) & (df_metadata['confidence_score'] < 0.9)]),
-                'low_below_70': len(df_metadata[df_metadata['confidence_score'] < 0.7])
+                'high_90plus': sum(row[3] or 0 for row in rows),
+                'medium_70_90': sum(row[4] or 0 for row in rows),
+                'low_below_70': sum(row[5] or 0 for row in rows)
             }
         }
         
@@ -13,13 +13,15 @@ Basic boilerplate for a FastAPI web application
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
 import subprocess
 import os
 import re
+import json
 import asyncio
 import logging
 import threading
@@ -34,16 +36,17 @@ load_dotenv()
 # Import our services
 from api.services import SystemService, SearchService, TriageService
 from api.rollback_service import RollbackService
+from api.job_service import JobService, JobContext
+from api.status_aggregator import StatusAggregator
+from api.startup import StartupRegistry
+from api.execution import run_blocking, shutdown_executors, get_execution_status, ExecutorOverloaded, ExecutionTimeout
 from api.veo_prompts_api import router as veo_router, clip_router
 from security_utils import sanitize_filename, validate_path_within_base
 from gdrive_integration import get_metadata_root, get_ai_organizer_root
-from universal_adaptive_learning import UniversalAdaptiveLearning
-from easy_rollback_system import ensure_rollback_db
-from adaptive_background_monitor import AdaptiveBackgroundMonitor
-from confidence_system import ADHDFriendlyConfidenceSystem, ConfidenceLevel
-from automated_deduplication_service import AutomatedDeduplicationService
-from emergency_space_protection import EmergencySpaceProtection
-from orchestrate_staging import orchestrate
+
+# Heavy subsystems (learning, monitoring, deduplication, orchestration and the
+# ML stacks they pull in) are imported where they are first used, so the
+# server answers /health before they load. tests/test_startup_time.py guards this.
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -147,88 +150,28 @@ async def lifespan(app: FastAPI):
     """
     Stateful lifecycle management for the FastAPI application.
     Ensures services are initialized once and cleaned up properly.
+
+    Phase 1 (before the first request) is only the metadata tripwire; phase 2
+    (start_subsystems) runs in the background with per-subsystem readiness.
     """
     logger.info("🚀 Starting AI File Organizer Architecture (Lifespan mode)...")
     
     # 0. Rule #1 Tripwire
     verify_metadata_safety()
     
-    # 1. Initialize core persistence
-    try:
-        from easy_rollback_system import ensure_rollback_db
-        from api.veo_prompts_api import init_veo_prompts_table
-        ensure_rollback_db()
-        init_veo_prompts_table()
-        try:
-            from api.veo_studio_api import init_veo_studio_tables
-            init_veo_studio_tables()
-        except ImportError:
-            logger.warning("veo_studio_api not available - skipping table init")
-        logger.info("✅ Core DBs & Tables initialized")
-    except Exception as e:
-        logger.exception("Failed to initialize core DBs: %s", e)
-
-    # 2. Setup Background Monitoring
-    try:
-        paths_str = os.getenv("AUTO_MONITOR_PATHS", "")
-        paths_list = []
-        if paths_str.strip():
-            paths_list = [
-                os.path.expanduser(p.strip())
-                for p in paths_str.split(",")
-                if p.strip()
-            ]
-        
-        default_paths = [
-            os.path.expanduser("~/Downloads"),
-            os.path.expanduser("~/Desktop"),
-            os.path.expanduser("~/Documents")
-        ]
-        
-        all_paths = set(paths_list)
-        all_paths.update(default_paths)
-        
-        try:
-            library_root = get_ai_organizer_root()
-            all_paths.add(str(library_root))
-            logger.info(f"📚 Library Root: {library_root}")
-        except Exception as e:
-            logger.warning(f"Could not determine Library Root: {e}")
-             
-        monitor_paths = list(all_paths)
-        logger.info(f"🛡️  Paths: {monitor_paths}")
-        
-        # Initialize and start monitor
-        app.state.background_monitor = AdaptiveBackgroundMonitor(
-            additional_watch_paths=monitor_paths
-        )
-        app.state.background_monitor.start()
-        SystemService.set_monitor(app.state.background_monitor)
-        logger.info("✅ Background Monitor Active")
-
-    except Exception as e:
-        logger.error(f"❌ Monitor Initialization Failed: {e}")
-        app.state.background_monitor = None
-
-    # 3. Start Emergency Services
-    try:
-        app.state.space_protection = EmergencySpaceProtection()
-        app.state.space_protection.start_space_protection()
-        logger.info("🛡️  Space Protection Active")
-    except Exception as e:
-        logger.error(f"❌ Space Protection Failed: {e}")
-        app.state.space_protection = None
-
-    # 4. Schedule Orchestration Tasks
-    logger.info("🎼 Scheduling background orchestration...")
-    app.state.scan_task = asyncio.create_task(delayed_initial_scan())
-    app.state.orchestration_task = asyncio.create_task(periodic_orchestration())
+    # Everything heavy starts in the background; /health reports readiness
+    app.state.background_monitor = None
+    app.state.space_protection = None
+    app.state.startup_task = asyncio.create_task(start_subsystems(app))
 
     yield
     
     # --- SHUTDOWN ---
     logger.info("🛑 Shutting down AI File Organizer services...")
     
+    if hasattr(app.state, 'startup_task'):
+        app.state.startup_task.cancel()
+
     if hasattr(app.state, 'background_monitor') and app.state.background_monitor:
         logger.info("   Stopping monitor...")
         app.state.background_monitor.stop()
@@ -242,9 +185,96 @@ async def lifespan(app: FastAPI):
     
     if hasattr(app.state, 'orchestration_task'):
         app.state.orchestration_task.cancel()
+
+    shutdown_executors()
+    if _status_aggregator is not None:
+        _status_aggregator.stop()
+    if _job_service is not None:
+        _job_service.shutdown()
         
     logger.info("✅ Shutdown complete")
 
+# Readiness flags, in start order
+startup = StartupRegistry([
+    "core_db", "status_aggregator", "jobs", "background_monitor", "space_protection", "librarian"
+])
+
+def init_core_databases():
+    """Create the rollback and VEO tables if missing"""
+    from easy_rollback_system import ensure_rollback_db
+    from api.veo_prompts_api import init_veo_prompts_table
+    ensure_rollback_db()
+    init_veo_prompts_table()
+    try:
+        from api.veo_studio_api import init_veo_studio_tables
+        init_veo_studio_tables()
+    except ImportError:
+        logger.warning("veo_studio_api not available - skipping table init")
+
+def get_monitor_paths():
+    """AUTO_MONITOR_PATHS plus the default user folders and the Library Root"""
+    paths_str = os.getenv("AUTO_MONITOR_PATHS", "")
+    paths_list = []
+    if paths_str.strip():
+        paths_list = [
+            os.path.expanduser(p.strip())
+            for p in paths_str.split(",")
+            if p.strip()
+        ]
+
+    default_paths = [
+        os.path.expanduser("~/Downloads"),
+        os.path.expanduser("~/Desktop"),
+        os.path.expanduser("~/Documents")
+    ]
+
+    all_paths = set(paths_list)
+    all_paths.update(default_paths)
+
+    try:
+        library_root = get_ai_organizer_root()
+        all_paths.add(str(library_root))
+        logger.info(f"📚 Library Root: {library_root}")
+    except Exception as e:
+        logger.warning(f"Could not determine Library Root: {e}")
+
+    return list(all_paths)
+
+def start_background_monitor(app: FastAPI):
+    from adaptive_background_monitor import AdaptiveBackgroundMonitor
+
+    monitor_paths = get_monitor_paths()
+    logger.info(f"🛡️  Paths: {monitor_paths}")
+
+    monitor = AdaptiveBackgroundMonitor(additional_watch_paths=monitor_paths)
+    monitor.start()
+    app.state.background_monitor = monitor
+    SystemService.set_monitor(monitor)
+
+def start_space_protection(app: FastAPI):
+    from emergency_space_protection import EmergencySpaceProtection
+
+    protection = EmergencySpaceProtection()
+    protection.start_space_protection()
+    app.state.space_protection = protection
+
+async def start_subsystems(app: FastAPI):
+    """
+    Phase 2 of startup, run after the server is already serving requests.
+    Each step runs on a worker thread; failures are recorded and the rest continue.
+    """
+    await startup.run("core_db", init_core_databases)
+    await startup.run("status_aggregator", get_status_aggregator)
+    await startup.run("jobs", lambda: get_job_service().resume_interrupted())
+    await startup.run("background_monitor", lambda: start_background_monitor(app))
+    await startup.run("space_protection", lambda: start_space_protection(app))
+    # Loads the classifiers and search index so the first search or triage request doesn't have to
+    await startup.run("librarian", SystemService.get_librarian)
+
+    logger.info("🎼 Scheduling background orchestration...")
+    app.state.scan_task = asyncio.create_task(delayed_initial_scan())
+    app.state.orchestration_task = asyncio.create_task(periodic_orchestration())
+
 # Global state for background monitor (Deprecated: Use app.state in routes)
 background_monitor = None
 monitor_paths = []
@@ -286,6 +316,8 @@ _triage_service = None
 _learning_system = None
 _confidence_system = None
 _deduplication_service = None
+_job_service = None
+_status_aggregator = None
 
 def get_system_service():
     global _system_service
@@ -314,21 +346,42 @@ def get_triage_service():
 def get_learning_system():
     global _learning_system
     if _learning_system is None:
+        from universal_adaptive_learning import UniversalAdaptiveLearning
         _learning_system = UniversalAdaptiveLearning()
     return _learning_system
 
 def get_confidence_system():
     global _confidence_system
     if _confidence_system is None:
+        from confidence_system import ADHDFriendlyConfidenceSystem
         _confidence_system = ADHDFriendlyConfidenceSystem()
     return _confidence_system
 
 def get_deduplication_service():
     global _deduplication_service
     if _deduplication_service is None:
+        from automated_deduplication_service import AutomatedDeduplicationService
         _deduplication_service = AutomatedDeduplicationService()
     return _deduplication_service
 
+def get_job_service():
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService()
+        _job_service.register("scan_folder", run_scan_folder_job)
+        _job_service.register("deduplicate", run_deduplicate_job)
+        _job_service.register("orchestrate", run_orchestrate_job)
+        _job_service.register("undo_today", run_undo_today_job)
+    return _job_service
+
+def get_status_aggregator():
+    global _status_aggregator
+    if _status_aggregator is None:
+        _status_aggregator = StatusAggregator(get_system_service())
+        SystemService.set_status_aggregator(_status_aggregator)
+        _status_aggregator.start()
+    return _status_aggregator
+
 def get_space_protection(request: Request):
     """Access space protection from app state"""
     return getattr(request.app.state, 'space_protection', None)
@@ -340,35 +393,136 @@ def get_background_monitor(request: Request):
 # The old top-level initializations are now REMOVED or moved into get_* functions.
 # This prevents side effects on import.
 
+# --- Background job handlers (run on JobService worker threads) ---
+
+def run_scan_folder_job(ctx: JobContext, folder_path: str):
+    """Classify a custom folder, streaming each file into the job results"""
+    def on_file(entry, scanned):
+        ctx.add_results([entry])
+        ctx.progress(completed=ctx.result_count(), message=f"Scanned {scanned} files")
+
+    # Files classified before an interruption are reused, not reclassified
+    result = get_triage_service().scan_custom_folder(
+        folder_path,
+        on_file=on_file,
+        should_cancel=lambda: ctx.cancelled,
+        completed=ctx.results()
+    )
+    ctx.replace_results(result.pop("files", []))
+    return result
+
+def run_deduplicate_job(ctx: JobContext):
+    """Process queued duplicate threats with rollback protection"""
+    service = get_deduplication_service()
+    before_stats = service.get_service_stats()
+
+    if before_stats.get("active_threats", 0) == 0:
+        return {
+            "status": "success",
+            "message": "No duplicates found to clean up",
+            "data": {
+                "duplicates_removed": 0,
+                "space_freed_mb": 0,
+                "service_stats": before_stats
+            }
+        }
+
+    before = dict(before_stats["service_stats"])
+    ctx.progress(completed=0, total=before_stats["active_threats"], message="Cleaning up duplicates", force=True)
+    handled = service.process_queued_threats(
+        on_progress=lambda done, total: ctx.progress(completed=done, total=total,
+                                                     message=f"Handled {done} of {total} duplicates"),
+        should_cancel=lambda: ctx.cancelled
+    )
+    ctx.progress(completed=handled, force=True)
+
+    after_stats = service.get_service_stats()
+    after = after_stats["service_stats"]
+    duplicates_removed = after["automatic_cleanups"] - before["automatic_cleanups"]
+    space_freed = after["space_recovered_mb"] - before["space_recovered_mb"]
+
+    return {
+        "status": "success",
+        "message": f"Cleanup completed - {duplicates_removed} duplicates removed, {space_freed:.1f} MB freed",
+        "data": {
+            "duplicates_removed": duplicates_removed,
+            "space_freed_mb": space_freed,
+            "threats_detected": after["threats_detected"],
+            "threats_resolved": handled,
+            "rollback_available": True,
+            "service_stats": after_stats
+        }
+    }
+
+def run_orchestrate_job(ctx: JobContext):
+    """Full Staging -> Triage -> Auto-Organize pipeline"""
+    from orchestrate_staging import orchestrate
+
+    SystemService.update_orchestration_status({
+        "last_run": datetime.now().isoformat(),
+        "files_processed": 0,
+        "status": "running"
+    })
+    try:
+        result = orchestrate()
+    except Exception:
+        SystemService.update_orchestration_status({
+            "last_run": datetime.now().isoformat(),
+            "files_processed": 0,
+            "status": "error"
+        })
+        raise
+
+    files_processed = result.get("files_processed", 0) if result else 0
+    SystemService.update_orchestration_status({
+        "last_run": datetime.now().isoformat(),
+        "files_processed": files_processed,
+        "status": "idle"
+    })
+    return {"files_processed": files_processed}
+
+def run_undo_today_job(ctx: JobContext):
+    """Emergency rollback of today's operations; stops between waves when cancelled"""
+    def on_progress(progress):
+        ctx.progress(completed=progress["completed"], total=progress["total"],
+                     message=f"Wave {progress['current_wave']} of {progress['waves']}", force=True)
+
+    return get_rollback_service().run_undo_today(on_progress=on_progress, should_cancel=lambda: ctx.cancelled)
+
+def job_accepted_response(job: dict, created: bool, message: str):
+    """Standard response for endpoints that start a background job"""
+    return {
+        "status": "accepted",
+        "message": message if created else f"{message} (already running)",
+        "job_id": job["job_id"],
+        "data": {"job": job, "coalesced": not created}
+    }
+
+async def run_workload(workload: str, fn, *args, **kwargs):
+    """
+    Run a blocking service call on its workload pool (search, classification,
+    maintenance) so the event loop stays free for other requests.
+    Sheds load with 503 + Retry-After when the pool's queue is full.
+    """
+    try:
+        return await run_blocking(workload, fn, *args, **kwargs)
+    except ExecutorOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server is busy with {e.workload} work. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ExecutionTimeout as e:
+        raise HTTPException(status_code=504, detail=f"The {e.workload} request timed out. Please try again.")
+
 
 if __name__ == "__main__":
     # Enforce single instance
     from pid_lock import enforce_single_instance
     lock = enforce_single_instance("server.lock")
-    
-    # Run the application directly with python main.py
-    # Enable reload=True for better development    # Print database paths for debugging
-    try:
-        from easy_rollback_system import EasyRollbackSystem
-        from universal_adaptive_learning import UniversalAdaptiveLearning
-        
-        rollback_db_path = EasyRollbackSystem().db_path
-        learning_db_path = UniversalAdaptiveLearning().db_path
-        
-        logger.info(f"DEBUG: Rollback DB Path: {rollback_db_path}")
-        logger.info(f"DEBUG: Learning DB Path: {learning_db_path}")
-    except Exception as e:
-        logger.error(f"DEBUG: Failed to print DB paths: {e}")
-        
-    try:
-        if get_triage_service().rollback_service:
-             logger.info("DEBUG: TriageService has RollbackService initialized")
-        else:
-             logger.error("DEBUG: TriageService MISSING RollbackService")
-             
-    except Exception as e:
-        logger.error(f"DEBUG: Failed to verify services: {e}")
 
+    # Services are loaded inside the server by start_subsystems(); loading them
+    # here as well would add their full startup cost before uvicorn even binds
     try:
         # Start uvicorn server
         # Disable reload in production-like run to prevent signal handling issues
@@ -414,6 +568,8 @@ async def periodic_orchestration():
                 "status": "running"
             })
             
+            from orchestrate_staging import orchestrate
+
             loop = asyncio.get_event_loop()
             # Run orchestration with dry_run=False and default threshold
             # Capture result if orchestrate returns stats
@@ -455,29 +611,70 @@ async def serve_spa():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring"""
-    return {"status": "healthy", "service": "AI File Organizer API"}
+    """
+    Health check endpoint for monitoring.
+    Answers as soon as the server is up; `startup` shows which subsystems are ready.
+    """
+    return {
+        "status": "healthy",
+        "service": "AI File Organizer API",
+        "startup": startup.get_status(),
+        "workloads": get_execution_status()
+    }
 
 @app.get("/api/system/status")
 async def get_system_status():
-    """Get current system status including file counts, monitor status, and last run time"""
-    # SystemService now handles aggregation of all status data
-    return get_system_service().get_status()
+    """
+    Get current system status including file counts, monitor status, and last run time
+
+    Served from the StatusAggregator snapshot; each component is refreshed in
+    the background on its own cadence and `freshness` says when.
+    """
+    return dict(get_status_aggregator().get_snapshot())
+
+@app.get("/api/system/status/stream")
+async def stream_system_status(request: Request):
+    """
+    Server-Sent Events push channel for system status.
+    Sends a full `snapshot` event first, then `delta` events with only the changed components.
+    """
+    aggregator = get_status_aggregator()
+
+    async def event_stream():
+        snapshot = aggregator.get_snapshot()
+        version = snapshot["version"]
+        yield f"event: snapshot\ndata: {json.dumps(dict(snapshot), default=str)}\n\n"
+
+        idle_polls = 0
+        while not await request.is_disconnected():
+            await asyncio.sleep(1.0)
+            deltas = aggregator.deltas_since(version)
+            if deltas is None:
+                # Fell behind the delta log; resync with a full snapshot
+                snapshot = aggregator.get_snapshot()
+                version = snapshot["version"]
+                yield f"event: snapshot\ndata: {json.dumps(dict(snapshot), default=str)}\n\n"
+                continue
+            for delta in deltas:
+                version = delta["version"]
+                yield f"event: delta\ndata: {json.dumps(delta, default=str)}\n\n"
+
+            idle_polls = 0 if deltas else idle_polls + 1
+            if idle_polls and idle_polls % 15 == 0:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/api/system/orchestrate")
 async def trigger_orchestration():
-    """Manually trigger the orchestration process in the background"""
+    """Manually trigger the orchestration process as a background job"""
     try:
-        # Run in a background thread to avoid blocking
-        thread = threading.Thread(target=orchestrate)
-        thread.start()
+        job, created = get_job_service().submit("orchestrate")
         
         logger.info("Manual orchestration triggered via API")
         
-        return {
-            "status": "success",
-            "message": "Orchestration triggered in the background"
-        }
+        return job_accepted_response(job, created, "Orchestration triggered in the background")
     except Exception as e:
         logger.error(f"Failed to trigger orchestration: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -495,7 +692,7 @@ async def get_recent_activity(limit: int = 50):
 @app.post("/api/system/emergency_cleanup")
 async def emergency_cleanup():
     """Emergency cleanup: Move large files from Downloads to Google Drive"""
-    result = get_system_service().emergency_cleanup()
+    result = await run_workload("maintenance", get_system_service().emergency_cleanup)
     return result
 
 @app.get("/api/system/monitor-status")
@@ -574,8 +771,7 @@ async def get_learning_stats():
         
         # Add files organized today from rollback service
         try:
-            today_ops = get_rollback_service().get_operations(today_only=True)
-            stats["files_organized_today"] = len(today_ops)
+            stats["files_organized_today"] = get_rollback_service().count_operations(today_only=True)
         except Exception:
             stats["files_organized_today"] = 0
             
@@ -792,24 +988,31 @@ async def scan_for_duplicates():
         JSON with duplicate scan results including:
         - status: success or error
         - message: Human-readable message
+        - groups: Byte-identical duplicate groups
+        - near_duplicate_groups: Visually similar images/videos (perceptual hash) and the
+          same recording in different audio formats (acoustic fingerprint)
         - data: Duplicate statistics and threat information
     """
     try:
         # Perform a fresh scan of the primary AI organizer root
         base_dir = get_deduplication_service().base_dir
-        report = get_deduplication_service().scan_for_duplicates(str(base_dir))
+        report = await run_workload("maintenance", get_deduplication_service().scan_for_duplicates, str(base_dir))
 
         logger.info(f"Duplicate scan completed for {base_dir} - returning findings")
 
         # Extract groups from report for frontend compatibility
         groups = report.get("findings", {}).get("groups", [])
+        near_duplicate_groups = report.get("findings", {}).get("near_duplicate_groups", [])
 
         return {
             "status": "success",
             "message": f"Deduplication scan complete",
             "groups": groups,
+            "near_duplicate_groups": near_duplicate_groups,
             "data": report
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to scan for duplicates: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to scan for duplicates")
@@ -817,54 +1020,17 @@ async def scan_for_duplicates():
 @app.post("/api/system/deduplicate")
 async def perform_deduplication_cleanup():
     """
-    Perform safe duplicate cleanup with rollback protection
+    Start safe duplicate cleanup with rollback protection as a background job
+
+    Poll /api/jobs/{job_id} (or stream /api/jobs/{job_id}/events) for progress;
+    the finished job's result holds the cleanup summary.
 
     Returns:
-        JSON with cleanup results including:
-        - status: success or error
-        - message: Human-readable message
-        - data: Duplicates removed, space freed, and rollback information
+        JSON with the accepted job in {status, message, job_id, data} format
     """
     try:
-        # Get current stats before cleanup
-        before_stats = get_deduplication_service().get_service_stats()
-
-        # Check if there are any active threats to process
-        active_threats = before_stats.get("active_threats", 0)
-
-        if active_threats == 0:
-            return {
-                "status": "success",
-                "message": "No duplicates found to clean up",
-                "data": {
-                    "duplicates_removed": 0,
-                    "space_freed_mb": 0,
-                    "service_stats": before_stats
-                }
-            }
-
-        # Process all threats in the queue
-        # This will automatically handle cleanup with rollback protection
-        get_deduplication_service()._process_threats()
-
-        # Get updated stats after cleanup
-        after_stats = get_deduplication_service().get_service_stats()
-
-        duplicates_removed = after_stats["service_stats"]["duplicates_removed"]
-        space_freed = after_stats["service_stats"]["space_saved_mb"]
-
-        return {
-            "status": "success",
-            "message": f"Cleanup completed - {duplicates_removed} duplicates removed, {space_freed:.1f} MB freed",
-            "data": {
-                "duplicates_removed": duplicates_removed,
-                "space_freed_mb": space_freed,
-                "threats_detected": after_stats["service_stats"]["threats_detected"],
-                "threats_resolved": after_stats["service_stats"]["threats_resolved"],
-                "rollback_available": True,
-                "service_stats": after_stats
-            }
-        }
+        job, created = get_job_service().submit("deduplicate")
+        return job_accepted_response(job, created, "Duplicate cleanup started")
     except Exception as e:
         logger.error(f"Failed to perform deduplication cleanup: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to perform deduplication cleanup")
@@ -883,7 +1049,7 @@ async def get_space_protection_status(request: Request):
         stats = sp.get_protection_stats()
 
         # Force emergency check to get current disk status
-        emergency_check = sp.force_emergency_check()
+        emergency_check = await run_workload("maintenance", sp.force_emergency_check)
         
         # Get current disk space info directly
         disk_space = get_system_service().get_disk_space()
@@ -949,7 +1115,7 @@ async def trigger_space_cleanup(request: Request):
             }
 
         # Handle the emergency (this triggers cleanup internally)
-        sp._handle_space_emergency(emergency)
+        await run_workload("maintenance", sp._handle_space_emergency, emergency)
 
         # Get updated stats after cleanup
         updated_stats = sp.get_protection_stats()
@@ -964,6 +1130,8 @@ async def trigger_space_cleanup(request: Request):
                 "protection_stats": updated_stats
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to trigger space cleanup: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to trigger space cleanup")
@@ -983,12 +1151,14 @@ async def search_files(q: str = Query(..., description="Search query", min_lengt
         raise HTTPException(status_code=400, detail="Query parameter 'q' cannot be empty")
 
     try:
-        results = get_search_service().search(q.strip())
+        results = await run_workload("search", get_search_service().search, q.strip())
         return {
             "query": q.strip(),
             "results": results,
             "count": len(results)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         # Security: Log detailed error internally, return generic message to user
         logger.error(f"Search operation failed: {e}", exc_info=True)
@@ -999,19 +1169,22 @@ async def get_files_to_review():
     """
     Get list of files that require manual review due to low confidence categorization
 
-    WARNING: This endpoint performs EXPENSIVE AI operations (vision analysis, audio analysis, etc.)
-    and should only be called when the user explicitly requests a triage scan.
+    Reads the review queue and the staging snapshot only; staging files are
+    classified in the background as they appear, so this stays cheap and does
+    not wait behind classification work.
 
     Returns:
         JSON response with files needing review
     """
     try:
-        files = get_triage_service().get_files_for_review()
+        files = await run_workload("search", get_triage_service().get_files_for_review)
         return {
             "files": files,
             "count": len(files),
             "message": f"Found {len(files)} files requiring review"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         # Security: Log detailed error internally, return generic message to user
         logger.error(f"Failed to retrieve files for review: {e}", exc_info=True)
@@ -1022,15 +1195,17 @@ async def trigger_triage_scan():
     """
     Manually trigger a triage scan for files needing review
 
-    This endpoint explicitly triggers the expensive scanning operation.
-    Use this when the user navigates to the triage page or clicks "Scan for files".
+    Requests a background rescan of the staging areas and returns the current
+    results. Use this when the user clicks "Scan for files".
 
     Returns:
         JSON response with scan results
     """
     try:
-        result = get_triage_service().trigger_scan()
+        result = await run_workload("classification", get_triage_service().trigger_scan)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         # Security: Log detailed error internally, return generic message to user
         logger.error(f"Failed to trigger triage scan: {e}", exc_info=True)
@@ -1048,10 +1223,8 @@ async def scan_custom_folder(request: ScanFolderRequest):
         request: ScanFolderRequest containing folder_path
 
     Returns:
-        JSON response with scan results including:
-        - files: List of files needing review
-        - count: Total files found
-        - message: Status message
+        JSON with the accepted job; its paginated results are the files found
+        and its result holds the scan summary (files_found, total_files_scanned)
     """
     try:
         # Security check: Ensure path is valid and accessible
@@ -1062,11 +1235,14 @@ async def scan_custom_folder(request: ScanFolderRequest):
         if not folder_path.is_dir():
              raise HTTPException(status_code=400, detail=f"Path is not a directory: {request.folder_path}")
 
-        # Trigger scan on the custom folder
-        result = get_triage_service().scan_custom_folder(str(folder_path))
-        return result
+        # Scan runs as a background job; results are paged from /api/jobs/{job_id}/results
+        job, created = get_job_service().submit("scan_folder", {"folder_path": str(folder_path.resolve())})
+        return job_accepted_response(job, created, f"Scanning {folder_path}")
     except HTTPException:
         raise
+    except Exception as e:
+        logger.error(f"Failed to start folder scan: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start folder scan")
 
 @app.get("/api/triage/projects")
 async def get_known_projects():
@@ -1188,23 +1364,93 @@ async def get_file_preview_text(path: str = Query(..., description="Absolute pat
         if not validate_path_is_safe(file_path):
              raise HTTPException(status_code=403, detail="Access denied: Path is outside allowed directories or contains illegal characters")
 
-        # Initialize ContentExtractor
-        from content_extractor import ContentExtractor
-        extractor = ContentExtractor()
-        
-        # Extract content
-        content = extractor.extract_content(file_path)
+        def extract():
+            # Initialize ContentExtractor
+            from content_extractor import ContentExtractor
+            extractor = ContentExtractor()
+
+            # Extract content
+            return extractor.extract_content(file_path)
+
+        content = await run_workload("classification", extract)
         
         if not content or not content.get('text'):
             return {"text": "No text content could be extracted from this file."}
             
         return {"text": content['text']}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error extracting preview text: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to extract preview: {str(e)}")
 
 
+# Previews change only when the file's content does (ETag = content key), so
+# browsers may reuse them briefly and then revalidate cheaply with a 304
+PREVIEW_CACHE_CONTROL = "private, max-age=3600"
+
+async def serve_preview(request: Request, path: str, kind: str, *args):
+    """
+    Render (on first request) and serve a preview derivative of a file:
+    kind is "thumbnail", "poster", "video_preview" or "waveform".
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="File not found")
+    if file_path.name.startswith('.') or file_path.name.startswith('~'):
+        raise HTTPException(status_code=403, detail="Access denied to hidden/system files")
+    if not validate_path_is_safe(file_path):
+        raise HTTPException(status_code=403, detail="Access denied: Path is outside allowed directories or contains illegal characters")
+
+    from preview_service import get_preview_service, PreviewUnavailable, PreviewDecodeError
+    previews = get_preview_service()
+    try:
+        # Revalidations are answered from the content key alone, before any rendering
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            etag = await run_workload("preview", previews.etag, file_path, kind, *args)
+            if if_none_match == f'"{etag}"':
+                return Response(status_code=304, headers={"ETag": f'"{etag}"', "Cache-Control": PREVIEW_CACHE_CONTROL})
+        derivative = await run_workload("preview", getattr(previews, kind), file_path, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except PreviewDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Could not decode file: {e}")
+    except PreviewUnavailable as e:
+        raise HTTPException(status_code=404, detail=f"No preview available: {e}")
+
+    headers = {"ETag": f'"{derivative.etag}"', "Cache-Control": PREVIEW_CACHE_CONTROL}
+    # FileResponse answers Range requests, so preview clips stay seekable
+    return FileResponse(derivative.path, media_type=derivative.media_type, headers=headers)
+
+@app.get("/api/previews/thumbnail")
+async def get_preview_thumbnail(
+    request: Request,
+    path: str = Query(..., description="Absolute path to image"),
+    size: int = Query(320, description="Thumbnail edge length: 160, 320 or 1024")
+):
+    """JPEG thumbnail of an image, instead of the full-size original"""
+    return await serve_preview(request, path, "thumbnail", size)
+
+@app.get("/api/previews/poster")
+async def get_preview_poster(request: Request, path: str = Query(..., description="Absolute path to video")):
+    """Poster frame (JPEG) for a video"""
+    return await serve_preview(request, path, "poster")
+
+@app.get("/api/previews/video")
+async def get_preview_video(request: Request, path: str = Query(..., description="Absolute path to video")):
+    """Short, muted, low-bitrate MP4 preview of a video"""
+    return await serve_preview(request, path, "video_preview")
+
+@app.get("/api/previews/waveform")
+async def get_preview_waveform(request: Request, path: str = Query(..., description="Absolute path to audio file")):
+    """Waveform peaks for an audio file: {"duration": seconds, "peaks": [0..1, ...]}"""
+    return await serve_preview(request, path, "waveform")
+
+
 @app.post("/api/triage/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -1235,7 +1481,7 @@ async def upload_file(file: UploadFile = File(...)):
         logger.info(f"File uploaded (sanitized): {file_path}")
 
         # Classify the file using triage service
-        classification = get_triage_service().get_classification(str(file_path))
+        classification = await run_workload("classification", get_triage_service().get_classification, str(file_path))
 
         # Return classification result
         return {
@@ -1254,6 +1500,8 @@ async def upload_file(file: UploadFile = File(...)):
             "operation_id": 0
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File upload failed: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
@@ -1274,13 +1522,17 @@ async def classify_file(request: ClassificationRequest):
         JSON response with classification status and hierarchical metadata
     """
     try:
-        result = get_triage_service().classify_file(
+        result = await run_workload(
+            "classification",
+            get_triage_service().classify_file,
             file_path=request.file_path,
             confirmed_category=request.confirmed_category,
             project=request.project,
             episode=request.episode
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
@@ -1370,7 +1622,9 @@ async def open_file(request: OpenFileRequest):
 async def get_rollback_operations(
     days: int = Query(7, description="Number of days to look back"),
     today_only: bool = Query(False, description="Show only today's operations"),
-    search: Optional[str] = Query(None, description="Search term to filter operations")
+    search: Optional[str] = Query(None, description="Search term to filter operations"),
+    limit: int = Query(200, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """
     Get file operations that can be rolled back
@@ -1379,12 +1633,18 @@ async def get_rollback_operations(
         days: Number of days to look back (default: 7)
         today_only: Only show today's operations (default: False)
         search: Optional search term
+        limit: Page size (default: 200)
+        cursor: Keyset cursor returned as next_cursor by the previous page
 
     Returns:
         JSON response with list of operations in {status, message, data} format
     """
     try:
-        operations = get_rollback_service().get_operations(days=days, today_only=today_only, search=search)
+        rollback_service = get_rollback_service()
+        operations = rollback_service.get_operations(
+            days=days, today_only=today_only, search=search, limit=limit, cursor=cursor
+        )
+        next_cursor = rollback_service.encode_cursor(operations[-1]) if len(operations) == limit else None
 
         time_range = "today" if today_only else f"last {days} days"
         message = f"Found {len(operations)} operations from {time_range}"
@@ -1399,7 +1659,8 @@ async def get_rollback_operations(
                 "count": len(operations),
                 "days": days,
                 "today_only": today_only,
-                "search_term": search
+                "search_term": search,
+                "next_cursor": next_cursor
             }
         }
     except Exception as e:
@@ -1438,33 +1699,144 @@ async def undo_operation(operation_id: int):
         raise HTTPException(status_code=500, detail="Failed to undo operation")
 
 @app.post("/api/rollback/undo-today")
-async def undo_today():
+async def undo_today(dry_run: bool = Query(False, description="Plan only; return the plan and estimated time")):
     """
     Emergency undo: Rollback all operations from today
 
+    The rollback runs as a background job; poll /api/jobs/{job_id} or
+    /api/rollback/undo-today/progress for progress and the final result.
+
+    Args:
+        dry_run: Only plan the rollback (default: False)
+
     Returns:
-        JSON response with count and status in {status, message, data} format
+        JSON response with plan and progress in {status, message, data} format
     """
     try:
-        result = get_rollback_service().undo_today()
+        # Planning reads every operation from today; keep it off the event loop
+        loop = asyncio.get_event_loop()
+        if dry_run:
+            result = await loop.run_in_executor(None, get_rollback_service().plan_undo_today)
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result["message"])
+            return {
+                "status": "success",
+                "message": result["message"],
+                "data": {"plan": result["plan"], "dry_run": True}
+            }
 
-        if not result["success"] and result["count"] == 0:
-            raise HTTPException(status_code=404, detail="No operations found to undo")
+        plan = await loop.run_in_executor(None, get_rollback_service().plan_undo_today)
+        if plan["success"] and not plan["plan"]["operations_to_undo"]:
+            raise HTTPException(status_code=404, detail="No active operations from today to undo")
 
-        return {
-            "status": "success" if result["success"] else "partial",
-            "message": result["message"],
-            "data": {
-                "operations_undone": result["count"],
-                "rollback_successful": result["success"]
-            }
-        }
+        job, created = get_job_service().submit("undo_today")
+        response = job_accepted_response(job, created, plan["message"])
+        response["data"].update({"started": created, "plan": plan["plan"]})
+        return response
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Failed to undo today's operations: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to undo today's operations")
 
+@app.get("/api/rollback/undo-today/progress")
+async def undo_today_progress():
+    """
+    Progress of the running (or most recent) bulk rollback
+
+    Returns:
+        JSON response with progress counters and the final result once finished
+    """
+    status = get_rollback_service().get_undo_progress()
+    result = status["result"]
+
+    return {
+        "status": "success",
+        "message": result["message"] if result else f"Rollback {status['progress']['state']}",
+        "data": {
+            "progress": status["progress"],
+            "operations_undone": result["count"] if result else status["progress"]["succeeded"],
+            "rollback_successful": result["success"] if result else None
+        }
+    }
+
+# --- Background Job Endpoints ---
+
+@app.get("/api/jobs")
+async def list_jobs(
+    kind: Optional[str] = Query(None, description="Filter by job kind"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Recent background jobs, newest first"""
+    return {"status": "success", "data": {"jobs": get_job_service().list_jobs(kind, status, limit)}}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, progress and (once finished) result summary of a job"""
+    job = get_job_service().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "message": job["progress"]["message"] or job["status"], "data": job}
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Request cancellation; running jobs stop at their next checkpoint"""
+    job = get_job_service().cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "message": "Cancellation requested", "data": job}
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """One page of a job's result items (available while the job is still running)"""
+    if not get_job_service().get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "data": get_job_service().get_results(job_id, offset, limit)}
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, after: int = Query(0, ge=0)):
+    """
+    Server-Sent Events stream of a job's status, progress and result events.
+    Reconnect with ?after=<last event id> (or Last-Event-ID) to resume the stream.
+    """
+    service = get_job_service()
+    # Job reads are SQLite queries; keep them off the event loop
+    if not await run_in_threadpool(service.get_job, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    last_event_id = request.headers.get("last-event-id")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else after
+
+    async def event_stream():
+        last_id = after
+        idle_polls = 0
+        while not await request.is_disconnected():
+            events = await run_in_threadpool(service.get_events, job_id, after_id=last_id)
+            for event in events:
+                last_id = event["id"]
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+            if events:
+                idle_polls = 0
+                continue
+
+            job = await run_in_threadpool(service.get_job, job_id)
+            if job["status"] in ("succeeded", "failed", "cancelled"):
+                yield f"event: end\ndata: {json.dumps({'status': job['status']})}\n\n"
+                break
+
+            idle_polls += 1
+            if idle_polls % 30 == 0:
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Catch-all to support React Router (client-side routing)
 # Must be defined LAST to avoid blocking API routes
 @app.get("/{full_path:path}")
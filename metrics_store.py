@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Embedded Time-Series Metrics Store
+Append-only metric events with incrementally maintained rollups.
+
+Every recorded point is appended to `metric_events` and folded into
+1-minute, 1-hour and 1-day rollup buckets (count/sum/min/max) in the same
+transaction, so recording is O(1) and dashboards read O(buckets) rows
+instead of re-scanning raw history. Retention downsamples old data: raw
+events and fine-grained rollups expire while coarser rollups are kept.
+
+Used by DriftMonitor, UniversalAdaptiveLearning statistics,
+LearningStatsTracker and learning_report.py.
+
+Usage:
+    store = MetricsStore()
+    store.record("librarian.decisions", dims={"outcome": "review"})
+    store.totals("librarian.decisions", since=time.time() - 7 * 86400)
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+# How long each level is kept (seconds); None keeps it forever
+DEFAULT_RETENTION = {
+    "events": 14 * DAY,
+    MINUTE: 2 * DAY,
+    HOUR: 90 * DAY,
+    DAY: None,
+}
+
+METRICS_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS metric_events (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  ts REAL NOT NULL,                    -- unix time
+  series TEXT NOT NULL,
+  dims TEXT NOT NULL DEFAULT '',       -- canonical JSON of dimensions, '' for none
+  value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metric_events_series_ts ON metric_events(series, ts);
+CREATE INDEX IF NOT EXISTS idx_metric_events_series_value ON metric_events(series, value);
+
+CREATE TABLE IF NOT EXISTS metric_rollups (
+  series TEXT NOT NULL,
+  dims TEXT NOT NULL,
+  resolution INTEGER NOT NULL,         -- bucket width in seconds
+  bucket_start INTEGER NOT NULL,       -- unix time, aligned to resolution
+  count INTEGER NOT NULL,
+  sum REAL NOT NULL,
+  min REAL NOT NULL,
+  max REAL NOT NULL,
+  PRIMARY KEY (series, resolution, bucket_start, dims)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_UPSERT_SQL = """
+INSERT INTO metric_rollups (series, dims, resolution, bucket_start, count, sum, min, max)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT(series, resolution, bucket_start, dims) DO UPDATE SET
+  count = count + 1,
+  sum = sum + excluded.sum,
+  min = MIN(min, excluded.min),
+  max = MAX(max, excluded.max)
+"""
+
+
+@dataclass
+class MetricPoint:
+    """A single metric observation"""
+    series: str
+    value: float = 1.0
+    dims: Optional[Dict[str, Any]] = None
+    ts: Optional[float] = None
+
+
+def encode_dims(dims: Optional[Dict[str, Any]]) -> str:
+    """Canonical string form of a dimensions dict"""
+    if not dims:
+        return ""
+    return json.dumps(dims, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def decode_dims(dims: str) -> Dict[str, Any]:
+    return json.loads(dims) if dims else {}
+
+
+class MetricsStore:
+    """
+    SQLite-backed time-series store (WAL mode, safe to share between processes).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, retention: Optional[Dict[Any, Optional[int]]] = None,
+                 retention_interval_sec: int = HOUR):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "metrics.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.retention_interval_sec = retention_interval_sec
+
+        self._local = threading.local()
+        self._last_retention = 0.0
+
+        with self._connect() as conn:
+            conn.executescript(METRICS_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, series: str, value: float = 1.0, dims: Optional[Dict[str, Any]] = None,
+               ts: Optional[float] = None):
+        """Append one point and update its rollups (O(1))"""
+        self.record_many([MetricPoint(series, value, dims, ts)])
+
+    def record_many(self, points: Iterable[MetricPoint]):
+        """Append several points in a single transaction"""
+        now = time.time()
+        event_rows = []
+        rollup_rows = []
+
+        for point in points:
+            ts = point.ts if point.ts is not None else now
+            dims = encode_dims(point.dims)
+            value = float(point.value)
+            event_rows.append((ts, point.series, dims, value))
+            for resolution in RESOLUTIONS:
+                bucket_start = int(ts) - int(ts) % resolution
+                rollup_rows.append((point.series, dims, resolution, bucket_start, value, value, value))
+
+        if not event_rows:
+            return
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO metric_events (ts, series, dims, value) VALUES (?, ?, ?, ?)", event_rows
+            )
+            conn.executemany(_ROLLUP_UPSERT_SQL, rollup_rows)
+
+        if now - self._last_retention >= self.retention_interval_sec:
+            self.apply_retention(now)
+
+    def apply_retention(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop raw events and rollups older than their retention window"""
+        now = now if now is not None else time.time()
+        self._last_retention = now
+        removed = {}
+
+        conn = self._connect()
+        with conn:
+            keep = self.retention.get("events")
+            if keep is not None:
+                removed["events"] = conn.execute(
+                    "DELETE FROM metric_events WHERE ts < ?", (now - keep,)
+                ).rowcount
+            for resolution in RESOLUTIONS:
+                keep = self.retention.get(resolution)
+                if keep is not None:
+                    removed[str(resolution)] = conn.execute(
+                        "DELETE FROM metric_rollups WHERE resolution = ? AND bucket_start < ?",
+                        (resolution, int(now - keep))
+                    ).rowcount
+        return removed
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def is_empty(self, series: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM metric_rollups WHERE series = ? AND resolution = ? LIMIT 1", (series, DAY)
+        ).fetchone()
+        return row is None
+
+    def buckets(self, series: str, resolution: int = HOUR, since: Optional[float] = None,
+                until: Optional[float] = None, dims: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Rollup buckets for a series (summed over all dims unless dims is given)"""
+        query = """
+            SELECT bucket_start, SUM(count), SUM(sum), MIN(min), MAX(max) FROM metric_rollups
+            WHERE series = ? AND resolution = ? AND bucket_start >= ? AND bucket_start < ?
+        """
+        params: List[Any] = [series, resolution, self._align(since or 0, resolution), until or float("inf")]
+        if dims is not None:
+            query += " AND dims = ?"
+            params.append(encode_dims(dims))
+        query += " GROUP BY bucket_start ORDER BY bucket_start"
+
+        return [
+            {"bucket_start": row[0], "count": row[1], "sum": row[2], "min": row[3], "max": row[4],
+             "avg": row[2] / row[1] if row[1] else 0.0}
+            for row in self._connect().execute(query, params)
+        ]
+
+    def totals(self, series: str, since: Optional[float] = None, until: Optional[float] = None,
+               by_dims: bool = False) -> Any:
+        """
+        Aggregate count/sum/min/max over [since, until).
+
+        Full days are read from day buckets, ragged edges from hour and minute
+        buckets, so the cost is O(days + 48 + 120) rows regardless of how many
+        events were recorded. Edges finer than one minute are rounded to the
+        enclosing minute; edges whose fine buckets were already downsampled
+        are rounded down to the enclosing hour or day.
+
+        Returns:
+            {"count", "sum", "min", "max", "avg"}, or a {dims_dict_json: totals}
+            mapping when by_dims is True
+        """
+        now = time.time()
+        start = int(since) if since is not None else 0
+        end = int(until) if until is not None else int(now) + MINUTE
+
+        ranges = self._covering_ranges(self._surviving_edge(start, now), self._surviving_edge(end, now))
+        clauses = " OR ".join("(resolution = ? AND bucket_start >= ? AND bucket_start < ?)" for _ in ranges)
+        params: List[Any] = [series]
+        for resolution, lo, hi in ranges:
+            params.extend([resolution, lo, hi])
+
+        query = f"""
+            SELECT dims, SUM(count), SUM(sum), MIN(min), MAX(max) FROM metric_rollups
+            WHERE series = ? AND ({clauses})
+            GROUP BY dims
+        """
+        rows = self._connect().execute(query, params).fetchall() if ranges else []
+
+        def pack(count, total, minimum, maximum):
+            count = count or 0
+            return {
+                "count": count,
+                "sum": total or 0.0,
+                "min": minimum,
+                "max": maximum,
+                "avg": (total / count) if count else 0.0
+            }
+
+        if by_dims:
+            return {row[0]: pack(*row[1:]) for row in rows}
+
+        count = sum(row[1] for row in rows)
+        total = sum(row[2] for row in rows)
+        minimum = min((row[3] for row in rows), default=None)
+        maximum = max((row[4] for row in rows), default=None)
+        return pack(count, total, minimum, maximum)
+
+    def totals_by(self, series: str, dim: str, since: Optional[float] = None,
+                  until: Optional[float] = None) -> Dict[Any, Dict[str, Any]]:
+        """Totals grouped by one dimension key, e.g. totals_by("learning.media_type", "media_type")"""
+        grouped: Dict[Any, Dict[str, Any]] = {}
+        for dims, stats in self.totals(series, since, until, by_dims=True).items():
+            key = decode_dims(dims).get(dim)
+            current = grouped.get(key)
+            if current is None:
+                grouped[key] = dict(stats)
+                continue
+            current["count"] += stats["count"]
+            current["sum"] += stats["sum"]
+            current["min"] = min(current["min"], stats["min"])
+            current["max"] = max(current["max"], stats["max"])
+            current["avg"] = current["sum"] / current["count"] if current["count"] else 0.0
+        return grouped
+
+    def top_values(self, series: str, limit: int = 10) -> List[float]:
+        """
+        Largest recorded values, read through the (series, value) index.
+
+        Raw events only cover the retention window; older days contribute
+        their day-bucket maximum, so the result stays meaningful after
+        downsampling.
+        """
+        conn = self._connect()
+        values = [row[0] for row in conn.execute(
+            "SELECT value FROM metric_events WHERE series = ? ORDER BY value DESC LIMIT ?", (series, limit)
+        )]
+
+        oldest = conn.execute("SELECT MIN(ts) FROM metric_events WHERE series = ?", (series,)).fetchone()[0]
+        cutoff = self._align(oldest, DAY) if oldest is not None else float("inf")
+        values.extend(row[0] for row in conn.execute(
+            "SELECT max FROM metric_rollups WHERE series = ? AND resolution = ? AND bucket_start < ? ORDER BY max DESC LIMIT ?",
+            (series, DAY, cutoff, limit)
+        ))
+        return sorted(values, reverse=True)[:limit]
+
+    def _surviving_edge(self, ts: int, now: float) -> int:
+        """Align a range edge to the finest resolution still retained at that age"""
+        for resolution in RESOLUTIONS:
+            keep = self.retention.get(resolution)
+            if keep is None or ts >= now - keep:
+                return self._align(ts, resolution)
+        return self._align(ts, DAY)
+
+    @staticmethod
+    def _align(ts: float, resolution: int) -> int:
+        return int(ts) - int(ts) % resolution
+
+    @staticmethod
+    def _covering_ranges(start: int, end: int) -> List[Tuple[int, int, int]]:
+        """
+        Split [start, end) into (resolution, lo, hi) bucket_start ranges using
+        the coarsest buckets that fit entirely inside the interval.
+        """
+        start = start - start % MINUTE
+        end = end - end % MINUTE if end % MINUTE == 0 else end - end % MINUTE + MINUTE
+        if end <= start:
+            return []
+
+        ranges = []
+
+        def take(resolution: int, lo: int, hi: int):
+            if hi > lo:
+                ranges.append((resolution, lo, hi))
+
+        hour_lo = -(-start // HOUR) * HOUR
+        hour_hi = end - end % HOUR
+        if hour_hi <= hour_lo:
+            take(MINUTE, start, end)
+            return ranges
+
+        day_lo = -(-hour_lo // DAY) * DAY
+        day_hi = hour_hi - hour_hi % DAY
+
+        take(MINUTE, start, hour_lo)
+        if day_hi > day_lo:
+            take(HOUR, hour_lo, day_lo)
+            take(DAY, day_lo, day_hi)
+            take(HOUR, day_hi, hour_hi)
+        else:
+            take(HOUR, hour_lo, hour_hi)
+        take(MINUTE, hour_hi, end)
+        return ranges
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+MinHash / Locality-Sensitive Hashing Utilities
+Near-linear candidate discovery for keyword-set similarity.
+
+Used by InteractiveBatchProcessor to find files with similar content
+without comparing every pair. Candidates found here are always verified
+with exact Jaccard similarity by the caller.
+"""
+
+import hashlib
+import struct
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# blake2b yields at most 64 bytes, i.e. 16 independent 32-bit hash values per call
+_VALUES_PER_DIGEST = 16
+
+
+class MinHasher:
+    """
+    Computes fixed-length MinHash signatures for sets of tokens.
+
+    Each token is expanded into num_perm independent 32-bit hashes using
+    blake2b keyed with a per-block salt derived from the seed; the signature
+    is the element-wise minimum over all tokens. Signatures are stable across
+    processes and can be persisted.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1, token_cache_size: int = 50000):
+        self.num_perm = num_perm
+        self.seed = seed
+        self.token_cache_size = token_cache_size
+
+        blocks = -(-num_perm // _VALUES_PER_DIGEST)
+        self._salts = [struct.pack(">QQ", seed, block) for block in range(blocks)]
+        self._unpack = struct.Struct(f">{num_perm}I").unpack_from
+        self._token_cache: Dict[str, Tuple[int, ...]] = {}
+
+    def _token_hashes(self, token: str) -> Tuple[int, ...]:
+        """num_perm independent hash values for a token (cached; vocabularies repeat)"""
+        values = self._token_cache.get(token)
+        if values is None:
+            data = token.encode('utf-8')
+            digest = b"".join(hashlib.blake2b(data, digest_size=64, salt=salt).digest() for salt in self._salts)
+            values = self._unpack(digest)
+            if len(self._token_cache) >= self.token_cache_size:
+                self._token_cache.clear()
+            self._token_cache[token] = values
+        return values
+
+    def signature(self, tokens: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        """Compute the MinHash signature for a token set (None for an empty set)"""
+        token_hashes = [self._token_hashes(t) for t in set(tokens)]
+        if not token_hashes:
+            return None
+        if len(token_hashes) == 1:
+            return token_hashes[0]
+        return tuple(map(min, zip(*token_hashes)))
+
+    @staticmethod
+    def serialize(signature: Sequence[int]) -> str:
+        """Serialize a signature for storage in SQLite"""
+        return ",".join(format(v, 'x') for v in signature)
+
+    @staticmethod
+    def deserialize(data: Optional[str]) -> Optional[Tuple[int, ...]]:
+        """Restore a signature produced by serialize()"""
+        if not data:
+            return None
+        try:
+            return tuple(int(v, 16) for v in data.split(","))
+        except ValueError:
+            return None
+
+
+class LSHIndex:
+    """
+    Banded LSH index over MinHash signatures.
+
+    A signature of num_perm values is split into `bands` bands of `rows`
+    values each; two items become candidates when any band matches exactly.
+    The probability of becoming a candidate at Jaccard s is
+    1 - (1 - s**rows) ** bands.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [defaultdict(list) for _ in range(bands)]
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def insert(self, key: str, signature: Sequence[int]):
+        """Add an item to the index"""
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Signature length {len(signature)} does not match num_perm {self.num_perm}")
+
+        signature = tuple(signature)
+        self._signatures[key] = signature
+        for band, buckets in enumerate(self._buckets):
+            start = band * self.rows
+            buckets[signature[start:start + self.rows]].append(key)
+
+    def query(self, signature: Sequence[int]) -> Set[str]:
+        """Return every indexed key sharing at least one band with the signature"""
+        signature = tuple(signature)
+        candidates: Set[str] = set()
+        for band, buckets in enumerate(self._buckets):
+            start = band * self.rows
+            candidates.update(buckets.get(signature[start:start + self.rows], ()))
+        return candidates
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Adaptive Pattern Index
+Hash-map index over UniversalAdaptiveLearning patterns so predictions only
+score candidate patterns instead of scanning every learned pattern.
+
+Filename, location and timing patterns match when all but one of their
+trigger conditions are equal to the file's features (match ratio > 0.7 over
+5 conditions, > 0.8 over 6). So a match must share either its "anchor"
+condition or the signature of all the remaining ones, and the candidates
+for a file are the union of two bucket lookups:
+
+    filename:  extension       | keywords tuple
+    location:  depth           | (in_downloads, in_desktop, in_documents, in_temp)
+    timing:    hour            | (day_of_week, is_weekend, is_morning, is_afternoon, is_evening)
+    content:   keyword_combination (exact)
+
+Patterns whose trigger conditions don't follow these schemas (e.g. older
+data) are kept in a small per-type fallback list and always scored.
+Callers apply the same scoring as before to the candidates, so results are
+unchanged.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# pattern_type -> (anchor condition, remaining conditions)
+INDEXED_SCHEMAS = {
+    "filename": ("extension", ("contains_numbers", "word_count", "contains_date", "keywords")),
+    "location": ("depth", ("in_downloads", "in_desktop", "in_documents", "in_temp")),
+    "timing": ("hour", ("day_of_week", "is_weekend", "is_morning", "is_afternoon", "is_evening")),
+}
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def condition_signature(conditions: Dict[str, Any], keys: Iterable[str]) -> Tuple:
+    """Hashable signature of the given trigger conditions"""
+    return tuple(_hashable(conditions.get(key)) for key in keys)
+
+
+class PatternIndex:
+    """
+    Candidate lookup for AdaptivePattern objects, keyed by pattern id.
+
+    Trigger conditions never change after a pattern is created, so patterns
+    are indexed once on add(); sync() rebuilds when the pattern dict is
+    replaced or shrinks (rebuild_knowledge_base, cleanup_old_data).
+    """
+
+    def __init__(self):
+        self._order: Dict[str, int] = {}
+        self._anchor: Dict[str, Dict[Any, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self._rest: Dict[str, Dict[Tuple, List[str]]] = defaultdict(lambda: defaultdict(list))
+        self._content: Dict[Tuple, List[str]] = defaultdict(list)
+        self._fallback: Dict[str, List[str]] = defaultdict(list)
+        self._source: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def clear(self):
+        self.__init__()
+
+    def add(self, pattern) -> None:
+        """Index a pattern (no-op if already indexed)"""
+        pattern_id = pattern.pattern_id
+        if pattern_id in self._order:
+            return
+        self._order[pattern_id] = len(self._order)
+
+        conditions = pattern.trigger_conditions or {}
+        schema = INDEXED_SCHEMAS.get(pattern.pattern_type)
+        if schema:
+            anchor, rest = schema
+            if set(conditions) == {anchor, *rest}:
+                try:
+                    self._anchor[pattern.pattern_type][_hashable(conditions[anchor])].append(pattern_id)
+                    self._rest[pattern.pattern_type][condition_signature(conditions, rest)].append(pattern_id)
+                    return
+                except TypeError:
+                    pass  # unhashable condition value
+            self._fallback[pattern.pattern_type].append(pattern_id)
+        elif pattern.pattern_type == "content":
+            combo = conditions.get("keyword_combination")
+            # Only tuples can ever match the generated keyword combinations
+            if isinstance(combo, tuple):
+                self._content[combo].append(pattern_id)
+
+    def sync(self, patterns: Dict[str, Any]) -> None:
+        """Make sure the index covers exactly this pattern dict"""
+        if patterns is not self._source or len(patterns) < len(self._order):
+            self.clear()
+            self._source = patterns
+        if len(patterns) != len(self._order):
+            for pattern in patterns.values():
+                self.add(pattern)
+
+    def _ordered(self, patterns: Dict[str, Any], ids: Iterable[str]) -> List[Any]:
+        """Existing patterns for ids, in insertion order (keeps tie-breaking identical to a full scan)"""
+        unique = sorted(set(ids), key=lambda pattern_id: self._order.get(pattern_id, 0))
+        return [patterns[pattern_id] for pattern_id in unique if pattern_id in patterns]
+
+    def candidates(self, patterns: Dict[str, Any], pattern_type: str, features: Dict[str, Any]) -> List[Any]:
+        """Patterns of pattern_type that can reach the match threshold for these features"""
+        self.sync(patterns)
+        anchor, rest = INDEXED_SCHEMAS[pattern_type]
+        ids = list(self._fallback.get(pattern_type, ()))
+        ids.extend(self._anchor[pattern_type].get(_hashable(features.get(anchor)), ()))
+        ids.extend(self._rest[pattern_type].get(condition_signature(features, rest), ()))
+        return self._ordered(patterns, ids)
+
+    def content_candidates(self, patterns: Dict[str, Any], keyword_combos: Iterable[Tuple]) -> List[Any]:
+        """Content patterns whose keyword combination is one of keyword_combos"""
+        self.sync(patterns)
+        ids = []
+        for combo in keyword_combos:
+            ids.extend(self._content.get(combo, ()))
+        return self._ordered(patterns, ids)
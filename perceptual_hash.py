@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Perceptual Hashing
+Near-duplicate detection for images and videos.
+
+BulletproofDeduplicator only finds byte-identical files; the same photo
+exported at two resolutions or a screenshot saved as both PNG and JPEG have
+different bytes but (nearly) the same 64-bit perceptual hash:
+
+    pHash  - sign of the low-frequency 8x8 DCT coefficients of a 32x32
+             grayscale thumbnail (needs numpy)
+    dHash  - sign of horizontal gradients of a 9x8 grayscale thumbnail
+             (fallback when numpy is unavailable)
+
+Videos are hashed as a sequence of keyframe hashes sampled evenly across
+the clip with ffmpeg; two videos match when the mean Hamming distance of
+their aligned keyframes is within the radius.
+
+Hamming-radius queries go through a multi-index hash table: each 64-bit
+hash is split into 4 16-bit chunks, and by the pigeonhole principle any
+hash within radius r shares at least one chunk within r // 4 bits of the
+query. A query therefore probes a few dozen buckets instead of scanning
+every stored hash.
+
+Usage:
+    store = get_perceptual_hash_store()
+    matches = store.find_near_duplicates(path)     # hashes and indexes path
+    groups = store.near_duplicate_groups(paths)     # dedup UI groups
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import logging
+import itertools
+import subprocess
+import threading
+from pathlib import Path
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from gdrive_integration import get_metadata_root
+from analysis_cache import content_fingerprint
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+HASH_ALGORITHM = "phash" if NUMPY_AVAILABLE else "dhash"
+
+# Maximum Hamming distance (of 64 bits) between near-duplicates
+NEAR_DUPLICATE_RADIUS = 6
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.heic', '.heif', '.tiff'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.m4v'}
+
+VIDEO_KEYFRAMES = 8
+
+PERCEPTUAL_HASH_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS perceptual_hashes (
+  file_path TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,                  -- image | video
+  algorithm TEXT NOT NULL,             -- phash | dhash
+  size INTEGER NOT NULL,
+  mtime REAL NOT NULL,
+  fingerprint TEXT NOT NULL,           -- analysis_cache.content_fingerprint
+  hashes TEXT NOT NULL,                -- comma separated hex; one per keyframe for videos
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_perceptual_hashes_kind ON perceptual_hashes(kind, algorithm);
+"""
+
+
+# ----------------------------------------------------------------------
+# Hash functions
+# ----------------------------------------------------------------------
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bits_to_int(bits: Iterable[bool]) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bool(bit)
+    return value
+
+
+def dhash_pixels(pixels: Sequence[int], width: int = 9, height: int = 8) -> int:
+    """dHash from row-major grayscale pixels of a width x height thumbnail"""
+    return _bits_to_int(
+        pixels[row * width + col] > pixels[row * width + col + 1]
+        for row in range(height) for col in range(width - 1)
+    )
+
+
+_DCT_MATRIX = None
+
+
+def phash_pixels(pixels: Sequence[int], size: int = 32) -> int:
+    """pHash from row-major grayscale pixels of a size x size thumbnail"""
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None:
+        n = np.arange(size)
+        matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+        matrix[0] *= 1 / np.sqrt(2)
+        _DCT_MATRIX = matrix * np.sqrt(2 / size)
+    block = np.asarray(pixels, dtype=np.float64).reshape(size, size)
+    coefficients = (_DCT_MATRIX @ block @ _DCT_MATRIX.T)[:8, :8].flatten()
+    # The DC term only reflects overall brightness
+    median = np.median(coefficients[1:])
+    return _bits_to_int(coefficients > median)
+
+
+def _thumbnail_size() -> Tuple[int, int]:
+    return (32, 32) if HASH_ALGORITHM == "phash" else (9, 8)
+
+
+def _hash_pixels(pixels: Sequence[int]) -> int:
+    return phash_pixels(pixels) if HASH_ALGORITHM == "phash" else dhash_pixels(pixels)
+
+
+def image_hash(image_path: Path) -> Optional[int]:
+    """Perceptual hash of an image file (None if it can't be decoded)"""
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        with Image.open(image_path) as img:
+            size = _thumbnail_size()
+            # JPEG can decode straight to a reduced scale, much faster than a full decode
+            img.draft("L", (size[0] * 4, size[1] * 4))
+            thumbnail = img.convert("L").resize(size, Image.Resampling.LANCZOS)
+            return _hash_pixels(list(thumbnail.getdata()))
+    except Exception as e:
+        logger.debug(f"Could not hash image {image_path}: {e}")
+        return None
+
+
+def video_keyframe_hashes(video_path: Path, frames: int = VIDEO_KEYFRAMES) -> Optional[List[int]]:
+    """
+    Perceptual hashes of keyframes sampled evenly across a video. None
+    without ffmpeg or when any keyframe fails to decode: sequences are
+    compared position by position, so a gap would misalign the rest.
+    """
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        return None
+    try:
+        probe = subprocess.run(
+            ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(video_path)],
+            capture_output=True, text=True, timeout=30
+        )
+        duration = float(probe.stdout.strip())
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return None
+
+    width, height = _thumbnail_size()
+    hashes = []
+    for n in range(frames):
+        # Input seeking (-ss before -i) jumps to the nearest keyframe without decoding up to it
+        offset = duration * (n + 0.5) / frames
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-v', 'quiet', '-ss', f"{offset:.3f}", '-i', str(video_path), '-frames:v', '1',
+                 '-vf', f"scale={width}:{height},format=gray", '-f', 'rawvideo', '-'],
+                capture_output=True, timeout=30
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+        if len(result.stdout) < width * height:
+            logger.debug(f"Could not decode keyframe {n} of {video_path}")
+            return None
+        hashes.append(_hash_pixels(list(result.stdout[:width * height])))
+    return hashes or None
+
+
+def sequence_distance(a: Sequence[int], b: Sequence[int]) -> float:
+    """Mean Hamming distance of aligned keyframe hashes"""
+    pairs = list(zip(a, b))
+    if not pairs:
+        return float(HASH_BITS)
+    return sum(hamming_distance(x, y) for x, y in pairs) / len(pairs)
+
+
+# ----------------------------------------------------------------------
+# Multi-index hash table
+# ----------------------------------------------------------------------
+
+class HammingIndex:
+    """
+    Multi-index hash table for Hamming-radius queries over 64-bit hashes.
+    A key may hold several hashes (video keyframes). Buckets hold integer
+    entry ids to keep a few hundred thousand hashes compact.
+    """
+
+    def __init__(self, chunks: int = 4, bits: int = HASH_BITS):
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(chunks)]
+        self._entry_keys: List[Optional[str]] = []
+        self._entry_values: List[int] = []
+        self._key_entries: Dict[str, List[int]] = {}
+        self._flips: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._key_entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_entries
+
+    def _chunks(self, value: int) -> List[int]:
+        return [(value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def _flip_masks(self, radius: int) -> List[int]:
+        """Every chunk-sized mask with at most `radius` bits set"""
+        masks = self._flips.get(radius)
+        if masks is None:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in itertools.combinations(range(self.chunk_bits), r):
+                    masks.append(sum(1 << b for b in bits))
+            self._flips[radius] = masks
+        return masks
+
+    def insert(self, key: str, value: int):
+        entry = len(self._entry_keys)
+        self._entry_keys.append(key)
+        self._entry_values.append(value)
+        self._key_entries.setdefault(key, []).append(entry)
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            table[chunk].append(entry)
+
+    def remove(self, key: str):
+        for entry in self._key_entries.pop(key, ()):
+            value = self._entry_values[entry]
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                bucket = table.get(chunk)
+                if bucket:
+                    bucket.remove(entry)
+                    if not bucket:
+                        del table[chunk]
+            self._entry_keys[entry] = None
+
+    def query(self, value: int, radius: int) -> Dict[str, int]:
+        """Keys holding a hash within radius of value -> smallest distance"""
+        masks = self._flip_masks(radius // self.chunks)
+        keys, values = self._entry_keys, self._entry_values
+        found: Dict[str, int] = {}
+        seen: Set[int] = set()
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for mask in masks:
+                for entry in table.get(chunk ^ mask, ()):
+                    if entry in seen:
+                        continue
+                    seen.add(entry)
+                    distance = (value ^ values[entry]).bit_count()
+                    key = keys[entry]
+                    if distance <= radius and distance < found.get(key, HASH_BITS + 1):
+                        found[key] = distance
+        return found
+
+
+# ----------------------------------------------------------------------
+# Persistent store
+# ----------------------------------------------------------------------
+
+def media_kind(file_path: Path) -> Optional[str]:
+    suffix = Path(file_path).suffix.lower()
+    if suffix in IMAGE_EXTENSIONS:
+        return "image"
+    if suffix in VIDEO_EXTENSIONS:
+        return "video"
+    return None
+
+
+def _encode(hashes: Sequence[int]) -> str:
+    return ",".join(format(h, "016x") for h in hashes)
+
+
+def _decode(data: str) -> List[int]:
+    return [int(h, 16) for h in data.split(",") if h]
+
+
+class PerceptualHashStore:
+    """
+    SQLite-backed perceptual hashes (WAL mode, one connection per thread)
+    with in-memory multi-index tables built on first use.
+
+    Rows are keyed by path and refreshed when size or mtime change; each
+    row carries the file's content fingerprint so callers can find cached
+    analyses of a near-duplicate (see analysis_cache). Memory holds only
+    each path's kind and hashes; everything else is read from SQLite for
+    the few rows a query returns.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, radius: int = NEAR_DUPLICATE_RADIUS):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "perceptual_hashes.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.radius = radius
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, HammingIndex]] = None
+        self._hashes: Dict[str, Tuple[str, Tuple[int, ...]]] = {}
+
+        with self._connect() as conn:
+            conn.executescript(PERCEPTUAL_HASH_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        self._ensure_index()
+        return len(self._hashes)
+
+    def _ensure_index(self) -> Dict[str, HammingIndex]:
+        with self._lock:
+            if self._index is None:
+                self._index = {"image": HammingIndex(), "video": HammingIndex()}
+                rows = self._connect().execute(
+                    "SELECT file_path, kind, hashes FROM perceptual_hashes WHERE algorithm = ?", (HASH_ALGORITHM,)
+                )
+                for file_path, kind, hashes in rows:
+                    self._index_hashes(file_path, kind, _decode(hashes))
+            return self._index
+
+    def _index_hashes(self, file_path: str, kind: str, hashes: Sequence[int]):
+        table = self._index[kind]
+        table.remove(file_path)
+        for value in hashes:
+            table.insert(file_path, value)
+        self._hashes[file_path] = (kind, tuple(hashes))
+
+    def _rows(self, file_paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored rows for file_paths"""
+        rows = {}
+        file_paths = list(file_paths)
+        conn = self._connect()
+        for start in range(0, len(file_paths), 500):
+            chunk = file_paths[start:start + 500]
+            for row in conn.execute(
+                f"SELECT * FROM perceptual_hashes WHERE file_path IN ({','.join('?' * len(chunk))}) AND algorithm = ?",
+                (*chunk, HASH_ALGORITHM)
+            ):
+                row = dict(row)
+                row["hashes"] = _decode(row["hashes"])
+                rows[row["file_path"]] = row
+        return rows
+
+    def hash_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Stored hash row for a file, computing it if the file is new or
+        changed. None for unsupported or undecodable files.
+        """
+        file_path = Path(file_path)
+        kind = media_kind(file_path)
+        if kind is None:
+            return None
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+
+        self._ensure_index()
+        row = self._rows([str(file_path)]).get(str(file_path))
+        if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return row
+
+        hashes = video_keyframe_hashes(file_path) if kind == "video" else image_hash(file_path)
+        if hashes is None:
+            return None
+        hashes = hashes if isinstance(hashes, list) else [hashes]
+        try:
+            fingerprint = content_fingerprint(file_path, stat)
+        except OSError:
+            return None
+
+        row = {
+            "file_path": str(file_path), "kind": kind, "algorithm": HASH_ALGORITHM,
+            "size": stat.st_size, "mtime": stat.st_mtime, "fingerprint": fingerprint,
+            "hashes": hashes, "updated_at": time.time(),
+        }
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO perceptual_hashes "
+                "(file_path, kind, algorithm, size, mtime, fingerprint, hashes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (row["file_path"], kind, HASH_ALGORITHM, row["size"], row["mtime"], fingerprint,
+                 _encode(hashes), row["updated_at"])
+            )
+            self._index_hashes(row["file_path"], kind, hashes)
+        return row
+
+    def forget(self, file_path: str):
+        """Drop a path (deleted or moved file)"""
+        self._ensure_index()
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM perceptual_hashes WHERE file_path = ?", (file_path,))
+            entry = self._hashes.pop(file_path, None)
+            if entry:
+                self._index[entry[0]].remove(file_path)
+
+    def _matches(self, file_path: str, kind: str, hashes: Sequence[int], radius: int) -> Dict[str, float]:
+        """Other indexed paths within radius of these hashes -> distance"""
+        index = self._ensure_index()[kind]
+        with self._lock:
+            if kind == "image":
+                found = index.query(hashes[0], radius)
+            else:
+                candidates: Set[str] = set()
+                for value in hashes:
+                    candidates.update(index.query(value, radius))
+                found = {}
+                for path in candidates:
+                    distance = sequence_distance(hashes, self._hashes[path][1])
+                    if distance <= radius:
+                        found[path] = distance
+        found.pop(file_path, None)
+        return found
+
+    def find_near_duplicates(self, file_path: Path, radius: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Previously hashed files that look like file_path, closest first.
+        Each match has file_path, distance and fingerprint. Paths are not
+        checked for existence: a moved file's fingerprint still finds its
+        cached analysis.
+        """
+        row = self.hash_file(file_path)
+        if row is None:
+            return []
+        radius = self.radius if radius is None else radius
+        found = self._matches(row["file_path"], row["kind"], row["hashes"], radius)
+        stored = self._rows(found)
+        matches = [
+            {"file_path": path, "distance": distance, "fingerprint": stored[path]["fingerprint"]}
+            for path, distance in found.items() if path in stored
+        ]
+        return sorted(matches, key=lambda m: (m["distance"], m["file_path"]))
+
+    def near_duplicate_groups(self, file_paths: Iterable[Path], radius: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Group visually similar images/videos among file_paths, in the dedup
+        UI's group format. Byte-identical copies (same fingerprint) are left
+        to the exact duplicate scan.
+        """
+        radius = self.radius if radius is None else radius
+        rows = {}
+        for path in file_paths:
+            row = self.hash_file(Path(path))
+            if row:
+                rows[row["file_path"]] = row
+
+        parent = {path: path for path in rows}
+
+        def find(path):
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+
+        distances: Dict[str, float] = {}
+        for path, row in rows.items():
+            for other, distance in self._matches(path, row["kind"], row["hashes"], radius).items():
+                if other not in rows or rows[other]["fingerprint"] == row["fingerprint"]:
+                    continue
+                root_a, root_b = find(path), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                distances[path] = max(distances.get(path, 0), distance)
+
+        members = defaultdict(list)
+        for path in rows:
+            members[find(path)].append(path)
+
+        groups = []
+        for root, paths in members.items():
+            if len({rows[p]["fingerprint"] for p in paths}) < 2:
+                continue
+            # Largest (usually highest resolution) copy first
+            paths.sort(key=lambda p: rows[p]["size"], reverse=True)
+            groups.append({
+                "group_id": f"near-{rows[paths[0]]['fingerprint'][:16]}",
+                "match": "near_duplicate",
+                "kind": rows[root]["kind"],
+                "max_distance": max(distances.get(p, 0) for p in paths),
+                "total_size": sum(rows[p]["size"] for p in paths),
+                "files": [
+                    {
+                        "path": p,
+                        "name": Path(p).name,
+                        "size": rows[p]["size"],
+                        "modified": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(rows[p]["mtime"])),
+                    }
+                    for p in paths
+                ],
+            })
+        groups.sort(key=lambda g: g["total_size"], reverse=True)
+        return groups
+
+    def prune_missing(self) -> int:
+        """Forget rows whose file no longer exists; returns the number removed"""
+        self._ensure_index()
+        with self._lock:
+            missing = [path for path in self._hashes if not os.path.exists(path)]
+        for path in missing:
+            self.forget(path)
+        return len(missing)
+
+
+_perceptual_hash_store: Optional[PerceptualHashStore] = None
+_perceptual_hash_store_lock = threading.Lock()
+
+
+def get_perceptual_hash_store() -> PerceptualHashStore:
+    """Shared PerceptualHashStore for the metadata root"""
+    global _perceptual_hash_store
+    with _perceptual_hash_store_lock:
+        if _perceptual_hash_store is None:
+            _perceptual_hash_store = PerceptualHashStore()
+        return _perceptual_hash_store
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Preview Service
+Small derivatives for the triage UI, so it never downloads originals just
+to show a thumbnail:
+  - image thumbnails at fixed sizes (THUMBNAIL_SIZES)
+  - a video poster frame and a short, low-bitrate, muted preview clip
+  - audio waveform peaks (JSON)
+
+Derivatives are rendered on the first request and kept in the shared
+derivative cache (content-addressed, size-capped); the cache key doubles
+as the HTTP ETag. Concurrent requests for the same derivative share one
+render. Video and audio use ffmpeg; PCM WAV waveforms work without it.
+
+Usage:
+    previews = get_preview_service()
+    derivative = previews.thumbnail(path, 320)     # Derivative(path, etag, media_type)
+    derivative = previews.video_preview(path)
+"""
+
+import json
+import wave
+import shutil
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from derivative_cache import DerivativeCache, get_derivative_cache
+from image_preprocessing import ImagePreprocessor, get_image_preprocessor
+
+logger = logging.getLogger(__name__)
+
+# Bump when a renderer changes so stale derivatives are not reused
+PREVIEW_VERSION = "1"
+
+# Thumbnail edge length -> image_preprocessing target
+THUMBNAIL_SIZES: Dict[int, str] = {160: "thumbnail_small", 320: "thumbnail", 1024: "preview"}
+
+POSTER_WIDTH = 640
+PREVIEW_CLIP_SEC = 6
+PREVIEW_CLIP_WIDTH = 480
+WAVEFORM_POINTS = 800
+# Waveforms are computed from 8 kHz mono in 10 ms windows
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_WINDOW = 80
+
+FFMPEG_TIMEOUT_SEC = 120
+
+
+class PreviewUnavailable(Exception):
+    """Raised when a derivative can't be produced for a file (unsupported type, no ffmpeg)"""
+
+
+class PreviewDecodeError(PreviewUnavailable):
+    """Raised when the source file exists but could not be decoded"""
+
+
+@dataclass
+class Derivative:
+    """A rendered derivative and how to serve it"""
+    path: Path
+    etag: str
+    media_type: str
+
+
+def _ffmpeg_available() -> bool:
+    return bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+def _duration(media_path: Path) -> Optional[float]:
+    try:
+        probe = subprocess.run(
+            ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(media_path)],
+            capture_output=True, text=True, timeout=30
+        )
+        return float(probe.stdout.strip())
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return None
+
+
+def _run_ffmpeg(args: List[str]):
+    result = subprocess.run(['ffmpeg', '-v', 'error', '-y', *args], capture_output=True, timeout=FFMPEG_TIMEOUT_SEC)
+    if result.returncode != 0:
+        raise PreviewDecodeError(result.stderr.decode(errors="replace").strip()[-300:] or "ffmpeg failed")
+
+
+def _thumbnail_purpose(size: int = 320) -> str:
+    purpose = THUMBNAIL_SIZES.get(size)
+    if purpose is None:
+        raise ValueError(f"Thumbnail size must be one of {sorted(THUMBNAIL_SIZES)}")
+    return purpose
+
+
+def _derivative_spec(preview: str, *args):
+    """(cache kind, version, params) of an ffmpeg/waveform preview"""
+    if preview == "poster":
+        return "video.poster", PREVIEW_VERSION, str(POSTER_WIDTH)
+    if preview == "video_preview":
+        return "video.preview", PREVIEW_VERSION, f"{PREVIEW_CLIP_WIDTH}:{PREVIEW_CLIP_SEC}"
+    if preview == "waveform":
+        return "audio.waveform", PREVIEW_VERSION, str(args[0] if args else WAVEFORM_POINTS)
+    raise ValueError(f"Unknown preview: {preview}")
+
+
+def _poster_offset(duration: Optional[float]) -> float:
+    """Skip black leaders/slates: 10% in, at most 10 s"""
+    return min((duration or 0) * 0.1, 10.0)
+
+
+def _reduce_peaks(window_peaks: "np.ndarray", points: int) -> List[float]:
+    """Max of per-window peaks over `points` equal buckets, scaled to 0..1"""
+    if window_peaks.size == 0:
+        return []
+    points = min(points, window_peaks.size)
+    edges = np.linspace(0, window_peaks.size, points + 1).astype(int)
+    peaks = np.maximum.reduceat(window_peaks, edges[:-1])
+    return [round(float(p), 3) for p in np.clip(peaks / 32768.0, 0.0, 1.0)]
+
+
+class PreviewService:
+    """Renders and caches triage previews on demand"""
+
+    def __init__(self, cache: Optional[DerivativeCache] = None, preprocessor: Optional[ImagePreprocessor] = None):
+        self.cache = cache or get_derivative_cache()
+        self.preprocessor = preprocessor or get_image_preprocessor()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Previews
+    # ------------------------------------------------------------------
+
+    def thumbnail(self, image_path: Path, size: int = 320) -> Derivative:
+        """JPEG thumbnail fitting size x size (size must be one of THUMBNAIL_SIZES)"""
+        purpose = _thumbnail_purpose(size)
+        try:
+            derived = self.preprocessor.prepare(Path(image_path), purpose)
+        except (FileNotFoundError, ValueError):
+            raise
+        except Exception as e:
+            raise PreviewDecodeError(f"Cannot render thumbnail: {e}")
+        # Derived files are named by their cache key
+        return Derivative(derived, derived.stem, "image/jpeg")
+
+    def poster(self, video_path: Path) -> Derivative:
+        """Single JPEG frame from early in the video"""
+        def render(source: Path, target: Path):
+            offset = _poster_offset(_duration(source))
+            _run_ffmpeg(['-ss', f"{offset:.3f}", '-i', str(source), '-frames:v', '1',
+                         '-vf', f"scale='min({POSTER_WIDTH},iw)':-2", '-q:v', '4', str(target)])
+
+        return self._derive(video_path, "poster", (), ".jpg", "image/jpeg", render)
+
+    def video_preview(self, video_path: Path) -> Derivative:
+        """Short, muted, low-bitrate H.264 clip"""
+        def render(source: Path, target: Path):
+            offset = _poster_offset(_duration(source))
+            # -ss before -i seeks on the input, so only the clip is decoded
+            _run_ffmpeg(['-ss', f"{offset:.3f}", '-i', str(source), '-t', str(PREVIEW_CLIP_SEC), '-an',
+                         '-vf', f"scale='min({PREVIEW_CLIP_WIDTH},iw)':-2", '-c:v', 'libx264',
+                         '-preset', 'veryfast', '-crf', '32', '-pix_fmt', 'yuv420p',
+                         '-movflags', '+faststart', str(target)])
+
+        return self._derive(video_path, "video_preview", (), ".mp4", "video/mp4", render)
+
+    def waveform(self, audio_path: Path, points: int = WAVEFORM_POINTS) -> Derivative:
+        """JSON waveform: {"duration": seconds, "peaks": [0..1, ...]}"""
+        if not NUMPY_AVAILABLE:
+            raise PreviewUnavailable("numpy is required for waveforms")
+
+        def render(source: Path, target: Path):
+            window_peaks, duration = self._window_peaks(source)
+            target.write_text(json.dumps({"duration": round(duration, 3),
+                                          "peaks": _reduce_peaks(window_peaks, points)}))
+
+        return self._derive(audio_path, "waveform", (points,), ".json", "application/json", render)
+
+    def etag(self, file_path: Path, preview: str, *args) -> str:
+        """
+        ETag a preview would be served with, without rendering it; preview
+        and args are a preview method's name and arguments. Raises
+        FileNotFoundError or ValueError like the preview itself.
+        """
+        file_path = Path(file_path)
+        if preview == "thumbnail":
+            return self.preprocessor.cache_key(file_path, _thumbnail_purpose(*args))
+        key = self.cache.file_key(file_path, *_derivative_spec(preview, *args))
+        if key is None:
+            raise FileNotFoundError(str(file_path))
+        return key
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _derive(self, source: Path, preview: str, args: tuple, suffix: str, media_type: str,
+                render: Callable[[Path, Path], None]) -> Derivative:
+        source = Path(source)
+        kind = _derivative_spec(preview, *args)[0]
+        key = self.etag(source, preview, *args)
+        derived = self.cache.get(key)
+        if derived is None:
+            derived = self._render_once(key, kind, suffix, source, render)
+        return Derivative(derived, key, media_type)
+
+    def _render_once(self, key: str, kind: str, suffix: str, source: Path,
+                     render: Callable[[Path, Path], None]) -> Path:
+        """Render unless the same derivative is already being rendered; then wait for it"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            if kind.startswith("video.") and not _ffmpeg_available():
+                raise PreviewUnavailable("ffmpeg is not installed")
+            target = self.cache.reserve(key, suffix)
+            try:
+                render(source, target)
+            except subprocess.TimeoutExpired:
+                target.unlink(missing_ok=True)
+                raise PreviewUnavailable(f"Rendering {kind} timed out")
+            except Exception:
+                target.unlink(missing_ok=True)
+                raise
+            derived = self.cache.commit(key, kind, target)
+            if derived is None:
+                raise PreviewUnavailable(f"Could not store {kind}")
+            future.set_result(derived)
+            return derived
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _window_peaks(self, audio_path: Path):
+        """Peak |sample| per 10 ms window of the mono 8 kHz signal, and the duration"""
+        if _ffmpeg_available():
+            process = subprocess.Popen(
+                ['ffmpeg', '-v', 'error', '-i', str(audio_path), '-ac', '1', '-ar', str(WAVEFORM_SAMPLE_RATE),
+                 '-f', 's16le', '-'],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            # Reads block until ffmpeg writes, so a stuck decode is killed from a timer
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(FFMPEG_TIMEOUT_SEC, kill)
+            timer.start()
+            try:
+                peaks = self._peaks_from_stream(
+                    lambda: process.stdout.read(WAVEFORM_SAMPLE_RATE * 2 * 10), np.int16, 1, WAVEFORM_SAMPLE_RATE)
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+                timer.cancel()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(process.args, FFMPEG_TIMEOUT_SEC)
+            if returncode != 0:
+                raise PreviewDecodeError("ffmpeg could not decode the audio")
+            return peaks
+
+        if audio_path.suffix.lower() != ".wav":
+            raise PreviewUnavailable("ffmpeg is not installed")
+        try:
+            with wave.open(str(audio_path), "rb") as wav:
+                dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(wav.getsampwidth())
+                if dtype is None:
+                    raise PreviewDecodeError("Unsupported WAV sample width")
+                frames_per_read = wav.getframerate() * 10
+                return self._peaks_from_stream(
+                    lambda: wav.readframes(frames_per_read), dtype, wav.getnchannels(), wav.getframerate())
+        except wave.Error as e:
+            raise PreviewDecodeError(f"Unreadable WAV file: {e}")
+
+    def _peaks_from_stream(self, read: Callable[[], bytes], dtype, channels: int, sample_rate: int):
+        """Stream PCM chunks into per-window peaks (bounded memory for long files)"""
+        window = max(1, sample_rate // 100)
+        itemsize = np.dtype(dtype).itemsize
+        peaks = []
+        samples = 0
+        carry = np.empty(0, dtype=np.int32)
+        while True:
+            chunk = read()
+            if not chunk:
+                break
+            usable = len(chunk) - len(chunk) % (itemsize * channels)
+            data = np.frombuffer(chunk[:usable], dtype=dtype).astype(np.int32)
+            if dtype == np.uint8:
+                data = (data - 128) << 8
+            elif dtype == np.int32:
+                data = data >> 16
+            frames = np.abs(data.reshape(-1, channels)).max(axis=1)
+            samples += frames.size
+            frames = np.concatenate([carry, frames])
+            whole = frames.size - frames.size % window
+            if whole:
+                peaks.append(frames[:whole].reshape(-1, window).max(axis=1))
+            carry = frames[whole:]
+        if carry.size:
+            peaks.append(carry.max(keepdims=True))
+        window_peaks = np.concatenate(peaks) if peaks else np.empty(0, dtype=np.int32)
+        return window_peaks, samples / sample_rate
+
+
+_preview_service: Optional[PreviewService] = None
+_preview_service_lock = threading.Lock()
+
+
+def get_preview_service() -> PreviewService:
+    """Shared PreviewService backed by the shared derivative cache"""
+    global _preview_service
+    with _preview_service_lock:
+        if _preview_service is None:
+            _preview_service = PreviewService()
+        return _preview_service
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Remote Model Request Scheduler
+One rate limiter for every remote model call (Gemini, OpenAI), shared by
+all processes on the machine - the API server, the background monitor and
+CLI batch runs draw from the same token buckets.
+
+Each bucket (one per provider/API key) is a token bucket stored in SQLite
+(WAL mode): `rate_per_minute` tokens are added continuously up to `burst`,
+each request takes one, and an optional daily limit caps requests per
+calendar day. Waiting requests register in a waiter table, so a token
+always goes to the highest-priority, longest-waiting request across
+processes - interactive triage jumps ahead of background backfill.
+
+Identical requests issued while one is already in flight in this process
+are coalesced: they wait for and share the first one's result.
+
+Usage:
+    scheduler = get_request_scheduler()
+    scheduler.acquire("gemini")                        # blocks until a token is granted
+    await scheduler.acquire_async("gemini")            # same, without blocking the event loop
+    text = scheduler.call("gemini", generate, prompt, key=cache_key)
+
+    with request_priority(INTERACTIVE):
+        analyzer.analyze_image(path)                   # acquires at interactive priority
+
+    async with scheduler.reserve("gemini"):            # API routes: wait on the loop, then
+        await asyncio.to_thread(analyze, path)         # the worker's acquire() uses that token
+"""
+
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower is served first)
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Waiters that stop heartbeating (crashed process) are dropped after this
+WAITER_STALE_SEC = 10.0
+# Longest single sleep while waiting, so heartbeats stay fresh and
+# newly arrived higher-priority waiters are noticed
+MAX_POLL_SEC = 0.5
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=BACKGROUND)
+# Tokens acquired on the event loop for work handed to a worker thread (see reserve())
+_reserved: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("reserved_tokens", default=None)
+
+
+class DailyQuotaExceeded(Exception):
+    """Raised when a bucket's daily request limit is used up"""
+
+    def __init__(self, bucket: str, limit: int):
+        super().__init__(f"Daily quota exceeded for {bucket} ({limit} requests/day)")
+        self.bucket = bucket
+        self.limit = limit
+
+
+@dataclass
+class BucketConfig:
+    """Rate for one remote API"""
+    rate_per_minute: float
+    burst: float = 1.0
+    daily_limit: Optional[int] = None
+
+
+# Gemini free tier: 15 RPM, 1,500 requests/day (shared by vision and text analysis)
+DEFAULT_BUCKETS: Dict[str, BucketConfig] = {
+    "gemini": BucketConfig(rate_per_minute=15, burst=1, daily_limit=1500),
+    "openai": BucketConfig(rate_per_minute=60, burst=5),
+}
+
+REQUEST_SCHEDULER_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+  name TEXT PRIMARY KEY,
+  capacity REAL NOT NULL,
+  refill_per_sec REAL NOT NULL,
+  tokens REAL NOT NULL,                -- may go negative after backoff()
+  updated_at REAL NOT NULL,
+  daily_limit INTEGER,
+  day TEXT NOT NULL,
+  day_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rate_waiters (
+  waiter_id TEXT PRIMARY KEY,
+  bucket TEXT NOT NULL,
+  priority INTEGER NOT NULL,
+  enqueued_at REAL NOT NULL,
+  heartbeat REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_waiters_order ON rate_waiters(bucket, priority, enqueued_at, waiter_id);
+"""
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the enclosed remote calls at the given priority class"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def _today() -> str:
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+class RequestScheduler:
+    """
+    Cross-process token buckets with priority ordering and in-process
+    request coalescing (SQLite WAL, one connection per thread).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, buckets: Optional[Dict[str, BucketConfig]] = None):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "request_scheduler.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = {"granted": 0, "coalesced": 0, "waited_sec": 0.0}
+
+        with self._connect() as conn:
+            conn.executescript(REQUEST_SCHEDULER_SCHEMA_SQL)
+        for name, config in (DEFAULT_BUCKETS if buckets is None else buckets).items():
+            self.configure(name, config)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread (autocommit; transactions are explicit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------------
+    # Buckets
+    # ------------------------------------------------------------------
+
+    def configure(self, name: str, config: BucketConfig):
+        """Create or re-rate a bucket (tokens and today's count are kept)"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO rate_buckets (name, capacity, refill_per_sec, tokens, updated_at, daily_limit, day, day_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET capacity = excluded.capacity, "
+                "refill_per_sec = excluded.refill_per_sec, daily_limit = excluded.daily_limit",
+                (name, config.burst, config.rate_per_minute / 60.0, config.burst, now, config.daily_limit, _today())
+            )
+
+    def _refill(self, conn: sqlite3.Connection, bucket: str, now: float) -> Dict[str, Any]:
+        row = conn.execute(
+            "SELECT capacity, refill_per_sec, tokens, updated_at, daily_limit, day, day_count "
+            "FROM rate_buckets WHERE name = ?", (bucket,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown request bucket: {bucket}")
+        capacity, rate, tokens, updated_at, daily_limit, day, day_count = row
+        tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+        today = _today()
+        if day != today:
+            day, day_count = today, 0
+        return {"capacity": capacity, "rate": rate, "tokens": tokens, "daily_limit": daily_limit,
+                "day": day, "day_count": day_count}
+
+    def _store(self, conn: sqlite3.Connection, bucket: str, state: Dict[str, Any], now: float):
+        conn.execute(
+            "UPDATE rate_buckets SET tokens = ?, updated_at = ?, day = ?, day_count = ? WHERE name = ?",
+            (state["tokens"], now, state["day"], state["day_count"], bucket)
+        )
+
+    def usage(self, bucket: str) -> Dict[str, Any]:
+        """Today's request count, daily limit and available tokens for a bucket (read only)"""
+        state = self._refill(self._connect(), bucket, time.time())
+        return {"date": state["day"], "requests": state["day_count"],
+                "daily_limit": state["daily_limit"], "tokens": state["tokens"]}
+
+    def daily_remaining(self, bucket: str) -> Optional[int]:
+        """Requests left today (None if the bucket has no daily limit)"""
+        usage = self.usage(bucket)
+        if usage["daily_limit"] is None:
+            return None
+        return max(0, usage["daily_limit"] - usage["requests"])
+
+    def record_daily_usage(self, bucket: str, day: str, count: int):
+        """Carry over a count made elsewhere today (e.g. an older quota file)"""
+        now = time.time()
+        with self._transaction() as conn:
+            state = self._refill(conn, bucket, now)
+            if state["day"] == day:
+                state["day_count"] = max(state["day_count"], count)
+            self._store(conn, bucket, state, now)
+
+    def backoff(self, bucket: str, seconds: float):
+        """
+        The provider rate-limited us: drain the bucket so no process sends
+        to it for roughly `seconds`.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            state = self._refill(conn, bucket, now)
+            state["tokens"] = min(state["tokens"], 1.0 - seconds * state["rate"])
+            self._store(conn, bucket, state, now)
+
+    # ------------------------------------------------------------------
+    # Acquiring tokens
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, bucket: str, priority: int) -> str:
+        waiter_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO rate_waiters (waiter_id, bucket, priority, enqueued_at, heartbeat) VALUES (?, ?, ?, ?, ?)",
+                (waiter_id, bucket, priority, now, now)
+            )
+        return waiter_id
+
+    def _dequeue(self, waiter_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_waiters WHERE waiter_id = ?", (waiter_id,))
+
+    def _try_acquire(self, bucket: str, waiter_id: str) -> Tuple[bool, float]:
+        """
+        One attempt: take a token if this waiter is first in line and one is
+        available. Returns (granted, seconds to wait before trying again).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            state = self._refill(conn, bucket, now)
+            if state["daily_limit"] is not None and state["day_count"] >= state["daily_limit"]:
+                raise DailyQuotaExceeded(bucket, state["daily_limit"])
+
+            conn.execute("DELETE FROM rate_waiters WHERE bucket = ? AND heartbeat < ?", (bucket, now - WAITER_STALE_SEC))
+            conn.execute("UPDATE rate_waiters SET heartbeat = ? WHERE waiter_id = ?", (now, waiter_id))
+            head = conn.execute(
+                "SELECT waiter_id FROM rate_waiters WHERE bucket = ? "
+                "ORDER BY priority, enqueued_at, waiter_id LIMIT 1", (bucket,)
+            ).fetchone()
+
+            if head is None or head[0] == waiter_id:
+                if state["tokens"] >= 1.0:
+                    state["tokens"] -= 1.0
+                    state["day_count"] += 1
+                    conn.execute("DELETE FROM rate_waiters WHERE waiter_id = ?", (waiter_id,))
+                    self._store(conn, bucket, state, now)
+                    return True, 0.0
+                wait = (1.0 - state["tokens"]) / state["rate"] if state["rate"] > 0 else MAX_POLL_SEC
+            else:
+                # Someone ahead of us; check back soon
+                wait = MAX_POLL_SEC / 5
+            self._store(conn, bucket, state, now)
+        return False, min(max(wait, 0.005), MAX_POLL_SEC)
+
+    def acquire(self, bucket: str, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a token is granted. Returns False on timeout; raises
+        DailyQuotaExceeded when the daily limit is used up.
+        """
+        reserved = _reserved.get()
+        if reserved and reserved.get(bucket):
+            reserved[bucket] -= 1
+            return True
+
+        priority = current_priority() if priority is None else priority
+        started = time.time()
+        waiter_id = self._enqueue(bucket, priority)
+        try:
+            while True:
+                granted, wait = self._try_acquire(bucket, waiter_id)
+                if granted:
+                    self._granted(time.time() - started)
+                    return True
+                if timeout is not None and time.time() - started + wait > timeout:
+                    return False
+                time.sleep(wait)
+        finally:
+            self._dequeue(waiter_id)
+
+    async def acquire_async(self, bucket: str, priority: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        acquire() for event-loop callers: waits with asyncio.sleep, and each
+        database step runs on a worker thread so the loop never blocks on
+        the SQLite write lock.
+        """
+        priority = current_priority() if priority is None else priority
+        started = time.time()
+        waiter_id = await asyncio.to_thread(self._enqueue, bucket, priority)
+        try:
+            while True:
+                granted, wait = await asyncio.to_thread(self._try_acquire, bucket, waiter_id)
+                if granted:
+                    self._granted(time.time() - started)
+                    return True
+                if timeout is not None and time.time() - started + wait > timeout:
+                    return False
+                await asyncio.sleep(wait)
+        finally:
+            await asyncio.to_thread(self._dequeue, waiter_id)
+
+    @asynccontextmanager
+    async def reserve(self, bucket: str, priority: Optional[int] = None):
+        """
+        Acquire a token on the event loop for blocking work run inside the
+        block with asyncio.to_thread (which copies the context). The first
+        acquire() for the bucket in that work takes the reserved token
+        instead of parking the worker thread; an unused token is refunded.
+        """
+        await self.acquire_async(bucket, priority)
+        reserved = {bucket: 1}
+        token = _reserved.set(reserved)
+        try:
+            yield
+        finally:
+            _reserved.reset(token)
+            if reserved[bucket] > 0:
+                await asyncio.to_thread(self.refund, bucket)
+
+    def refund(self, bucket: str):
+        """Return a granted token that ended up unused (e.g. the result was cached)"""
+        now = time.time()
+        with self._transaction() as conn:
+            state = self._refill(conn, bucket, now)
+            state["tokens"] = min(state["capacity"], state["tokens"] + 1.0)
+            state["day_count"] = max(0, state["day_count"] - 1)
+            self._store(conn, bucket, state, now)
+
+    def _granted(self, waited: float):
+        self.stats["granted"] += 1
+        self.stats["waited_sec"] += waited
+        if waited > 1.0:
+            logger.info(f"Remote request waited {waited:.1f}s for its rate limit slot")
+
+    # ------------------------------------------------------------------
+    # Coalesced calls
+    # ------------------------------------------------------------------
+
+    def _join(self, bucket: str, key: Optional[Hashable]) -> Tuple[Optional[Future], bool]:
+        """(future, owner): owner runs the call, others wait on the future"""
+        if key is None:
+            return None, True
+        with self._inflight_lock:
+            future = self._inflight.get((bucket, key))
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._inflight[(bucket, key)] = future
+            return future, True
+
+    def _finish(self, bucket: str, key: Optional[Hashable], future: Optional[Future],
+                result: Any = None, error: Optional[BaseException] = None):
+        if future is None:
+            return
+        with self._inflight_lock:
+            self._inflight.pop((bucket, key), None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, bucket: str, fn: Callable[..., Any], *args, key: Optional[Hashable] = None,
+             priority: Optional[int] = None, **kwargs) -> Any:
+        """Acquire a token from bucket, then run fn (coalesced on key)"""
+        future, owner = self._join(bucket, key)
+        if not owner:
+            return future.result()
+        try:
+            self.acquire(bucket, priority)
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(bucket, key, future, error=e)
+            raise
+        self._finish(bucket, key, future, result=result)
+        return result
+
+    def call_with_backoff(self, bucket: str, fn: Callable[..., Any], *args, is_rate_limited: Callable[[BaseException], bool],
+                          max_retries: int = 3, initial_delay: float = 2.0, **kwargs) -> Any:
+        """
+        call() that retries when the provider still rate-limits us, draining
+        the shared bucket so every process backs off, not just this one.
+        """
+        retries = 0
+        while True:
+            try:
+                return self.call(bucket, fn, *args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or retries >= max_retries:
+                    raise
+                # Exponential backoff with jitter
+                delay = initial_delay * (2 ** retries) + random.uniform(0, 1)
+                logger.warning(f"{bucket} rate limited; backing off {delay:.1f}s (attempt {retries + 1}/{max_retries})")
+                self.backoff(bucket, delay)
+                retries += 1
+
+
+_request_scheduler: Optional[RequestScheduler] = None
+_request_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """Shared RequestScheduler for the metadata root"""
+    global _request_scheduler
+    with _request_scheduler_lock:
+        if _request_scheduler is None:
+            _request_scheduler = RequestScheduler()
+        return _request_scheduler
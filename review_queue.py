@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Review Queue Store
+Indexed, persistent queue of files the classifier wants a human to look at.
+
+Replaces the append-only review_queue.jsonl: each queued file version is one
+row keyed by queue_id (path + size + mtime), so re-classifying an unchanged
+file updates its row instead of appending a duplicate, and a newer version of
+the file supersedes the older pending row. Pending items are read in
+confidence order through an index with keyset pagination, so loading triage
+costs the same whatever the queue's history length. Resolved rows are
+compacted away after a retention period.
+
+Usage:
+    queue = get_review_queue()
+    queue.enqueue(file_path, category="unknown", confidence=0.41, reasoning="...")
+    page = queue.list_pending(limit=200)
+    queue.resolve_path(file_path)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RESOLVED = "resolved"          # user classified the file
+SUPERSEDED = "superseded"      # a newer version of the file was queued
+MISSING = "missing"            # file no longer exists at its path
+
+# Resolved/superseded/missing rows older than this are deleted by compact()
+DEFAULT_RETENTION_DAYS = 30
+
+# SQLite's default host parameter limit is 999
+_IN_CHUNK = 500
+
+REVIEW_QUEUE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS review_queue (
+  queue_id TEXT PRIMARY KEY,           -- md5 of path + size + mtime
+  file_path TEXT NOT NULL,
+  file_type TEXT,
+  category TEXT,
+  confidence REAL NOT NULL DEFAULT 0,
+  reasoning TEXT,
+  details TEXT,                        -- JSON: decision trace, conflicts, candidates
+  status TEXT NOT NULL DEFAULT 'pending',
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL,
+  resolved_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_review_queue_status_confidence ON review_queue(status, confidence, queue_id);
+CREATE INDEX IF NOT EXISTS idx_review_queue_path ON review_queue(file_path, status);
+CREATE INDEX IF NOT EXISTS idx_review_queue_resolved_at ON review_queue(status, resolved_at);
+"""
+
+
+def make_queue_id(file_path: Path) -> str:
+    """Identity of one version of a file (same scheme the JSONL queue used)"""
+    stat = file_path.stat()
+    return hashlib.md5(f"{file_path}{stat.st_size}{stat.st_mtime}".encode()).hexdigest()
+
+
+def encode_cursor(item: Dict[str, Any]) -> str:
+    """Keyset cursor from the last item of a page"""
+    return f"{item['confidence']!r}|{item['queue_id']}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """Parse a cursor produced by encode_cursor (None if absent or malformed)"""
+    if not cursor:
+        return None
+    confidence, _, queue_id = cursor.partition("|")
+    try:
+        return float(confidence), queue_id
+    except ValueError:
+        return None
+
+
+class ReviewQueueStore:
+    """
+    SQLite-backed review queue (WAL mode, one connection per thread).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, import_legacy: bool = True):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "review_queue.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(REVIEW_QUEUE_SCHEMA_SQL)
+
+        if import_legacy:
+            for legacy_path in (
+                get_metadata_root() / ".AI_LIBRARIAN_CORPUS" / "03_ADAPTIVE_FEEDBACK" / "review_queue.jsonl",
+                get_metadata_root() / "review_queue.jsonl",
+            ):
+                self.import_jsonl(legacy_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def enqueue(self, file_path: Path, category: str, confidence: float, reasoning: str = "",
+                file_type: Optional[str] = None, details: Optional[Dict[str, Any]] = None,
+                queue_id: Optional[str] = None) -> str:
+        """
+        Queue a file for review; returns its queue_id.
+
+        Re-queuing an unchanged file refreshes its row (a resolved row stays
+        resolved); queuing a changed file supersedes its older pending row.
+        """
+        file_path = Path(file_path)
+        queue_id = queue_id or make_queue_id(file_path)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE review_queue SET status = ?, resolved_at = ? "
+                "WHERE file_path = ? AND status = ? AND queue_id != ?",
+                (SUPERSEDED, now, str(file_path), PENDING, queue_id)
+            )
+            conn.execute("""
+                INSERT INTO review_queue
+                  (queue_id, file_path, file_type, category, confidence, reasoning, details, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(queue_id) DO UPDATE SET
+                  category = excluded.category,
+                  confidence = excluded.confidence,
+                  reasoning = excluded.reasoning,
+                  details = excluded.details,
+                  updated_at = excluded.updated_at
+            """, (
+                queue_id, str(file_path), file_type, category, float(confidence or 0.0), reasoning,
+                json.dumps(details, default=str) if details else None, PENDING, now, now
+            ))
+        return queue_id
+
+    def resolve_path(self, file_path: str, status: str = RESOLVED) -> int:
+        """Close every pending item for a path (e.g. after the user classified it)"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE review_queue SET status = ?, resolved_at = ? WHERE file_path = ? AND status = ?",
+                (status, time.time(), str(file_path), PENDING)
+            )
+            return cursor.rowcount
+
+    def resolve(self, queue_ids: Iterable[str], status: str = RESOLVED) -> int:
+        """Close specific pending items"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE review_queue SET status = ?, resolved_at = ? WHERE queue_id = ? AND status = ?",
+                [(status, now, queue_id, PENDING) for queue_id in queue_ids]
+            )
+            return cursor.rowcount
+
+    def compact(self, retention_days: int = DEFAULT_RETENTION_DAYS) -> int:
+        """Delete closed items resolved more than retention_days ago; returns rows removed"""
+        cutoff = time.time() - retention_days * 86400
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM review_queue WHERE status != ? AND resolved_at < ?",
+                (PENDING, cutoff)
+            )
+            removed = cursor.rowcount
+        if removed:
+            logger.info(f"Compacted {removed} closed review queue items")
+        return removed
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def list_pending(self, limit: int = 200, cursor: Optional[str] = None,
+                     check_exists: bool = True) -> Dict[str, Any]:
+        """
+        One page of pending items, least confident first.
+
+        With check_exists, items whose file has disappeared are marked
+        missing (one batched update) and the page is topped up, so only
+        the returned page is stat'ed.
+
+        Returns:
+            {"items": [...], "next_cursor": str or None}
+        """
+        items: List[Dict[str, Any]] = []
+        after = decode_cursor(cursor)
+        conn = self._connect()
+
+        while len(items) < limit:
+            want = limit - len(items)
+            if after:
+                rows = conn.execute(
+                    "SELECT * FROM review_queue WHERE status = ? AND (confidence, queue_id) > (?, ?) "
+                    "ORDER BY confidence, queue_id LIMIT ?",
+                    (PENDING, after[0], after[1], want)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM review_queue WHERE status = ? ORDER BY confidence, queue_id LIMIT ?",
+                    (PENDING, want)
+                ).fetchall()
+            if not rows:
+                return {"items": items, "next_cursor": None}
+
+            page = [self._row_to_item(row) for row in rows]
+            after = (page[-1]["confidence"], page[-1]["queue_id"])
+
+            if check_exists:
+                missing = {item["queue_id"] for item in page if not os.path.exists(item["file_path"])}
+                if missing:
+                    self.resolve(missing, status=MISSING)
+                    page = [item for item in page if item["queue_id"] not in missing]
+            items.extend(page)
+
+            if len(rows) < want:
+                return {"items": items, "next_cursor": None}
+
+        return {"items": items, "next_cursor": encode_cursor(items[-1])}
+
+    def pending_paths(self, paths: Iterable[str]) -> Set[str]:
+        """Which of these paths already have a pending review item (batched lookup)"""
+        paths = [str(p) for p in paths]
+        found: Set[str] = set()
+        conn = self._connect()
+        for start in range(0, len(paths), _IN_CHUNK):
+            chunk = paths[start:start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(row[0] for row in conn.execute(
+                f"SELECT DISTINCT file_path FROM review_queue WHERE status = ? AND file_path IN ({placeholders})",
+                (PENDING, *chunk)
+            ))
+        return found
+
+    def count(self, status: str = PENDING) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM review_queue WHERE status = ?", (status,)
+        ).fetchone()[0]
+
+    @staticmethod
+    def _row_to_item(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["details"] = json.loads(item["details"]) if item["details"] else {}
+        return item
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    def import_jsonl(self, path: Path) -> int:
+        """One-time import of a legacy review_queue.jsonl; the file is renamed afterwards"""
+        path = Path(path)
+        if not path.exists():
+            return 0
+
+        rows = {}
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                file_path = entry.get("file_path") or entry.get("path")
+                if not file_path:
+                    continue
+                decision = entry.get("final_decision", {})
+                ts = entry.get("timestamp") or time.time()
+                queue_id = entry.get("queue_id") or hashlib.md5(file_path.encode()).hexdigest()
+                # Later lines for the same queue_id win, like a replay of the log
+                rows[queue_id] = (
+                    queue_id, file_path, entry.get("file_type"),
+                    decision.get("category", entry.get("current_category", "unknown")),
+                    float(decision.get("confidence", entry.get("confidence", 0.0)) or 0.0),
+                    decision.get("trace", entry.get("reasoning", "")),
+                    json.dumps({"conflicts": entry.get("conflicts", []), "candidates": entry.get("candidates", [])}),
+                    entry.get("status", PENDING), ts, ts
+                )
+
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO review_queue
+                  (queue_id, file_path, file_type, category, confidence, reasoning, details, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, list(rows.values()))
+            # The JSONL kept every version of a file; only the newest stays pending
+            conn.execute("""
+                UPDATE review_queue SET status = ?, resolved_at = ?
+                WHERE status = ? AND EXISTS (
+                  SELECT 1 FROM review_queue AS newer
+                  WHERE newer.file_path = review_queue.file_path AND newer.status = ?
+                    AND (newer.updated_at, newer.queue_id) > (review_queue.updated_at, review_queue.queue_id)
+                )
+            """, (SUPERSEDED, time.time(), PENDING, PENDING))
+
+        path.rename(path.with_suffix(".jsonl.imported"))
+        logger.info(f"Imported {len(rows)} review queue items from {path}")
+        return len(rows)
+
+
+_review_queue: Optional[ReviewQueueStore] = None
+_review_queue_lock = threading.Lock()
+
+
+def get_review_queue() -> ReviewQueueStore:
+    """Shared ReviewQueueStore for the metadata root"""
+    global _review_queue
+    with _review_queue_lock:
+        if _review_queue is None:
+            _review_queue = ReviewQueueStore()
+            _review_queue.compact()
+        return _review_queue
@@ -8,7 +8,6 @@ enabling the system to "read" and understand document context beyond simple keyw
 """
 
 import os
-import time
 import json
 import logging
 import google.generativeai as genai
@@ -30,6 +29,9 @@ class SemanticTextAnalyzer:
     - Key entity extraction
     """
     
+    # Bump when the prompt or result handling changes so cached analyses are redone
+    CACHE_VERSION = "1"
+    
     def __init__(self, 
                  api_key: Optional[str] = None,
                  base_dir: Optional[str] = None,
@@ -45,8 +47,14 @@ class SemanticTextAnalyzer:
         self.base_dir = Path(base_dir) if base_dir else Path(os.getcwd())
         self.model_name = model_name
         self.api_initialized = False
-        self._last_request_time = 0
-        self._min_request_interval = 4.0  # 15 RPM = 1 request every 4 seconds
+        
+        # Gemini calls share the cross-process 15 RPM bucket with VisionAnalyzer
+        from request_scheduler import get_request_scheduler
+        self.scheduler = get_request_scheduler()
+        
+        # Content-addressed result cache shared with the other analyzers
+        from analysis_cache import get_analysis_cache
+        self.analysis_cache = get_analysis_cache()
         
         # Initialize API
         self._initialize_api(api_key)
@@ -106,12 +114,13 @@ class SemanticTextAnalyzer:
             logger.error(f"Failed to initialize Gemini API: {e}")
             self.api_initialized = False
 
-    def _wait_for_rate_limit(self):
-        """Enforce rate limiting (15 RPM)."""
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self._min_request_interval:
-            time.sleep(self._min_request_interval - elapsed)
-        self._last_request_time = time.time()
+    def _generate(self, prompt: str):
+        """Single Gemini request (runs under the shared rate limit)"""
+        model = genai.GenerativeModel(self.model_name)
+        return model.generate_content(
+            prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
 
     def analyze_text(self, text_content: str, filename: str, allowed_categories: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
@@ -134,6 +143,19 @@ class SemanticTextAnalyzer:
         # Truncate text if too long
         truncated_text = text_content[:50000]
         
+        # Keyed by the text rather than the filename, so a renamed file isn't
+        # re-analyzed; only the extension reaches the cache key.
+        cache_key = self.analysis_cache.text_key(
+            truncated_text, "text.semantic", f"{self.CACHE_VERSION}:{self.model_name}",
+            json.dumps({
+                "extension": Path(filename).suffix.lower(),
+                "categories": [(cat.get('id'), cat.get('name')) for cat in allowed_categories or []]
+            })
+        )
+        cached = self.analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Format allowed categories for prompt
         category_list_str = ""
         if allowed_categories:
@@ -180,13 +202,8 @@ class SemanticTextAnalyzer:
         """
 
         try:
-            self._wait_for_rate_limit()
-            
-            model = genai.GenerativeModel(self.model_name)
-            response = model.generate_content(
-                prompt,
-                generation_config={"response_mime_type": "application/json"}
-            )
+            # Identical in-flight requests (same cache key) share one call
+            response = self.scheduler.call("gemini", self._generate, prompt, key=cache_key)
             
             result = json.loads(response.text)
             
@@ -198,6 +215,7 @@ class SemanticTextAnalyzer:
                 result = {"raw_result": result}
                 
             result["success"] = True
+            self.analysis_cache.put(cache_key, "text.semantic", result)
             return result
 
         except Exception as e:
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Staging Classification Snapshot
+Persistent, incrementally maintained classification of files in the staging
+areas (Downloads, Desktop, inbox/staging folders).
+
+The background monitor notes files as they appear, change or move; a single
+background worker classifies only files that are new or changed since their
+last classification; triage reads the stored results. Opening the triage view
+is therefore a database read instead of a classification pass over every
+staging file.
+
+Each consumer builds its own StagingSnapshot for its own staging areas;
+they share the database, so files noted by the monitor are picked up by
+the worker triage attaches.
+
+Usage:
+    snapshot = StagingSnapshot(default_staging_areas(base_dir))
+    snapshot.note_file(path)                  # from file events (cheap: one stat)
+    snapshot.attach_classifier(classify_fn)   # starts the background worker
+    snapshot.low_confidence(0.60, limit=200)  # triage read
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from gdrive_integration import get_metadata_root
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"          # new or changed since last classification
+CLASSIFIED = "classified"
+ERROR = "error"              # classification failed for this version of the file
+SKIPPED = "skipped"          # too large to classify in the background
+
+MAX_CLASSIFY_BYTES = 100 * 1024 * 1024
+
+# Don't rescan the areas more often than this, even when asked; events keep
+# the snapshot current in between
+MIN_RECONCILE_GAP_SEC = 30.0
+# The worker checks for files marked pending by other processes this often
+PENDING_POLL_SEC = 10.0
+# Failed classifications are tried again after this long
+ERROR_RETRY_SEC = 3600.0
+
+STAGING_SNAPSHOT_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS staging_files (
+  file_path TEXT PRIMARY KEY,
+  area TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime REAL NOT NULL,
+  state TEXT NOT NULL,
+  category TEXT,
+  confidence REAL,
+  reasoning TEXT,
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_staging_files_state_confidence ON staging_files(state, confidence);
+CREATE INDEX IF NOT EXISTS idx_staging_files_area ON staging_files(area);
+"""
+
+
+def default_staging_areas(base_dir: Path) -> List[Path]:
+    """Common staging areas where unorganized files are found"""
+    return [
+        Path.home() / "Downloads",
+        Path.home() / "Desktop",
+        base_dir / "99_TEMP_PROCESSING" / "Downloads_Staging",
+        base_dir / "99_TEMP_PROCESSING" / "Desktop_Staging",
+        base_dir / "99_TEMP_PROCESSING" / "Manual_Review",
+        base_dir / "99_STAGING_EMERGENCY",  # Emergency staging for bulk file dumps
+        base_dir / "00_INBOX_STAGING",  # New Primary Input Queue
+        # Add iCloud Staging
+        Path.home() / "Library/Mobile Documents/com~apple~CloudDocs/Documents/GDRIVE_STAGING"
+    ]
+
+
+class StagingSnapshot:
+    """
+    SQLite-backed snapshot of staging-area classifications (WAL mode, one connection per thread).
+
+    Only top-level, non-hidden files of the configured areas are tracked,
+    matching what triage shows.
+    """
+
+    def __init__(self, areas: Iterable[Path], db_path: Optional[Path] = None,
+                 reconcile_interval_sec: float = 300.0):
+        self.db_path = Path(db_path) if db_path else get_metadata_root() / "databases" / "staging_snapshot.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.areas = [Path(area) for area in areas]
+        self.reconcile_interval_sec = reconcile_interval_sec
+
+        self._local = threading.local()
+        self._classify: Optional[Callable[[Path], Tuple[str, float, str]]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._reconcile_requested = threading.Event()
+        self._stop = threading.Event()
+
+        with self._connect() as conn:
+            conn.executescript(STAGING_SNAPSHOT_SCHEMA_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One long-lived connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def area_for(self, path: Path) -> Optional[Path]:
+        """The staging area a file sits directly in, or None if it is not tracked"""
+        path = Path(path)
+        if path.name.startswith('.'):
+            return None
+        for area in self.areas:
+            if path.parent == area:
+                return area
+        return None
+
+    # ------------------------------------------------------------------
+    # Maintenance (file events, reconcile)
+    # ------------------------------------------------------------------
+
+    def note_file(self, path: Path, stat: Optional[os.stat_result] = None) -> bool:
+        """
+        Record that a staging file exists in its current version.
+        Returns True when it is new or changed and therefore needs classifying.
+        """
+        path = Path(path)
+        area = self.area_for(path)
+        if area is None:
+            return False
+        try:
+            stat = stat or path.stat()
+        except OSError:
+            self.forget(path)
+            return False
+        if not os.path.isfile(path):
+            return False
+
+        conn = self._connect()
+        row = conn.execute("SELECT size, mtime FROM staging_files WHERE file_path = ?", (str(path),)).fetchone()
+        if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return False
+
+        state = SKIPPED if stat.st_size > MAX_CLASSIFY_BYTES else PENDING
+        with conn:
+            conn.execute("""
+                INSERT INTO staging_files (file_path, area, size, mtime, state, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_path) DO UPDATE SET
+                  size = excluded.size, mtime = excluded.mtime, state = excluded.state,
+                  category = NULL, confidence = NULL, reasoning = NULL, updated_at = excluded.updated_at
+            """, (str(path), str(area), stat.st_size, stat.st_mtime, state, time.time()))
+
+        if state == PENDING:
+            self._wake.set()
+        return state == PENDING
+
+    def forget(self, path: Path):
+        """A staging file was moved away or deleted"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM staging_files WHERE file_path = ?", (str(path),))
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Bring the snapshot in line with the staging areas on disk (stat only,
+        no classification). Catches anything file events missed.
+        """
+        counts = {"seen": 0, "changed": 0, "removed": 0}
+        conn = self._connect()
+        for area in self.areas:
+            present = set()
+            try:
+                with os.scandir(area) as it:
+                    for entry in it:
+                        if entry.name.startswith('.') or not entry.is_file():
+                            continue
+                        present.add(entry.path)
+                        counts["seen"] += 1
+                        if self.note_file(Path(entry.path), entry.stat()):
+                            counts["changed"] += 1
+            except OSError:
+                pass
+
+            known = {row[0] for row in conn.execute("SELECT file_path FROM staging_files WHERE area = ?", (str(area),))}
+            gone = known - present
+            if gone:
+                with conn:
+                    conn.executemany("DELETE FROM staging_files WHERE file_path = ?", [(p,) for p in gone])
+                counts["removed"] += len(gone)
+        return counts
+
+    # ------------------------------------------------------------------
+    # Classification worker
+    # ------------------------------------------------------------------
+
+    def attach_classifier(self, classify: Callable[[Path], Tuple[str, float, str]]):
+        """Start the background worker; classify(path) returns (category, confidence, reasoning)"""
+        self._classify = classify
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run_worker, name="staging-classifier", daemon=True)
+        self._worker.start()
+        self.request_refresh(reconcile=True)
+
+    def request_refresh(self, reconcile: bool = False):
+        """Ask the worker to classify pending files (and optionally rescan the areas) without waiting"""
+        if reconcile:
+            self._reconcile_requested.set()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._worker:
+            self._worker.join(timeout=5)
+
+    def _run_worker(self):
+        last_reconcile = float("-inf")
+        while not self._stop.is_set():
+            timeout = min(self.reconcile_interval_sec, PENDING_POLL_SEC)
+            try:
+                since = time.monotonic() - last_reconcile
+                if self._reconcile_requested.is_set() or since >= self.reconcile_interval_sec:
+                    if since >= MIN_RECONCILE_GAP_SEC:
+                        self._reconcile_requested.clear()
+                        self.reconcile()
+                        last_reconcile = time.monotonic()
+                    else:
+                        # Too soon after the last rescan: keep the request and run it when the gap is up
+                        timeout = min(timeout, MIN_RECONCILE_GAP_SEC - since)
+                self.retry_errors()
+                self.classify_pending()
+            except Exception as e:
+                logger.error(f"Staging snapshot worker error: {e}")
+            self._wake.wait(timeout=timeout)
+            self._wake.clear()
+
+    def retry_errors(self, older_than_sec: float = ERROR_RETRY_SEC) -> int:
+        """Mark files whose classification failed at least older_than_sec ago pending again"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE staging_files SET state = ?, updated_at = ? WHERE state = ? AND updated_at <= ?",
+                (PENDING, time.time(), ERROR, time.time() - older_than_sec)
+            )
+        return cursor.rowcount
+
+    def classify_pending(self, batch_size: int = 20) -> int:
+        """Classify files that are new or changed since their last classification"""
+        if not self._classify:
+            return 0
+        done = 0
+        while not self._stop.is_set():
+            rows = self._connect().execute(
+                "SELECT file_path, size, mtime FROM staging_files WHERE state = ? ORDER BY updated_at LIMIT ?",
+                (PENDING, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                self._classify_one(Path(row["file_path"]), row["size"], row["mtime"])
+                done += 1
+        return done
+
+    def _classify_one(self, path: Path, size: int, mtime: float):
+        try:
+            category, confidence, reasoning = self._classify(path)
+            state = CLASSIFIED
+        except Exception as e:
+            logger.warning(f"Background classification failed for {path.name}: {e}")
+            category, confidence, reasoning, state = None, None, str(e), ERROR
+
+        # Only store the result if the file wasn't changed (re-marked pending) meanwhile
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE staging_files SET state = ?, category = ?, confidence = ?, reasoning = ?, updated_at = ?
+                WHERE file_path = ? AND size = ? AND mtime = ? AND state = ?
+            """, (state, category, confidence, reasoning, time.time(), str(path), size, mtime, PENDING))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def low_confidence(self, threshold: float, limit: int = 200) -> List[Dict[str, Any]]:
+        """Classified staging files below the threshold, least confident first"""
+        rows = self._connect().execute(
+            "SELECT * FROM staging_files WHERE state = ? AND confidence < ? ORDER BY confidence LIMIT ?",
+            (CLASSIFIED, threshold, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            row["state"]: row["n"]
+            for row in self._connect().execute("SELECT state, COUNT(*) AS n FROM staging_files GROUP BY state")
+        }
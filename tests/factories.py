@@ -0,0 +1,114 @@
+"""
+Shared builders for partially initialised service objects.
+
+Several tests need a real instance of a class whose __init__ opens
+databases, loads models or starts learning systems. These helpers create
+the instance with __new__ and set only the state the exercised code
+reads, so a new attribute only has to be added here.
+"""
+
+import os
+import sys
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from minhash_lsh import MinHasher
+
+
+class ContentExtractorStub:
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+
+BATCH_PROCESSOR_CONFIG = {
+    "max_batch_size": 50,
+    "preview_length": 500,
+    "similarity_threshold": 0.7,
+    "auto_process_threshold": 0.85,
+    "keyword_limit": 10,
+    "minhash_permutations": 128,
+    "lsh_bands": 32,
+    "lsh_min_files": 200,
+    "preview_workers": 4,
+    "first_screen_files": 5,
+    "stream_chunk_files": 10,
+    "signature_cache_size": 1000,
+    "group_by_preferences": ["duplicates", "similar_content", "same_type"],
+}
+
+
+def make_batch_processor(base: Optional[Path] = None, learning_system: Any = None,
+                         confidence_system: Any = None, **config):
+    """
+    InteractiveBatchProcessor with only the learning and confidence systems
+    passed in, and no rollback system. With a base directory it also gets a batch database and a
+    content extractor stub, which is enough to run preview sessions.
+    """
+    from interactive_batch_processor import InteractiveBatchProcessor
+
+    processor = InteractiveBatchProcessor.__new__(InteractiveBatchProcessor)
+    processor.config = {**BATCH_PROCESSOR_CONFIG, **config}
+    processor.learning_system = learning_system
+    processor.confidence_system = confidence_system
+    processor.preview_cache = {}
+    processor.minhasher = MinHasher(num_perm=processor.config["minhash_permutations"])
+    processor.content_signatures = OrderedDict()
+    processor._signature_lock = threading.Lock()
+    processor.active_sessions = {}
+    processor._worker_local = threading.local()
+    processor._prediction_lock = threading.Lock()
+    processor.stats = {"preview_cache_hits": 0}
+    processor.logger = logging.getLogger("tests.batch_processor")
+    if base is not None:
+        processor.batch_db_path = base / "batch_processing.db"
+        processor.content_extractor = ContentExtractorStub(base / "content_index.db")
+        processor._init_batch_database()
+    return processor
+
+
+def make_audio_analyzer(**attributes):
+    """AudioAnalyzer with no OpenAI client, Whisper model or caches; override as needed"""
+    from audio_analyzer import AudioAnalyzer
+
+    analyzer = AudioAnalyzer.__new__(AudioAnalyzer)
+    analyzer.client = None
+    analyzer.remote_enabled = False
+    analyzer.use_local_whisper = False
+    analyzer.transcription_queue = None
+    analyzer.analysis_cache = None
+    for name, value in attributes.items():
+        setattr(analyzer, name, value)
+    return analyzer
+
+
+def make_classification_service(audio_analyzer=None):
+    """UnifiedClassificationService with learning off and only an audio analyzer"""
+    from unified_classifier import UnifiedClassificationService
+
+    service = UnifiedClassificationService.__new__(UnifiedClassificationService)
+    service._audio_analyzer = audio_analyzer
+    service._transcript_jobs = {}
+    service.learning_enabled = False
+    return service
+
+
+def make_deduplication_service(threats: List[Any], stats: Optional[Dict[str, Any]] = None):
+    """AutomatedDeduplicationService with a preloaded threat queue and no monitoring"""
+    from automated_deduplication_service import AutomatedDeduplicationService
+
+    service = AutomatedDeduplicationService.__new__(AutomatedDeduplicationService)
+    service.stats = stats if stats is not None else {
+        "threats_detected": len(threats), "automatic_cleanups": 0, "space_recovered_mb": 0.0
+    }
+    service.monitoring_active = False
+    service.config = {}
+    service.threat_patterns = {}
+    service._threat_lock = threading.Lock()
+    service.threat_queue = list(threats)
+    return service
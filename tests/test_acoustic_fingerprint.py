@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import time
+import wave
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from acoustic_fingerprint import AcousticFingerprintIndex, SAMPLE_RATE, landmarks
+
+
+def plucked_notes(seed: int, seconds: float, rate: int) -> np.ndarray:
+    """Decaying notes with a few harmonics at random times (each rings for 1.5 s)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    out = np.zeros_like(t)
+    for onset, note in zip(rng.uniform(0, seconds, int(seconds * 6)), rng.integers(40, 90, int(seconds * 6))):
+        freq = 440 * 2 ** ((note - 69) / 12)
+        start = int(onset * rate)
+        tt = t[start:start + int(1.5 * rate)] - onset
+        out[start:start + tt.size] += np.exp(-tt * 4) * sum(np.sin(2 * np.pi * freq * k * tt) / k for k in (1, 2, 3))
+    return 0.3 * out / np.abs(out).max()
+
+
+def write_wav(path: Path, samples: np.ndarray, rate: int, channels: int = 1):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(pcm, channels).tobytes())
+
+
+class TestAcousticFingerprintIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.index = AcousticFingerprintIndex(db_path=self.root / "acoustic.db", max_workers=2)
+        self.addCleanup(self.index.shutdown)
+
+        # One take as a 44.1 kHz stereo master and a quieter, noisier 22.05 kHz mono export
+        self.master = self.root / "take_03.wav"
+        write_wav(self.master, plucked_notes(1, 20, 44100), 44100, channels=2)
+        self.export = self.root / "take_03_export.wav"
+        noise = np.random.default_rng(9).normal(0, 0.01, 20 * 22050)
+        write_wav(self.export, plucked_notes(1, 20, 22050) * 0.5 + noise, 22050)
+        self.other = self.root / "take_04.wav"
+        write_wav(self.other, plucked_notes(2, 20, 44100), 44100)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_excerpt_is_found_with_its_offset(self):
+        self.index.index_files([self.master, self.export, self.other])
+        self.assertEqual(len(self.index), 3)
+
+        excerpt = plucked_notes(1, 20, SAMPLE_RATE)[8 * SAMPLE_RATE:12 * SAMPLE_RATE]
+        clip = self.root / "clip.wav"
+        write_wav(clip, plucked_notes(1, 20, 16000)[8 * 16000:12 * 16000], 16000)
+
+        # Decoded samples skip the file decoder; both paths must agree
+        for matches in (self.index.query_samples(excerpt), self.index.find_containing(clip)):
+            self.assertEqual({m["file_path"] for m in matches}, {str(self.master), str(self.export)})
+            for match in matches:
+                self.assertAlmostEqual(match["offset_seconds"], 8.0, delta=0.1)
+        # The clip itself was only queried, not indexed
+        self.assertEqual(len(self.index), 3)
+
+    def test_unrelated_audio_does_not_match(self):
+        self.index.index_files([self.master, self.other])
+        silence_and_noise = np.random.default_rng(3).normal(0, 0.1, 10 * SAMPLE_RATE)
+        self.assertEqual(self.index.query_samples(silence_and_noise), [])
+        self.assertEqual(len(landmarks(np.zeros(5 * SAMPLE_RATE))[0]), 0)
+
+    def test_cross_format_duplicate_groups(self):
+        copy = self.root / "copy of take_03.wav"
+        shutil.copy(self.master, copy)
+        clip = self.root / "clip.wav"
+        write_wav(clip, plucked_notes(1, 20, 44100)[: 5 * 44100], 44100)
+
+        groups = self.index.duplicate_groups([self.master, self.export, self.other, copy, clip])
+        self.assertEqual(len(groups), 1)
+        group = groups[0]
+        self.assertEqual(group["kind"], "audio")
+        # The byte-identical copy joins the group; the excerpt and the other take don't
+        self.assertEqual({f["path"] for f in group["files"]}, {str(self.master), str(copy), str(self.export)})
+        self.assertIn(group["files"][0]["path"], (str(self.master), str(copy)))
+
+        # Byte-identical copies alone are left to the exact duplicate scan
+        self.assertEqual(self.index.duplicate_groups([self.master, copy]), [])
+
+    def test_changed_and_deleted_files_are_reindexed(self):
+        self.index.index_file(self.master)
+        self.index.index_file(self.other)
+        write_wav(self.other, plucked_notes(1, 20, 44100), 44100)
+        os.utime(self.other, (time.time() + 10, time.time() + 10))
+        self.assertEqual([m["file_path"] for m in self.index.find_containing(self.master)], [])
+        self.index.index_file(self.other)
+        self.assertEqual([m["file_path"] for m in self.index.find_containing(self.master)], [str(self.other)])
+
+        self.other.unlink()
+        self.assertEqual(self.index.prune_missing(), 1)
+        self.assertEqual(self.index.find_containing(self.master), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis_cache import AnalysisCache, content_fingerprint, SAMPLE_BYTES, FULL_HASH_MAX_BYTES
+from request_scheduler import RequestScheduler
+from derivative_cache import DerivativeCache
+from image_preprocessing import ImagePreprocessor
+from video_sampling import VideoSampler
+from perceptual_hash import PerceptualHashStore
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.cache = AnalysisCache(db_path=self.root / "analysis_cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_key_follows_content_not_path(self):
+        original = self.root / "IMG_0001.jpg"
+        original.write_bytes(b"pixels" * 1000)
+        key = self.cache.file_key(original, "vision.image", "1", prompt="p")
+        self.cache.put(key, "vision.image", {"description": "a cat"})
+
+        moved = self.root / "Photos" / "cat.jpg"
+        moved.parent.mkdir()
+        original.rename(moved)
+        self.assertEqual(self.cache.file_key(moved, "vision.image", "1", prompt="p"), key)
+        self.assertEqual(self.cache.get(key), {"description": "a cat"})
+
+        # Analyzer version and prompt are part of the key
+        self.assertNotEqual(self.cache.file_key(moved, "vision.image", "2", prompt="p"), key)
+        self.assertNotEqual(self.cache.file_key(moved, "vision.image", "1", prompt="q"), key)
+
+        moved.write_bytes(b"other pixels" * 1000)
+        self.assertNotEqual(self.cache.file_key(moved, "vision.image", "1", prompt="p"), key)
+        self.assertIsNone(self.cache.file_key(self.root / "missing.jpg", "vision.image", "1"))
+
+    def test_large_files_are_sampled(self):
+        big = self.root / "clip.mov"
+        data = bytearray(FULL_HASH_MAX_BYTES * 3)
+        big.write_bytes(bytes(data))
+        before = content_fingerprint(big)
+
+        # Outside the sampled head/middle/tail the fingerprint doesn't look
+        data[SAMPLE_BYTES + 10] = 1
+        big.write_bytes(bytes(data))
+        os.utime(big, ns=(1, 1))
+        self.assertEqual(content_fingerprint(big), before)
+
+        data[-1] = 1
+        big.write_bytes(bytes(data))
+        self.assertNotEqual(content_fingerprint(big), before)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = AnalysisCache(db_path=self.root / "small.db", max_bytes=1000)
+        payload = {"text": "x" * 180}
+        for n in range(4):
+            cache.put(f"k{n}", "text.semantic", payload)
+        # k0 becomes the most recently used entry
+        with patch("analysis_cache.time.time", return_value=10 ** 10):
+            cache.get("k0")
+        cache.put("k4", "text.semantic", payload)
+        cache.put("k5", "text.semantic", payload)
+
+        self.assertIsNotNone(cache.get("k0"))
+        self.assertIsNone(cache.get("k1"))
+        self.assertLessEqual(cache.stats()["total_bytes"], 1000)
+
+        reopened = AnalysisCache(db_path=self.root / "small.db", max_bytes=1000)
+        self.assertEqual(reopened.stats()["total_bytes"], cache.stats()["total_bytes"])
+
+    def test_expired_entries_are_dropped(self):
+        self.cache.put("k", "vision.image", {"ok": True})
+        with patch("analysis_cache.time.time", return_value=10 ** 10):
+            self.assertIsNone(self.cache.get("k", max_age_days=30))
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["total_bytes"], 0)
+
+
+class TestVisionAnalyzerCache(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.cache = AnalysisCache(db_path=self.root / "analysis_cache.db")
+        for target, value in (
+            ("vision_analyzer.get_metadata_root", self.root),
+            ("universal_adaptive_learning.get_metadata_root", self.root),
+            ("universal_adaptive_learning.get_ai_organizer_root", self.root),
+            ("vision_analyzer.get_analysis_cache", self.cache),
+            ("vision_analyzer.get_perceptual_hash_store", PerceptualHashStore(db_path=self.root / "phash.db")),
+            ("vision_analyzer.get_request_scheduler", RequestScheduler(db_path=self.root / "requests.db")),
+            ("vision_analyzer.get_image_preprocessor", ImagePreprocessor(DerivativeCache(root=self.root / "derivatives"))),
+            ("vision_analyzer.get_video_sampler", VideoSampler(DerivativeCache(root=self.root / "derivatives"))),
+        ):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        from vision_analyzer import VisionAnalyzer
+        self.analyzer = VisionAnalyzer(api_key="test", base_dir=str(self.root))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_renamed_image_is_not_reanalyzed(self):
+        image = self.root / "IMG_0001.png"
+        image.write_bytes(b"\x89PNG" + b"\x00" * 2048)
+        analysis = {"success": True, "description": "a cat", "content_type": "image", "confidence_score": 0.9,
+                    "metadata": {"file_name": "IMG_0001.png", "file_size": 2052}}
+
+        self.analyzer.remote_enabled = True
+        self.analyzer.remote_ip = "127.0.0.1"
+        with patch.object(self.analyzer, "_analyze_image_remote", return_value=analysis) as remote:
+            self.assertEqual(self.analyzer.analyze_image(str(image)), analysis)
+            renamed = image.with_name("cat.png")
+            image.rename(renamed)
+            cached = self.analyzer.analyze_image(str(renamed))
+            self.assertEqual(cached["description"], "a cat")
+            # The cached analysis describes the file as it is now
+            self.assertEqual(cached["metadata"]["file_name"], "cat.png")
+            # A different project context is a different prompt
+            self.analyzer.analyze_image(str(renamed), project_context="Stranger Things")
+
+        self.assertEqual(remote.call_count, 2)
+        self.assertEqual(self.analyzer.cache_hits, 1)
+
+    def test_video_analyses_are_cached_per_sample_duration(self):
+        video = self.root / "clip.mp4"
+        video.write_bytes(b"\x00" * 4096)
+        analysis = {"success": True, "description": "a skate clip", "content_type": "video",
+                    "confidence_score": 0.9, "metadata": {"file_name": "clip.mp4"}}
+        key = self.analyzer._get_cache_key(str(video), "video", self.analyzer._cache_prompt(None, None, 120))
+        self.analyzer._save_to_cache(key, analysis, "video")
+
+        self.assertEqual(self.analyzer.analyze_video(str(video), max_duration=120)["description"], "a skate clip")
+        with patch.object(self.analyzer, "_ensure_initialized"), \
+                patch.object(self.analyzer, "_fallback_video_analysis", return_value={"success": False}) as fallback:
+            self.analyzer.api_initialized = False
+            # A 30 second sample is a different analysis than the 2 minute one
+            self.analyzer.analyze_video(str(video), max_duration=30)
+        fallback.assert_called_once()
+        self.assertEqual(self.analyzer.cache_hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
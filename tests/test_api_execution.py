@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.execution import WorkloadExecutor, WorkloadConfig, ExecutorOverloaded, ExecutionTimeout
+
+
+class TestWorkloadExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = WorkloadExecutor("test", WorkloadConfig(max_workers=2, max_queue=2, timeout=5.0))
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_excess_calls_are_shed(self):
+        release = threading.Event()
+
+        async def flood():
+            calls = [asyncio.ensure_future(self.executor.run(release.wait)) for _ in range(6)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*calls, return_exceptions=True)
+
+        results = asyncio.run(flood())
+        self.assertEqual(sum(1 for r in results if r is True), 4)
+        self.assertEqual(sum(1 for r in results if isinstance(r, ExecutorOverloaded)), 2)
+        self.assertEqual(self.executor.get_status()["rejected"], 2)
+
+    def test_timeout_keeps_slot_until_work_finishes(self):
+        async def slow():
+            with self.assertRaises(ExecutionTimeout):
+                await self.executor.run(time.sleep, 0.3, timeout=0.05)
+            # The abandoned call still occupies a worker
+            self.assertEqual(self.executor.get_status()["in_flight"], 1)
+            await asyncio.sleep(0.4)
+            self.assertEqual(self.executor.get_status()["in_flight"], 0)
+
+        asyncio.run(slow())
+
+    def test_event_loop_stays_responsive(self):
+        async def scenario():
+            work = asyncio.ensure_future(self.executor.run(time.sleep, 0.3))
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            ticked = time.perf_counter() - start
+            await work
+            return ticked
+
+        self.assertLess(asyncio.run(scenario()), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+import os
+import sys
+import wave
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import audio_features
+from audio_features import AudioFeatureEngine, AudioFeatureStore, LIBROSA_AVAILABLE
+from factories import make_audio_analyzer
+
+
+def write_wav(path: Path, samples: np.ndarray, rate: int = 44100, channels: int = 1):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(pcm, channels).tobytes())
+
+
+class TestAudioFeatureEngine(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.store = AudioFeatureStore(db_path=self.root / "audio_features.db")
+        self.engine = AudioFeatureEngine(self.store, max_workers=2)
+        self.addCleanup(self.engine.shutdown)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_features_are_stored_by_content_and_extracted_once(self):
+        first = self.root / "take1.wav"
+        write_wav(first, np.zeros(4410))
+        copy = self.root / "copy of take1.wav"
+        shutil.copy(first, copy)
+        other = self.root / "take2.wav"
+        write_wav(other, np.ones(4410) * 0.5)
+        calls = []
+
+        def fake_extract(path, max_duration):
+            calls.append(path)
+            return {'bpm': 120.0, 'source': Path(path).name}
+
+        with patch.object(audio_features, "LIBROSA_AVAILABLE", True), \
+                patch.object(audio_features, "extract_features", side_effect=fake_extract), \
+                patch.object(self.engine, "_executor", return_value=ThreadPoolExecutor(2)):
+            results = self.engine.analyze_many([first, copy, other, self.root / "missing.wav"], 30)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(results[str(copy)], results[str(first)])
+            self.assertIsNone(results[str(self.root / "missing.wav")])
+
+            # Moved files and re-runs come from the store
+            moved = first.rename(self.root / "renamed.wav")
+            self.assertEqual(self.engine.analyze(moved, 30), {'bpm': 120.0, 'source': "take1.wav"})
+            self.assertEqual(len(calls), 2)
+            # A different slice length is a different feature set
+            self.engine.analyze(moved, 120)
+            self.assertEqual(len(calls), 3)
+
+        self.assertEqual(self.store.count(), 3)
+        self.assertEqual(self.engine.stats["store_hits"], 1)
+
+    def test_failures_are_reported_per_file(self):
+        bad = self.root / "bad.wav"
+        bad.write_bytes(b"not audio")
+
+        def fail(path, max_duration):
+            raise ValueError("cannot decode")
+
+        with patch.object(audio_features, "LIBROSA_AVAILABLE", True), \
+                patch.object(audio_features, "extract_features", side_effect=fail), \
+                patch.object(self.engine, "_executor", return_value=ThreadPoolExecutor(1)):
+            self.assertIsNone(self.engine.analyze(bad))
+        self.assertEqual(self.store.count(), 0)
+        self.assertEqual(self.engine.stats["failed"], 1)
+
+    def test_relative_paths_are_looked_up_normalized(self):
+        take = self.root / "take.wav"
+        write_wav(take, np.zeros(4410))
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+
+        with patch.object(audio_features, "LIBROSA_AVAILABLE", True), \
+                patch.object(audio_features, "extract_features", return_value={'bpm': 0.0}), \
+                patch.object(self.engine, "_executor", return_value=ThreadPoolExecutor(1)):
+            self.assertEqual(self.engine.analyze("./take.wav"), {'bpm': 0.0})
+
+    def test_audio_ai_analyzer_classifies_from_stored_features(self):
+        from audio_ai_analyzer import AudioAIAnalyzer
+        song = self.root / "night drive track.wav"
+        write_wav(song, np.zeros(4410))
+        features = {
+            'bpm': 120.0, 'beat_count': 60, 'beat_interval_cv': 0.05, 'analyzed_duration': 30.0,
+            'duration': 200.0, 'sample_rate': 44100, 'spectral_centroid_mean': 2500.0,
+            'spectral_centroid_std': 500.0, 'spectral_flatness_mean': 0.1, 'zero_crossing_rate_mean': 0.04,
+            'rms_energy_mean': 0.3, 'rms_max': 0.6, 'rms_min': 0.05, 'speech_segments': [],
+            'chroma_mean': [0.1] * 9 + [0.9, 0.1, 0.1],
+        }
+        with patch("audio_features.get_audio_feature_engine") as engine:
+            analysis = AudioAIAnalyzer(base_dir=str(self.root)).analyze_audio_file(song, features=features)
+        engine.assert_not_called()
+        self.assertEqual(analysis.content_type, 'music')
+        self.assertEqual(analysis.key, 'A')
+        self.assertEqual(analysis.tempo, 120.0)
+        self.assertEqual(analysis.audio_quality, 'excellent')
+
+    @unittest.skipUnless(LIBROSA_AVAILABLE, "librosa not installed")
+    def test_harmonic_ratio_keeps_the_full_hpss_thresholds(self):
+        """The mel estimate lands on the same side of every threshold as full HPSS"""
+        import librosa
+        rate = 44100
+        t = np.arange(rate * 4) / rate
+        rng = np.random.default_rng(0)
+        noise = rng.normal(0, 1, t.size)
+        chord = sum(np.sin(2 * np.pi * f * t) for f in (261, 329, 392))
+        clicks = np.zeros_like(t)
+        clicks[::rate // 4] = 1.0
+        voice = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 13)) * (0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 4 * t)))
+        signals = {
+            'tone': np.sin(2 * np.pi * 440 * t),
+            'noise': noise,
+            'noisy chord': chord + 3.2 * noise,
+            'voice over clicks': voice + 32 * clicks,
+            'clicks': clicks,
+        }
+
+        analyzer = make_audio_analyzer()
+        for name, samples in signals.items():
+            samples = 0.5 * samples / np.max(np.abs(samples))
+            path = self.root / f"{name}.wav"
+            write_wav(path, samples, rate)
+            features = audio_features.extract_features(str(path), max_duration=30)
+
+            harmonic, percussive = librosa.effects.hpss(samples)
+            full = np.sum(harmonic ** 2) / (np.sum(harmonic ** 2) + np.sum(percussive ** 2))
+            estimate = features['harmonic_ratio']
+            self.assertAlmostEqual(estimate, full, delta=0.1, msg=name)
+
+            bandwidth, zcr = features['spectral_bandwidth_mean'], features['zero_crossing_rate_mean']
+            centroid = features['spectral_centroid_mean']
+            self.assertEqual(analyzer._determine_texture(bandwidth, zcr, estimate),
+                             analyzer._determine_texture(bandwidth, zcr, full), name)
+            self.assertEqual(analyzer._determine_content_type(estimate, zcr, centroid),
+                             analyzer._determine_content_type(full, zcr, centroid), name)
+
+    @unittest.skipUnless(LIBROSA_AVAILABLE, "librosa not installed")
+    def test_tone_is_harmonic_and_clicks_are_not(self):
+        rate = 44100
+        t = np.arange(rate * 4) / rate
+        tone = self.root / "tone.wav"
+        write_wav(tone, 0.5 * np.sin(2 * np.pi * 440 * t), rate, channels=2)
+        clicks = np.zeros_like(t)
+        clicks[::rate // 2] = 1.0
+        click_track = self.root / "clicks.wav"
+        write_wav(click_track, clicks, rate)
+
+        results = self.engine.analyze_many([tone, click_track], max_duration=30)
+        tone_features = results[str(tone)]
+        self.assertGreater(tone_features['harmonic_ratio'], 0.8)
+        self.assertLess(results[str(click_track)]['harmonic_ratio'], 0.3)
+        self.assertAlmostEqual(tone_features['spectral_centroid_mean'], 440, delta=60)
+        self.assertAlmostEqual(tone_features['duration'], 4.0, places=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
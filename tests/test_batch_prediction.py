@@ -0,0 +1,114 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from confidence_system import ADHDFriendlyConfidenceSystem, ConfidenceDecision, ConfidenceLevel
+from interactive_batch_processor import BatchGroup, FilePreview
+from factories import make_batch_processor
+
+
+class TestBatchPrediction(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for target in ("universal_adaptive_learning.get_metadata_root", "confidence_system.get_metadata_root"):
+            patcher = patch(target, return_value=self.root)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.confidence = ADHDFriendlyConfidenceSystem(base_dir=str(self.root))
+        self.learning = self.confidence.learning_system
+
+        self.downloads = self.root / "Downloads"
+        self.downloads.mkdir()
+        self.files = []
+        for n in range(30):
+            path = self.downloads / f"acme invoice {n % 3}.pdf"
+            path.write_text("x")
+            self.files.append(str(path))
+        for n in range(6):
+            self.learning.record_learning_event(
+                event_type="user_correction",
+                file_path=str(self.downloads / f"acme invoice {n}.pdf"),
+                original_prediction={"category": "documents"},
+                user_action={"target_category": "invoices", "target_location": "/Docs/Invoices"},
+                confidence_before=0.5,
+                context={"content_keywords": ["invoice", "acme", "total"]}
+            )
+
+    def tearDown(self):
+        self.learning.event_log.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_batch_predictions_match_single_predictions(self):
+        contexts = [{"content_keywords": ["invoice", "acme", "total"]} if n % 2 else None for n in range(len(self.files))]
+        batch = self.learning.predict_user_actions(self.files, contexts)
+        single = [self.learning.predict_user_action(f, c) for f, c in zip(self.files, contexts)]
+        self.assertEqual(batch, single)
+        self.assertTrue(any(p["pattern_count"] for p in batch))
+
+    def test_batch_decisions_match_and_share_disk_checks(self):
+        items = [
+            {"file_path": f, "predicted_action": {"target_category": "invoices"}, "system_confidence": 0.5}
+            for f in self.files
+        ]
+        single = [
+            self.confidence.make_confidence_decision(i["file_path"], i["predicted_action"], i["system_confidence"])
+            for i in items
+        ]
+
+        with patch("shutil.disk_usage", wraps=shutil.disk_usage) as disk_usage:
+            batch = self.confidence.make_confidence_decisions(items)
+
+        self.assertEqual(disk_usage.call_count, 1)
+        self.assertEqual(
+            [(d.confidence_level, d.requires_user_input, d.emergency_prevention) for d in batch],
+            [(d.confidence_level, d.requires_user_input, d.emergency_prevention) for d in single]
+        )
+
+    def test_batch_review_asks_the_confidence_system_before_automatic_processing(self):
+        processor = make_batch_processor(learning_system=self.learning, confidence_system=self.confidence)
+        now = datetime.now()
+        previews = [
+            FilePreview(f, Path(f).name, 0.1, ".pdf", now, now, "", ["invoice"], "", "invoices", 0.95, [], False)
+            for f in self.files[:3]
+        ]
+        group = BatchGroup("g1", "similar_content", "Invoices", previews, {}, "organize_together",
+                           ConfidenceLevel.SMART, len(previews))
+
+        def decisions(needs_user):
+            return [ConfidenceDecision(fp.file_path, ConfidenceLevel.SMART, {}, 0.95, needs_user) for fp in previews]
+
+        def session():
+            processor.active_sessions["s1"] = {
+                "groups_ready": threading.Condition(), "status": "ready",
+                "batch_groups": [group], "current_group_index": 0
+            }
+
+        with patch.object(processor, "_process_group_automatically") as automatic:
+            session()
+            with patch.object(self.confidence, "make_confidence_decisions",
+                              return_value=decisions(True)) as decide:
+                review = processor.get_next_group_for_review("s1")
+            self.assertEqual(review["group_summary"]["group_id"], "g1")
+            automatic.assert_not_called()
+            # One batched call covers the whole group
+            self.assertEqual(decide.call_count, 1)
+            self.assertEqual([i["file_path"] for i in decide.call_args[0][0]], self.files[:3])
+
+            session()
+            with patch.object(self.confidence, "make_confidence_decisions", return_value=decisions(False)):
+                self.assertIsNone(processor.get_next_group_for_review("s1"))
+            automatic.assert_called_once_with("s1", group)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from factories import make_batch_processor
+
+
+class SlowLearningSystem:
+    """Prediction stub that simulates a slow classifier"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def predict_user_actions(self, file_paths, contexts=None):
+        with self.lock:
+            self.calls += len(file_paths)
+            self.batches += 1
+        time.sleep(self.delay * len(file_paths))
+        return [{"predicted_action": {"target_category": "documents"}, "confidence": 0.4} for _ in file_paths]
+
+
+def make_processor(base, delay=0.0):
+    return make_batch_processor(base, learning_system=SlowLearningSystem(delay))
+
+
+class TestBatchPreviewStreaming(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.source = self.base / "source"
+        self.source.mkdir()
+        for i in range(40):
+            (self.source / f"note_{i:02d}.txt").write_text(f"quarterly budget report number {i} " * 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.base, ignore_errors=True)
+
+    def test_first_screen_returns_before_all_previews(self):
+        processor = make_processor(self.base, delay=0.05)
+        session_id = processor.start_batch_session(str(self.source))
+
+        overview = processor.get_session_overview(session_id)
+        self.assertGreater(overview["total_groups"], 0)
+        self.assertLess(overview["previews_generated"], 40)
+        self.assertFalse(overview["generation_complete"])
+
+        # Streaming consumer sees every file exactly once
+        streamed = [fp.file_path for group in processor.iter_batch_groups(session_id) for fp in group.file_previews]
+        self.assertEqual(len(streamed), 40)
+        self.assertEqual(len(set(streamed)), 40)
+
+        overview = processor.get_session_overview(session_id)
+        self.assertTrue(overview["generation_complete"])
+        self.assertEqual(overview["status"], "active")
+        self.assertEqual(overview["preview_progress_percent"], 100)
+
+    def test_cached_previews_skip_the_worker_pool(self):
+        processor = make_processor(self.base)
+        processor.start_batch_session(str(self.source), wait=True)
+        self.assertEqual(processor.learning_system.calls, 40)
+        # One batched prediction per streamed chunk (first screen + 4 chunks)
+        self.assertLessEqual(processor.learning_system.batches, 5)
+
+        # Same paths, sizes and mtimes: everything comes from the preview cache
+        session_id = processor.start_batch_session(str(self.source), wait=True)
+        self.assertEqual(processor.learning_system.calls, 40)
+        self.assertEqual(processor.get_session_overview(session_id)["preview_cache_hits"], 40)
+
+        # Touching one file invalidates only that preview
+        changed = self.source / "note_00.txt"
+        changed.write_text("different content entirely")
+        session_id = processor.start_batch_session(str(self.source), wait=True)
+        self.assertEqual(processor.learning_system.calls, 41)
+
+    def test_groups_span_streamed_chunks(self):
+        # Copies of a first-screen file that sort far behind it
+        for n in (1, 2):
+            (self.source / f"zz_copies_{n}").mkdir()
+            (self.source / f"zz_copies_{n}" / f"note_00 ({n}).txt").write_text((self.source / "note_00.txt").read_text())
+        processor = make_processor(self.base)
+        session_id = processor.start_batch_session(str(self.source), wait=True)
+        groups = processor.active_sessions[session_id]["batch_groups"]
+
+        duplicates = [g for g in groups if g.group_type == "duplicates"]
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(len(duplicates[0].file_previews), 2)
+        # Everything after the first screen is similar content, grouped across all chunks
+        similar = sorted((g for g in groups if g.group_type == "similar_content"), key=lambda g: -len(g.file_previews))
+        self.assertEqual(len(similar[0].file_previews), 37)
+        self.assertEqual(processor.active_sessions[session_id]["preview_progress"]["chunks_grouped"], 5)
+
+    def test_full_similar_groups_are_released_while_streaming(self):
+        processor = make_processor(self.base, delay=0.02)
+        processor.config["max_batch_size"] = 10
+        session_id = processor.start_batch_session(str(self.source))
+        session = processor.active_sessions[session_id]
+
+        similar_seen_early = False
+        streamed = []
+        for group in processor.iter_batch_groups(session_id):
+            streamed.extend(fp.file_path for fp in group.file_previews)
+            if group.group_type == "similar_content" and session["status"] == "generating_previews":
+                similar_seen_early = True
+            self.assertLessEqual(len(group.file_previews), 10)
+
+        self.assertTrue(similar_seen_early)
+        self.assertEqual(len(streamed), 40)
+        self.assertEqual(len(set(streamed)), 40)
+
+    def test_concurrent_sessions_close_only_their_own_connections(self):
+        processor = make_processor(self.base, delay=0.01)
+        closed = []
+        close = processor._close_worker_connections
+
+        def record_close(connections):
+            closed.append(list(connections))
+            close(connections)
+
+        processor._close_worker_connections = record_close
+        other = self.base / "other"
+        other.mkdir()
+        for i in range(20):
+            (other / f"memo_{i:02d}.txt").write_text(f"meeting memo {i}")
+
+        threads = [threading.Thread(target=processor.start_batch_session, args=(str(folder),), kwargs={"wait": True})
+                   for folder in (self.source, other)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(closed), 2)
+        self.assertTrue(all(closed))
+        self.assertFalse({id(c) for c in closed[0]} & {id(c) for c in closed[1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
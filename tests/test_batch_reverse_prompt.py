@@ -2,9 +2,22 @@
 Phase 3b · Test Suite · Batch Reverse Prompt Processor
 """
 
-import json, tempfile
+import json, os, sys, tempfile, time, types
 from pathlib import Path
-from batch_reverse_prompt import discover_videos, run_batch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import veo_prompt_generator  # noqa: F401
+except ImportError:
+    # Every test below swaps in a stub generator, so the real one isn't needed
+    stub = types.ModuleType("veo_prompt_generator")
+    stub.VEOPromptGenerator = object
+    sys.modules["veo_prompt_generator"] = stub
+
+from batch_reverse_prompt import AdaptiveConcurrency, discover_videos, retry_delay, run_batch
+from request_scheduler import DailyQuotaExceeded
 
 def test_discover_videos(tmp_path: Path):
     # Create fake videos
@@ -14,6 +27,20 @@ def test_discover_videos(tmp_path: Path):
     assert all(v.suffix in [".mp4", ".mov"] for v in vids)
     assert len(vids) == 2
 
+def test_run_batch_only_descends_into_subfolders_when_recursive(monkeypatch, tmp_path: Path):
+    (tmp_path / "top.mp4").write_bytes(b"top")
+    (tmp_path / "day2").mkdir()
+    (tmp_path / "day2" / "nested.mp4").write_bytes(b"nested")
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: CountingGenerator())
+    monkeypatch.setattr("batch_reverse_prompt.analyze_continuity", lambda results: [])
+    monkeypatch.setattr("batch_reverse_prompt.build_manifest",
+                        lambda results, cont: {"clips": results})
+
+    flat = run_batch(str(tmp_path), workers=1, resume=False, recursive=False)
+    assert [Path(c["path"]).name for c in flat["clips"]] == ["top.mp4"]
+    deep = run_batch(str(tmp_path), workers=1, resume=False)
+    assert sorted(Path(c["path"]).name for c in deep["clips"]) == ["nested.mp4", "top.mp4"]
+
 def test_run_batch_minimal(monkeypatch, tmp_path: Path):
     """Smoke test using a stubbed VEOPromptGenerator"""
     dummy_json = {"shot_id": "auto_shot_test", "scene": {"duration_s": 8}, "confidence_score": 0.9}
@@ -24,7 +51,7 @@ def test_run_batch_minimal(monkeypatch, tmp_path: Path):
             return dummy_json
 
     monkeypatch.setattr("batch_reverse_prompt.discover_videos",
-                        lambda path: [tmp_path / "dummy.mp4"])
+                        lambda path, recursive=True: [tmp_path / "dummy.mp4"])
     monkeypatch.setattr("batch_reverse_prompt.get_veo_generator",
                         lambda: MockGenerator())
     monkeypatch.setattr("batch_reverse_prompt.analyze_continuity",
@@ -35,3 +62,132 @@ def test_run_batch_minimal(monkeypatch, tmp_path: Path):
     manifest = run_batch(str(tmp_path), workers=1)
     assert "project" in manifest
     assert manifest["project"] == "unit_test"
+
+
+class CountingGenerator:
+    """Stub VEOPromptGenerator that records which clips it was asked for"""
+
+    def __init__(self, fail_on=None, error=None):
+        self.calls = []
+        self.times = []
+        self.fail_on = fail_on
+        self.error = error or RuntimeError("429 Resource exhausted")
+
+    def generate_reverse_veo_json(self, path):
+        self.calls.append(Path(path).name)
+        self.times.append(time.monotonic())
+        if self.fail_on and self.fail_on(Path(path).name, len(self.calls)):
+            raise self.error
+        return {"shot_id": Path(path).stem, "scene": {"duration_s": 8}, "confidence_score": 0.9}
+
+
+def make_clips(folder: Path, count: int):
+    for i in range(count):
+        (folder / f"clip_{i:02d}.mp4").write_bytes(f"frames {i}".encode())
+
+
+def test_journal_skips_processed_clips_by_content(monkeypatch, tmp_path: Path):
+    make_clips(tmp_path, 4)
+    generator = CountingGenerator()
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+
+    manifest = run_batch(str(tmp_path), workers=2)
+    assert manifest["summary"]["total_clips"] == 4
+    assert manifest["batch"] == {"processed": 4, "failed": 0, "remaining": 0}
+    assert [c["shot_id"] for c in manifest["clips"]] == [f"clip_{i:02d}" for i in range(4)]
+    assert json.loads((tmp_path / "batch_manifest.json").read_text()) == manifest
+
+    # A renamed clip, a re-created copy of it and a new clip: only the new one goes to the API
+    (tmp_path / "clip_01.mp4").rename(tmp_path / "opening.mp4")
+    make_clips(tmp_path, 5)
+    generator.calls.clear()
+    manifest = run_batch(str(tmp_path), workers=2)
+    assert generator.calls == ["clip_04.mp4"]
+    assert manifest["summary"]["total_clips"] == 6
+
+
+def test_crashed_run_leaves_valid_manifest_and_resumes(monkeypatch, tmp_path: Path):
+    make_clips(tmp_path, 6)
+
+    class Crash(BaseException):
+        pass
+
+    def crash_on_fourth(name, calls):
+        if calls == 4:
+            raise Crash()
+
+    generator = CountingGenerator(fail_on=crash_on_fourth)
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+    monkeypatch.setattr("batch_reverse_prompt.MANIFEST_INTERVAL_SEC", 0)
+    try:
+        run_batch(str(tmp_path), workers=1)
+    except Crash:
+        pass
+    else:
+        raise AssertionError("batch should have crashed")
+
+    partial = json.loads((tmp_path / "batch_manifest.json").read_text())
+    assert partial["batch"]["processed"] == 3
+    assert partial["summary"]["total_clips"] == 3
+    # A torn journal line is ignored
+    with open(tmp_path / ".metadata" / "batch_reverse_prompt.jsonl", "a") as f:
+        f.write('{"fingerprint": "abc", "res')
+
+    generator = CountingGenerator()
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+    manifest = run_batch(str(tmp_path), workers=3)
+    assert len(generator.calls) == 3
+    assert manifest["batch"] == {"processed": 6, "failed": 0, "remaining": 0}
+
+
+def test_rate_limited_clips_back_off_and_retry(monkeypatch, tmp_path: Path):
+    make_clips(tmp_path, 3)
+    generator = CountingGenerator(fail_on=lambda name, calls: name == "clip_01.mp4" and calls < 4)
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+    monkeypatch.setattr("batch_reverse_prompt.RETRY_DELAY_SEC", 0.3)
+
+    manifest = run_batch(str(tmp_path), workers=3)
+    assert generator.calls.count("clip_01.mp4") == 2
+    first, second = [t for name, t in zip(generator.calls, generator.times) if name == "clip_01.mp4"]
+    assert second - first >= 0.3
+    assert manifest["batch"]["failed"] == 0
+    assert manifest["summary"]["total_clips"] == 3
+
+
+def test_retry_delay_doubles_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr("batch_reverse_prompt.RETRY_DELAY_SEC", 2.0)
+    assert 2.0 <= retry_delay(1) <= 2.5
+    assert 8.0 <= retry_delay(3) <= 10.0
+    assert retry_delay(1, retry_after=30.0) == 30.0
+
+
+def test_quota_exhausted_clip_is_left_for_next_run(monkeypatch, tmp_path: Path):
+    make_clips(tmp_path, 3)
+    generator = CountingGenerator(fail_on=lambda name, calls: name == "clip_01.mp4",
+                                  error=DailyQuotaExceeded("gemini", 250))
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+
+    manifest = run_batch(str(tmp_path), workers=1)
+    assert generator.calls == ["clip_00.mp4", "clip_01.mp4"]
+    assert manifest["batch"] == {"processed": 1, "failed": 0, "remaining": 2}
+    journal = (tmp_path / ".metadata" / "batch_reverse_prompt.jsonl").read_text().splitlines()
+    assert len(journal) == 1
+
+    generator = CountingGenerator()
+    monkeypatch.setattr("batch_reverse_prompt.get_veo_generator", lambda: generator)
+    manifest = run_batch(str(tmp_path), workers=1)
+    assert generator.calls == ["clip_01.mp4", "clip_02.mp4"]
+    assert manifest["batch"] == {"processed": 3, "failed": 0, "remaining": 0}
+
+
+def test_adaptive_concurrency_respects_rate_bucket():
+    concurrency = AdaptiveConcurrency(max_workers=8, rate_per_minute=15)
+    for _ in range(10):
+        concurrency.succeeded(8.0)
+    # 0.25 clips/s at 8 s each keeps two busy, plus one waiting for a token
+    assert concurrency.limit == 3
+    concurrency.throttled()
+    assert concurrency.limit == 1
+    for _ in range(10):
+        concurrency.succeeded(60.0)
+    assert concurrency.limit == 8
@@ -0,0 +1,115 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import easy_rollback_system
+from easy_rollback_system import EasyRollbackSystem
+from bulk_undo_engine import BulkUndoEngine
+
+
+class TestBulkUndo(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.files = self.root / "files"
+        self.files.mkdir()
+        self.patcher = patch.object(easy_rollback_system, "get_metadata_root", return_value=self.root / "meta")
+        self.patcher.start()
+        self.rollback = EasyRollbackSystem()
+        self.clock = datetime.now().replace(hour=0, minute=0, second=1)
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _move(self, src: Path, dst: Path) -> int:
+        """Move a file and log it like the organizer does"""
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        src.rename(dst)
+        self.clock += timedelta(seconds=1)
+        with sqlite3.connect(self.rollback.db_path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO file_operations (timestamp, action, src_path, dst_path, confidence, details) VALUES (?, 'move', ?, ?, 0.9, ?)",
+                (self.clock.isoformat(timespec="seconds"), str(src), str(dst), json.dumps({"notes": "test"}))
+            )
+            return cursor.lastrowid
+
+    def _details(self, op_id: int) -> dict:
+        with sqlite3.connect(self.rollback.db_path) as conn:
+            return json.loads(conn.execute("SELECT details FROM file_operations WHERE id = ?", (op_id,)).fetchone()[0])
+
+    def test_chain_is_undone_in_reverse(self):
+        a, b, c = self.files / "a.txt", self.files / "sorted" / "b.txt", self.files / "archive" / "c.txt"
+        a.write_text("chain")
+        self._move(a, b)
+        self._move(b, c)
+
+        plan = BulkUndoEngine(self.rollback).plan_today()
+        self.assertEqual(len(plan.steps), 2)
+        self.assertEqual(plan.waves, 2)
+
+        result = BulkUndoEngine(self.rollback).execute(plan)
+        self.assertEqual(result["count"], 2)
+        self.assertTrue(a.exists())
+        self.assertFalse(b.exists())
+        self.assertFalse(c.exists())
+
+    def test_collision_is_never_overwritten(self):
+        original = self.files / "report.pdf"
+        original.write_text("first")
+        op_id = self._move(original, self.files / "docs" / "report.pdf")
+        # Something new now lives at the original path
+        original.write_text("newer file")
+
+        engine = BulkUndoEngine(self.rollback)
+        plan = engine.plan_today()
+        self.assertEqual(len(plan.steps), 0)
+        self.assertEqual(len(plan.conflicts), 1)
+
+        engine.execute(plan)
+        self.assertEqual(original.read_text(), "newer file")
+        self.assertEqual(self._details(op_id)["rollback_status"], "conflict")
+
+    def test_many_moves_parallel_with_batched_status(self):
+        op_ids = []
+        for i in range(50):
+            src = self.files / f"inbox_{i}.txt"
+            src.write_text(str(i))
+            op_ids.append(self._move(src, self.files / "sorted" / f"file_{i}.txt"))
+
+        engine = BulkUndoEngine(self.rollback, max_workers=4, status_batch_size=16)
+        plan = engine.plan_today()
+        self.assertEqual(plan.waves, 1)
+        self.assertGreater(plan.estimated_seconds, 0)
+
+        result = engine.execute(plan)
+        self.assertEqual(result["count"], 50)
+        self.assertEqual(engine.get_progress()["percent"], 100.0)
+        self.assertTrue(all(self._details(op_id)["rollback_status"] == "executed" for op_id in op_ids))
+
+        # Already rolled back operations are not planned again
+        self.assertEqual(len(BulkUndoEngine(self.rollback).plan_today().steps), 0)
+
+    def test_dry_run_touches_nothing(self):
+        src = self.files / "draft.md"
+        src.write_text("draft")
+        dst = self.files / "writing" / "draft.md"
+        self._move(src, dst)
+
+        result = self.rollback.undo_today_operations(dry_run=True)
+        self.assertEqual(result["plan"]["operations_to_undo"], 1)
+        self.assertTrue(dst.exists())
+        self.assertFalse(src.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -171,3 +171,39 @@ class TestCooldownLogic:
         # Verify
         assert result is False
         monitor._execute_automatic_action.assert_not_called()
+
+
+class TestEventWorkerConnections:
+
+    @pytest.fixture
+    def monitor(self, tmp_path):
+        monitor = AdaptiveBackgroundMonitor(base_dir="/tmp/test_monitor")
+        monitor.rules_db_path = tmp_path / "adaptive_rules.db"
+        monitor.db_path = tmp_path / "processed_files.db"
+        monitor.staging_monitor = MagicMock()
+        monitor.staging_monitor.db_path = tmp_path / "staging.db"
+        monitor._init_adaptive_database()
+        monitor._should_process_file = MagicMock(return_value=True)
+        monitor._process_single_file = MagicMock()
+        monitor._update_staging_snapshot = MagicMock()
+        return monitor
+
+    def test_modified_files_are_checked_on_the_worker_connection(self, monitor, tmp_path):
+        doc = tmp_path / "notes.txt"
+        doc.write_text("draft")
+        connections = monitor._open_event_connections()
+        try:
+            event = {'type': 'modified', 'path': str(doc), 'timestamp': datetime.now()}
+            with patch('adaptive_background_monitor.sqlite3.connect') as connect:
+                # First sighting only records the hash; an unchanged file is left alone
+                monitor._process_event_batch([event], connections)
+                monitor._process_event_batch([event], connections)
+                assert monitor._process_single_file.call_count == 0
+
+                doc.write_text("final version")
+                monitor._process_event_batch([event], connections)
+                monitor._process_single_file.assert_called_once_with(doc)
+                # No per-event connections
+                connect.assert_not_called()
+        finally:
+            monitor._close_event_connections(connections)
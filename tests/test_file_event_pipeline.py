@@ -0,0 +1,158 @@
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from file_event_pipeline import FileEventPipeline
+
+
+def created(path):
+    return {'type': 'created', 'path': path, 'timestamp': None}
+
+
+def modified(path):
+    return {'type': 'modified', 'path': path, 'timestamp': None}
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestFileEventPipeline(unittest.TestCase):
+    def setUp(self):
+        self.processed = []
+        self.lock = threading.Lock()
+        self.pipelines = []
+
+    def tearDown(self):
+        for pipeline, thread in self.pipelines:
+            pipeline.stop()
+            thread.join(timeout=5)
+
+    def record(self, events, resources):
+        with self.lock:
+            self.processed.extend((event['type'], event.get('path', event.get('src_path')), resources) for event in events)
+
+    def start(self, **kwargs):
+        pipeline = FileEventPipeline(self.record, **kwargs)
+        thread = threading.Thread(target=pipeline.run, daemon=True)
+        thread.start()
+        self.pipelines.append((pipeline, thread))
+        return pipeline
+
+    def test_events_for_a_path_are_coalesced(self):
+        pipeline = self.start(debounce_sec=0.2)
+        pipeline.submit(created('/dl/a.zip'))
+        for _ in range(20):
+            pipeline.submit(modified('/dl/a.zip'))
+        pipeline.submit(modified('/dl/b.txt'))
+
+        self.assertTrue(wait_until(lambda: len(self.processed) == 2))
+        time.sleep(0.3)
+        self.assertEqual(sorted((t, p) for t, p, _ in self.processed),
+                         [('created', '/dl/a.zip'), ('modified', '/dl/b.txt')])
+        self.assertEqual(pipeline.stats['coalesced'], 20)
+
+    def test_drop_is_processed_well_under_a_second(self):
+        pipeline = self.start(debounce_sec=0.1)
+        submitted = time.monotonic()
+        pipeline.submit(created('/dl/new.pdf'))
+        self.assertTrue(wait_until(lambda: self.processed, timeout=2))
+        self.assertLess(time.monotonic() - submitted, 0.5)
+
+    def test_move_discards_pending_work_for_source(self):
+        pipeline = self.start(debounce_sec=0.2)
+        pipeline.submit(created('/dl/a.pdf'))
+        pipeline.submit({'type': 'moved', 'src_path': '/dl/a.pdf', 'dest_path': '/docs/a.pdf', 'timestamp': None})
+
+        self.assertTrue(wait_until(lambda: self.processed))
+        time.sleep(0.3)
+        self.assertEqual([(t, p) for t, p, _ in self.processed], [('moved', '/dl/a.pdf')])
+
+    def test_burst_is_bounded_and_triggers_rescan(self):
+        rescans = []
+        release = threading.Event()
+
+        def slow(events, resources):
+            release.wait(5)
+            self.record(events, resources)
+
+        pipeline = FileEventPipeline(slow, debounce_sec=0, max_pending=100, max_batch=50,
+                                     on_overflow=lambda: rescans.append(True))
+        thread = threading.Thread(target=pipeline.run, daemon=True)
+        thread.start()
+        self.pipelines.append((pipeline, thread))
+
+        for n in range(1000):
+            pipeline.submit(created(f'/dl/unzipped/{n}.txt'))
+        self.assertLessEqual(pipeline.pending_count, 100)
+        release.set()
+
+        self.assertTrue(wait_until(lambda: rescans))
+        self.assertGreater(pipeline.stats['dropped'], 0)
+        self.assertEqual(pipeline.stats['dropped'] + len(self.processed), 1000)
+
+    def test_workers_reuse_their_resources(self):
+        opened = []
+
+        def open_resources():
+            opened.append(threading.current_thread().name)
+            return threading.current_thread().name
+
+        pipeline = self.start(debounce_sec=0, workers=2, max_batch=5, open_worker_resources=open_resources)
+        for n in range(50):
+            pipeline.submit(created(f'/dl/{n}.txt'))
+
+        self.assertTrue(wait_until(lambda: len(self.processed) == 50))
+        self.assertEqual(len(opened), 2)
+        self.assertTrue({resources for _, _, resources in self.processed} <= set(opened))
+
+    def test_pipeline_restarts_after_stop(self):
+        pipeline = self.start(debounce_sec=0)
+        pipeline.submit(created('/dl/a.txt'))
+        self.assertTrue(wait_until(lambda: len(self.processed) == 1))
+        pipeline.stop()
+        self.pipelines[0][1].join(timeout=5)
+
+        # Submitted while stopped: kept and picked up by the next run()
+        pipeline.submit(created('/dl/b.txt'))
+        thread = threading.Thread(target=pipeline.run, daemon=True)
+        thread.start()
+        self.pipelines.append((pipeline, thread))
+        self.assertTrue(wait_until(lambda: len(self.processed) == 2))
+        self.assertEqual(self.processed[1][1], '/dl/b.txt')
+
+    def test_event_for_a_busy_path_runs_after_its_batch(self):
+        release = threading.Event()
+
+        def slow_record(events, resources):
+            self.record(events, resources)
+            release.wait(5)
+
+        pipeline = FileEventPipeline(slow_record, debounce_sec=0, workers=2)
+        thread = threading.Thread(target=pipeline.run, daemon=True)
+        thread.start()
+        self.pipelines.append((pipeline, thread))
+
+        pipeline.submit(created('/dl/a.txt'))
+        self.assertTrue(wait_until(lambda: len(self.processed) == 1))
+        pipeline.submit(modified('/dl/a.txt'))
+        time.sleep(0.1)
+        # Never processed by two workers at once
+        self.assertEqual(len(self.processed), 1)
+        release.set()
+        self.assertTrue(wait_until(lambda: len(self.processed) == 2))
+        self.assertEqual(self.processed[1][:2], ('modified', '/dl/a.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import io
+import os
+import sys
+import shutil
+import struct
+import zlib
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from derivative_cache import DerivativeCache
+from image_preprocessing import IMAGE_TARGETS, ImagePreprocessor, ImageTooLarge, decode_image
+
+
+def exif_with_thumbnail(thumbnail_jpeg: bytes, orientation: int = 1) -> bytes:
+    """Minimal EXIF block: IFD0 with Orientation, IFD1 pointing at a JPEG thumbnail"""
+    ifd0 = 8
+    ifd1 = ifd0 + 2 + 12 + 4
+    data_offset = ifd1 + 2 + 3 * 12 + 4
+    out = b"II*\x00" + struct.pack("<I", ifd0)
+    out += struct.pack("<H", 1) + struct.pack("<HHIHH", 0x0112, 3, 1, orientation, 0) + struct.pack("<I", ifd1)
+    out += struct.pack("<H", 3)
+    out += struct.pack("<HHII", 0x0103, 3, 1, 6)
+    out += struct.pack("<HHII", 0x0201, 4, 1, data_offset)
+    out += struct.pack("<HHII", 0x0202, 4, 1, len(thumbnail_jpeg))
+    out += struct.pack("<I", 0)
+    return b"Exif\x00\x00" + out + thumbnail_jpeg
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class TestDecodeImage(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        path = self.root / "big.jpg"
+        Image.new("RGB", (6000, 4000), (10, 120, 200)).save(path, quality=80)
+        png = self.root / "big.png"
+        Image.new("RGB", (6000, 4000), (10, 120, 200)).save(png)
+
+        # Draft mode decodes the JPEG at 1/2 scale, so a quarter of the pixel budget is enough
+        img = decode_image(str(path), 1536, max_pixels=6000 * 4000 // 4)
+        self.assertEqual(img.size, (1536, 1024))
+        self.assertEqual(img.mode, "RGB")
+        with self.assertRaises(ImageTooLarge):
+            decode_image(str(png), 1536, max_pixels=6000 * 4000 // 4)
+
+    def test_exif_thumbnail_and_orientation(self):
+        thumbnail = io.BytesIO()
+        Image.new("RGB", (400, 300), (0, 255, 0)).save(thumbnail, "JPEG")
+        path = self.root / "camera.jpg"
+        Image.new("RGB", (4000, 3000), (255, 0, 0)).save(
+            path, exif=exif_with_thumbnail(thumbnail.getvalue(), orientation=6))
+
+        img = decode_image(str(path), 320)
+        # Rotated upright, and taken from the green embedded thumbnail
+        self.assertEqual(img.size, (240, 320))
+        r, g, b = img.getpixel((100, 100))
+        self.assertGreater(g, 200)
+        self.assertLess(r, 50)
+
+        # Too small for a bigger target: the main image is used instead
+        r, g, b = decode_image(str(path), 1024).getpixel((100, 100))
+        self.assertGreater(r, 200)
+
+    def test_transparency_is_flattened_onto_white(self):
+        path = self.root / "logo.png"
+        Image.new("RGBA", (100, 100), (0, 0, 0, 0)).save(path)
+        img = decode_image(str(path), 1536)
+        self.assertEqual(img.mode, "RGB")
+        self.assertEqual(img.getpixel((50, 50)), (255, 255, 255))
+
+    def test_pyramidal_tiff_uses_smallest_sufficient_page(self):
+        path = self.root / "scan.tif"
+        full = Image.new("RGB", (4000, 4000), (90, 90, 90))
+        full.save(path, save_all=True, append_images=[full.resize((2000, 2000)), full.resize((500, 500))])
+
+        img = decode_image(str(path), 1536, max_pixels=2000 * 2000)
+        self.assertEqual(img.size, (1536, 1536))
+
+
+class TestImagePreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.cache = DerivativeCache(root=self.root / "derivatives")
+        self.preprocessor = ImagePreprocessor(self.cache, max_workers=2)
+        self.addCleanup(self.preprocessor.shutdown)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_derivatives_are_cached_by_content(self):
+        path = self.root / "IMG_0001.jpg"
+        Image.new("RGB", (4000, 3000), (200, 100, 50)).save(path)
+
+        derived = self.preprocessor.prepare(path, "vision")
+        with Image.open(derived) as img:
+            self.assertEqual(img.size, (1536, 1152))
+        self.assertEqual(self.preprocessor.load(path, "ocr").size, (3072, 2304))
+
+        renamed = path.with_name("sunset.jpg")
+        path.rename(renamed)
+        self.assertEqual(self.preprocessor.prepare(renamed, "vision"), derived)
+        self.assertEqual(self.preprocessor.stats["rendered"], 2)
+        self.assertEqual(self.preprocessor.stats["cache_hits"], 1)
+
+    def test_images_over_the_pil_limit_are_decoded_in_workers(self):
+        photo = self.root / "photo.jpg"
+        Image.new("RGB", (4000, 3000), (10, 120, 200)).save(photo, quality=80)
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            # Workers start under the lowered limit; draft mode keeps the decode within the pipeline's budget
+            derived = self.preprocessor.prepare(photo, "thumbnail")
+        with Image.open(derived) as img:
+            self.assertEqual(max(img.size), IMAGE_TARGETS["thumbnail"].max_dimension)
+
+        # A PNG header claiming 20000x20000 pixels: over PIL's decompression bomb limit
+        header = struct.pack(">IIBBBBB", 20000, 20000, 8, 2, 0, 0, 0)
+        huge = self.root / "huge.png"
+        huge.write_bytes(b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", b"") +
+                         png_chunk(b"IEND", b""))
+        with self.assertRaises(Image.DecompressionBombError):
+            Image.open(huge)
+        # Workers get past PIL's check, and the pipeline's own budget refuses it
+        with self.assertRaises(ImageTooLarge):
+            self.preprocessor.prepare(huge, "thumbnail")
+
+    def test_batch_reports_failures_per_file(self):
+        good = self.root / "good.png"
+        Image.new("RGB", (800, 600), (1, 2, 3)).save(good)
+        broken = self.root / "broken.jpg"
+        broken.write_bytes(b"not an image")
+
+        results = self.preprocessor.prepare_many([good, broken, self.root / "missing.jpg"], "thumbnail")
+        self.assertTrue(results[str(good)].exists())
+        self.assertIsNone(results[str(broken)])
+        self.assertIsNone(results[str(self.root / "missing.jpg")])
+        # No partial files are left behind
+        self.assertEqual([p.name for p in (self.root / "derivatives").rglob("*.tmp*")], [])
+
+    def test_least_recently_used_derivatives_are_evicted(self):
+        cache = DerivativeCache(root=self.root / "small", max_bytes=1000)
+        for n in range(4):
+            cache.put_bytes(f"k{n}", "image.thumbnail", b"x" * 300, ".jpg")
+
+        self.assertIsNone(cache.get("k0"))
+        self.assertIsNotNone(cache.get("k3"))
+        self.assertLessEqual(cache.stats()["total_bytes"], 1000)
+        self.assertEqual(len(list((self.root / "small").rglob("*.jpg"))), cache.stats()["entries"]["image.thumbnail"])
+
+
+if __name__ == '__main__':
+    unittest.main()
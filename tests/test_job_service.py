@@ -0,0 +1,207 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.job_service import JobService
+from automated_deduplication_service import DuplicationThreat
+from factories import make_deduplication_service
+
+
+def wait_for(service, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = service.get_job(job_id)
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.db_path = self.root / "jobs.db"
+        self.service = JobService(self.db_path, progress_interval_sec=0)
+
+    def tearDown(self):
+        self.service.shutdown(wait=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_results_are_paginated(self):
+        def produce(ctx, count):
+            for start in range(0, count, 10):
+                ctx.add_results([{"n": n} for n in range(start, start + 10)])
+                ctx.progress(completed=start + 10, total=count)
+            return {"produced": count}
+
+        self.service.register("produce", produce)
+        job, created = self.service.submit("produce", {"count": 45})
+        self.assertTrue(created)
+
+        job = wait_for(self.service, job["job_id"])
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"], {"produced": 45})
+        self.assertEqual(job["result_count"], 50)
+
+        page = self.service.get_results(job["job_id"], offset=40, limit=20)
+        self.assertEqual([item["n"] for item in page["items"]], list(range(40, 50)))
+        self.assertIsNone(page["next_offset"])
+
+        event_types = [event["type"] for event in self.service.get_events(job["job_id"])]
+        self.assertEqual(event_types[0], "status")
+        self.assertIn("progress", event_types)
+        self.assertIn("results", event_types)
+
+    def test_identical_active_jobs_are_coalesced(self):
+        release = threading.Event()
+        calls = []
+
+        def slow(ctx):
+            calls.append(ctx.job_id)
+            release.wait(5)
+            return {}
+
+        self.service.register("slow", slow)
+        first, created_first = self.service.submit("slow")
+        second, created_second = self.service.submit("slow")
+        release.set()
+
+        self.assertTrue(created_first)
+        self.assertFalse(created_second)
+        self.assertEqual(first["job_id"], second["job_id"])
+        wait_for(self.service, first["job_id"])
+        self.assertEqual(len(calls), 1)
+
+        # Once finished, a new submission starts a new job
+        third, created_third = self.service.submit("slow")
+        self.assertTrue(created_third)
+        wait_for(self.service, third["job_id"])
+
+    def test_cancel_running_job(self):
+        started = threading.Event()
+
+        def loop(ctx):
+            started.set()
+            for i in range(500):
+                ctx.check_cancelled()
+                time.sleep(0.01)
+            return {"finished": True}
+
+        self.service.register("loop", loop)
+        job, _ = self.service.submit("loop")
+        started.wait(5)
+        self.service.cancel(job["job_id"])
+
+        job = wait_for(self.service, job["job_id"])
+        self.assertEqual(job["status"], "cancelled")
+        self.assertIsNone(job["result"])
+
+    def test_interrupted_job_resumes_from_stored_results(self):
+        processed = []
+
+        def scan(ctx, items):
+            done = {result["item"] for result in ctx.results()}
+            for item in items:
+                if item in done:
+                    continue
+                processed.append(item)
+                ctx.add_results([{"item": item}])
+            return {"total": len(ctx.results())}
+
+        # Simulate a crash: a job left "running" with two results stored
+        self.service.register("scan", scan)
+        self.service.shutdown(wait=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, coalesce_key, status, created_at) VALUES "
+                "('crashed', 'scan', '{\"items\": [\"a\", \"b\", \"c\", \"d\"]}', 'scan:x', 'running', '2024-01-01T00:00:00')"
+            )
+            conn.executemany("INSERT INTO job_results (job_id, seq, item) VALUES ('crashed', ?, ?)",
+                             [(0, '{"item": "a"}'), (1, '{"item": "b"}')])
+
+        self.service = JobService(self.db_path, progress_interval_sec=0)
+        self.service.register("scan", scan)
+        self.assertEqual(self.service.resume_interrupted(), 1)
+
+        job = wait_for(self.service, "crashed")
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(processed, ["c", "d"])
+        self.assertEqual(job["result"], {"total": 4})
+
+    def test_resume_leaves_jobs_of_this_process_alone(self):
+        started = threading.Event()
+        release = threading.Event()
+        runs = []
+
+        def slow(ctx):
+            runs.append(ctx.job_id)
+            started.set()
+            release.wait(5)
+            return {}
+
+        self.service.register("slow", slow)
+        job, _ = self.service.submit("slow")
+        started.wait(5)
+        # The startup phase may run after requests have already submitted work
+        self.assertEqual(self.service.resume_interrupted(), 0)
+        release.set()
+        self.assertEqual(wait_for(self.service, job["job_id"])["status"], "succeeded")
+        self.assertEqual(runs, [job["job_id"]])
+
+    def test_old_event_logs_are_pruned(self):
+        self.service.register("noop", lambda ctx: {})
+        job, _ = self.service.submit("noop")
+        job = wait_for(self.service, job["job_id"])
+        self.assertTrue(self.service.get_events(job["job_id"]))
+
+        # Recently finished jobs keep their events
+        self.assertEqual(self.service.prune_events(), 0)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE jobs SET finished_at = '2024-01-01T00:00:00.000' WHERE id = ?", (job["job_id"],))
+        self.assertGreater(self.service.prune_events(), 0)
+        self.assertEqual(self.service.get_events(job["job_id"]), [])
+        self.assertEqual(self.service.get_job(job["job_id"])["status"], "succeeded")
+
+    def test_deduplicate_job_reports_progress_and_stops_on_cancel(self):
+        from main import run_deduplicate_job
+
+        dedup = make_deduplication_service([
+            DuplicationThreat(f"t{n}", "immediate", "high", f"/tmp/{n}", [], 0.9, "auto", {}) for n in range(3)
+        ])
+        handled = threading.Event()
+        release = threading.Event()
+
+        def handle(threat):
+            dedup.stats["automatic_cleanups"] += 1
+            handled.set()
+            release.wait(5)
+
+        self.service.register("deduplicate", run_deduplicate_job)
+        with patch("main.get_deduplication_service", return_value=dedup), \
+                patch.object(dedup, "_handle_threat", side_effect=handle), \
+                patch("automated_deduplication_service.time.sleep"):
+            job, _ = self.service.submit("deduplicate")
+            handled.wait(5)
+            self.service.cancel(job["job_id"])
+            release.set()
+            job = wait_for(self.service, job["job_id"])
+
+        self.assertEqual(job["status"], "cancelled")
+        self.assertEqual(job["progress"]["completed"], 1)
+        self.assertEqual(job["result"]["data"]["duplicates_removed"], 1)
+        # Threats not reached stay queued for the next run
+        self.assertEqual(len(dedup.threat_queue), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+import os
+import sys
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from learning_event_log import LearningEventLog
+from universal_adaptive_learning import UniversalAdaptiveLearning
+
+
+def segment_names(log_dir):
+    return sorted(p.name for p in Path(log_dir).glob("segment-*.log"))
+
+
+class TestLearningEventLog(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.log_dir = self.root / "event_log"
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_torn_tail_is_ignored_and_new_segment_started(self):
+        log = LearningEventLog(self.log_dir)
+        self.assertIsNone(log.load())
+        log.close()
+
+        seg = self.log_dir / "segment-00000001.log"
+        with open(seg, "wb") as f:
+            pickle.dump(("preference", _Pref("a")), f)
+            f.write(b"\x80\x05garbage")
+
+        log = LearningEventLog(self.log_dir)
+        state = log.load()
+        self.assertEqual(list(state["preferences"]), ["a"])
+
+        log.append("preference", _Pref("b"))
+        log.close()
+        self.assertEqual(segment_names(self.log_dir), ["segment-00000001.log", "segment-00000002.log"])
+        self.assertEqual(set(LearningEventLog(self.log_dir).load()["preferences"]), {"a", "b"})
+
+    def test_snapshot_removes_covered_segments(self):
+        log = LearningEventLog(self.log_dir, segment_max_bytes=64)
+        log.load()
+        for n in range(10):
+            log.append("preference", _Pref(f"p{n}"))
+        self.assertGreater(len(segment_names(self.log_dir)), 1)
+
+        state = LearningEventLog(self.log_dir).load()
+        log.write_snapshot(state)
+        self.assertEqual(segment_names(self.log_dir), [])
+        self.assertEqual(log.records_since_snapshot, 0)
+
+        log.append("preference", _Pref("after"))
+        reloaded = LearningEventLog(self.log_dir).load()
+        self.assertEqual(len(reloaded["preferences"]), 11)
+        self.assertEqual(reloaded["tail_preference_ids"], {"after"})
+
+
+class _Pref:
+    def __init__(self, preference_id):
+        self.preference_id = preference_id
+
+
+class TestAdaptiveLearningPersistence(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        patcher = patch("universal_adaptive_learning.get_metadata_root", return_value=self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def record(self, learning, n):
+        return learning.record_learning_event(
+            event_type="user_correction",
+            file_path=f"/Users/me/Downloads/invoice_{n}.pdf",
+            original_prediction={"category": "documents", "confidence": 0.5},
+            user_action={"target_category": "invoices", "target_location": "/Docs/Invoices"},
+            confidence_before=0.5,
+            context={"content_keywords": ["invoice", "total", "due"]}
+        )
+
+    def db_count(self, learning, table):
+        with sqlite3.connect(learning.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_each_event_appends_instead_of_rewriting(self):
+        learning = UniversalAdaptiveLearning(base_dir=str(self.root))
+        for n in range(5):
+            self.record(learning, n)
+        learning.save_all_data(force=True)
+
+        segment = learning.event_log.log_dir / segment_names(learning.event_log.log_dir)[-1]
+        size = segment.stat().st_size
+        self.record(learning, 5)
+        learning.save_all_data(force=True)
+
+        # One more event grows the log by a few records, not by the whole history
+        self.assertLess(segment.stat().st_size - size, size)
+        self.assertFalse(learning.learning_events_file.exists())
+        self.assertEqual(self.db_count(learning, "learning_events"), 6)
+
+    def test_state_survives_restart_and_compaction(self):
+        learning = UniversalAdaptiveLearning(base_dir=str(self.root))
+        for n in range(6):
+            self.record(learning, n)
+        learning.save_all_data(force=True)
+        expected_patterns = {pid: p.frequency for pid, p in learning.patterns.items()}
+        expected_prefs = {pid: p.frequency for pid, p in learning.user_preferences.items()}
+        learning.event_log.close()
+
+        restarted = UniversalAdaptiveLearning(base_dir=str(self.root))
+        self.assertEqual(len(restarted.learning_events), 6)
+        self.assertEqual({pid: p.frequency for pid, p in restarted.patterns.items()}, expected_patterns)
+        self.assertEqual({pid: p.frequency for pid, p in restarted.user_preferences.items()}, expected_prefs)
+
+        restarted._write_snapshot()
+        restarted.event_log.close()
+        self.assertEqual(segment_names(restarted.event_log.log_dir), [])
+
+        compacted = UniversalAdaptiveLearning(base_dir=str(self.root))
+        self.assertEqual(len(compacted.learning_events), 6)
+        self.assertEqual(set(compacted.patterns), set(expected_patterns))
+
+    def test_database_receives_deltas_only(self):
+        learning = UniversalAdaptiveLearning(base_dir=str(self.root))
+        for n in range(4):
+            self.record(learning, n)
+        learning.save_all_data(force=True)
+        self.assertFalse(learning._db_dirty_preferences)
+
+        # Rows already synced are not rewritten on the next flush
+        with sqlite3.connect(learning.db_path) as conn:
+            conn.execute("UPDATE learning_events SET event_type = 'untouched'")
+            conn.execute("UPDATE user_preferences SET frequency = -1")
+        self.record(learning, 4)
+        learning.save_all_data(force=True)
+
+        with sqlite3.connect(learning.db_path) as conn:
+            self.assertEqual(conn.execute(
+                "SELECT COUNT(*) FROM learning_events WHERE event_type != 'untouched'").fetchone()[0], 1)
+            changed_prefs = conn.execute("SELECT COUNT(*) FROM user_preferences WHERE frequency != -1").fetchone()[0]
+        self.assertEqual(changed_prefs, 2)  # the category and location preference this event reinforced
+
+    def test_legacy_pickles_are_imported_once(self):
+        learning = UniversalAdaptiveLearning(base_dir=str(self.root))
+        for n in range(3):
+            self.record(learning, n)
+        events = list(learning.learning_events)
+        learning.event_log.close()
+        shutil.rmtree(learning.event_log.log_dir)
+        with open(learning.learning_events_file, "wb") as f:
+            pickle.dump(events, f)
+
+        imported = UniversalAdaptiveLearning(base_dir=str(self.root))
+        self.assertEqual([e.event_id for e in imported.learning_events], [e.event_id for e in events])
+        self.assertFalse(imported.learning_events_file.exists())
+        self.assertTrue(imported.event_log.snapshot_file.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
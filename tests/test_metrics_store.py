@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import drift_metrics
+from metrics_store import MetricsStore, MetricPoint, MINUTE, HOUR, DAY
+
+
+class TestMetricsStore(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.store = MetricsStore(self.root / "metrics.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_rollups_match_raw_events(self):
+        self.store.retention = {"events": None, MINUTE: None, HOUR: None, DAY: None}
+        # 10 days of points, one every 37 minutes, so every edge case of the covering ranges is hit
+        start = 1_700_000_000
+        points = [MetricPoint("demo", value=i % 7, dims={"kind": "a" if i % 3 else "b"}, ts=start + i * 37 * MINUTE)
+                  for i in range(400)]
+        self.store.record_many(points)
+
+        since, until = start + 5 * HOUR + 17 * MINUTE, start + 8 * DAY + 3 * HOUR
+        expected = [p for p in points if since - since % MINUTE <= p.ts < until]
+
+        totals = self.store.totals("demo", since=since, until=until)
+        self.assertEqual(totals["count"], len(expected))
+        self.assertEqual(totals["sum"], sum(p.value for p in expected))
+        self.assertEqual(totals["max"], 6)
+
+        by_kind = self.store.totals_by("demo", "kind", since=since, until=until)
+        self.assertEqual(by_kind["b"]["count"], sum(1 for p in expected if p.dims["kind"] == "b"))
+
+    def test_totals_read_only_covering_buckets(self):
+        ranges = MetricsStore._covering_ranges(DAY + 30 * MINUTE, 4 * DAY + 2 * HOUR)
+        self.assertEqual(ranges, [
+            (MINUTE, DAY + 30 * MINUTE, DAY + HOUR),
+            (HOUR, DAY + HOUR, 2 * DAY),
+            (DAY, 2 * DAY, 4 * DAY),
+            (HOUR, 4 * DAY, 4 * DAY + 2 * HOUR),
+        ])
+
+    def test_retention_keeps_coarse_rollups(self):
+        now = time.time()
+        old = now - 30 * DAY
+        self.store.record("demo", value=0.99, ts=old)
+        self.store.record("demo", value=0.5, ts=now)
+        self.store.apply_retention(now)
+
+        with sqlite3.connect(self.store.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM metric_events").fetchone()[0], 1)
+            self.assertEqual(conn.execute(
+                "SELECT COUNT(*) FROM metric_rollups WHERE resolution = ? AND bucket_start < ?", (MINUTE, int(old) + DAY)
+            ).fetchone()[0], 0)
+
+        # The downsampled day survives and still feeds totals and top values
+        self.assertEqual(self.store.totals("demo")["count"], 2)
+        self.assertEqual(self.store.totals("demo", since=old + 5 * MINUTE)["count"], 2)
+        self.assertEqual(self.store.top_values("demo", limit=2), [0.99, 0.5])
+
+
+class TestDriftMonitor(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.patcher = patch.object(drift_metrics, "get_metadata_root", return_value=self.root)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_decisions_are_counted_per_day(self):
+        (self.root / "librarian_metrics.json").write_text('{"2024-01-02": {"total": 3, "unsorted": 1, "fallback_stub": 0}}')
+        monitor = drift_metrics.DriftMonitor()
+        self.assertFalse((self.root / "librarian_metrics.json").exists())
+
+        review = SimpleNamespace(target_path="/x/Uncertain", action="review", suggested_filename="a.pdf", category_id="docs")
+        stub = SimpleNamespace(target_path="/x/docs", action="move", suggested_filename="Document.pdf", category_id="unknown")
+        monitor.log_decision(review)
+        monitor.log_decision(stub)
+
+        daily = monitor.get_daily_metrics(days=10000)
+        self.assertEqual(daily["2024-01-02"], {"total": 3, "unsorted": 1, "fallback_stub": 0})
+        self.assertEqual(monitor.get_drift_rate(days=1), 0.5)
+        today = [counts for day, counts in daily.items() if day != "2024-01-02"]
+        self.assertEqual(today, [{"total": 2, "unsorted": 1, "fallback_stub": 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
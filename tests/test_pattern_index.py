@@ -0,0 +1,140 @@
+import unittest
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pattern_index import PatternIndex
+from universal_adaptive_learning import UniversalAdaptiveLearning, AdaptivePattern
+
+
+def make_pattern(n, pattern_type, conditions):
+    return AdaptivePattern(
+        pattern_id=f"p{n}",
+        pattern_type=pattern_type,
+        trigger_conditions=conditions,
+        predicted_action={"category": f"cat{n % 7}"},
+        confidence=0.7,
+        frequency=1,
+        last_seen=datetime.now()
+    )
+
+
+def random_filename_conditions(rng):
+    return {
+        "extension": rng.choice([".pdf", ".jpg", ".docx"]),
+        "contains_numbers": rng.random() < 0.5,
+        "word_count": rng.randint(1, 3),
+        "contains_date": rng.random() < 0.5,
+        "keywords": rng.choice([["invoice"], ["invoice", "acme"], ["photo"], []])
+    }
+
+
+def random_location_conditions(rng):
+    return {
+        "in_downloads": rng.random() < 0.5,
+        "in_desktop": rng.random() < 0.5,
+        "in_documents": rng.random() < 0.5,
+        "in_temp": rng.random() < 0.5,
+        "depth": rng.randint(3, 6)
+    }
+
+
+def full_scan_matches(patterns, pattern_type, features, threshold):
+    matches = []
+    for pattern in patterns.values():
+        if pattern.pattern_type != pattern_type:
+            continue
+        score = sum(1 for k, v in features.items() if pattern.trigger_conditions.get(k, object()) == v)
+        if score / len(pattern.trigger_conditions) > threshold:
+            matches.append(pattern.pattern_id)
+    return matches
+
+
+class TestPatternIndex(unittest.TestCase):
+    def test_candidates_cover_every_full_scan_match(self):
+        rng = random.Random(7)
+        patterns = {}
+        for n in range(2000):
+            pattern_type = rng.choice(["filename", "location"])
+            make = random_filename_conditions if pattern_type == "filename" else random_location_conditions
+            pattern = make_pattern(n, pattern_type, make(rng))
+            patterns[pattern.pattern_id] = pattern
+
+        index = PatternIndex()
+        for _ in range(100):
+            for pattern_type, make in (("filename", random_filename_conditions), ("location", random_location_conditions)):
+                features = make(rng)
+                candidates = [p.pattern_id for p in index.candidates(patterns, pattern_type, features)]
+                expected = full_scan_matches(patterns, pattern_type, features, 0.7)
+                self.assertTrue(set(expected) <= set(candidates))
+                # Candidates keep the dict's insertion order
+                candidate_set = set(candidates)
+                self.assertEqual(candidates, [pid for pid in patterns if pid in candidate_set])
+                self.assertLess(len(candidates), len(patterns) // 2)
+
+    def test_nonstandard_conditions_are_always_candidates(self):
+        odd = make_pattern(1, "filename", {"extension": ".pdf"})
+        patterns = {odd.pattern_id: odd}
+        features = random_filename_conditions(random.Random(1))
+        self.assertEqual(PatternIndex().candidates(patterns, "filename", features), [odd])
+
+    def test_index_follows_replaced_and_pruned_pattern_dicts(self):
+        index = PatternIndex()
+        conditions = {"keyword_combination": ("acme", "invoice")}
+        patterns = {"a": make_pattern(1, "content", conditions)}
+        patterns["a"].pattern_id = "a"
+        self.assertEqual(len(index.content_candidates(patterns, [("acme", "invoice")])), 1)
+
+        del patterns["a"]
+        self.assertEqual(index.content_candidates(patterns, [("acme", "invoice")]), [])
+        self.assertEqual(index.content_candidates({}, [("acme", "invoice")]), [])
+
+
+class TestIndexedPrediction(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        patcher = patch("universal_adaptive_learning.get_metadata_root", return_value=self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.learning = UniversalAdaptiveLearning(base_dir=str(self.root))
+
+    def tearDown(self):
+        self.learning.event_log.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_prediction_unchanged_and_flat_with_many_patterns(self):
+        target = "/Users/me/Downloads/acme invoice 2024-01-05.pdf"
+        self.learning.patterns["match"] = AdaptivePattern(
+            pattern_id="match", pattern_type="filename",
+            trigger_conditions=self.learning._filename_features(target),
+            predicted_action={"category": "invoices"}, confidence=0.9, frequency=4, last_seen=datetime.now()
+        )
+        rng = random.Random(3)
+        for n in range(20000):
+            pattern = make_pattern(n, "filename", random_filename_conditions(rng))
+            pattern.trigger_conditions["extension"] = ".bin"
+            pattern.trigger_conditions["keywords"] = [f"kw{n}"]
+            self.learning.patterns[pattern.pattern_id] = pattern
+
+        self.learning.predict_user_action(target)  # builds the index
+        started = time.perf_counter()
+        for _ in range(200):
+            prediction = self.learning.predict_user_action(target)
+        per_call = (time.perf_counter() - started) / 200
+
+        self.assertEqual(prediction["predicted_action"]["category"], "invoices")
+        self.assertIn("match", prediction["supporting_patterns"])
+        self.assertLess(per_call, 0.005)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PIL import Image, ImageDraw
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis_cache import AnalysisCache
+from request_scheduler import RequestScheduler
+from derivative_cache import DerivativeCache
+from image_preprocessing import ImagePreprocessor
+from video_sampling import VideoSampler
+from perceptual_hash import HammingIndex, PerceptualHashStore, image_hash, hamming_distance, video_keyframe_hashes
+
+
+def draw_scene(seed, size=(800, 600)):
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    for _ in range(30):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse([x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 200)], fill=color)
+    return img
+
+
+def flip_bits(value, count, rng):
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+class TestHammingIndex(unittest.TestCase):
+    def test_query_matches_brute_force(self):
+        rng = random.Random(5)
+        base = [rng.getrandbits(64) for _ in range(50)]
+        values = {}
+        for n in range(3000):
+            # Clusters of nearby hashes plus random noise
+            values[f"k{n}"] = flip_bits(rng.choice(base), rng.randrange(0, 10), rng) if n % 2 else rng.getrandbits(64)
+
+        index = HammingIndex()
+        for key, value in values.items():
+            index.insert(key, value)
+        index.remove("k1")
+        del values["k1"]
+
+        for radius in (0, 3, 6, 9):
+            for _ in range(30):
+                query = flip_bits(rng.choice(base), rng.randrange(0, 5), rng)
+                expected = {k: hamming_distance(query, v) for k, v in values.items() if hamming_distance(query, v) <= radius}
+                self.assertEqual(index.query(query, radius), expected)
+
+    def test_queries_on_200k_hashes_take_milliseconds(self):
+        rng = random.Random(9)
+        index = HammingIndex()
+        values = [rng.getrandbits(64) for _ in range(200000)]
+        for n, value in enumerate(values):
+            index.insert(str(n), value)
+
+        started = time.perf_counter()
+        for n in range(200):
+            found = index.query(flip_bits(values[n], 5, rng), 6)
+            self.assertIn(str(n), found)
+        self.assertLess((time.perf_counter() - started) / 200, 0.005)
+
+
+class TestPerceptualHashStore(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.store = PerceptualHashStore(db_path=self.root / "phash.db")
+        self.photo = self.root / "photo.png"
+        draw_scene(1).save(self.photo)
+        self.export = self.root / "photo export.jpg"
+        draw_scene(1).resize((400, 300)).save(self.export, quality=70)
+        self.other = self.root / "other.png"
+        draw_scene(2).save(self.other)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_resized_reencoded_copy_is_a_near_duplicate(self):
+        self.assertLessEqual(hamming_distance(image_hash(self.photo), image_hash(self.export)), 2)
+        self.assertGreater(hamming_distance(image_hash(self.photo), image_hash(self.other)), 12)
+
+        self.store.hash_file(self.photo)
+        self.store.hash_file(self.other)
+        matches = self.store.find_near_duplicates(self.export)
+        self.assertEqual([m["file_path"] for m in matches], [str(self.photo)])
+
+        # Hashes persist and the index is rebuilt from SQLite
+        reopened = PerceptualHashStore(db_path=self.root / "phash.db")
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual([m["file_path"] for m in reopened.find_near_duplicates(self.photo)], [str(self.export)])
+
+    def test_groups_skip_byte_identical_copies(self):
+        shutil.copy(self.other, self.root / "other copy.png")
+        groups = self.store.near_duplicate_groups(sorted(self.root.glob("*.*g")))
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0]["match"], "near_duplicate")
+        self.assertEqual({f["path"] for f in groups[0]["files"]}, {str(self.photo), str(self.export)})
+        # Largest copy first
+        self.assertEqual(groups[0]["files"][0]["path"], str(self.photo))
+
+        self.export.unlink()
+        self.assertEqual(self.store.prune_missing(), 1)
+        self.assertEqual(self.store.find_near_duplicates(self.photo), [])
+
+    def test_video_with_undecodable_keyframe_is_not_hashed(self):
+        frame = bytes(range(256)) * 64
+        outputs = iter([b"12.0\n", frame, b"", frame, frame])
+
+        def fake_run(args, **kwargs):
+            out = next(outputs)
+            return SimpleNamespace(stdout=out.decode() if kwargs.get("text") else out)
+
+        with patch("perceptual_hash.shutil.which", return_value="/usr/bin/ffmpeg"), \
+                patch("perceptual_hash.subprocess.run", side_effect=fake_run):
+            # Dropping keyframe 1 would shift keyframes 2 and 3 into the wrong positions
+            self.assertIsNone(video_keyframe_hashes(self.root / "clip.mp4", frames=4))
+
+
+class TestVisionNearDuplicateReuse(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for target, value in (
+            ("vision_analyzer.get_metadata_root", self.root),
+            ("universal_adaptive_learning.get_metadata_root", self.root),
+            ("universal_adaptive_learning.get_ai_organizer_root", self.root),
+            ("vision_analyzer.get_analysis_cache", AnalysisCache(db_path=self.root / "analysis_cache.db")),
+            ("vision_analyzer.get_perceptual_hash_store", PerceptualHashStore(db_path=self.root / "phash.db")),
+            ("vision_analyzer.get_request_scheduler", RequestScheduler(db_path=self.root / "requests.db")),
+            ("vision_analyzer.get_image_preprocessor", ImagePreprocessor(DerivativeCache(root=self.root / "derivatives"))),
+            ("vision_analyzer.get_video_sampler", VideoSampler(DerivativeCache(root=self.root / "derivatives"))),
+        ):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        from vision_analyzer import VisionAnalyzer
+        self.analyzer = VisionAnalyzer(api_key="test", base_dir=str(self.root))
+        self.analyzer.remote_enabled = True
+        self.analyzer.remote_ip = "127.0.0.1"
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_near_duplicate_reuses_analysis(self):
+        photo = self.root / "beach.png"
+        draw_scene(3).save(photo)
+        export = self.root / "beach small.jpg"
+        draw_scene(3).resize((320, 240)).save(export, quality=60)
+        unrelated = self.root / "city.png"
+        draw_scene(4).save(unrelated)
+        analysis = {"success": True, "description": "beach", "content_type": "image",
+                    "confidence_score": 0.9, "metadata": {"file_name": "beach.png"}}
+
+        with patch.object(self.analyzer, "_analyze_image_remote", return_value=analysis) as remote:
+            self.analyzer.analyze_image(str(photo))
+            reused = self.analyzer.analyze_image(str(export))
+            self.analyzer.analyze_image(str(unrelated))
+
+        self.assertEqual(remote.call_count, 2)
+        self.assertEqual(reused["description"], "beach")
+        self.assertEqual(reused["near_duplicate_of"], str(photo))
+        self.assertEqual(reused["metadata"]["file_name"], "beach small.jpg")
+        self.assertEqual(self.analyzer.get_statistics()["near_duplicate_hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
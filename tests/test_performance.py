@@ -10,6 +10,7 @@ Created by: Task Orchestrator / Claude Code
 
 import pytest
 import httpx
+import asyncio
 import time
 import statistics
 from typing import List, Dict
@@ -43,6 +44,14 @@ class PerformanceMetrics:
         index = int(len(sorted_latencies) * 0.95)
         return sorted_latencies[index]
 
+    def p99(self) -> float:
+        """Calculate 99th percentile latency"""
+        if not self.latencies:
+            return 0
+        sorted_latencies = sorted(self.latencies)
+        index = min(len(sorted_latencies) - 1, int(len(sorted_latencies) * 0.99))
+        return sorted_latencies[index]
+
     def summary(self) -> Dict[str, float]:
         """Get performance summary"""
         return {
@@ -50,6 +59,7 @@ class PerformanceMetrics:
             "median_ms": round(self.median(), 2),
             "mean_ms": round(self.mean(), 2),
             "p95_ms": round(self.p95(), 2),
+            "p99_ms": round(self.p99(), 2),
             "min_ms": round(min(self.latencies), 2) if self.latencies else 0,
             "max_ms": round(max(self.latencies), 2) if self.latencies else 0
         }
@@ -242,6 +252,60 @@ async def test_combined_endpoint_load():
     assert summary["p95_ms"] < 300, f"P95 latency too high: {summary['p95_ms']}ms"
 
 
+async def _measure_health(client: httpx.AsyncClient, count: int) -> PerformanceMetrics:
+    """Sequential /health probes"""
+    metrics = PerformanceMetrics()
+    for _ in range(count):
+        start = time.time()
+        response = await client.get("/health")
+        metrics.add((time.time() - start) * 1000)
+        assert response.status_code == 200
+    return metrics
+
+
+@pytest.mark.asyncio
+async def test_health_p99_under_classification_flood():
+    """
+    /health must stay flat while blocking classification work is flooding the API.
+    Classification runs on its own bounded pool; excess requests are shed with 503.
+    """
+    flood_requests = 200
+
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60.0) as client:
+        await client.get("/health")
+        baseline = await _measure_health(client, 100)
+
+        async def classify(i: int) -> int:
+            response = await client.post("/api/triage/classify", json={
+                "file_path": f"/tmp/perf_flood_{i}.txt",
+                "confirmed_category": "perf_test"
+            })
+            return response.status_code
+
+        async def preview(i: int) -> int:
+            response = await client.get("/api/files/preview-text", params={"path": f"/tmp/perf_flood_{i}.pdf"})
+            return response.status_code
+
+        flood = asyncio.gather(
+            *[classify(i) for i in range(flood_requests // 2)],
+            *[preview(i) for i in range(flood_requests // 2)]
+        )
+        under_load, statuses = await asyncio.gather(_measure_health(client, 100), flood)
+
+    baseline_summary = baseline.summary()
+    load_summary = under_load.summary()
+    print(f"\n/health baseline: {baseline_summary}")
+    print(f"/health under classification flood: {load_summary}")
+    print(f"Flood status codes: { {code: statuses.count(code) for code in set(statuses)} }")
+
+    # Flood requests either finish, fail fast, or are shed - never hang the server
+    assert all(code in (200, 403, 404, 500, 503, 504) for code in statuses)
+
+    # p99 stays flat: within 5x of the idle p99, and never above 100ms
+    assert load_summary["p99_ms"] < max(5 * baseline_summary["p99_ms"], 100), \
+        f"/health p99 degraded under load: {load_summary['p99_ms']}ms (baseline {baseline_summary['p99_ms']}ms)"
+
+
 if __name__ == "__main__":
     # Run performance tests
     pytest.main([__file__, "-v", "-s", "--asyncio-mode=auto"])
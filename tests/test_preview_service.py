@@ -0,0 +1,181 @@
+import unittest
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from derivative_cache import DerivativeCache
+from image_preprocessing import ImagePreprocessor
+from preview_service import PreviewService, PreviewUnavailable, PreviewDecodeError
+
+FFMPEG = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+class TestPreviewService(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        cache = DerivativeCache(root=self.root / "derivatives")
+        self.preprocessor = ImagePreprocessor(cache, max_workers=1)
+        self.addCleanup(self.preprocessor.shutdown)
+        self.previews = PreviewService(cache, self.preprocessor)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write_wav(self, path: Path):
+        rate = 22050
+        t = np.arange(rate) / rate
+        loud = (np.sin(2 * np.pi * 440 * t) * 16384).astype(np.int16)
+        stereo = np.column_stack([np.concatenate([np.zeros(rate, np.int16), loud])] * 2)
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(stereo.tobytes())
+
+    def test_thumbnails_are_small_and_keyed_by_content(self):
+        photo = self.root / "IMG_0001.jpg"
+        Image.new("RGB", (6000, 4000), (30, 60, 90)).save(photo, quality=95)
+
+        thumbnail = self.previews.thumbnail(photo, 320)
+        self.assertEqual(thumbnail.media_type, "image/jpeg")
+        with Image.open(thumbnail.path) as img:
+            self.assertEqual(img.size, (320, 213))
+        self.assertLess(thumbnail.path.stat().st_size * 20, photo.stat().st_size)
+
+        renamed = photo.with_name("beach.jpg")
+        photo.rename(renamed)
+        self.assertEqual(self.previews.thumbnail(renamed, 320).etag, thumbnail.etag)
+        self.assertNotEqual(self.previews.thumbnail(renamed, 160).etag, thumbnail.etag)
+        with self.assertRaises(ValueError):
+            self.previews.thumbnail(renamed, 500)
+
+    def test_waveform_peaks(self):
+        audio = self.root / "take.wav"
+        self._write_wav(audio)
+
+        waveform = self.previews.waveform(audio, points=10)
+        data = json.loads(waveform.path.read_text())
+        self.assertAlmostEqual(data["duration"], 2.0, places=1)
+        self.assertEqual(len(data["peaks"]), 10)
+        self.assertTrue(all(p < 0.01 for p in data["peaks"][:5]))
+        self.assertTrue(all(0.45 < p < 0.55 for p in data["peaks"][5:]))
+
+    def test_undecodable_files_are_told_apart_from_missing_previews(self):
+        broken = self.root / "broken.wav"
+        broken.write_bytes(b"RIFF\x00\x00\x00\x00not a wave file")
+        photo = self.root / "broken.jpg"
+        photo.write_bytes(b"not a jpeg")
+
+        with patch("preview_service._ffmpeg_available", return_value=False):
+            with self.assertRaises(PreviewDecodeError):
+                self.previews.waveform(broken)
+        with self.assertRaises(PreviewDecodeError):
+            self.previews.thumbnail(photo, 320)
+
+        video = self.root / "clip.mp4"
+        video.write_bytes(b"\x00" * 1024)
+        with patch("preview_service._ffmpeg_available", return_value=False):
+            with self.assertRaises(PreviewUnavailable) as raised:
+                self.previews.poster(video)
+        self.assertNotIsInstance(raised.exception, PreviewDecodeError)
+
+    def test_etag_is_known_before_rendering(self):
+        photo = self.root / "IMG_0001.jpg"
+        Image.new("RGB", (800, 600), (30, 60, 90)).save(photo)
+        audio = self.root / "take.wav"
+        self._write_wav(audio)
+
+        with patch.object(self.previews, "_window_peaks") as window_peaks:
+            waveform_etag = self.previews.etag(audio, "waveform", 10)
+            thumbnail_etag = self.previews.etag(photo, "thumbnail", 320)
+        window_peaks.assert_not_called()
+        self.assertEqual(self.preprocessor.stats["rendered"], 0)
+
+        self.assertEqual(self.previews.waveform(audio, points=10).etag, waveform_etag)
+        self.assertEqual(self.previews.thumbnail(photo, 320).etag, thumbnail_etag)
+        with self.assertRaises(ValueError):
+            self.previews.etag(photo, "thumbnail", 500)
+        with self.assertRaises(FileNotFoundError):
+            self.previews.etag(self.root / "missing.wav", "waveform")
+
+    def test_timed_out_render_leaves_no_partial_file(self):
+        audio = self.root / "take.wav"
+        self._write_wav(audio)
+        reserve = self.previews.cache.reserve
+        reserved = []
+
+        def track_reserve(*args):
+            reserved.append(reserve(*args))
+            return reserved[-1]
+
+        def stuck_render(path):
+            reserved[-1].write_text('{"duration": ')
+            raise subprocess.TimeoutExpired("ffmpeg", 1)
+
+        with patch.object(self.previews.cache, "reserve", side_effect=track_reserve), \
+                patch.object(self.previews, "_window_peaks", side_effect=stuck_render):
+            with self.assertRaises(PreviewUnavailable):
+                self.previews.waveform(audio)
+        self.assertEqual(len(reserved), 1)
+        self.assertFalse(reserved[0].exists())
+
+    def test_concurrent_requests_share_one_render(self):
+        audio = self.root / "take.wav"
+        self._write_wav(audio)
+        original = self.previews._window_peaks
+        calls = []
+
+        def slow_window_peaks(path):
+            calls.append(path)
+            time.sleep(0.2)
+            return original(path)
+
+        results = []
+        with patch.object(self.previews, "_window_peaks", side_effect=slow_window_peaks):
+            threads = [threading.Thread(target=lambda: results.append(self.previews.waveform(audio)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({r.path for r in results}, {results[0].path})
+
+    @unittest.skipIf(FFMPEG, "ffmpeg is installed")
+    def test_video_previews_need_ffmpeg(self):
+        video = self.root / "clip.mp4"
+        video.write_bytes(b"\x00" * 1024)
+        with self.assertRaises(PreviewUnavailable):
+            self.previews.poster(video)
+
+    @unittest.skipUnless(FFMPEG, "ffmpeg not installed")
+    def test_video_poster_and_preview_clip(self):
+        video = self.root / "clip.mp4"
+        subprocess.run(['ffmpeg', '-v', 'quiet', '-f', 'lavfi', '-i', 'testsrc=duration=20:size=1280x720:rate=25',
+                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(video)], check=True)
+
+        poster = self.previews.poster(video)
+        with Image.open(poster.path) as img:
+            self.assertEqual(img.size, (640, 360))
+        clip = self.previews.video_preview(video)
+        self.assertEqual(clip.media_type, "video/mp4")
+        self.assertLess(clip.path.stat().st_size, video.stat().st_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
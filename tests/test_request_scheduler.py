@@ -0,0 +1,190 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from request_scheduler import (
+    RequestScheduler, BucketConfig, DailyQuotaExceeded, INTERACTIVE, BACKGROUND, request_priority
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Each worker process sends its requests to the stub model server through its
+# own scheduler instance; only the SQLite file is shared.
+WORKER_SCRIPT = """
+import sys, urllib.request
+sys.path.insert(0, sys.argv[1])
+from request_scheduler import RequestScheduler, BucketConfig
+scheduler = RequestScheduler(db_path=sys.argv[2], buckets={"stub": BucketConfig(rate_per_minute=600)})
+for _ in range(int(sys.argv[4])):
+    scheduler.call("stub", lambda: urllib.request.urlopen(sys.argv[3]).read())
+"""
+
+
+class _StubModelHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.request_times.append(time.time())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"text": "ok"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.db_path = self.root / "request_scheduler.db"
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_processes_share_one_rate_limit(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubModelHandler)
+        server.request_times = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/generate"
+
+        # Create the bucket before the workers start so neither sees a fresh burst
+        RequestScheduler(db_path=self.db_path, buckets={"stub": BucketConfig(rate_per_minute=600)})
+        workers = [
+            subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT, PROJECT_ROOT, str(self.db_path), url, "5"])
+            for _ in range(2)
+        ]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+
+        # 10 requests at 10/s with a burst of 1: at least ~0.9s end to end
+        times = sorted(server.request_times)
+        self.assertEqual(len(times), 10)
+        self.assertGreaterEqual(times[-1] - times[0], 0.8)
+
+    def test_interactive_requests_jump_the_queue(self):
+        scheduler = RequestScheduler(db_path=self.db_path, buckets={"gemini": BucketConfig(rate_per_minute=120)})
+        scheduler.acquire("gemini")  # drain the burst
+        order = []
+
+        def wait_for_token(name, priority):
+            scheduler.acquire("gemini", priority=priority)
+            order.append(name)
+
+        background = threading.Thread(target=wait_for_token, args=("background", BACKGROUND))
+        background.start()
+        time.sleep(0.1)
+        with request_priority(INTERACTIVE):
+            wait_for_token("interactive", None)
+        background.join(timeout=10)
+
+        self.assertEqual(order, ["interactive", "background"])
+
+    def test_identical_in_flight_requests_are_coalesced(self):
+        scheduler = RequestScheduler(db_path=self.db_path, buckets={"gemini": BucketConfig(rate_per_minute=6000, burst=10)})
+        calls = []
+        results = []
+
+        def generate(prompt):
+            calls.append(prompt)
+            time.sleep(0.2)
+            return {"description": prompt}
+
+        threads = [
+            threading.Thread(target=lambda: results.append(scheduler.call("gemini", generate, "cat", key="k")))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        self.assertEqual(calls, ["cat"])
+        self.assertEqual(results, [{"description": "cat"}] * 4)
+        self.assertEqual(scheduler.stats["granted"], 1)
+        # Once finished, the same key runs again
+        scheduler.call("gemini", generate, "cat", key="k")
+        self.assertEqual(len(calls), 2)
+
+    def test_usage_reads_without_the_write_lock(self):
+        scheduler = RequestScheduler(db_path=self.db_path, buckets={"gemini": BucketConfig(rate_per_minute=600)})
+        scheduler.acquire("gemini")
+        writer = sqlite3.connect(self.db_path, isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+
+        started = time.time()
+        self.assertEqual(scheduler.usage("gemini")["requests"], 1)
+        self.assertLess(time.time() - started, 1.0)
+        writer.execute("ROLLBACK")
+
+    def test_acquire_async_waits_without_blocking_the_loop(self):
+        scheduler = RequestScheduler(db_path=self.db_path, buckets={"gemini": BucketConfig(rate_per_minute=150)})
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.time())
+                await asyncio.sleep(0.02)
+
+        async def scenario():
+            tick_task = asyncio.create_task(ticker())
+            await scheduler.acquire_async("gemini")
+            started = time.time()
+            await scheduler.acquire_async("gemini")
+            waited = time.time() - started
+            tick_task.cancel()
+            return waited, started
+
+        waited, started = asyncio.run(scenario())
+        self.assertGreaterEqual(waited, 0.3)
+        # The loop kept running while the second request waited for its slot
+        self.assertGreater(len([t for t in ticks if t > started]), 5)
+        self.assertEqual(scheduler.usage("gemini")["requests"], 2)
+
+    def test_reserved_token_is_used_by_the_worker_or_refunded(self):
+        scheduler = RequestScheduler(db_path=self.db_path, buckets={"gemini": BucketConfig(rate_per_minute=6000, burst=5)})
+
+        async def scenario():
+            async with scheduler.reserve("gemini"):
+                # The worker's acquire() takes the token reserved on the loop
+                await asyncio.to_thread(scheduler.acquire, "gemini")
+            after_use = scheduler.usage("gemini")["requests"]
+            async with scheduler.reserve("gemini"):
+                await asyncio.to_thread(lambda: None)
+            return after_use
+
+        self.assertEqual(asyncio.run(scenario()), 1)
+        self.assertEqual(scheduler.usage("gemini")["requests"], 1)
+        self.assertEqual(scheduler.stats["granted"], 2)
+
+    def test_daily_limit_and_backoff_apply_across_instances(self):
+        buckets = {"gemini": BucketConfig(rate_per_minute=6000, burst=5, daily_limit=3)}
+        first = RequestScheduler(db_path=self.db_path, buckets=buckets)
+        second = RequestScheduler(db_path=self.db_path, buckets=buckets)
+
+        first.acquire("gemini")
+        second.backoff("gemini", 0.3)
+        started = time.time()
+        first.acquire("gemini")
+        self.assertGreaterEqual(time.time() - started, 0.25)
+
+        second.acquire("gemini")
+        self.assertEqual(first.daily_remaining("gemini"), 0)
+        with self.assertRaises(DailyQuotaExceeded):
+            first.acquire("gemini")
+
+
+if __name__ == '__main__':
+    unittest.main()
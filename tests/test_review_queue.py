@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from review_queue import ReviewQueueStore
+
+
+class TestReviewQueueStore(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.queue = ReviewQueueStore(self.root / "review_queue.db", import_legacy=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_file(self, name, content="x"):
+        path = self.root / name
+        path.write_text(content)
+        return path
+
+    def test_requeue_does_not_duplicate(self):
+        path = self.make_file("a.pdf")
+        first = self.queue.enqueue(path, category="unknown", confidence=0.4)
+        second = self.queue.enqueue(path, category="invoices", confidence=0.5)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.queue.count(), 1)
+        item = self.queue.list_pending()["items"][0]
+        self.assertEqual(item["category"], "invoices")
+
+    def test_changed_file_supersedes_and_resolved_stays_resolved(self):
+        path = self.make_file("a.pdf")
+        old_id = self.queue.enqueue(path, category="unknown", confidence=0.4)
+        time.sleep(0.01)
+        path.write_text("longer content")
+        new_id = self.queue.enqueue(path, category="unknown", confidence=0.3)
+
+        self.assertNotEqual(old_id, new_id)
+        self.assertEqual([i["queue_id"] for i in self.queue.list_pending()["items"]], [new_id])
+
+        self.assertEqual(self.queue.resolve_path(str(path)), 1)
+        self.queue.enqueue(path, category="unknown", confidence=0.3)
+        self.assertEqual(self.queue.count(), 0)
+
+    def test_pages_are_confidence_ordered(self):
+        for n in range(25):
+            self.queue.enqueue(self.make_file(f"f{n}.txt"), category="unknown", confidence=(n % 5) / 10)
+
+        seen = []
+        cursor = None
+        while True:
+            page = self.queue.list_pending(limit=10, cursor=cursor)
+            seen.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len({i["queue_id"] for i in seen}), 25)
+        confidences = [i["confidence"] for i in seen]
+        self.assertEqual(confidences, sorted(confidences))
+
+    def test_missing_files_are_dropped_from_page(self):
+        keep = self.make_file("keep.txt")
+        gone = self.make_file("gone.txt")
+        self.queue.enqueue(keep, category="unknown", confidence=0.5)
+        self.queue.enqueue(gone, category="unknown", confidence=0.1)
+        gone.unlink()
+
+        items = self.queue.list_pending()["items"]
+        self.assertEqual([i["file_path"] for i in items], [str(keep)])
+        self.assertEqual(self.queue.count("missing"), 1)
+
+    def test_pending_paths_batched_lookup(self):
+        paths = [self.make_file(f"f{n}.txt") for n in range(3)]
+        self.queue.enqueue(paths[0], category="unknown", confidence=0.2)
+
+        many = [str(p) for p in paths] + [f"/nowhere/{n}" for n in range(1200)]
+        self.assertEqual(self.queue.pending_paths(many), {str(paths[0])})
+
+    def test_compact_removes_old_closed_items(self):
+        path = self.make_file("a.pdf")
+        self.queue.enqueue(path, category="unknown", confidence=0.4)
+        self.queue.resolve_path(str(path))
+        with sqlite3.connect(self.queue.db_path) as conn:
+            conn.execute("UPDATE review_queue SET resolved_at = ?", (time.time() - 40 * 86400,))
+
+        self.assertEqual(self.queue.compact(retention_days=30), 1)
+        self.assertEqual(self.queue.count("resolved"), 0)
+
+    def test_legacy_jsonl_import(self):
+        path = self.make_file("a.pdf")
+        legacy = self.root / "review_queue.jsonl"
+        with open(legacy, "w") as f:
+            for n, conf in enumerate([0.5, 0.3]):
+                f.write(json.dumps({
+                    "timestamp": 1000 + n, "queue_id": f"v{n}", "file_path": str(path), "file_type": "document",
+                    "final_decision": {"category": "unknown", "confidence": conf, "trace": "t"},
+                    "conflicts": [], "candidates": [], "status": "pending"
+                }) + "\n")
+
+        self.assertEqual(self.queue.import_jsonl(legacy), 2)
+        self.assertFalse(legacy.exists())
+        items = self.queue.list_pending()["items"]
+        self.assertEqual([i["queue_id"] for i in items], ["v1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import easy_rollback_system
+from easy_rollback_system import EasyRollbackSystem
+from api.rollback_service import RollbackService
+
+
+class TestRollbackOperations(unittest.TestCase):
+    def setUp(self):
+        self.metadata_root = Path(tempfile.mkdtemp())
+        self.patcher = patch.object(easy_rollback_system, "get_metadata_root", return_value=self.metadata_root)
+        self.patcher.start()
+        self.rollback = EasyRollbackSystem()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.metadata_root, ignore_errors=True)
+
+    def _insert(self, when: datetime, src: str, dst: str):
+        with sqlite3.connect(self.rollback.db_path) as conn:
+            conn.execute(
+                "INSERT INTO file_operations (timestamp, action, src_path, dst_path, confidence, details) VALUES (?, ?, ?, ?, ?, ?)",
+                (when.isoformat(timespec="seconds"), "move", src, dst, 0.9, json.dumps({"notes": "test"}))
+            )
+
+    def test_keyset_pagination_walks_all_operations(self):
+        now = datetime.now()
+        for i in range(25):
+            # Several operations share a timestamp to exercise the id tie-breaker
+            self._insert(now - timedelta(minutes=i // 3), f"/in/file{i}.txt", f"/out/file{i}.txt")
+
+        seen = []
+        before = None
+        while True:
+            page = self.rollback.show_recent_operations(days=1, limit=10, before=before)
+            seen.extend(op.rollback_id for op in page)
+            if len(page) < 10:
+                break
+            before = (page[-1].timestamp, page[-1].rollback_id)
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_day_window_is_respected(self):
+        self._insert(datetime.now(), "/in/new.txt", "/out/new.txt")
+        self._insert(datetime.now() - timedelta(days=45), "/in/old.txt", "/out/old.txt")
+
+        self.assertEqual(len(self.rollback.show_recent_operations(days=30)), 1)
+        self.assertEqual(len(self.rollback.show_recent_operations(days=60)), 2)
+        self.assertEqual(self.rollback.count_operations(today_only=True), 1)
+
+    def test_queries_use_indexes(self):
+        with sqlite3.connect(self.rollback.db_path) as conn:
+            plan = " ".join(str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT 1 FROM file_operations WHERE src_path = ? AND timestamp > ?",
+                ("/a", "2024-01-01")
+            ))
+            self.assertIn("idx_file_operations_src_time", plan)
+
+            plan = " ".join(str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM file_operations WHERE timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT 10",
+                ("2024-01-01",)
+            ))
+            self.assertIn("idx_file_operations_time", plan)
+
+    def test_was_ai_operation(self):
+        self._insert(datetime.now(), "/in/recent.txt", "/out/recent.txt")
+        self._insert(datetime.now() - timedelta(minutes=5), "/in/stale.txt", "/out/stale.txt")
+
+        self.assertTrue(self.rollback.was_ai_operation("/in/recent.txt"))
+        self.assertTrue(self.rollback.was_ai_operation("/out/recent.txt"))
+        self.assertFalse(self.rollback.was_ai_operation("/in/stale.txt"))
+
+    def test_archive_and_search(self):
+        self._insert(datetime.now(), "/in/demo reel.mp4", "/out/demo reel.mp4")
+        self._insert(datetime.now() - timedelta(days=200), "/in/demo_old.mp4", "/out/demo_old.mp4")
+
+        self.assertEqual(self.rollback.archive_old_operations(older_than_days=90), 1)
+        self.assertEqual(self.rollback.archive_old_operations(older_than_days=90), 0)
+
+        live = self.rollback.search_operations("demo", days=365)
+        self.assertEqual([op.new_filename for op in live], ["demo reel.mp4"])
+
+        everything = self.rollback.search_operations("demo", days=365, include_archived=True)
+        self.assertEqual(len(everything), 2)
+
+        # LIKE wildcards in the search term are matched literally
+        self.assertEqual(len(self.rollback.search_operations("demo_", days=365, include_archived=True)), 1)
+
+    def test_today_search_starts_at_local_midnight(self):
+        midnight = datetime.combine(datetime.now().date(), datetime.min.time())
+        self._insert(midnight + timedelta(seconds=1), "/in/report today.pdf", "/out/report today.pdf")
+        # Less than 24 hours ago, but yesterday
+        self._insert(midnight - timedelta(seconds=1), "/in/report late.pdf", "/out/report late.pdf")
+
+        operations = RollbackService().get_operations(today_only=True, search="report")
+        self.assertEqual([op["new_filename"] for op in operations], ["report today.pdf"])
+        self.assertEqual(len(RollbackService().get_operations(days=2, search="report")), 2)
+
+    def test_service_cursor_round_trip(self):
+        now = datetime.now()
+        for i in range(5):
+            self._insert(now - timedelta(seconds=i), f"/in/f{i}.txt", f"/out/f{i}.txt")
+
+        service = RollbackService()
+        first = service.get_operations(days=1, limit=3)
+        second = service.get_operations(days=1, limit=3, cursor=service.encode_cursor(first[-1]))
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({op["operation_id"] for op in first} & {op["operation_id"] for op in second})
+
+
+if __name__ == '__main__':
+    unittest.main()
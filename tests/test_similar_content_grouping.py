@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from minhash_lsh import MinHasher, LSHIndex
+from interactive_batch_processor import FilePreview
+from factories import make_batch_processor
+
+
+def make_preview(path, keywords):
+    now = datetime.now()
+    return FilePreview(
+        file_path=path, file_name=os.path.basename(path), file_size_mb=0.1,
+        file_type=".txt", creation_date=now, modification_date=now,
+        content_preview="", content_keywords=keywords, content_summary="",
+        predicted_category="unknown", confidence_score=0.5,
+        similar_files=[], duplicate_indicator=False
+    )
+
+
+def make_fixture(num_clusters=150, per_cluster=6, noise_files=600, seed=7):
+    """Clusters of near-identical keyword sets plus unrelated noise files"""
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(5000)]
+    previews = []
+    for c in range(num_clusters):
+        base = rng.sample(vocab, 10)
+        for k in range(per_cluster):
+            keywords = list(base)
+            # Swap out at most one keyword so members stay above the 0.7 threshold
+            if k % 2:
+                keywords[rng.randrange(10)] = rng.choice(vocab)
+            previews.append(make_preview(f"/fixture/c{c}/f{k}.txt", keywords))
+    for n in range(noise_files):
+        previews.append(make_preview(f"/fixture/noise/n{n}.txt", rng.sample(vocab, 10)))
+    rng.shuffle(previews)
+    return previews
+
+
+class TestMinHashLSH(unittest.TestCase):
+    def test_signature_is_stable_and_serializable(self):
+        hasher = MinHasher(num_perm=64)
+        sig = hasher.signature(["contract", "payment", "royalty"])
+        self.assertEqual(sig, MinHasher(num_perm=64).signature(["royalty", "contract", "payment"]))
+        self.assertEqual(MinHasher.deserialize(MinHasher.serialize(sig)), sig)
+        self.assertIsNone(hasher.signature([]))
+
+    def test_index_finds_identical_sets(self):
+        hasher = MinHasher(num_perm=128)
+        index = LSHIndex(num_perm=128, bands=32)
+        index.insert("a", hasher.signature(["alpha", "beta", "gamma"]))
+        index.insert("b", hasher.signature(["delta", "epsilon", "zeta"]))
+        self.assertIn("a", index.query(hasher.signature(["gamma", "beta", "alpha"])))
+
+    def test_bands_must_divide_permutations(self):
+        with self.assertRaises(ValueError):
+            LSHIndex(num_perm=100, bands=32)
+
+
+class TestSimilarContentGrouping(unittest.TestCase):
+    def test_lsh_grouping_matches_exhaustive(self):
+        """LSH grouping has parity with the exhaustive pass on the fixture set"""
+        processor = make_batch_processor()
+        previews = make_fixture()
+
+        exhaustive = processor._find_similar_content_exhaustive(previews)
+        lsh = processor._find_similar_content_lsh(previews)
+
+        as_paths = lambda groups: [[fp.file_path for fp in group] for group in groups]
+        self.assertEqual(as_paths(lsh), as_paths(exhaustive))
+        self.assertGreaterEqual(len(lsh), 150)
+
+    def test_signatures_persist_with_preview_cache(self):
+        processor = make_batch_processor()
+        conn = sqlite3.connect(":memory:")
+        conn.execute("""
+            CREATE TABLE file_previews (
+                file_path TEXT PRIMARY KEY, file_hash TEXT, preview_data TEXT,
+                generated_time TEXT, last_accessed TEXT, access_count INTEGER DEFAULT 1,
+                minhash_signature TEXT
+            )
+        """)
+        preview = make_preview("/fixture/doc.txt", ["budget", "invoice", "payment"])
+        signature = processor._get_content_signature(preview)
+        processor._cache_preview(preview.file_path, "hash1", preview, conn, signature=signature)
+
+        # A fresh session restores the signature from the cache without recomputing
+        fresh = make_batch_processor()
+        cached = fresh._get_cached_preview(preview.file_path, "hash1", conn)
+        self.assertIsNotNone(cached)
+        self.assertEqual(fresh.content_signatures[fresh._signature_key(cached)], signature)
+
+    def test_signature_cache_follows_file_changes_and_is_bounded(self):
+        processor = make_batch_processor()
+        processor.config["signature_cache_size"] = 3
+        preview = make_preview("/fixture/doc.txt", ["budget", "invoice", "payment"])
+        processor._get_content_signature(preview)
+
+        # Same path, new mtime and keywords: the old signature isn't reused
+        preview.modification_date += timedelta(seconds=5)
+        preview.content_keywords = ["holiday", "photos", "beach"]
+        self.assertEqual(processor._get_content_signature(preview), processor.minhasher.signature(preview.content_keywords))
+
+        for i in range(5):
+            processor._get_content_signature(make_preview(f"/fixture/other_{i}.txt", ["note", str(i)]))
+        self.assertEqual(len(processor.content_signatures), 3)
+        self.assertNotIn(processor._signature_key(preview), processor.content_signatures)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import staging_snapshot
+from staging_snapshot import StagingSnapshot, CLASSIFIED, ERROR, PENDING
+
+
+class TestStagingSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.area = self.root / "Downloads"
+        self.area.mkdir()
+        self.snapshot = StagingSnapshot([self.area], db_path=self.root / "staging_snapshot.db")
+        self.calls = []
+
+    def tearDown(self):
+        self.snapshot.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def classify(self, path):
+        self.calls.append(path.name)
+        return "unknown", 0.3 if path.suffix == ".bin" else 0.9, "test"
+
+    def make_file(self, name, content="x"):
+        path = self.area / name
+        path.write_text(content)
+        return path
+
+    def test_only_new_or_changed_files_are_classified(self):
+        a = self.make_file("a.bin")
+        self.make_file("b.pdf")
+        self.snapshot._classify = self.classify
+
+        self.snapshot.reconcile()
+        self.assertEqual(self.snapshot.classify_pending(), 2)
+
+        # Unchanged files: nothing to do
+        self.assertEqual(self.snapshot.reconcile()["changed"], 0)
+        self.assertEqual(self.snapshot.classify_pending(), 0)
+
+        a.write_text("changed content")
+        self.snapshot.note_file(a)
+        self.assertEqual(self.snapshot.classify_pending(), 1)
+        self.assertEqual(sorted(self.calls), ["a.bin", "a.bin", "b.pdf"])
+
+    def test_low_confidence_read_does_not_classify(self):
+        self.make_file("a.bin")
+        self.make_file("b.pdf")
+        self.snapshot._classify = self.classify
+        self.snapshot.reconcile()
+        self.snapshot.classify_pending()
+        self.calls.clear()
+
+        rows = self.snapshot.low_confidence(0.6)
+        self.assertEqual([Path(r["file_path"]).name for r in rows], ["a.bin"])
+        self.assertEqual(self.calls, [])
+
+    def test_untracked_paths_are_ignored(self):
+        (self.area / "sub").mkdir()
+        self.assertFalse(self.snapshot.note_file(self.area / "sub" / "deep.txt"))
+        self.assertFalse(self.snapshot.note_file(self.make_file(".DS_Store")))
+        self.assertFalse(self.snapshot.note_file(self.root / "elsewhere.txt"))
+        self.assertEqual(self.snapshot.counts(), {})
+
+    def test_moved_and_deleted_files_leave_the_snapshot(self):
+        a = self.make_file("a.bin")
+        b = self.make_file("b.bin")
+        self.snapshot.note_file(a)
+        self.snapshot.note_file(b)
+
+        a.rename(self.root / "a.bin")
+        self.snapshot.forget(a)
+        b.unlink()
+        self.assertEqual(self.snapshot.reconcile()["removed"], 1)
+        self.assertEqual(self.snapshot.counts(), {})
+
+    def test_result_for_stale_version_is_discarded(self):
+        a = self.make_file("a.bin")
+        self.snapshot.note_file(a)
+
+        def classify_while_changing(path):
+            path.write_text("edited during classification")
+            os.utime(path, (time.time() + 5, time.time() + 5))
+            self.snapshot.note_file(path)
+            return "unknown", 0.1, "stale"
+
+        self.snapshot._classify = classify_while_changing
+        row = self.snapshot._connect().execute("SELECT size, mtime FROM staging_files").fetchone()
+        self.snapshot._classify_one(a, row["size"], row["mtime"])
+        self.assertEqual(self.snapshot.counts(), {PENDING: 1})
+
+    def test_background_worker_classifies_new_files(self):
+        self.snapshot.attach_classifier(self.classify)
+        self.snapshot.note_file(self.make_file("a.bin"))
+
+        deadline = time.time() + 5
+        while time.time() < deadline and self.snapshot.counts().get(CLASSIFIED) != 1:
+            time.sleep(0.02)
+        self.assertEqual(self.snapshot.counts(), {CLASSIFIED: 1})
+
+    def test_failed_classification_is_retried_later(self):
+        a = self.make_file("a.bin")
+        self.snapshot.note_file(a)
+
+        def fail(path):
+            raise RuntimeError("model offline")
+
+        self.snapshot._classify = fail
+        self.snapshot.classify_pending()
+        self.assertEqual(self.snapshot.counts(), {ERROR: 1})
+        self.assertEqual(self.snapshot.retry_errors(), 0)
+
+        self.snapshot._classify = self.classify
+        self.assertEqual(self.snapshot.retry_errors(older_than_sec=0), 1)
+        self.assertEqual(self.snapshot.classify_pending(), 1)
+        self.assertEqual(self.snapshot.counts(), {CLASSIFIED: 1})
+
+    def test_rescan_requested_too_soon_is_deferred_not_dropped(self):
+        def wait_for_classified(n):
+            deadline = time.time() + 5
+            while time.time() < deadline and self.snapshot.counts().get(CLASSIFIED) != n:
+                time.sleep(0.02)
+            self.assertEqual(self.snapshot.counts(), {CLASSIFIED: n})
+
+        with patch.object(staging_snapshot, "MIN_RECONCILE_GAP_SEC", 0.5):
+            self.make_file("first.bin")
+            self.snapshot.attach_classifier(self.classify)
+            wait_for_classified(1)
+
+            # A file the events missed, and a rescan request right after the first one
+            self.make_file("missed.bin")
+            self.snapshot.request_refresh(reconcile=True)
+            wait_for_classified(2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Startup budget guard for the API server.
+
+`python -X importtime -c "import main"` must not pull in the heavy subsystems
+(they start in the background after the server is up), and a cold uvicorn
+process must answer /health within the budget. Budgets can be relaxed on slow
+machines with STARTUP_IMPORT_BUDGET_SEC / STARTUP_FIRST_200_BUDGET_SEC.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+import socket
+import subprocess
+import urllib.request
+
+# Ensure project root is in path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from api.startup import StartupRegistry
+
+IMPORT_BUDGET_SEC = float(os.getenv("STARTUP_IMPORT_BUDGET_SEC", "1.0"))
+FIRST_200_BUDGET_SEC = float(os.getenv("STARTUP_FIRST_200_BUDGET_SEC", "1.0"))
+
+# Modules that must only load after the server is serving requests
+DEFERRED_MODULES = [
+    "unified_librarian",
+    "unified_classifier",
+    "universal_adaptive_learning",
+    "adaptive_background_monitor",
+    "automated_deduplication_service",
+    "emergency_space_protection",
+    "orchestrate_staging",
+    "google_drive_auth",
+    "googleapiclient",
+    "google.generativeai",
+    "numpy",
+    "librosa",
+    "sentence_transformers",
+    "torch",
+]
+
+
+def server_env():
+    return dict(os.environ, AI_ORGANIZER_ALLOW_LOCAL_FALLBACK="true", PYTHONDONTWRITEBYTECODE="1")
+
+
+def import_profile():
+    """Return {module: cumulative_microseconds} from -X importtime for `import main`"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, env=server_env(), capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        raise AssertionError(f"import main failed:\n{proc.stderr[-2000:]}")
+
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+class TestImportBudget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.profile = import_profile()
+
+    def test_heavy_subsystems_are_not_imported(self):
+        loaded = [name for name in DEFERRED_MODULES if name in self.profile]
+        self.assertEqual(loaded, [], f"imported at startup: {loaded}")
+
+    def test_import_time_within_budget(self):
+        seconds = self.profile["main"] / 1_000_000
+        self.assertLess(seconds, IMPORT_BUDGET_SEC, f"import main took {seconds:.2f}s")
+
+
+class TestColdStart(unittest.TestCase):
+    def test_first_health_200_within_budget(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        started = time.monotonic()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=server_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            elapsed = None
+            while time.monotonic() - started < 30:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                        if response.status == 200:
+                            elapsed = time.monotonic() - started
+                            break
+                except OSError:
+                    time.sleep(0.02)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+        self.assertIsNotNone(elapsed, "server never answered /health")
+        self.assertLess(elapsed, FIRST_200_BUDGET_SEC, f"first 200 after {elapsed:.2f}s")
+
+
+class TestStartupRegistry(unittest.TestCase):
+    def test_records_ready_and_failed_subsystems(self):
+        registry = StartupRegistry(["fast", "broken", "later"])
+
+        def broken():
+            raise RuntimeError("no credentials")
+
+        async def start():
+            await registry.run("fast", lambda: 42)
+            await registry.run("broken", broken)
+
+        asyncio.run(start())
+        status = registry.get_status()
+
+        self.assertFalse(status["ready"])
+        self.assertEqual(status["subsystems"]["fast"]["state"], "ready")
+        self.assertEqual(status["subsystems"]["broken"]["state"], "failed")
+        self.assertEqual(status["subsystems"]["broken"]["error"], "no credentials")
+        self.assertEqual(status["subsystems"]["later"]["state"], "pending")
+        self.assertTrue(registry.is_ready("fast"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import time
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.status_aggregator import StatusAggregator
+
+
+class StubSystemService:
+    def __init__(self):
+        self.calls = {"monitor": 0, "orchestration": 0, "disk_space": 0, "google_drive": 0}
+        self.files_processed = 0
+
+    def collect_monitor_status(self):
+        self.calls["monitor"] += 1
+        return {"status": "active", "watching_paths": 2}
+
+    def collect_orchestration_status(self):
+        self.calls["orchestration"] += 1
+        return {"status": "idle", "files_processed": self.files_processed}
+
+    def get_disk_space(self):
+        self.calls["disk_space"] += 1
+        return {"free_gb": 100, "total_gb": 200, "percent_used": 50.0, "status": "ok"}
+
+    def collect_google_drive_status(self):
+        self.calls["google_drive"] += 1
+        return {"connected": True, "user_name": "Test User", "quota_used_gb": 1, "quota_total_gb": 15}
+
+
+class TestStatusAggregator(unittest.TestCase):
+    def setUp(self):
+        self.service = StubSystemService()
+        self.aggregator = StatusAggregator(self.service, cadences={
+            "monitor": 60, "orchestration": 60, "disk_space": 60, "google_drive": 300
+        })
+
+    def test_collectors_run_once_per_interval(self):
+        self.aggregator.refresh_due()
+        for _ in range(50):
+            self.aggregator.refresh_due()
+            self.aggregator.get_snapshot()
+
+        self.assertEqual(self.service.calls["google_drive"], 1)
+        self.assertEqual(self.service.calls["monitor"], 1)
+
+        self.aggregator.invalidate("orchestration")
+        self.aggregator.refresh_due()
+        self.assertEqual(self.service.calls["orchestration"], 2)
+        self.assertEqual(self.service.calls["google_drive"], 1)
+
+    def test_snapshot_is_read_only_with_freshness(self):
+        self.assertEqual(self.aggregator.get_snapshot()["orchestration"]["status"], "idle")
+        self.assertIsNone(self.aggregator.get_snapshot()["freshness"]["google_drive"]["updated_at"])
+
+        self.aggregator.refresh_due()
+        snapshot = self.aggregator.get_snapshot()
+        self.assertEqual(snapshot["backend_status"], "ok")
+        self.assertTrue(snapshot["google_drive"]["connected"])
+        self.assertIsNotNone(snapshot["freshness"]["google_drive"]["updated_at"])
+        self.assertEqual(snapshot["freshness"]["google_drive"]["refresh_interval_sec"], 300)
+
+        with self.assertRaises(TypeError):
+            snapshot["monitor"] = None
+
+    def test_deltas_contain_only_changed_components(self):
+        self.aggregator.refresh_due()
+        version = self.aggregator.version
+
+        self.service.files_processed = 7
+        self.aggregator.refresh_due(force=True)
+
+        deltas = self.aggregator.deltas_since(version)
+        self.assertEqual(len(deltas), 1)
+        self.assertEqual(list(deltas[0]["changes"]), ["orchestration"])
+        self.assertEqual(deltas[0]["changes"]["orchestration"]["files_processed"], 7)
+        self.assertEqual(self.aggregator.deltas_since(self.aggregator.version), [])
+
+    def test_lagging_subscriber_gets_resync_signal(self):
+        aggregator = StatusAggregator(self.service, max_deltas=2)
+        for n in range(5):
+            self.service.files_processed = n + 1
+            aggregator.refresh_due(force=True)
+        self.assertIsNone(aggregator.deltas_since(0))
+        self.assertEqual(len(aggregator.deltas_since(aggregator.version - 1)), 1)
+
+    def test_background_thread_publishes(self):
+        self.aggregator.start()
+        try:
+            deadline = time.time() + 5
+            while self.aggregator.version == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertGreater(self.aggregator.version, 0)
+        finally:
+            self.aggregator.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
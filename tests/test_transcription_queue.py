@@ -0,0 +1,337 @@
+import unittest
+import os
+import sys
+import json
+import wave
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import transcription_queue
+from analysis_cache import AnalysisCache
+from factories import make_audio_analyzer, make_classification_service
+from transcription_queue import (TranscriptionQueue, WHISPER_SAMPLE_RATE, detect_speech,
+                                 sidecar_path, write_transcript_sidecar)
+
+RATE = WHISPER_SAMPLE_RATE
+
+
+def speechy(seconds: float, seed: int = 0) -> np.ndarray:
+    """Syllable-like bursts: a voiced tone under a 4 Hz envelope"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 4 * t))
+    return 0.3 * envelope * np.sin(2 * np.pi * (140 + 20 * seed) * t)
+
+
+def quiet(seconds: float) -> np.ndarray:
+    return np.random.default_rng(1).normal(0, 0.001, int(seconds * RATE))
+
+
+class FakeWhisper:
+    """Stands in for faster_whisper.WhisperModel: one segment per clip"""
+
+    def __init__(self):
+        self.clips = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def transcribe(self, clip, initial_prompt=None, **kwargs):
+        self.release.wait(5)
+        self.clips.append(clip.size / RATE)
+        segment = SimpleNamespace(start=0.0, end=clip.size / RATE, text=f" words {len(self.clips)} ")
+        return iter([segment]), None
+
+
+class TestVoiceActivity(unittest.TestCase):
+    def test_speech_regions_skip_silence(self):
+        audio = np.concatenate([quiet(2), speechy(3), quiet(4), speechy(2, 1), quiet(1)])
+        regions = detect_speech(audio, RATE)
+        self.assertEqual(len(regions), 2)
+        (s1, e1), (s2, e2) = regions
+        self.assertAlmostEqual(s1, 2.0, delta=0.3)
+        self.assertAlmostEqual(e1, 5.0, delta=0.3)
+        self.assertAlmostEqual(s2, 9.0, delta=0.3)
+        self.assertAlmostEqual(e2, 11.0, delta=0.3)
+
+    def test_long_speech_is_split_to_whisper_window(self):
+        audio = np.concatenate([quiet(1), speechy(70), quiet(1)])
+        regions = detect_speech(audio, RATE, max_segment_sec=30)
+        self.assertGreaterEqual(len(regions), 3)
+        self.assertTrue(all(end - start <= 30.0 + 1e-6 for start, end in regions))
+        # Pieces are contiguous
+        for (_, end), (start, _) in zip(regions, regions[1:]):
+            self.assertEqual(end, start)
+
+    def test_silence_has_no_speech(self):
+        self.assertEqual(detect_speech(np.zeros(5 * RATE), RATE), [])
+        self.assertEqual(detect_speech(quiet(5), RATE), [])
+
+
+class TestTranscriptionQueue(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.cache = AnalysisCache(db_path=self.root / "analysis_cache.db")
+        self.model = FakeWhisper()
+        self.queue = TranscriptionQueue(model_loader=lambda: self.model, cache=self.cache, batch_size=2)
+        self.addCleanup(self.queue.shutdown)
+        self.audio = {}
+
+        for patcher in (patch.object(transcription_queue, "BATCHED_PIPELINE_AVAILABLE", False),
+                        patch.object(self.queue, "_decode_blocks", side_effect=self.decode_blocks)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def decode_blocks(self, path: Path):
+        audio = self.audio[path.read_bytes()]
+        size = int(transcription_queue.DECODE_BLOCK_SEC * RATE)
+        return iter([audio[i:i + size] for i in range(0, audio.size, size)])
+
+    def add_file(self, name: str, audio: np.ndarray, content: bytes) -> Path:
+        path = self.root / name
+        path.write_bytes(content)
+        self.audio[content] = audio
+        return path
+
+    def test_segments_stream_into_sidecar_and_cache(self):
+        regions = [speechy(2, i) for i in range(3)]
+        audio = np.concatenate([quiet(1), regions[0], quiet(2), regions[1], quiet(2), regions[2], quiet(1)])
+        path = self.add_file("interview.wav", audio, b"interview")
+        sidecar = sidecar_path(path)
+        sidecar.parent.mkdir()
+        sidecar.write_text(json.dumps({'original_filename': path.name, 'classification': {'category': 'Audio'}}))
+
+        transcript = self.queue.submit(path, priority=0).result(timeout=10)
+        self.assertEqual(transcript, "words 1 words 2 words 3")
+        # Only speech went to the model
+        self.assertAlmostEqual(sum(self.model.clips), 6.0, delta=1.5)
+
+        data = json.loads(sidecar.read_text())
+        self.assertEqual(data['classification'], {'category': 'Audio'})
+        self.assertEqual(data['transcript']['status'], 'complete')
+        self.assertEqual(len(data['transcript']['segments']), 3)
+        # Segment times are positions in the file
+        self.assertAlmostEqual(data['transcript']['segments'][1]['start'], 5.0, delta=0.5)
+
+        # Renamed file comes from the cache
+        moved = path.rename(self.root / "interview renamed.wav")
+        job = self.queue.submit(moved)
+        self.assertTrue(job.done())
+        self.assertEqual(job.result(), transcript)
+        self.assertEqual(len(self.model.clips), 3)
+
+        stats = self.queue.get_statistics()
+        self.assertEqual(stats["files"], 1)
+        self.assertEqual(stats["cache_hits"], 1)
+        self.assertAlmostEqual(stats["audio_seconds"], 12.0, delta=0.1)
+        self.assertGreater(stats["realtime_factor"], 0)
+
+    def test_identical_content_in_flight_shares_a_job(self):
+        self.model.release.clear()
+        first = self.add_file("a.wav", np.concatenate([quiet(1), speechy(2), quiet(1)]), b"same")
+        copy = self.root / "b.wav"
+        copy.write_bytes(b"same")
+
+        job = self.queue.submit(first)
+        self.assertIs(self.queue.submit(copy), job)
+        self.model.release.set()
+        self.assertEqual(job.result(timeout=10), "words 1")
+        self.assertEqual(len(self.model.clips), 1)
+
+    def test_speech_across_decode_blocks_is_transcribed_once(self):
+        audio = np.concatenate([quiet(3), speechy(3), quiet(3), speechy(2, 1), quiet(3)])
+        path = self.add_file("long.wav", audio, b"long")
+        with patch.object(transcription_queue, "DECODE_BLOCK_SEC", 4.0):
+            self.queue.submit(path, priority=0).result(timeout=10)
+
+        # The first region straddles the 4s block boundary but reaches the model whole
+        self.assertEqual(len(self.model.clips), 2)
+        self.assertAlmostEqual(self.model.clips[0], 3.0, delta=0.7)
+        job = self.queue.submit(path)
+        self.assertAlmostEqual(job.segments[0]['start'], 3.0, delta=0.5)
+        self.assertAlmostEqual(job.segments[1]['start'], 9.0, delta=0.5)
+        self.assertEqual(self.queue.stats["audio_seconds"], 14.0)
+
+    def test_blocks_decode_the_whole_file_in_pieces(self):
+        queue = TranscriptionQueue(model_loader=lambda: None, cache=self.cache)
+        path = self.root / "tone.wav"
+        samples = (np.sin(np.arange(int(2.5 * RATE)) / 10) * 0.5 * 32767).astype(np.int16)
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(RATE)
+            wav.writeframes(samples.tobytes())
+
+        with patch.object(transcription_queue, "DECODE_BLOCK_SEC", 1.0):
+            blocks = list(queue._decode_blocks(path))
+        self.assertEqual([b.size for b in blocks], [RATE, RATE, RATE // 2])
+        np.testing.assert_allclose(np.concatenate(blocks), samples / 32768.0, atol=1e-3)
+
+    def test_model_loads_in_the_worker_not_on_submit(self):
+        loaded_on = []
+
+        def loader():
+            loaded_on.append(threading.current_thread().name)
+            return self.model
+
+        queue = TranscriptionQueue(model_loader=loader, cache=self.cache)
+        self.addCleanup(queue.shutdown)
+        patcher = patch.object(queue, "_decode_blocks", side_effect=self.decode_blocks)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertTrue(queue.model_available())
+        self.assertEqual(loaded_on, [])
+
+        path = self.add_file("memo.wav", speechy(2), b"memo")
+        self.assertEqual(queue.submit(path).result(timeout=10), "words 1")
+        self.assertEqual(loaded_on, ["transcription-worker"])
+
+    def test_no_model_means_no_transcript(self):
+        queue = TranscriptionQueue(model_loader=lambda: None, cache=self.cache)
+        self.addCleanup(queue.shutdown)
+        path = self.add_file("memo.wav", speechy(2), b"memo")
+        self.assertTrue(queue.model_available())
+        self.assertIsNone(queue.submit(path).result(timeout=10))
+        self.assertFalse(queue.model_available())
+
+    def test_sidecar_skipped_for_moved_file(self):
+        self.assertFalse(write_transcript_sidecar(self.root / "gone.wav", [], complete=True))
+        path = self.root / "memo.wav"
+        path.write_bytes(b"x")
+        segments = [{'start': 0.0, 'end': 1.0, 'text': "hello"}]
+        self.assertTrue(write_transcript_sidecar(path, segments, complete=False))
+        data = json.loads(sidecar_path(path).read_text())
+        self.assertEqual(data['original_filename'], "memo.wav")
+        self.assertEqual(data['transcript']['status'], 'in_progress')
+        self.assertEqual(data['transcript']['text'], "hello")
+
+    def test_job_follows_a_moved_file(self):
+        self.model.release.clear()
+        path = self.add_file("take.wav", np.concatenate([quiet(1), speechy(2), quiet(1)]), b"take")
+        job = self.queue.submit(path)
+
+        moved_dir = self.root / "Organized"
+        moved_dir.mkdir()
+        moved = Path(shutil.move(str(path), str(moved_dir / "take_01.wav")))
+        self.queue.relocate(path, moved)
+        self.model.release.set()
+
+        self.assertEqual(job.result(timeout=10), "words 1")
+        data = json.loads(sidecar_path(moved).read_text())
+        self.assertEqual(data['transcript']['status'], 'complete')
+        self.assertEqual(data['transcript']['text'], "words 1")
+        self.assertFalse(sidecar_path(path).exists())
+
+    def test_transcript_finished_in_transit_is_written_on_relocate(self):
+        path = self.add_file("take.wav", np.concatenate([quiet(1), speechy(2), quiet(1)]), b"take")
+        moved = self.root / "take_01.wav"
+        # The worker finishes while the file is between locations
+        original_save = self.queue._save
+
+        def move_then_save(job):
+            if moved.exists() or not path.exists():
+                return original_save(job)
+            path.rename(moved)
+            original_save(job)
+
+        with patch.object(self.queue, "_save", side_effect=move_then_save):
+            self.queue.submit(path).result(timeout=10)
+        self.assertFalse(sidecar_path(moved).exists())
+
+        self.queue.relocate(path, moved)
+        self.assertEqual(json.loads(sidecar_path(moved).read_text())['transcript']['text'], "words 1")
+
+    def test_classification_sidecar_keeps_transcript(self):
+        from unified_classifier import save_metadata_sidecar
+        path = self.root / "memo.wav"
+        path.write_bytes(b"x")
+        write_transcript_sidecar(path, [{'start': 0.0, 'end': 1.0, 'text': "hello"}], complete=True)
+
+        save_metadata_sidecar(path, {'original_filename': "memo.wav", 'classification': {'category': 'Audio'}})
+        data = json.loads(sidecar_path(path).read_text())
+        self.assertEqual(data['classification'], {'category': 'Audio'})
+        self.assertEqual(data['transcript']['text'], "hello")
+
+
+class TestDeferredAudioClassification(unittest.TestCase):
+    """AudioAnalyzer.classify_audio_file_deferred without any real backend"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.path = self.root / "memo.wav"
+        self.path.write_bytes(b"memo")
+
+        self.queue = MagicMock()
+        self.queue.cached.return_value = None
+        self.analyzer = make_audio_analyzer(client=MagicMock(), transcription_queue=self.queue,
+                                            analysis_cache=MagicMock())
+        self.analyzer.get_audio_metadata = lambda file_path: {}
+        self.analyzer.build_adaptive_prompt = lambda file_path, metadata, transcript: transcript or ""
+        self.analyzer.learn_from_classification = lambda file_path, classification: None
+        self.analyzer._retry_openai_call = lambda func, **kwargs: SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"category": "audio_vox"}'))])
+
+    def test_local_model_queues_and_returns_the_job(self):
+        self.analyzer.use_local_whisper = True
+        self.queue.model_available.return_value = True
+        job = transcription_queue.TranscriptionJob(self.path, None, "key")
+        self.queue.submit.return_value = job
+
+        classification, pending = self.analyzer.classify_audio_file_deferred(self.path)
+        self.assertIs(pending, job)
+        self.assertEqual(classification['transcript_status'], 'pending')
+        self.assertNotIn('transcript', classification)
+
+        # The returned dict is not touched when the transcript lands
+        snapshot = dict(classification)
+        job.set_result("hello there")
+        self.assertEqual(classification, snapshot)
+
+    def test_without_local_model_the_api_transcribes_inline(self):
+        self.analyzer.use_local_whisper = False
+        with patch.object(self.analyzer, "_transcribe_api", return_value="from the api") as api:
+            classification, pending = self.analyzer.classify_audio_file_deferred(self.path)
+        api.assert_called_once()
+        self.assertIsNone(pending)
+        self.queue.submit.assert_not_called()
+        self.assertEqual(classification['transcript'], "from the api")
+        self.assertEqual(classification['transcript_status'], 'complete')
+
+    def test_no_transcript_anywhere_is_unavailable(self):
+        self.analyzer.use_local_whisper = False
+        with patch.object(self.analyzer, "_transcribe_api", return_value=None):
+            classification, pending = self.analyzer.classify_audio_file_deferred(self.path)
+        self.assertIsNone(pending)
+        self.assertEqual(classification['transcript_status'], 'unavailable')
+
+    def test_unified_classifier_exposes_the_pending_job(self):
+        service = make_classification_service(self.analyzer)
+        self.analyzer.analyze_audio_spectral = lambda file_path, max_duration: {'success': False}
+        self.analyzer.use_local_whisper = True
+        self.queue.model_available.return_value = True
+        job = transcription_queue.TranscriptionJob(self.path, None, "key")
+        self.queue.submit.return_value = job
+
+        result = service._classify_audio_file(self.path)
+        self.assertEqual(result['metadata']['transcript_status'], 'pending')
+        self.assertIs(service.pending_transcript(self.path), job)
+        self.assertEqual(self.queue.submit.call_count, 1)
+
+        job.set_result("hello there")
+        self.assertIsNone(service.pending_transcript(self.path))
+        self.assertEqual(result['metadata']['transcript_status'], 'pending')
+
+
+if __name__ == '__main__':
+    unittest.main()
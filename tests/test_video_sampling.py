@@ -0,0 +1,127 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from derivative_cache import DerivativeCache
+from video_sampling import (VideoInfo, VideoSampler, can_stream_copy, concat_list, detect_scene_changes,
+                            plan_segments, sample_command)
+
+FFMPEG = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+class TestSamplePlanning(unittest.TestCase):
+    def test_even_segments_cover_beginning_middle_and_end(self):
+        self.assertEqual(plan_segments(7200, 120, 3), [(0.0, 40.0), (3580.0, 3620.0), (7160.0, 7200.0)])
+        # Barely too long: segments don't overlap
+        segments = plan_segments(130, 120, 3)
+        self.assertEqual(segments[0][0], 0.0)
+        self.assertEqual(segments[-1][1], 130.0)
+        self.assertTrue(all(a[1] <= b[0] for a, b in zip(segments, segments[1:])))
+
+    def test_scene_changes_move_segment_starts(self):
+        segments = plan_segments(7200, 120, 3, scene_times=[12.5, 2500.0, 2600.0, 7199.5])
+        self.assertEqual(segments, [(12.5, 52.5), (2500.0, 2540.0), (7160.0, 7200.0)])
+
+    def test_scene_detection_seeks_into_a_bounded_window_per_part(self):
+        commands = []
+
+        def fake_ffmpeg(cmd, **kwargs):
+            commands.append(cmd)
+            # A change 40 s into the first and last windows, none in the middle one
+            stderr = "" if len(commands) == 2 else "[Parsed_showinfo_2] n:   0 pts:  40 pts_time:40.5 \n"
+            return subprocess.CompletedProcess(cmd, 0, "", stderr)
+
+        with patch("video_sampling.subprocess.run", side_effect=fake_ffmpeg):
+            scene_times = detect_scene_changes(Path("long.mp4"), 7200, 3, window=300)
+
+        self.assertEqual(scene_times, [40.5, 4840.5])
+        self.assertEqual([cmd[cmd.index("-ss") + 1] for cmd in commands], ["0.000", "2400.000", "4800.000"])
+        self.assertTrue(all(cmd[cmd.index("-t") + 1] == "300.000" for cmd in commands))
+        self.assertTrue(all(cmd.index("-ss") < cmd.index("-i") for cmd in commands))
+        self.assertTrue(all(cmd[cmd.index("-frames:v") + 1] == "1" for cmd in commands))
+
+    def test_stream_copy_only_for_mp4_friendly_codecs(self):
+        self.assertTrue(can_stream_copy(VideoInfo(7200, "h264", "aac", 12_000_000)))
+        self.assertTrue(can_stream_copy(VideoInfo(7200, "hevc", None, None)))
+        self.assertFalse(can_stream_copy(VideoInfo(7200, "prores", "pcm_s24le", 800_000_000)))
+        self.assertFalse(can_stream_copy(VideoInfo(7200, "h264", "pcm_s16le", 12_000_000)))
+        self.assertFalse(can_stream_copy(VideoInfo(7200, "h264", "aac", 100_000_000)))
+
+        list_path, target = Path("/tmp/list.txt"), Path("/tmp/out.mp4")
+        self.assertIn("copy", sample_command(list_path, target, VideoInfo(7200, "h264", "aac", None)))
+        self.assertIn("libx264", sample_command(list_path, target, VideoInfo(7200, "prores", None, None)))
+
+    def test_concat_list_reads_segments_from_the_original(self):
+        script = concat_list(Path("/Volumes/Footage/Day 1/Tom's take.mov"), [(0, 40), (3580, 3620)])
+        self.assertEqual(script.splitlines(), [
+            "file '/Volumes/Footage/Day 1/Tom'\\''s take.mov'", "inpoint 0.000", "outpoint 40.000",
+            "file '/Volumes/Footage/Day 1/Tom'\\''s take.mov'", "inpoint 3580.000", "outpoint 3620.000",
+        ])
+
+
+class TestVideoSampler(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.sampler = VideoSampler(DerivativeCache(root=self.root / "derivatives"))
+        self.video = self.root / "interview.mov"
+        self.video.write_bytes(b"\x00" * 4096)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_samples_are_cached_by_content(self):
+        commands = []
+
+        def fake_ffmpeg(cmd, **kwargs):
+            commands.append(cmd)
+            Path(cmd[-1]).write_bytes(b"sample")
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+
+        with patch("video_sampling._ffmpeg_available", return_value=True), \
+                patch("video_sampling.probe", return_value=VideoInfo(7200, "h264", "aac", 8_000_000)), \
+                patch("video_sampling.subprocess.run", side_effect=fake_ffmpeg):
+            sample = self.sampler.sample(self.video)
+            self.assertNotEqual(sample, self.video)
+            self.assertEqual(sample.read_bytes(), b"sample")
+
+            moved = self.video.rename(self.root / "renamed.mov")
+            self.assertEqual(self.sampler.sample(moved), sample)
+
+        self.assertEqual(len(commands), 1)
+        self.assertIn("concat", commands[0])
+        self.assertEqual(self.sampler.stats["stream_copied"], 1)
+        self.assertEqual(self.sampler.stats["cache_hits"], 1)
+
+    def test_short_or_unreadable_videos_use_the_original(self):
+        with patch("video_sampling._ffmpeg_available", return_value=True), \
+                patch("video_sampling.probe", return_value=VideoInfo(90, "h264", "aac", None)):
+            self.assertEqual(self.sampler.sample(self.video), self.video)
+        with patch("video_sampling._ffmpeg_available", return_value=True), \
+                patch("video_sampling.probe", return_value=None):
+            self.assertEqual(self.sampler.sample(self.video), self.video)
+
+    @unittest.skipUnless(FFMPEG, "ffmpeg not installed")
+    def test_sample_time_does_not_grow_with_input_length(self):
+        timings = {}
+        for minutes in (3, 30):
+            video = self.root / f"{minutes}min.mp4"
+            subprocess.run(['ffmpeg', '-v', 'quiet', '-f', 'lavfi', '-i', f'testsrc=duration={minutes * 60}:size=320x240:rate=10',
+                            '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '50', str(video)], check=True)
+            started = time.perf_counter()
+            sample = self.sampler.sample(video, max_duration=30)
+            timings[minutes] = time.perf_counter() - started
+            self.assertNotEqual(sample, video)
+        self.assertLess(timings[30], timings[3] * 3 + 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
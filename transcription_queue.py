@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Transcription Queue
+Local Whisper transcription off the classification path.
+
+Callers submit a file and get a TranscriptionJob (a Future) back right
+away; one dedicated worker thread owns the Whisper model and works
+through the queue, interactive requests first. The model is loaded by
+the worker the first time it is needed, never on the submitting thread.
+For each file the worker:
+  - decodes 16 kHz mono in blocks of DECODE_BLOCK_SEC (so a long
+    recording is never held in memory whole) and finds voice activity
+    (frame energy against the block's own noise floor), so silence and
+    room tone are never sent to the model. This is an energy gate, not a
+    speech classifier: music and effects go through and Whisper returns
+    little or no text for them. Speech running into the end of a block
+    is carried over into the next one
+  - cuts speech into segments of at most MAX_SEGMENT_SEC (Whisper's
+    window), splitting long stretches at their quietest point
+  - runs the segments through the model BATCH_SIZE at a time, appending
+    each batch's text to the file's .metadata sidecar as it lands
+
+A job writes to wherever its file is now: callers that move a file call
+relocate() so queued and running jobs follow it, and a transcript that
+finished while the file was in transit is written once it is relocated.
+
+Finished transcripts are cached by content fingerprint under the same key
+AudioAnalyzer uses, so a moved or renamed file is never transcribed
+twice. Throughput is tracked as audio-seconds per wall-second.
+
+Usage:
+    queue = get_transcription_queue()
+    job = queue.submit(path, project_context="Episode 3 interviews")
+    job.add_done_callback(lambda job: enrich(job.result()))
+    print(queue.get_statistics()["realtime_factor"])
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+try:
+    from faster_whisper import BatchedInferencePipeline
+    BATCHED_PIPELINE_AVAILABLE = True
+except ImportError:
+    BATCHED_PIPELINE_AVAILABLE = False
+
+from analysis_cache import AnalysisCache, get_analysis_cache
+from request_scheduler import current_priority
+
+logger = logging.getLogger(__name__)
+
+# Shared with AudioAnalyzer.transcribe_audio: bump to redo cached transcripts
+TRANSCRIPT_CACHE_VERSION = "1"
+
+WHISPER_SAMPLE_RATE = 16000
+MAX_SEGMENT_SEC = 30.0
+# Audio decoded (and searched for speech) at a time
+DECODE_BLOCK_SEC = 600.0
+BATCH_SIZE = 8
+# Finished transcripts waiting for their file to reappear after a move
+MAX_UNSAVED = 256
+
+# Voice activity detection
+VAD_FRAME_SEC = 0.03
+# Speech is this far above the noise floor (20th percentile frame energy)
+VAD_THRESHOLD_DB = 12.0
+# ...or, when a recording is nearly all speech and the percentile lands in
+# it, anything within this range of the loudest frame
+VAD_DYNAMIC_RANGE_DB = 30.0
+# Frames quieter than this are never speech
+VAD_SILENCE_DB = -50.0
+VAD_MIN_SPEECH_SEC = 0.25
+# Pauses shorter than this stay inside a segment
+VAD_MAX_GAP_SEC = 0.6
+VAD_PAD_SEC = 0.2
+
+
+# ----------------------------------------------------------------------
+# Voice activity
+# ----------------------------------------------------------------------
+
+def _frame_energy_db(samples: "np.ndarray", sample_rate: int) -> "np.ndarray":
+    frame = max(1, int(VAD_FRAME_SEC * sample_rate))
+    usable = samples.size - samples.size % frame
+    if usable == 0:
+        return np.empty(0)
+    power = np.mean(samples[:usable].reshape(-1, frame).astype(np.float64) ** 2, axis=1)
+    return 10 * np.log10(power + 1e-12)
+
+
+def _split_long(start: int, end: int, energy: "np.ndarray", max_frames: int) -> List[Tuple[int, int]]:
+    """Cut a frame range into pieces of at most max_frames at the quietest frames"""
+    pieces = []
+    while end - start > max_frames:
+        # Quietest frame in the second half of the window
+        window = energy[start + max_frames // 2:start + max_frames]
+        cut = start + max_frames // 2 + int(np.argmin(window))
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def detect_speech(samples: "np.ndarray", sample_rate: int = WHISPER_SAMPLE_RATE,
+                  max_segment_sec: float = MAX_SEGMENT_SEC) -> List[Tuple[float, float]]:
+    """(start, end) seconds of voice activity, each at most max_segment_sec long"""
+    energy = _frame_energy_db(samples, sample_rate)
+    if energy.size == 0:
+        return []
+    floor = np.percentile(energy, 20)
+    threshold = max(min(floor + VAD_THRESHOLD_DB, energy.max() - VAD_DYNAMIC_RANGE_DB), VAD_SILENCE_DB)
+    active = energy > threshold
+
+    regions: List[List[int]] = []
+    max_gap = int(VAD_MAX_GAP_SEC / VAD_FRAME_SEC)
+    for frame in np.flatnonzero(active):
+        if regions and frame - regions[-1][1] <= max_gap:
+            regions[-1][1] = frame + 1
+        else:
+            regions.append([frame, frame + 1])
+
+    pad = int(VAD_PAD_SEC / VAD_FRAME_SEC)
+    min_frames = int(VAD_MIN_SPEECH_SEC / VAD_FRAME_SEC)
+    max_frames = int(max_segment_sec / VAD_FRAME_SEC)
+    segments = []
+    for start, end in regions:
+        if end - start < min_frames:
+            continue
+        start, end = max(0, start - pad), min(energy.size, end + pad)
+        if segments and start < segments[-1][1]:
+            start = segments[-1][1]
+        segments.extend(_split_long(start, end, energy, max_frames))
+    return [(round(s * VAD_FRAME_SEC, 2), round(e * VAD_FRAME_SEC, 2)) for s, e in segments]
+
+
+# ----------------------------------------------------------------------
+# Sidecars
+# ----------------------------------------------------------------------
+
+def sidecar_path(file_path: Path) -> Path:
+    """folder/take.wav -> folder/.metadata/take.wav.json (see save_metadata_sidecar)"""
+    return file_path.parent / ".metadata" / f"{file_path.name}.json"
+
+
+# Sidecars are read-modify-written from the transcription worker and from
+# whoever files the classification; one lock keeps either from losing the other
+_sidecar_lock = threading.Lock()
+
+
+def read_sidecar(file_path: Path) -> Dict[str, Any]:
+    """The file's sidecar contents ({} if it has none or it can't be read)"""
+    try:
+        return json.loads(sidecar_path(file_path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def merge_sidecar(file_path: Path, updates: Dict[str, Any]) -> bool:
+    """
+    Set top-level keys of the file's sidecar, keeping whatever else it
+    holds, and replace it atomically. Skipped (False) when the file is gone.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return False
+    path = sidecar_path(file_path)
+    with _sidecar_lock:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = read_sidecar(file_path) or {'original_filename': file_path.name}
+            data.update(updates)
+            tmp = path.with_name(f".{path.name}.tmp")
+            tmp.write_text(json.dumps(data, indent=2, default=str))
+            os.replace(tmp, path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not update sidecar for {file_path.name}: {e}")
+            return False
+
+
+def write_transcript_sidecar(file_path: Path, segments: List[Dict[str, Any]], complete: bool) -> bool:
+    """
+    Merge the transcript so far into the file's sidecar. Skipped (False)
+    when the file has been moved meanwhile.
+    """
+    return merge_sidecar(file_path, {'transcript': {
+        'status': 'complete' if complete else 'in_progress',
+        'text': " ".join(s['text'] for s in segments if s['text']).strip(),
+        'segments': segments,
+        'updated': time.time(),
+    }})
+
+
+# ----------------------------------------------------------------------
+# Queue
+# ----------------------------------------------------------------------
+
+def load_whisper_model():
+    """The local faster-whisper model (base, int8 on CPU), or None"""
+    if not FASTER_WHISPER_AVAILABLE:
+        return None
+    logger.info("Loading local faster-whisper model (base)")
+    return WhisperModel("base", device="cpu", compute_type="int8")
+
+
+class TranscriptionJob(Future):
+    """
+    A queued transcription. result() is the transcript (None when no local
+    model is available or the file has no speech); segments fills in as
+    batches finish.
+    """
+
+    def __init__(self, file_path: Path, project_context: Optional[str], cache_key: Optional[str]):
+        super().__init__()
+        self.file_path = file_path
+        self.project_context = project_context
+        self.cache_key = cache_key
+        self.segments: List[Dict[str, Any]] = []
+        self.audio_seconds = 0.0
+        # All segments are in; saved once they have reached the sidecar
+        self.finished = False
+        self.saved = False
+
+
+class TranscriptionQueue:
+    """
+    Background local transcription: one worker thread owns the Whisper
+    model, jobs are taken in priority order and identical content is
+    transcribed once.
+    """
+
+    def __init__(self, model_loader: Optional[Callable[[], Any]] = None, cache: Optional[AnalysisCache] = None,
+                 batch_size: int = BATCH_SIZE, write_sidecars: bool = True):
+        self.model_loader = model_loader or load_whisper_model
+        self._can_load = model_loader is not None or FASTER_WHISPER_AVAILABLE
+        self.cache = cache or get_analysis_cache()
+        self.batch_size = batch_size
+        self.write_sidecars = write_sidecars
+        self._model = None
+        self._model_failed = False
+        self._model_lock = threading.Lock()
+        self._pipeline = None
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._inflight: Dict[str, TranscriptionJob] = {}
+        # Jobs by current file path until their final sidecar write lands
+        self._unsaved: Dict[Path, TranscriptionJob] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"files": 0, "cache_hits": 0, "failed": 0,
+                      "audio_seconds": 0.0, "speech_seconds": 0.0, "busy_seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # Submitting
+    # ------------------------------------------------------------------
+
+    def cache_key(self, file_path: Path, project_context: Optional[str] = None) -> Optional[str]:
+        return self.cache.file_key(file_path, "audio.transcript", TRANSCRIPT_CACHE_VERSION, project_context or "")
+
+    def cached(self, file_path: Path, project_context: Optional[str] = None) -> Optional[str]:
+        """Cached transcript for the file's content, without queueing anything"""
+        cached = self.cache.get(self.cache_key(file_path, project_context))
+        return cached.get('transcript') if cached else None
+
+    def submit(self, file_path: Path, project_context: Optional[str] = None,
+               priority: Optional[int] = None) -> TranscriptionJob:
+        """
+        Queue a file (priority defaults to the caller's request_priority).
+        Cached transcripts come back as an already finished job; a file
+        whose content is already queued shares that job.
+        """
+        file_path = Path(file_path)
+        key = self.cache_key(file_path, project_context)
+        job = TranscriptionJob(file_path, project_context, key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            job.segments = cached.get('segments', [])
+            job.set_result(cached.get('transcript'))
+            return job
+
+        with self._lock:
+            if key and key in self._inflight:
+                return self._inflight[key]
+            if key:
+                self._inflight[key] = job
+            if self.write_sidecars:
+                self._unsaved[file_path.absolute()] = job
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="transcription-worker", daemon=True)
+                self._worker.start()
+        self._queue.put((current_priority() if priority is None else priority, next(self._sequence), job))
+        return job
+
+    def relocate(self, old_path: Path, new_path: Path):
+        """
+        Point jobs for a file at its new location after a move or rename.
+        A transcript that finished while the file was in transit is written
+        to the new sidecar now, as is one the old sidecar still holds.
+        """
+        old_path, new_path = Path(old_path).absolute(), Path(new_path).absolute()
+        with self._lock:
+            job = self._unsaved.pop(old_path, None)
+            if job is not None:
+                job.file_path = new_path
+                self._unsaved[new_path] = job
+                if job.finished and not job.saved:
+                    self._save(job)
+        left_behind = read_sidecar(old_path).get('transcript')
+        if left_behind and 'transcript' not in read_sidecar(new_path):
+            merge_sidecar(new_path, {'transcript': left_behind})
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker after the job in progress; queued jobs are cancelled"""
+        self._queue.put((-1, -1, None))
+        if wait and self._worker is not None:
+            self._worker.join()
+        self._worker = None
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            if not job.set_running_or_notify_cancel():
+                self._forget(job)
+                continue
+            try:
+                job.set_result(self._transcribe(job))
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"Transcription failed for {job.file_path.name}: {e}")
+                job.set_exception(e)
+            finally:
+                self._forget(job)
+
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancel()
+                self._forget(job)
+
+    def _forget(self, job: TranscriptionJob):
+        with self._lock:
+            if job.cache_key and self._inflight.get(job.cache_key) is job:
+                del self._inflight[job.cache_key]
+            if job.saved or not job.finished:
+                if self._unsaved.get(job.file_path.absolute()) is job:
+                    del self._unsaved[job.file_path.absolute()]
+            while len(self._unsaved) > MAX_UNSAVED:
+                # Files deleted before their transcript could be written
+                del self._unsaved[next(iter(self._unsaved))]
+
+    def _save(self, job: TranscriptionJob):
+        """Final sidecar write for a finished job (caller holds _lock)"""
+        job.saved = write_transcript_sidecar(job.file_path, job.segments, complete=True)
+        if job.saved and self._unsaved.get(job.file_path.absolute()) is job:
+            del self._unsaved[job.file_path.absolute()]
+
+    def model_available(self) -> bool:
+        """Whether jobs can expect a local model, without loading it (the worker does that)"""
+        return self._can_load and not self._model_failed
+
+    def model(self):
+        """The Whisper model, loaded on first use (None if unavailable)"""
+        with self._model_lock:
+            if self._model is None and not self._model_failed:
+                try:
+                    self._model = self.model_loader()
+                except Exception as e:
+                    logger.warning(f"Failed to load local Whisper model: {e}")
+                self._model_failed = self._model is None
+            return self._model
+
+    def _decode_blocks(self, file_path: Path) -> Iterator["np.ndarray"]:
+        """16 kHz mono samples, DECODE_BLOCK_SEC at a time"""
+        block_size = int(DECODE_BLOCK_SEC * WHISPER_SAMPLE_RATE)
+        if FASTER_WHISPER_AVAILABLE:
+            # PyAV ships with faster-whisper; resample frame by frame as decode_audio does
+            import av
+            resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=WHISPER_SAMPLE_RATE)
+            pending: List["np.ndarray"] = []
+            buffered = 0
+            with av.open(str(file_path), metadata_errors="ignore") as container:
+                for frame in itertools.chain(container.decode(audio=0), [None]):
+                    for out in resampler.resample(frame):
+                        pending.append(out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0)
+                        buffered += pending[-1].size
+                    while buffered >= block_size:
+                        samples = np.concatenate(pending)
+                        yield samples[:block_size]
+                        pending, buffered = [samples[block_size:]], samples.size - block_size
+            if buffered:
+                yield np.concatenate(pending)
+            return
+
+        from acoustic_fingerprint import decode_mono
+        offset = 0.0
+        while True:
+            block = decode_mono(file_path, WHISPER_SAMPLE_RATE, max_seconds=DECODE_BLOCK_SEC, offset=offset)
+            if block.size:
+                yield block
+            if block.size < block_size:
+                return
+            offset += DECODE_BLOCK_SEC
+
+    def _transcribe(self, job: TranscriptionJob) -> Optional[str]:
+        model = self.model()
+        if model is None:
+            return None
+
+        started = time.perf_counter()
+        speech_seconds = 0.0
+        # Undecided tail of the previous block and its position in the file
+        carry = np.empty(0, dtype=np.float32)
+        carry_start = 0.0
+        blocks = self._decode_blocks(job.file_path)
+        block = next(blocks, None)
+        while block is not None:
+            following = next(blocks, None)
+            job.audio_seconds += block.size / WHISPER_SAMPLE_RATE
+            audio = np.concatenate([carry, block]) if carry.size else block
+            regions = detect_speech(audio, WHISPER_SAMPLE_RATE)
+
+            if following is not None:
+                # Speech that may continue past the block end is decided with the next block
+                cut = audio.size / WHISPER_SAMPLE_RATE - VAD_MAX_GAP_SEC - VAD_PAD_SEC
+                keep = next((i for i, (_, end) in enumerate(regions) if end > cut), len(regions))
+                keep_from = min([cut] + [start for start, _ in regions[keep:]])
+                regions = regions[:keep]
+            speech_seconds += sum(end - start for start, end in regions)
+
+            for start in range(0, len(regions), self.batch_size):
+                segments = self._transcribe_batch(model, audio, regions[start:start + self.batch_size],
+                                                  job.project_context, offset=carry_start)
+                if self.write_sidecars:
+                    # Under the lock, so a concurrent relocate() can't be missed
+                    with self._lock:
+                        job.segments.extend(segments)
+                        write_transcript_sidecar(job.file_path, job.segments, complete=False)
+                else:
+                    job.segments.extend(segments)
+
+            if following is not None:
+                keep_sample = max(0, int(keep_from * WHISPER_SAMPLE_RATE))
+                carry, carry_start = audio[keep_sample:], carry_start + keep_sample / WHISPER_SAMPLE_RATE
+            block = following
+
+        transcript = " ".join(s['text'] for s in job.segments if s['text']).strip()
+        if job.cache_key:
+            self.cache.put(job.cache_key, "audio.transcript", {'transcript': transcript, 'segments': job.segments})
+        if self.write_sidecars:
+            with self._lock:
+                job.finished = True
+                self._save(job)
+
+        elapsed = time.perf_counter() - started
+        self.stats["files"] += 1
+        self.stats["audio_seconds"] += job.audio_seconds
+        self.stats["speech_seconds"] += speech_seconds
+        self.stats["busy_seconds"] += elapsed
+        logger.info(f"Transcribed {job.file_path.name}: {len(job.segments)} segments from {speech_seconds:.0f}s of speech "
+                    f"in {job.audio_seconds:.0f}s of audio, {elapsed:.1f}s "
+                    f"({job.audio_seconds / max(elapsed, 1e-6):.1f}x realtime)")
+        return transcript
+
+    def _transcribe_batch(self, model, audio: "np.ndarray", regions: List[Tuple[float, float]],
+                          project_context: Optional[str], offset: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Whisper over a batch of speech regions of audio, which starts offset
+        seconds into the file; segment times are file times
+        """
+        if not regions:
+            return []
+        if BATCHED_PIPELINE_AVAILABLE:
+            if self._pipeline is None:
+                self._pipeline = BatchedInferencePipeline(model=model)
+            segments, _ = self._pipeline.transcribe(
+                audio, batch_size=len(regions), vad_filter=False, initial_prompt=project_context, beam_size=5,
+                clip_timestamps=[{"start": start, "end": end} for start, end in regions]
+            )
+            return [{'start': round(offset + s.start, 2), 'end': round(offset + s.end, 2), 'text': s.text.strip()}
+                    for s in segments]
+
+        results = []
+        for start, end in regions:
+            clip = audio[int(start * WHISPER_SAMPLE_RATE):int(end * WHISPER_SAMPLE_RATE)]
+            segments, _ = model.transcribe(clip, initial_prompt=project_context, beam_size=5,
+                                           condition_on_previous_text=False)
+            start += offset
+            results += [{'start': round(start + s.start, 2), 'end': round(start + s.end, 2), 'text': s.text.strip()}
+                        for s in segments]
+        return results
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def throughput(self) -> float:
+        """Audio-seconds transcribed per wall-second of worker time"""
+        return self.stats["audio_seconds"] / self.stats["busy_seconds"] if self.stats["busy_seconds"] else 0.0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["pending"] = self.pending()
+        stats["realtime_factor"] = round(self.throughput(), 2)
+        return stats
+
+
+_transcription_queue: Optional[TranscriptionQueue] = None
+_transcription_queue_lock = threading.Lock()
+
+
+def get_transcription_queue() -> TranscriptionQueue:
+    """Shared TranscriptionQueue (one Whisper model per process)"""
+    global _transcription_queue
+    with _transcription_queue_lock:
+        if _transcription_queue is None:
+            _transcription_queue = TranscriptionQueue()
+        return _transcription_queue
@@ -17,6 +17,7 @@ from typing import Dict, Any, Optional, Union, List
 # Import the analysis engines that will be integrated
 from content_extractor import ContentExtractor
 from audio_analyzer import AudioAnalyzer
+from transcription_queue import merge_sidecar, sidecar_path
 from vision_analyzer import VisionAnalyzer
 from semantic_text_analyzer import SemanticTextAnalyzer
 
@@ -45,6 +46,8 @@ class UnifiedClassificationService:
         self.learning_enabled = True
         self.vision_enabled = True
         self.semantic_text_enabled = True
+        # Background transcriptions still running for classified audio, by path
+        self._transcript_jobs: Dict[str, Any] = {}
 
 
         # Initialize Taxonomy Service (V3 Source of Truth)
@@ -54,9 +57,9 @@ class UnifiedClassificationService:
         config_dir = get_metadata_root() / "config"
         self.taxonomy_service = get_taxonomy_service(config_dir)
         
-        # Review Queue Path (Hidden .corpus directory)
-        self.review_queue_path = get_metadata_root() / ".AI_LIBRARIAN_CORPUS" / "03_ADAPTIVE_FEEDBACK" / "review_queue.jsonl"
-        self.review_queue_path.parent.mkdir(parents=True, exist_ok=True)
+        # Review Queue (indexed store; imports the legacy review_queue.jsonl once)
+        from review_queue import get_review_queue
+        self.review_queue = get_review_queue()
 
         print("✅ Unified Classification Service Ready (lazy mode - analyzers will load on demand)")
 
@@ -340,32 +343,22 @@ class UnifiedClassificationService:
         }
 
     def _add_to_review_queue(self, file_path: Path, result: Dict[str, Any], file_type: str):
-        """Add ambiguous/conflicting file to review queue"""
+        """Add ambiguous/conflicting file to review queue (re-queuing the same file updates its entry)"""
         try:
-            stat = file_path.stat()
-            file_hash = hashlib.md5(f"{file_path}{stat.st_size}{stat.st_mtime}".encode()).hexdigest()
-            
-            entry = {
-                "timestamp": time.time(),
-                "queue_id": file_hash,
-                "file_path": str(file_path),
-                "file_type": file_type,
-                "final_decision": {
-                    "category": result['final']['category'],
-                    "confidence": result['final']['confidence'],
-                    "trace": result['final']['decision_trace']
-                },
-                "conflicts": result['final']['conflicts'],
-                "candidates": [
-                    {"src": c['source'], "cat": c['category'], "conf": c['confidence']} 
-                    for c in result['final']['candidates']
-                ],
-                "status": "pending"
-            }
-            
-            with open(self.review_queue_path, 'a') as f:
-                f.write(json.dumps(entry) + "\n")
-                
+            self.review_queue.enqueue(
+                file_path,
+                category=result['final']['category'],
+                confidence=result['final']['confidence'],
+                reasoning=result['final']['decision_trace'],
+                file_type=file_type,
+                details={
+                    "conflicts": result['final']['conflicts'],
+                    "candidates": [
+                        {"src": c['source'], "cat": c['category'], "conf": c['confidence']}
+                        for c in result['final']['candidates']
+                    ]
+                }
+            )
         except Exception as e:
             print(f"❌ Failed to write to review queue: {e}")
 
@@ -704,8 +697,10 @@ class UnifiedClassificationService:
             # Perform spectral analysis first (works without OpenAI API)
             spectral_result = self.audio_analyzer.analyze_audio_spectral(file_path, max_duration=30)
 
-            # Use AudioAnalyzer for intelligent classification (requires OpenAI API)
-            classification_result = self.audio_analyzer.classify_audio_file(file_path, project_context=project_context)
+            # Use AudioAnalyzer for intelligent classification (requires OpenAI API).
+            # A transcript that isn't cached yet is queued rather than awaited.
+            classification_result, transcript_job = self.audio_analyzer.classify_audio_file_deferred(
+                file_path, project_context=project_context)
 
             if classification_result:
                 # Merge spectral analysis with AI classification
@@ -717,9 +712,14 @@ class UnifiedClassificationService:
                     'thematic_notes': classification_result.get('thematic_notes'),
                     'target_folder': classification_result.get('target_folder'),
                     'discovered_elements': classification_result.get('discovered_elements', []),
-                    'transcript': classification_result.get('transcript')
+                    'transcript': classification_result.get('transcript'),
+                    'transcript_status': classification_result.get('transcript_status', 'unavailable')
                 }
 
+                # The transcript goes to the file's sidecar when it finishes
+                if transcript_job is not None:
+                    self._track_transcript(file_path, transcript_job)
+
                 # Add spectral analysis data if available
                 if spectral_result.get('success'):
                     metadata['bpm'] = spectral_result.get('bpm', 0)
@@ -774,6 +774,24 @@ class UnifiedClassificationService:
                 'suggested_filename': file_path.name
             }
 
+    def _track_transcript(self, file_path: Path, job):
+        key = str(file_path)
+        self._transcript_jobs[key] = job
+
+        def finished(job, key=key):
+            if self._transcript_jobs.get(key) is job:
+                self._transcript_jobs.pop(key, None)
+
+        job.add_done_callback(finished)
+
+    def pending_transcript(self, file_path: Union[str, Path]):
+        """
+        The TranscriptionJob still running for an audio file classified with
+        transcript_status "pending" (None once it has finished). Its result
+        is the transcript; the sidecar is updated by the transcription queue.
+        """
+        return self._transcript_jobs.get(str(file_path))
+
     def _classify_audio_spectral_only(self, file_path: Path, spectral_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Classify audio file using only spectral analysis (when AI classification unavailable)
@@ -1035,29 +1053,12 @@ class UnifiedClassificationService:
             file_path: Path to the organized file
             classification_result: The classification dictionary
         """
-        try:
-            # Relocate sidecar to hidden .metadata folder to prevent clutter
-            # e.g., folder/image.jpg -> folder/.metadata/image.jpg.json
-            metadata_dir = file_path.parent / ".metadata"
-            metadata_dir.mkdir(parents=True, exist_ok=True)
-            
-            sidecar_path = metadata_dir / f"{file_path.name}.json"
-            
-            # Prepare metadata for saving
-            metadata = {
-                'original_filename': file_path.name,
-                'classification': classification_result,
-                'timestamp': time.time(),
-                'system_version': '3.1'
-            }
-            
-            with open(sidecar_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
-                
-            print(f"📝 Saved metadata sidecar to hidden folder: .metadata/{sidecar_path.name}")
-            
-        except Exception as e:
-            print(f"❌ Failed to save metadata sidecar for {file_path.name}: {e}")
+        save_metadata_sidecar(file_path, {
+            'original_filename': file_path.name,
+            'classification': classification_result,
+            'timestamp': time.time(),
+            'system_version': '3.1'
+        })
 
     def _classify_text_remote(self, text: str, filename: str, allowed_categories: List[Dict[str, str]]) -> Dict[str, Any]:
         """Dispatch text classification to remote Ollama server (5090)"""
@@ -1117,3 +1118,21 @@ class UnifiedClassificationService:
         except Exception as e:
             print(f"Error in remote text classification: {e}")
             return {"success": False, "error": str(e)}
+
+
+def save_metadata_sidecar(file_path: Path, metadata: Dict[str, Any]):
+    """
+    Merge metadata into the file's JSON sidecar (folder/.metadata/<name>.json).
+    Keys not in metadata, such as a transcript written by the transcription
+    queue, are kept.
+    """
+    file_path = Path(file_path)
+    try:
+        # Relocate sidecar to hidden .metadata folder to prevent clutter
+        # e.g., folder/image.jpg -> folder/.metadata/image.jpg.json
+        if merge_sidecar(file_path, metadata):
+            print(f"📝 Saved metadata sidecar to hidden folder: .metadata/{sidecar_path(file_path).name}")
+        else:
+            print(f"❌ Failed to save metadata sidecar for {file_path.name}")
+    except Exception as e:
+        print(f"❌ Failed to save metadata sidecar for {file_path.name}: {e}")
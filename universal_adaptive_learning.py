@@ -20,15 +20,55 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any, Set
 from dataclasses import dataclass, asdict
 from collections import defaultdict, Counter
+import re
 import hashlib
 import sqlite3
 import logging
+from functools import lru_cache
 
 # Import existing system components
 project_dir = Path(__file__).parent
 sys.path.insert(0, str(project_dir))
 
 from gdrive_integration import get_ai_organizer_root, get_metadata_root, ensure_safe_local_path
+from metrics_store import MetricsStore, MetricPoint
+from learning_event_log import LearningEventLog
+from pattern_index import PatternIndex
+
+# Event types that represent a confirmed user decision
+VERIFIED_EVENT_TYPES = {'user_correction', 'manual_move', 'preference_update', 'user_confirmed'}
+
+# Metrics series that the learning statistics dashboard reads from
+LEARNING_EVENTS_SERIES = "learning.events"
+
+DATE_PATTERN_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}'    # YYYY-MM-DD
+    r'|\d{2}-\d{2}-\d{4}'   # MM-DD-YYYY
+    r'|\d{8}'               # YYYYMMDD
+    r'|(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)'  # Month names
+)
+KEYWORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+STOP_WORDS = {"the", "and", "for", "are", "but", "not", "you", "all", "can", "had", "her", "was", "one", "our", "out", "day", "get", "has", "him", "his", "how", "its", "may", "new", "now", "old", "see", "two", "who", "boy", "did", "man", "men", "put", "say", "she", "too", "use"}
+
+
+@lru_cache(maxsize=50000)
+def _filename_feature_values(file_path: str) -> Tuple:
+    """Filename features used by filename patterns (cached: the same paths are seen repeatedly)"""
+    path = Path(file_path)
+    filename = path.name.lower()
+    return (
+        path.suffix.lower(),
+        any(c.isdigit() for c in filename),
+        len(filename.split()),
+        DATE_PATTERN_RE.search(filename) is not None,
+        tuple(_keywords(filename))
+    )
+
+
+def _keywords(text: str) -> List[str]:
+    text = re.sub(r'\.[^.]*$', '', text)  # Remove extension
+    words = KEYWORD_RE.findall(text.lower())  # Words with 3+ chars
+    return [word for word in words if word not in STOP_WORDS][:10]  # Return top 10 keywords
 
 @dataclass
 class LearningEvent:
@@ -85,11 +125,14 @@ class UniversalAdaptiveLearning:
         self.learning_dir = get_metadata_root() / ".AI_LIBRARIAN_CORPUS" / "03_ADAPTIVE_FEEDBACK"
         self.learning_dir.mkdir(parents=True, exist_ok=True)
 
-        # Persistent storage files
+        # Persistent storage: append-only event log with periodic snapshots
+        self.event_log = LearningEventLog(self.learning_dir / "event_log")
+        self.stats_file = self.learning_dir / "learning_stats.json"
+
+        # Legacy whole-state pickles (imported into the event log once)
         self.learning_events_file = self.learning_dir / "learning_events.pkl"
         self.patterns_file = self.learning_dir / "discovered_patterns.pkl"
         self.preferences_file = self.learning_dir / "user_preferences.pkl"
-        self.stats_file = self.learning_dir / "learning_stats.json"
 
         # Database for quick queries - use local storage for SQLite (cloud sync conflicts)
         # Use centralized metadata system for compliance
@@ -98,20 +141,6 @@ class UniversalAdaptiveLearning:
         # Enforce local storage - will raise RuntimeError if unsafe
         self.db_path = ensure_safe_local_path(local_db_dir / "adaptive_learning.db")
 
-        # Load existing data
-        self.learning_events: List[LearningEvent] = self._load_learning_events()
-        self.patterns: Dict[str, AdaptivePattern] = self._load_patterns()
-        self.user_preferences: Dict[str, UserPreference] = self._load_preferences()
-        self.stats = self._load_stats()
-
-        # Visual pattern storage for image/video learning
-        self.visual_patterns_file = self.learning_dir / "visual_patterns.pkl"
-        self.visual_patterns = self._load_visual_patterns()
-
-        # Audio pattern storage for audio learning
-        self.audio_patterns_file = self.learning_dir / "audio_patterns.pkl"
-        self.audio_patterns = self._load_audio_patterns()
-        
         # Learning configuration
         self.config = {
             "min_pattern_frequency": 3,
@@ -126,6 +155,33 @@ class UniversalAdaptiveLearning:
             },
             "flush_interval_sec": 15  # Throttle for persistence
         }
+
+        # Pattern/preference ids changed since they were last written to the
+        # event log / SQLite; events are tracked by the newest id written
+        self._log_dirty_patterns: Set[str] = set()
+        self._log_dirty_preferences: Set[str] = set()
+        self._db_dirty_patterns: Set[str] = set()
+        self._db_dirty_preferences: Set[str] = set()
+        self._db_full_resync = False
+        self._last_db_prune = 0.0
+
+        # Load existing data
+        self.learning_events: List[LearningEvent] = []
+        self.patterns: Dict[str, AdaptivePattern] = {}
+        self.user_preferences: Dict[str, UserPreference] = {}
+        self._load_learned_state()
+        self.stats = self._load_stats()
+
+        # Candidate lookup so predictions don't scan every learned pattern
+        self.pattern_index = PatternIndex()
+
+        # Visual pattern storage for image/video learning
+        self.visual_patterns_file = self.learning_dir / "visual_patterns.pkl"
+        self.visual_patterns = self._load_visual_patterns()
+
+        # Audio pattern storage for audio learning
+        self.audio_patterns_file = self.learning_dir / "audio_patterns.pkl"
+        self.audio_patterns = self._load_audio_patterns()
         
         # Persistence flags
         self._dirty = False
@@ -134,6 +190,11 @@ class UniversalAdaptiveLearning:
         # Initialize database
         self._init_database()
 
+        # Time-series rollups backing get_learning_statistics()
+        self.metrics = MetricsStore(local_db_dir / "metrics.db")
+        self._metrics_last_event_id: Optional[str] = None
+        self._init_learning_metrics()
+
     def _init_database(self):
         """Initialize SQLite database for fast pattern and preference queries"""
         with sqlite3.connect(self.db_path) as conn:
@@ -185,35 +246,51 @@ class UniversalAdaptiveLearning:
             conn.execute('CREATE INDEX IF NOT EXISTS idx_patterns_type ON patterns(pattern_type)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_preferences_type ON user_preferences(preference_type)')
 
-    def _load_learning_events(self) -> List[LearningEvent]:
-        """Load learning events from pickle file"""
-        if self.learning_events_file.exists():
-            try:
-                with open(self.learning_events_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                self.logger.warning(f"Could not load learning events: {e}")
-        return []
+    def _load_learned_state(self):
+        """Load the snapshot + log tail, importing the legacy pickles on first run"""
+        state = self.event_log.load()
+        if state is None:
+            state = self._import_legacy_pickles()
+
+        if state is not None:
+            self.learning_events = state["events"][-self.config["max_learning_events"]:]
+            self.patterns = state["patterns"]
+            self.user_preferences = state["preferences"]
+            # The log tail may not have reached SQLite before the last shutdown
+            self._db_dirty_patterns |= state.get("tail_pattern_ids", set())
+            self._db_dirty_preferences |= state.get("tail_preference_ids", set())
+
+        self._logged_event_id = self.learning_events[-1].event_id if self.learning_events else None
+        self._db_synced_event_id: Optional[str] = None
+        self._db_cursor_checked = False
+
+    def _import_legacy_pickles(self) -> Optional[Dict[str, Any]]:
+        """One-time import of learning_events.pkl / discovered_patterns.pkl / user_preferences.pkl"""
+        legacy_files = [self.learning_events_file, self.patterns_file, self.preferences_file]
+        if not any(path.exists() for path in legacy_files):
+            return None
 
-    def _load_patterns(self) -> Dict[str, AdaptivePattern]:
-        """Load discovered patterns from pickle file"""
-        if self.patterns_file.exists():
-            try:
-                with open(self.patterns_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                self.logger.warning(f"Could not load patterns: {e}")
-        return {}
+        state = {
+            "events": self._load_legacy_pickle(self.learning_events_file, []),
+            "patterns": self._load_legacy_pickle(self.patterns_file, {}),
+            "preferences": self._load_legacy_pickle(self.preferences_file, {}),
+        }
+        self.event_log.write_snapshot(state)
+
+        for path in legacy_files:
+            if path.exists():
+                path.rename(path.with_suffix(".pkl.imported"))
+        self.logger.info(f"Imported {len(state['events'])} legacy learning events into the event log")
+        return state
 
-    def _load_preferences(self) -> Dict[str, UserPreference]:
-        """Load user preferences from pickle file"""
-        if self.preferences_file.exists():
+    def _load_legacy_pickle(self, file_path: Path, default: Any) -> Any:
+        if file_path.exists():
             try:
-                with open(self.preferences_file, 'rb') as f:
+                with open(file_path, 'rb') as f:
                     return pickle.load(f)
             except Exception as e:
-                self.logger.warning(f"Could not load preferences: {e}")
-        return {}
+                self.logger.warning(f"Could not load {file_path.name}: {e}")
+        return default
 
     def _load_stats(self) -> Dict:
         """Load learning statistics"""
@@ -283,18 +360,6 @@ class UniversalAdaptiveLearning:
             self._dirty = False
 
 
-    def _atomic_write_pickle(self, file_path: Path, data: Any):
-        """Atomically write pickle data (write to temp, then rename)"""
-        temp_fd, temp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
-        try:
-            with os.fdopen(temp_fd, "wb") as f:
-                pickle.dump(data, f)
-            os.replace(temp_path, file_path)
-        except Exception:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            raise
-
     def _atomic_write_json(self, file_path: Path, data: Any):
         """Atomically write JSON data (write to temp, then rename)"""
         temp_fd, temp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
@@ -315,34 +380,145 @@ class UniversalAdaptiveLearning:
             return
 
         try:
-            # Save pickle files
-            self._atomic_write_pickle(self.learning_events_file, self.learning_events)
-            
-            self._atomic_write_pickle(self.patterns_file, self.patterns)
-            
-            self._atomic_write_pickle(self.preferences_file, self.user_preferences)
-            
+            # Append anything not yet in the event log, then make it durable
+            self._append_to_event_log()
+            self.event_log.sync()
+            if self.event_log.needs_compaction:
+                self._write_snapshot()
+
             # Update stats
             self.stats["last_updated"] = datetime.now().isoformat()
             self._atomic_write_json(self.stats_file, self.stats)
             
             # Sync to database
             self._sync_to_database()
+
+            # Fold newly persisted events into the metrics rollups
+            self._record_learning_metrics()
             
         except Exception as e:
             self.logger.error(f"Error saving learning data: {e}")
 
+    def _mark_pattern_changed(self, pattern_id: str):
+        self.pattern_index.add(self.patterns[pattern_id])
+        self._log_dirty_patterns.add(pattern_id)
+        self._db_dirty_patterns.add(pattern_id)
+
+    def _mark_preference_changed(self, preference_id: str):
+        self._log_dirty_preferences.add(preference_id)
+        self._db_dirty_preferences.add(preference_id)
+
+    def _events_after(self, event_id: Optional[str]) -> List[LearningEvent]:
+        """Events appended after event_id, oldest first (walks back from the newest event)"""
+        new_events = []
+        for event in reversed(self.learning_events):
+            if event.event_id == event_id:
+                break
+            new_events.append(event)
+        new_events.reverse()
+        return new_events
+
+    def _append_to_event_log(self):
+        """Append new events and changed patterns/preferences: O(changes), not O(history)"""
+        for event in self._events_after(self._logged_event_id):
+            self.event_log.append("event", event)
+            self._logged_event_id = event.event_id
+
+        for pattern_id in list(self._log_dirty_patterns):
+            self._log_dirty_patterns.discard(pattern_id)
+            if pattern_id in self.patterns:
+                self.event_log.append("pattern", self.patterns[pattern_id])
+
+        for preference_id in list(self._log_dirty_preferences):
+            self._log_dirty_preferences.discard(preference_id)
+            if preference_id in self.user_preferences:
+                self.event_log.append("preference", self.user_preferences[preference_id])
+
+    def _write_snapshot(self):
+        """Compact the event log into a snapshot of the current state"""
+        self._append_to_event_log()
+        self.event_log.write_snapshot({
+            "events": self.learning_events,
+            "patterns": self.patterns,
+            "preferences": self.user_preferences
+        })
+
+    def _init_learning_metrics(self):
+        """Backfill the metrics store once from events saved before it existed"""
+        if not self.learning_events:
+            return
+        if self.metrics.is_empty(LEARNING_EVENTS_SERIES):
+            self._record_learning_metrics()
+        else:
+            self._metrics_last_event_id = self.learning_events[-1].event_id
+
+    def _event_metric_point(self, event: LearningEvent) -> MetricPoint:
+        """Metric point for one learning event (dims drive the dashboard breakdowns)"""
+        verified = event.event_type in VERIFIED_EVENT_TYPES
+        dims = {"kind": "verified" if verified else "observation"}
+
+        if verified:
+            # For verified events, use the TARGET category (user's truth)
+            action = event.user_action or {}
+            category = action.get('target_category', action.get('category'))
+        else:
+            # For observations, use the prediction
+            category = (event.original_prediction or {}).get('category')
+        if category is not None:
+            dims["category"] = category
+
+        if event.context and 'media_type' in event.context:
+            dims["media_type"] = event.context['media_type']
+
+        return MetricPoint(
+            series=LEARNING_EVENTS_SERIES,
+            value=event.confidence_before,
+            dims=dims,
+            ts=event.timestamp.timestamp()
+        )
+
+    def _record_learning_metrics(self):
+        """Record events appended since the last call (walks back from the newest event)"""
+        new_events = []
+        for event in reversed(self.learning_events):
+            if event.event_id == self._metrics_last_event_id:
+                break
+            new_events.append(event)
+
+        if not new_events:
+            return
+
+        try:
+            self.metrics.record_many(self._event_metric_point(event) for event in reversed(new_events))
+            self._metrics_last_event_id = self.learning_events[-1].event_id
+        except Exception as e:
+            self.logger.warning(f"Could not record learning metrics: {e}")
+
     def _sync_to_database(self):
-        """Sync in-memory data to SQLite database using UPSERT (Non-destructive)"""
+        """Apply new events and changed patterns/preferences to SQLite using UPSERT (deltas only)"""
         with sqlite3.connect(self.db_path) as conn:
             conn.execute("PRAGMA journal_mode=WAL;")
             conn.execute("PRAGMA synchronous=NORMAL;")
 
             # Periodically prune very old events (> 120 days)
-            cutoff = (datetime.now() - timedelta(days=120)).isoformat()
-            conn.execute("DELETE FROM learning_events WHERE timestamp < ?", (cutoff,))
-            
-            # UPSERT learning events (Last 1000 items from memory)
+            if time.time() - self._last_db_prune >= 3600:
+                cutoff = (datetime.now() - timedelta(days=120)).isoformat()
+                conn.execute("DELETE FROM learning_events WHERE timestamp < ?", (cutoff,))
+                self._last_db_prune = time.time()
+
+            if not self._db_cursor_checked:
+                # First sync since startup: resume after the newest event SQLite already has
+                recent_ids = [event.event_id for event in self.learning_events[-1000:]]
+                placeholders = ",".join("?" * len(recent_ids))
+                stored = {
+                    row[0] for row in conn.execute(
+                        f"SELECT event_id FROM learning_events WHERE event_id IN ({placeholders})", recent_ids
+                    )
+                } if recent_ids else set()
+                self._db_synced_event_id = next((event_id for event_id in reversed(recent_ids) if event_id in stored), None)
+                self._db_cursor_checked = True
+
+            new_events = self._events_after(self._db_synced_event_id)[-1000:]
             events_data = [
                 (
                     event.event_id,
@@ -355,7 +531,7 @@ class UniversalAdaptiveLearning:
                     event.confidence_after,
                     json.dumps(event.context) if event.context else None
                 )
-                for event in self.learning_events[-1000:]
+                for event in new_events
             ]
 
             if events_data:
@@ -365,8 +541,16 @@ class UniversalAdaptiveLearning:
                      confidence_before, confidence_after, context)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', events_data)
-            
-            # UPSERT patterns
+
+            if self._db_full_resync:
+                # Patterns/preferences were rebuilt or pruned wholesale
+                conn.execute("DELETE FROM patterns")
+                conn.execute("DELETE FROM user_preferences")
+                pattern_ids, preference_ids = list(self.patterns), list(self.user_preferences)
+            else:
+                pattern_ids, preference_ids = list(self._db_dirty_patterns), list(self._db_dirty_preferences)
+
+            # UPSERT changed patterns
             patterns_data = [
                 (
                     pattern.pattern_id,
@@ -378,15 +562,16 @@ class UniversalAdaptiveLearning:
                     pattern.last_seen.isoformat(),
                     pattern.accuracy_rate
                 )
-                for pattern in self.patterns.values()
+                for pattern in (self.patterns.get(pattern_id) for pattern_id in pattern_ids)
+                if pattern is not None
             ]
 
             if patterns_data:
                 conn.executemany('''
                     INSERT OR REPLACE INTO patterns VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ''', patterns_data)
-            
-            # UPSERT preferences
+
+            # UPSERT changed preferences
             preferences_data = [
                 (
                     pref.preference_id,
@@ -397,7 +582,8 @@ class UniversalAdaptiveLearning:
                     pref.frequency,
                     pref.last_reinforced.isoformat()
                 )
-                for pref in self.user_preferences.values()
+                for pref in (self.user_preferences.get(preference_id) for preference_id in preference_ids)
+                if pref is not None
             ]
 
             if preferences_data:
@@ -405,6 +591,12 @@ class UniversalAdaptiveLearning:
                     INSERT OR REPLACE INTO user_preferences VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', preferences_data)
 
+        if new_events:
+            self._db_synced_event_id = new_events[-1].event_id
+        self._db_dirty_patterns.difference_update(pattern_ids)
+        self._db_dirty_preferences.difference_update(preference_ids)
+        self._db_full_resync = False
+
     def record_learning_event(self, 
                             event_type: str,
                             file_path: str,
@@ -417,11 +609,8 @@ class UniversalAdaptiveLearning:
         CRITICAL: Pattern discovery and confidence boosting ONLY happen for verified events.
         """
         
-        # Valid verified event types
-        VERIFIED_TYPES = {'user_correction', 'manual_move', 'preference_update', 'user_confirmed'}
-        
         # Calculate confidence boost ONLY for verified events
-        if event_type in VERIFIED_TYPES:
+        if event_type in VERIFIED_EVENT_TYPES:
             confidence_after = confidence_before + self.config["confidence_boost_rates"].get(event_type, 0.1)
             confidence_after = min(1.0, confidence_after)
         else:
@@ -453,10 +642,16 @@ class UniversalAdaptiveLearning:
         self.stats["total_learning_events"] += 1
         
         # Trigger pattern discovery ONLY for verified events
-        if event_type in VERIFIED_TYPES:
+        if event_type in VERIFIED_EVENT_TYPES:
             self._discover_patterns_from_event(learning_event)
             self._update_preferences_from_event(learning_event)
 
+        # One log record for the event (plus any pattern/preference it changed)
+        try:
+            self._append_to_event_log()
+        except Exception as e:
+            self.logger.error(f"Could not append learning event to log: {e}")
+
         # Throttled Save
         self._maybe_flush()
 
@@ -617,16 +812,8 @@ class UniversalAdaptiveLearning:
 
     def _discover_filename_patterns(self, event: LearningEvent):
         """Discover patterns in filenames that predict user actions"""
-        filename = Path(event.file_path).name.lower()
-        
         # Extract filename features
-        features = {
-            "extension": Path(event.file_path).suffix.lower(),
-            "contains_numbers": any(c.isdigit() for c in filename),
-            "word_count": len(filename.split()),
-            "contains_date": self._contains_date_pattern(filename),
-            "keywords": self._extract_keywords(filename)
-        }
+        features = self._filename_features(event.file_path)
         
         # Look for similar events with same filename features
         similar_events = []
@@ -634,14 +821,7 @@ class UniversalAdaptiveLearning:
             if past_event.event_id == event.event_id:
                 continue
                 
-            past_filename = Path(past_event.file_path).name.lower()
-            past_features = {
-                "extension": Path(past_event.file_path).suffix.lower(),
-                "contains_numbers": any(c.isdigit() for c in past_filename),
-                "word_count": len(past_filename.split()),
-                "contains_date": self._contains_date_pattern(past_filename),
-                "keywords": self._extract_keywords(past_filename)
-            }
+            past_features = self._filename_features(past_event.file_path)
             
             # Check for feature matches
             matches = sum(1 for k, v in features.items() if past_features.get(k) == v)
@@ -669,6 +849,7 @@ class UniversalAdaptiveLearning:
                 pattern.frequency += 1
                 pattern.last_seen = datetime.now()
                 pattern.confidence = min(0.95, pattern.confidence + 0.05)
+            self._mark_pattern_changed(pattern_id)
 
     def _discover_content_patterns(self, event: LearningEvent):
         """Discover patterns in file content that predict user actions"""
@@ -707,6 +888,7 @@ class UniversalAdaptiveLearning:
                         frequency=1,
                         last_seen=datetime.now()
                     )
+                    self._mark_pattern_changed(pattern_id)
 
     def _discover_location_patterns(self, event: LearningEvent):
         """Discover patterns in file locations that predict user actions"""
@@ -753,6 +935,7 @@ class UniversalAdaptiveLearning:
                     frequency=1,
                     last_seen=datetime.now()
                 )
+                self._mark_pattern_changed(pattern_id)
 
     def _discover_timing_patterns(self, event: LearningEvent):
         """Discover timing patterns in user behavior"""
@@ -798,6 +981,7 @@ class UniversalAdaptiveLearning:
                     frequency=1,
                     last_seen=datetime.now()
                 )
+                self._mark_pattern_changed(pattern_id)
 
     def _update_preferences_from_event(self, event: LearningEvent):
         """Update user preferences based on learning event"""
@@ -845,6 +1029,7 @@ class UniversalAdaptiveLearning:
                 last_reinforced=datetime.now()
             )
             self.stats["preferences_learned"] += 1
+        self._mark_preference_changed(pref_id)
 
     def _update_location_preference(self, event: LearningEvent, location: str):
         """Update user's location preferences"""
@@ -870,6 +1055,7 @@ class UniversalAdaptiveLearning:
                 frequency=1,
                 last_reinforced=datetime.now()
             )
+        self._mark_preference_changed(pref_id)
 
     def _update_person_preference(self, event: LearningEvent, person: str):
         """Update user's person-related preferences"""
@@ -897,6 +1083,7 @@ class UniversalAdaptiveLearning:
                 frequency=1,
                 last_reinforced=datetime.now()
             )
+        self._mark_preference_changed(pref_id)
 
     def predict_user_action(self, file_path: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -909,13 +1096,60 @@ class UniversalAdaptiveLearning:
         Returns:
             Prediction with confidence score and reasoning
         """
-        
+        return self._predict_user_action(file_path, context, self._new_prediction_batch())
+
+    def predict_user_actions(self, file_paths: List[str],
+                             contexts: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        """
+        Batch version of predict_user_action (same results, in input order).
+
+        Work that doesn't depend on the individual file is done once per batch:
+        the timing pattern evaluation, the preference decay filter and the
+        pattern index sync. Files that share a filename, folder or keyword set
+        share that lookup.
+        """
+        contexts = contexts if contexts is not None else [None] * len(file_paths)
+        if len(contexts) != len(file_paths):
+            raise ValueError("contexts must be the same length as file_paths")
+
+        batch = self._new_prediction_batch()
+        return [
+            self._predict_user_action(file_path, context, batch)
+            for file_path, context in zip(file_paths, contexts)
+        ]
+
+    def _new_prediction_batch(self) -> Dict[str, Any]:
+        """Per-batch shared prediction state"""
+        self.pattern_index.sync(self.patterns)
+        now = datetime.now()
+        return {
+            "timing": self._predict_from_timing_patterns(),
+            "preferences": [
+                pref for pref in self.user_preferences.values()
+                # Check if preference is still recent (not decayed)
+                if (now - pref.last_reinforced).days <= self.config["preference_decay_days"]
+            ],
+            "filename": {},
+            "content": {},
+            "location": {},
+            "preference": {}
+        }
+
+    def _memoized(self, batch: Dict[str, Any], kind: str, key: Any, compute):
+        memo = batch[kind]
+        if key not in memo:
+            memo[key] = compute()
+        return memo[key]
+
+    def _predict_user_action(self, file_path: str, context: Optional[Dict[str, Any]], batch: Dict[str, Any]) -> Dict[str, Any]:
         predictions = []
         confidence_sum = 0.0
         reasoning = []
+        path = Path(file_path)
         
         # Check filename patterns
-        filename_prediction = self._predict_from_filename_patterns(file_path)
+        filename_prediction = self._memoized(batch, "filename", path.name,
+                                             lambda: self._predict_from_filename_patterns(file_path))
         if filename_prediction:
             predictions.append(filename_prediction)
             confidence_sum += filename_prediction["confidence"]
@@ -923,28 +1157,35 @@ class UniversalAdaptiveLearning:
         
         # Check content patterns
         if context and "content_keywords" in context:
-            content_prediction = self._predict_from_content_patterns(context["content_keywords"])
+            keywords = context["content_keywords"]
+            content_prediction = self._memoized(batch, "content", tuple(keywords) if keywords else (),
+                                                lambda: self._predict_from_content_patterns(keywords))
             if content_prediction:
                 predictions.append(content_prediction)
                 confidence_sum += content_prediction["confidence"]
                 reasoning.append(f"Content pattern: {content_prediction['reasoning']}")
         
         # Check location patterns
-        location_prediction = self._predict_from_location_patterns(file_path)
+        location_prediction = self._memoized(batch, "location", str(path.parent),
+                                             lambda: self._predict_from_location_patterns(file_path))
         if location_prediction:
             predictions.append(location_prediction)
             confidence_sum += location_prediction["confidence"]
             reasoning.append(f"Location pattern: {location_prediction['reasoning']}")
         
         # Check timing patterns
-        timing_prediction = self._predict_from_timing_patterns()
+        timing_prediction = batch["timing"]
         if timing_prediction:
             predictions.append(timing_prediction)
             confidence_sum += timing_prediction["confidence"]
             reasoning.append(f"Timing pattern: {timing_prediction['reasoning']}")
         
         # Check user preferences
-        preference_prediction = self._predict_from_preferences(file_path, context)
+        keywords_key = tuple(context["content_keywords"][:3]) if context and "content_keywords" in context else None
+        preference_prediction = self._memoized(
+            batch, "preference", (path.suffix.lower(), str(path.parent), keywords_key),
+            lambda: self._predict_from_preferences(file_path, context, preferences=batch["preferences"])
+        )
         if preference_prediction:
             predictions.append(preference_prediction)
             confidence_sum += preference_prediction["confidence"]
@@ -985,23 +1226,12 @@ class UniversalAdaptiveLearning:
 
     def _predict_from_filename_patterns(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Predict action based on filename patterns"""
-        filename = Path(file_path).name.lower()
-        
-        features = {
-            "extension": Path(file_path).suffix.lower(),
-            "contains_numbers": any(c.isdigit() for c in filename),
-            "word_count": len(filename.split()),
-            "contains_date": self._contains_date_pattern(filename),
-            "keywords": self._extract_keywords(filename)
-        }
+        features = self._filename_features(file_path)
         
         best_match = None
         best_score = 0
         
-        for pattern in self.patterns.values():
-            if pattern.pattern_type != "filename":
-                continue
-            
+        for pattern in self.pattern_index.candidates(self.patterns, "filename", features):
             score = 0
             for key, value in features.items():
                 if key in pattern.trigger_conditions and pattern.trigger_conditions[key] == value:
@@ -1036,10 +1266,7 @@ class UniversalAdaptiveLearning:
         best_match = None
         best_score = 0
         
-        for pattern in self.patterns.values():
-            if pattern.pattern_type != "content":
-                continue
-            
+        for pattern in self.pattern_index.content_candidates(self.patterns, keyword_combos):
             pattern_combo = pattern.trigger_conditions.get("keyword_combination")
             if pattern_combo and pattern_combo in keyword_combos:
                 score = pattern.confidence * pattern.frequency / 10  # Weight by frequency
@@ -1072,10 +1299,7 @@ class UniversalAdaptiveLearning:
         best_match = None
         best_score = 0
         
-        for pattern in self.patterns.values():
-            if pattern.pattern_type != "location":
-                continue
-            
+        for pattern in self.pattern_index.candidates(self.patterns, "location", location_features):
             score = 0
             for key, value in location_features.items():
                 if key in pattern.trigger_conditions and pattern.trigger_conditions[key] == value:
@@ -1111,10 +1335,7 @@ class UniversalAdaptiveLearning:
         best_match = None
         best_score = 0
         
-        for pattern in self.patterns.values():
-            if pattern.pattern_type != "timing":
-                continue
-            
+        for pattern in self.pattern_index.candidates(self.patterns, "timing", time_features):
             score = 0
             for key, value in time_features.items():
                 if key in pattern.trigger_conditions and pattern.trigger_conditions[key] == value:
@@ -1135,8 +1356,9 @@ class UniversalAdaptiveLearning:
         
         return None
 
-    def _predict_from_preferences(self, file_path: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        """Predict action based on user preferences"""
+    def _predict_from_preferences(self, file_path: str, context: Dict[str, Any] = None,
+                                  preferences: Optional[List[UserPreference]] = None) -> Optional[Dict[str, Any]]:
+        """Predict action based on user preferences (preferences: pre-filtered non-decayed ones)"""
         file_features = {
             "file_extension": Path(file_path).suffix.lower(),
             "source_location": str(Path(file_path).parent)
@@ -1148,11 +1370,12 @@ class UniversalAdaptiveLearning:
         best_preference = None
         best_score = 0
         
-        for pref in self.user_preferences.values():
+        for pref in (preferences if preferences is not None else self.user_preferences.values()):
             # Check if preference is still recent (not decayed)
-            days_since_reinforced = (datetime.now() - pref.last_reinforced).days
-            if days_since_reinforced > self.config["preference_decay_days"]:
-                continue
+            if preferences is None:
+                days_since_reinforced = (datetime.now() - pref.last_reinforced).days
+                if days_since_reinforced > self.config["preference_decay_days"]:
+                    continue
             
             # Calculate match score
             score = 0
@@ -1184,34 +1407,24 @@ class UniversalAdaptiveLearning:
         
         return None
 
+    def _filename_features(self, file_path: str) -> Dict[str, Any]:
+        """Features of a filename that filename patterns are keyed on"""
+        extension, contains_numbers, word_count, contains_date, keywords = _filename_feature_values(file_path)
+        return {
+            "extension": extension,
+            "contains_numbers": contains_numbers,
+            "word_count": word_count,
+            "contains_date": contains_date,
+            "keywords": list(keywords)
+        }
+
     def _contains_date_pattern(self, text: str) -> bool:
         """Check if text contains date patterns"""
-        import re
-        date_patterns = [
-            r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'\d{2}-\d{2}-\d{4}',  # MM-DD-YYYY
-            r'\d{8}',              # YYYYMMDD
-            r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)',  # Month names
-        ]
-        
-        for pattern in date_patterns:
-            if re.search(pattern, text.lower()):
-                return True
-        return False
+        return DATE_PATTERN_RE.search(text.lower()) is not None
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract relevant keywords from text"""
-        import re
-
-        # Remove file extension and common words
-        text = re.sub(r'\.[^.]*$', '', text)  # Remove extension
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())  # Words with 3+ chars
-
-        # Filter out common words
-        stop_words = {"the", "and", "for", "are", "but", "not", "you", "all", "can", "had", "her", "was", "one", "our", "out", "day", "get", "has", "him", "his", "how", "its", "may", "new", "now", "old", "see", "two", "who", "boy", "did", "man", "men", "put", "say", "she", "too", "use"}
-
-        keywords = [word for word in words if word not in stop_words]
-        return keywords[:10]  # Return top 10 keywords
+        return _keywords(text)
 
     def _update_visual_patterns_from_classification(self,
                                                    file_path: str,
@@ -1373,10 +1586,14 @@ class UniversalAdaptiveLearning:
                 - category_distribution: Dict mapping category to count (top 10)
         """
 
-        # Reload learning events from disk to get latest data from all instances
-        self.learning_events = self._load_learning_events()
+        # Aggregates come from the shared metrics store, so this reads
+        # O(buckets) rows instead of reloading every pickled event
+        self._record_learning_metrics()
 
-        if not self.learning_events:
+        by_kind = self.metrics.totals_by(LEARNING_EVENTS_SERIES, "kind")
+        total_events = sum(stats["count"] for stats in by_kind.values())
+
+        if not total_events:
             return {
                 "total_learning_events": 0,
                 "image_events": 0,
@@ -1390,42 +1607,19 @@ class UniversalAdaptiveLearning:
                 "category_distribution": {}
             }
 
-        # Count events by media_type and split verification stats
-        media_type_counts = Counter()
-        categories = Counter()
-        confidences = []
-        
-        verified_events_count = 0
-        observation_events_count = 0
-
-        for event in self.learning_events:
-            # Split stats
-            if event.event_type in {'user_correction', 'manual_move', 'preference_update', 'user_confirmed'}:
-                verified_events_count += 1
-                # For verified events, use the TARGET category (user's truth)
-                if event.user_action and 'target_category' in event.user_action:
-                     category = event.user_action['target_category']
-                     categories[category] += 1
-                elif event.user_action and 'category' in event.user_action:
-                     category = event.user_action['category']
-                     categories[category] += 1
-            else:
-                observation_events_count += 1
-                # For observations, use the prediction
-                if event.original_prediction and 'category' in event.original_prediction:
-                    category = event.original_prediction['category']
-                    categories[category] += 1
-
-            # Extract media_type from context
-            if event.context and 'media_type' in event.context:
-                media_type = event.context['media_type']
-                media_type_counts[media_type] += 1
-
-            # Collect confidence scores
-            confidences.append(event.confidence_before)
+        media_type_counts = Counter({
+            media_type: stats["count"]
+            for media_type, stats in self.metrics.totals_by(LEARNING_EVENTS_SERIES, "media_type").items()
+            if media_type is not None
+        })
+        categories = Counter({
+            category: stats["count"]
+            for category, stats in self.metrics.totals_by(LEARNING_EVENTS_SERIES, "category").items()
+            if category is not None
+        })
 
         # Calculate top confidence average (top 10 events by confidence)
-        top_confidences = sorted(confidences, reverse=True)[:10]
+        top_confidences = self.metrics.top_values(LEARNING_EVENTS_SERIES, limit=10)
         top_confidence_avg = sum(top_confidences) / len(top_confidences) if top_confidences else 0.0
 
         # Get most common category
@@ -1433,9 +1627,9 @@ class UniversalAdaptiveLearning:
         most_common_category = most_common[0][0] if most_common else None
 
         return {
-            "total_learning_events": len(self.learning_events),
-            "verified_learning_events": verified_events_count,
-            "observation_events": observation_events_count,
+            "total_learning_events": total_events,
+            "verified_learning_events": by_kind.get("verified", {}).get("count", 0),
+            "observation_events": by_kind.get("observation", {}).get("count", 0),
             "patterns_count": len(self.patterns),
             "image_events": media_type_counts.get('image', 0),
             "video_events": media_type_counts.get('video', 0),
@@ -1461,8 +1655,10 @@ class UniversalAdaptiveLearning:
         
         try:
              import shutil
-             shutil.copy(self.patterns_file, f"{self.patterns_file}.{timestamp}.bak")
-             shutil.copy(self.preferences_file, f"{self.preferences_file}.{timestamp}.bak")
+             # The checkpoint above wrote everything into one snapshot
+             self._write_snapshot()
+             snapshot_file = self.event_log.snapshot_file
+             shutil.copy(snapshot_file, f"{snapshot_file}.{timestamp}.bak")
         except Exception as e:
              self.logger.error(f"Backup failed: {e}")
 
@@ -1481,6 +1677,8 @@ class UniversalAdaptiveLearning:
                 self._update_preferences_from_event(event)
         
         # 4. Save clean state
+        self._write_snapshot()
+        self._db_full_resync = True
         self.save_all_data(force=True)
         self.logger.info(f"✅ Knowledge Base Rebuilt! {verified_count} verified events replayed.")
         return verified_count
@@ -1508,6 +1706,11 @@ class UniversalAdaptiveLearning:
         
         for p_id in weak_prefs:
             del self.user_preferences[p_id]
+
+        # Removals can't be expressed as log appends; start from a fresh snapshot
+        if events_removed or patterns_to_remove or weak_prefs:
+            self._write_snapshot()
+            self._db_full_resync = True
         
         self.logger.info(f"Cleanup removed {events_removed} old events, {len(patterns_to_remove)} inactive patterns, {len(weak_prefs)} weak preferences")
         
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Video Sampling
+Short representative samples of long videos for the vision model, made
+without decoding the whole input.
+
+A sample is a few segments (beginning/middle/end, or the first scene
+change in each part of the video) joined by ffmpeg's concat demuxer in one
+pass. The demuxer seeks straight to each segment's inpoint, so the work
+depends on the sample length, not the input length:
+  - stream copy (keyframe-aligned cuts) when the codecs fit in MP4 and the
+    bitrate is reasonable to upload
+  - otherwise a low-resolution H.264 transcode of just the sampled segments
+
+Samples are stored in the derivative cache keyed by content fingerprint,
+so re-analyzing (or moving) a video reuses its sample.
+
+Usage:
+    sampler = get_video_sampler()
+    path = sampler.sample(video_path, max_duration=120)   # original if already short
+    path = sampler.sample(video_path, strategy="scenes")
+"""
+
+import re
+import json
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from derivative_cache import DerivativeCache, get_derivative_cache
+
+logger = logging.getLogger(__name__)
+
+# Bump when sampling changes so stale samples are not reused
+SAMPLER_VERSION = "1"
+
+DEFAULT_MAX_DURATION = 120
+DEFAULT_SEGMENTS = 3
+
+# Codecs MP4 can carry as-is (and Gemini accepts)
+COPYABLE_VIDEO_CODECS = {"h264", "hevc", "mpeg4", "av1"}
+COPYABLE_AUDIO_CODECS = {"aac", "mp3"}
+# Above this, copied samples get too big to upload; transcode instead
+MAX_COPY_BITRATE = 16_000_000
+
+TRANSCODE_HEIGHT = 480
+SCENE_THRESHOLD = 0.3
+# Scene detection only looks this far into each part of the video
+SCENE_WINDOW_SEC = 300
+FFMPEG_TIMEOUT_SEC = 600
+
+
+@dataclass
+class VideoInfo:
+    """What ffprobe says about a video"""
+    duration: float
+    video_codec: Optional[str]
+    audio_codec: Optional[str]
+    bit_rate: Optional[int]
+
+
+def _ffmpeg_available() -> bool:
+    return bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+def probe(video_path: Path) -> Optional[VideoInfo]:
+    """Duration, first video/audio codec and bitrate (None if ffprobe can't read it)"""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', str(video_path)],
+            capture_output=True, text=True, timeout=30
+        )
+        data = json.loads(result.stdout or "{}")
+        duration = float(data["format"]["duration"])
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError):
+        return None
+
+    codecs: Dict[str, str] = {}
+    for stream in data.get("streams", []):
+        codecs.setdefault(stream.get("codec_type"), stream.get("codec_name"))
+    bit_rate = data["format"].get("bit_rate")
+    return VideoInfo(
+        duration=duration,
+        video_codec=codecs.get("video"),
+        audio_codec=codecs.get("audio"),
+        bit_rate=int(bit_rate) if bit_rate and str(bit_rate).isdigit() else None,
+    )
+
+
+def can_stream_copy(info: VideoInfo) -> bool:
+    """True when segments can be cut without re-encoding"""
+    if info.video_codec not in COPYABLE_VIDEO_CODECS:
+        return False
+    if info.audio_codec is not None and info.audio_codec not in COPYABLE_AUDIO_CODECS:
+        return False
+    return info.bit_rate is None or info.bit_rate <= MAX_COPY_BITRATE
+
+
+def plan_segments(duration: float, max_duration: float, segments: int = DEFAULT_SEGMENTS,
+                  scene_times: Optional[List[float]] = None) -> List[Tuple[float, float]]:
+    """
+    (start, end) of each segment. The video is split into `segments` equal
+    parts; each segment starts at the first scene change in its part, or
+    where a beginning/middle/end spread puts it when there is none.
+    """
+    length = max_duration / segments
+    part = duration / segments
+    planned = []
+    for n in range(segments):
+        part_start, part_end = n * part, (n + 1) * part
+        # Beginning, evenly spaced middles, and flush with the end
+        start = part_start + (part - length) * (n / max(1, segments - 1))
+        for t in scene_times or []:
+            if part_start <= t < part_end - 1.0:
+                start = t
+                break
+        start = max(0.0, min(start, duration - length))
+        if planned and start < planned[-1][1]:
+            start = planned[-1][1]
+        planned.append((round(start, 3), round(min(start + length, duration), 3)))
+    return [(start, end) for start, end in planned if end - start > 0.5]
+
+
+def detect_scene_changes(video_path: Path, duration: float, segments: int = DEFAULT_SEGMENTS,
+                         threshold: float = SCENE_THRESHOLD, window: float = SCENE_WINDOW_SEC) -> List[float]:
+    """
+    The first scene change in each of the `segments` parts of the video, judged
+    on keyframes only. Each part is searched from a seek to its start for at
+    most `window` seconds, and ffmpeg stops at the first change, so the decode
+    work doesn't grow with the input length.
+    """
+    part = duration / segments
+    scene_times = []
+    for n in range(segments):
+        start = n * part
+        # plan_segments ignores changes in the last second of a part
+        length = min(window, part - 1.0)
+        if length <= 0:
+            continue
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-skip_frame', 'nokey', '-ss', f"{start:.3f}", '-t', f"{length:.3f}",
+                 '-i', str(video_path), '-an', '-vf', f"scale=160:-2,select='gt(scene,{threshold})',showinfo",
+                 '-frames:v', '1', '-f', 'null', '-'],
+                capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_SEC
+            )
+        except (subprocess.SubprocessError, OSError):
+            return scene_times
+        # Timestamps restart at the seek point
+        found = re.search(r"pts_time:(\d+(?:\.\d+)?)", result.stderr)
+        if found:
+            scene_times.append(round(start + float(found.group(1)), 3))
+    return scene_times
+
+
+def concat_list(video_path: Path, segments: List[Tuple[float, float]]) -> str:
+    """concat demuxer script that reads each segment straight from the original"""
+    quoted = str(Path(video_path).absolute()).replace("'", "'\\''")
+    lines = []
+    for start, end in segments:
+        lines += [f"file '{quoted}'", f"inpoint {start:.3f}", f"outpoint {end:.3f}"]
+    return "\n".join(lines) + "\n"
+
+
+def sample_command(list_path: Path, target: Path, info: VideoInfo) -> List[str]:
+    """ffmpeg invocation joining the segments into one MP4"""
+    cmd = ['ffmpeg', '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_path),
+           '-map', '0:v:0', '-map', '0:a:0?']
+    if can_stream_copy(info):
+        cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    else:
+        cmd += ['-vf', f"scale=-2:'min({TRANSCODE_HEIGHT},ih)'", '-c:v', 'libx264', '-preset', 'veryfast',
+                '-crf', '28', '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-b:a', '64k']
+    return cmd + ['-movflags', '+faststart', str(target)]
+
+
+class VideoSampler:
+    """Creates and caches analysis samples of long videos"""
+
+    def __init__(self, cache: Optional[DerivativeCache] = None):
+        self.cache = cache or get_derivative_cache()
+        self.stats = {"sampled": 0, "stream_copied": 0, "cache_hits": 0, "failed": 0}
+
+    def sample(self, video_path: Path, max_duration: float = DEFAULT_MAX_DURATION,
+               segments: int = DEFAULT_SEGMENTS, strategy: str = "even") -> Path:
+        """
+        Path to upload for analysis: the original when it is already short
+        enough (or can't be sampled), else a cached sample of about
+        max_duration seconds. strategy is "even" or "scenes".
+        """
+        video_path = Path(video_path)
+        if strategy not in ("even", "scenes"):
+            raise ValueError(f"Unknown sampling strategy: {strategy}")
+        if not _ffmpeg_available():
+            return video_path
+
+        key = self.cache.file_key(video_path, "video.sample", SAMPLER_VERSION,
+                                  f"{max_duration}:{segments}:{strategy}")
+        if key is None:
+            return video_path
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        info = probe(video_path)
+        if info is None or info.duration <= max_duration:
+            return video_path
+
+        scene_times = detect_scene_changes(video_path, info.duration, segments) if strategy == "scenes" else None
+        planned = plan_segments(info.duration, max_duration, segments, scene_times)
+        target = self.cache.reserve(key, ".mp4")
+        try:
+            self._render(video_path, planned, target, info)
+        except (subprocess.SubprocessError, OSError) as e:
+            self.stats["failed"] += 1
+            target.unlink(missing_ok=True)
+            logger.warning(f"Could not sample {video_path.name}, using the original: {e}")
+            return video_path
+
+        self.stats["sampled"] += 1
+        if can_stream_copy(info):
+            self.stats["stream_copied"] += 1
+        logger.info(f"Sampled {len(planned)} segments from {video_path.name} "
+                    f"({info.duration:.0f}s, {'stream copy' if can_stream_copy(info) else 'transcoded'})")
+        return self.cache.commit(key, "video.sample", target) or video_path
+
+    def _render(self, video_path: Path, planned: List[Tuple[float, float]], target: Path, info: VideoInfo):
+        with tempfile.TemporaryDirectory(prefix="video_sample_") as scratch:
+            list_path = Path(scratch) / "segments.txt"
+            list_path.write_text(concat_list(video_path, planned))
+            result = subprocess.run(sample_command(list_path, target, info),
+                                    capture_output=True, text=True, timeout=FFMPEG_TIMEOUT_SEC)
+        if result.returncode != 0 or not target.exists():
+            raise OSError(result.stderr.strip()[-300:] or "ffmpeg failed")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+_video_sampler: Optional[VideoSampler] = None
+_video_sampler_lock = threading.Lock()
+
+
+def get_video_sampler() -> VideoSampler:
+    """Shared VideoSampler backed by the shared derivative cache"""
+    global _video_sampler
+    with _video_sampler_lock:
+        if _video_sampler is None:
+            _video_sampler = VideoSampler()
+        return _video_sampler
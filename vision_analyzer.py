@@ -23,6 +23,11 @@ import logging
 import threading
 
 from gdrive_integration import get_ai_organizer_root, get_metadata_root
+from analysis_cache import get_analysis_cache, make_cache_key
+from perceptual_hash import get_perceptual_hash_store
+from request_scheduler import get_request_scheduler, DEFAULT_BUCKETS
+from image_preprocessing import get_image_preprocessor
+from video_sampling import get_video_sampler
 
 try:
     import google.generativeai as genai
@@ -64,6 +69,9 @@ class VisionAnalyzer:
     IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.heic', '.heif'}
     VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv'}
 
+    # Bump when the prompts or result parsing change so cached analyses are redone
+    CACHE_VERSION = "1"
+
     # Analysis prompts for different content types
     IMAGE_ANALYSIS_PROMPT = """Analyze this image and provide the results in JSON format.
 {category_list_str}
@@ -147,9 +155,15 @@ Return a valid JSON object with this structure:
 
         # Lazy initialization - actual API setup moved to _ensure_initialized()
 
-        # Cache directory
+        # Content-addressed result cache shared with the other analyzers.
+        # (vision_cache/ held the old path+mtime keyed JSON files.)
         self.cache_dir = get_metadata_root() /  "vision_cache"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.analysis_cache = get_analysis_cache() if enable_caching else None
+        self.perceptual_hashes = get_perceptual_hash_store() if enable_caching else None
+        # Downscaled images per analysis type (derivative cache + process pool)
+        self.image_preprocessor = get_image_preprocessor()
+        # Stream-copied samples of long videos, cached by content
+        self.video_sampler = get_video_sampler()
 
         # Learning data
         self.learning_dir = get_metadata_root() /  "adaptive_learning"
@@ -197,6 +211,7 @@ Return a valid JSON object with this structure:
         self.api_calls = 0
         self.cache_hits = 0
         self.cache_misses = 0
+        self.near_duplicate_hits = 0
 
         # LLM chatter stop words for fallback keyword extraction
         self.llm_stop_words = {
@@ -207,15 +222,17 @@ Return a valid JSON object with this structure:
         }
 
         # Rate limiting for Gemini Free Tier compliance
-        # Free tier: 15 RPM (requests per minute), 1,500 requests per day
-        self.rate_limit_rpm = 15  # Requests per minute
-        self.rate_limit_daily = 1500  # Requests per day
-        self.min_request_interval = 4.0  # 4 seconds = 15 requests/minute
-        self.last_request_time = 0
-
-        # Daily quota tracking
+        # Free tier: 15 RPM (requests per minute), 1,500 requests per day.
+        # The "gemini" bucket is shared with SemanticTextAnalyzer and with
+        # every other process (API server, monitor, CLI batch runs).
+        self.scheduler = get_request_scheduler()
+        self.rate_bucket = "gemini"
+        self.rate_limit_rpm = DEFAULT_BUCKETS[self.rate_bucket].rate_per_minute
+        self.rate_limit_daily = DEFAULT_BUCKETS[self.rate_bucket].daily_limit
+
+        # Older versions tracked today's usage in this file
         self.quota_file = get_metadata_root() /  "gemini_quota.json"
-        self.daily_requests = self._load_daily_quota()
+        self._import_daily_quota()
 
         self.logger.info(f"Rate limiting enabled: {self.rate_limit_rpm} RPM, {self.rate_limit_daily} daily")
 
@@ -369,34 +386,22 @@ Return a valid JSON object with this structure:
         except Exception as e:
             self.logger.warning(f"Could not save vision patterns: {e}")
 
-    def _load_daily_quota(self) -> Dict[str, Any]:
-        """Load daily quota tracking from file"""
-        if self.quota_file.exists():
-            try:
-                with open(self.quota_file, 'r') as f:
-                    quota_data = json.load(f)
-
-                # Check if it's a new day - reset counter
-                last_date = quota_data.get('date', '')
-                today = datetime.now().strftime('%Y-%m-%d')
-
-                if last_date != today:
-                    self.logger.info(f"New day detected - resetting quota counter (was {quota_data.get('requests', 0)})")
-                    return {'date': today, 'requests': 0}
-
-                return quota_data
-            except Exception as e:
-                self.logger.warning(f"Could not load quota file: {e}")
-
-        return {'date': datetime.now().strftime('%Y-%m-%d'), 'requests': 0}
-
-    def _save_daily_quota(self):
-        """Save daily quota tracking to file"""
+    def _import_daily_quota(self):
+        """Carry today's count from the old per-process quota file into the shared scheduler"""
+        if not self.quota_file.exists():
+            return
         try:
-            with open(self.quota_file, 'w') as f:
-                json.dump(self.daily_requests, f, indent=2)
+            with open(self.quota_file, 'r') as f:
+                quota_data = json.load(f)
+            self.scheduler.record_daily_usage(self.rate_bucket, quota_data.get('date', ''), quota_data.get('requests', 0))
+            self.quota_file.rename(self.quota_file.with_suffix(".json.imported"))
         except Exception as e:
-            self.logger.warning(f"Could not save quota file: {e}")
+            self.logger.warning(f"Could not import quota file: {e}")
+
+    @property
+    def daily_requests(self) -> Dict[str, Any]:
+        """Today's Gemini usage across all processes ({'date', 'requests'})"""
+        return self.scheduler.usage(self.rate_bucket)
 
     def _check_rate_limit(self) -> bool:
         """
@@ -405,107 +410,109 @@ Return a valid JSON object with this structure:
         Returns:
             True if request is allowed, False if quota exceeded
         """
-        # Check daily quota
-        today = datetime.now().strftime('%Y-%m-%d')
-        if self.daily_requests.get('date') != today:
-            # New day - reset counter
-            self.daily_requests = {'date': today, 'requests': 0}
-            self._save_daily_quota()
-
-        current_daily = self.daily_requests.get('requests', 0)
-        if current_daily >= self.rate_limit_daily:
-            self.logger.error(f"Daily quota exceeded: {current_daily}/{self.rate_limit_daily} requests used today")
+        remaining = self.scheduler.daily_remaining(self.rate_bucket)
+        if remaining is not None and remaining <= 0:
+            self.logger.error(f"Daily quota exceeded: {self.rate_limit_daily}/{self.rate_limit_daily} requests used today")
             return False
 
         return True
 
     def _wait_for_rate_limit(self):
         """
-        Enforce rate limiting by waiting if needed.
-        Ensures minimum 4 seconds between requests (15 RPM compliance).
+        Wait for a slot in the shared Gemini bucket (15 RPM across all
+        processes; interactive requests are served before background ones).
+        Raises DailyQuotaExceeded if another process used up today's quota.
         """
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-
-        if time_since_last < self.min_request_interval:
-            wait_time = self.min_request_interval - time_since_last
-            self.logger.info(f"Rate limiting: waiting {wait_time:.1f}s (15 RPM compliance)")
-            time.sleep(wait_time)
-
-        self.last_request_time = time.time()
-
-        # Update daily counter
-        self.daily_requests['requests'] = self.daily_requests.get('requests', 0) + 1
-        self._save_daily_quota()
+        self.scheduler.acquire(self.rate_bucket)
 
         # Log quota status every 10 requests
-        if self.daily_requests['requests'] % 10 == 0:
-            remaining = self.rate_limit_daily - self.daily_requests['requests']
-            self.logger.info(f"Gemini API quota: {self.daily_requests['requests']}/{self.rate_limit_daily} used today ({remaining} remaining)")
+        usage = self.daily_requests
+        if usage['requests'] % 10 == 0:
+            remaining = self.rate_limit_daily - usage['requests']
+            self.logger.info(f"Gemini API quota: {usage['requests']}/{self.rate_limit_daily} used today ({remaining} remaining)")
 
-    def _get_cache_key(self, file_path: str) -> str:
-        """Generate cache key for a file based on path and modification time"""
-        file_path_obj = Path(file_path)
-
-        # Include file modification time in cache key
-        if file_path_obj.exists():
-            mtime = file_path_obj.stat().st_mtime
-            cache_input = f"{file_path}_{mtime}"
-        else:
-            cache_input = file_path
-
-        return hashlib.md5(cache_input.encode()).hexdigest()
+    def _get_cache_key(self, file_path: str, kind: str = "image", prompt: str = "") -> Optional[str]:
+        """
+        Generate cache key for a file from its content, so moved or renamed
+        files keep their analysis. prompt carries the inputs that change the
+        result (project context, allowed categories).
+        """
+        if not self.analysis_cache:
+            return None
+        return self.analysis_cache.file_key(Path(file_path), f"vision.{kind}", self.CACHE_VERSION, prompt)
+
+    def _cache_prompt(self, project_context: Optional[str], allowed_categories: Optional[List[Dict[str, str]]],
+                      max_duration: Optional[int] = None) -> str:
+        """Prompt inputs (and, for videos, the sampled duration) that are part of the cache key"""
+        inputs = {
+            "project_context": project_context or "",
+            "categories": [(cat.get('id'), cat.get('name')) for cat in allowed_categories or []]
+        }
+        if max_duration is not None:
+            inputs["max_duration"] = max_duration
+        return json.dumps(inputs)
 
-    def _load_from_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
+    def _load_from_cache(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
         """Load analysis result from cache if available and fresh"""
         if not self.enable_caching:
             return None
 
-        cache_file = self.cache_dir / f"{cache_key}.json"
-
-        if not cache_file.exists():
+        cached_result = self.analysis_cache.get(cache_key, max_age_days=self.cache_duration_days)
+        if cached_result is None:
             self.cache_misses += 1
             return None
 
-        try:
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-
-            # Check if cache is still fresh
-            cached_time = datetime.fromisoformat(cached_data.get('timestamp', '2000-01-01'))
-            age_days = (datetime.now() - cached_time).days
+        self.cache_hits += 1
+        self.logger.info(f"Cache hit for {cache_key}")
+        return cached_result
 
-            if age_days > self.cache_duration_days:
-                self.logger.info(f"Cache expired for {cache_key}")
-                cache_file.unlink()  # Remove expired cache
-                self.cache_misses += 1
-                return None
-
-            self.cache_hits += 1
-            self.logger.info(f"Cache hit for {cache_key}")
-            return cached_data.get('result')
-
-        except Exception as e:
-            self.logger.warning(f"Error loading cache: {e}")
-            self.cache_misses += 1
-            return None
+    @staticmethod
+    def _for_file(cached_result: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
+        """
+        A cached analysis restated for the file being analyzed: the cache is
+        keyed by content, so the entry may have been stored for a copy or for
+        this file under an older name or location.
+        """
+        result = dict(cached_result)
+        result['metadata'] = {
+            **(cached_result.get('metadata') or {}),
+            'file_name': file_path.name,
+            'file_size': file_path.stat().st_size,
+        }
+        for key in ('file_path', 'path'):
+            if key in result:
+                result[key] = str(file_path)
+        return result
 
-    def _save_to_cache(self, cache_key: str, result: Dict[str, Any]):
+    def _save_to_cache(self, cache_key: Optional[str], result: Dict[str, Any], kind: str = "image"):
         """Save analysis result to cache"""
         if not self.enable_caching:
             return
 
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        self.analysis_cache.put(cache_key, f"vision.{kind}", result)
 
-        try:
-            cache_data = {
-                'timestamp': datetime.now().isoformat(),
-                'result': result
-            }
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-        except Exception as e:
-            self.logger.warning(f"Error saving to cache: {e}")
+    def _load_near_duplicate_analysis(self, image_path: Path, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Reuse the cached analysis of a visually near-identical image (same
+        photo at another resolution or format). Also records this image's
+        perceptual hash so later near-duplicates can find it.
+        """
+        if not self.enable_caching:
+            return None
+
+        for match in self.perceptual_hashes.find_near_duplicates(image_path):
+            cache_key = make_cache_key(match['fingerprint'], "vision.image", self.CACHE_VERSION, prompt)
+            cached_result = self.analysis_cache.get(cache_key, max_age_days=self.cache_duration_days)
+            if not cached_result:
+                continue
+
+            self.near_duplicate_hits += 1
+            self.logger.info(f"Reusing analysis of near-duplicate {Path(match['file_path']).name} for {image_path.name}")
+            result = self._for_file(cached_result, image_path)
+            result['near_duplicate_of'] = match['file_path']
+            result['near_duplicate_distance'] = match['distance']
+            return result
+        return None
 
     def analyze_image(self, image_path: str, project_context: Optional[str] = None, allowed_categories: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
         """
@@ -538,23 +545,23 @@ Return a valid JSON object with this structure:
                 'confidence_score': 0.0
             }
 
-        # Check cache if not in a specific project context (context might change results)
-        if not project_context:
-            cache_key = self._get_cache_key(str(image_path_obj)) # Use str() for consistency with _get_cache_key signature
-            cached_result = self._load_from_cache(cache_key)
-            if cached_result:
-                return cached_result
-        else:
-            # If project_context is present, we consider it a cache miss for the purpose of this block
-            # as the context changes the expected output.
-            self.cache_misses += 1
+        # Check cache (project context and categories are part of the key)
+        cache_prompt = self._cache_prompt(project_context, allowed_categories)
+        cache_key = self._get_cache_key(str(image_path_obj), "image", cache_prompt)
+        cached_result = self._load_from_cache(cache_key)
+        if cached_result:
+            return self._for_file(cached_result, image_path_obj)
+
+        near_duplicate_result = self._load_near_duplicate_analysis(image_path_obj, cache_prompt)
+        if near_duplicate_result:
+            self._save_to_cache(cache_key, near_duplicate_result)
+            return near_duplicate_result
 
         # Check if Remote Powerhouse should handle this (OFFLOADING)
         if self.remote_enabled and self.remote_ip:
             remote_result = self._analyze_image_remote(image_path_obj, project_context, allowed_categories)
             if remote_result and remote_result.get('success'):
                 # Cache the result
-                cache_key = self._get_cache_key(str(image_path_obj))
                 self._save_to_cache(cache_key, remote_result)
                 return remote_result
             else:
@@ -636,6 +643,8 @@ Return a valid JSON object with this structure:
             # Parse response
             analysis_text = response.text
             result = self._parse_image_analysis(analysis_text, image_path_obj)
+            if result.get('success'):
+                self._save_to_cache(cache_key, result)
 
             # Update learning patterns
             self._update_vision_patterns(result)
@@ -766,7 +775,7 @@ Return a valid JSON object with this structure:
 
         try:
             # Load image
-            image = self._load_image(image_path_obj)
+            image = self._load_image(image_path_obj, purpose="ocr")
 
             # Check rate limit before API call
             if not self._check_rate_limit():
@@ -839,10 +848,11 @@ Return a valid JSON object with this structure:
             }
 
         # Check cache first
-        cache_key = self._get_cache_key(video_path)
+        cache_key = self._get_cache_key(video_path, "video",
+                                        self._cache_prompt(project_context, allowed_categories, max_duration))
         cached_result = self._load_from_cache(cache_key)
         if cached_result:
-            return cached_result
+            return self._for_file(cached_result, video_path_obj)
 
         # Ensure initialized (Lazy)
         self._ensure_initialized()
@@ -862,11 +872,16 @@ Return a valid JSON object with this structure:
                     'quota_exceeded': True
                 }
 
+            # Long videos are uploaded as a ~max_duration sample (made before
+            # taking a rate limit slot, so slow ffmpeg work doesn't hold one)
+            upload_path = self.video_sampler.sample(video_path_obj, max_duration=max_duration)
+            sampled = upload_path != video_path_obj
+
             # Enforce rate limiting (15 RPM)
             self._wait_for_rate_limit()
 
             # Upload video file
-            self.logger.info(f"Uploading video {video_path_obj.name}... (quota: {self.daily_requests['requests']}/{self.rate_limit_daily})")
+            self.logger.info(f"Uploading video {video_path_obj.name}{' (sample)' if sampled else ''}... (quota: {self.daily_requests['requests']}/{self.rate_limit_daily})")
             
             if self.use_vertex:
                 # Vertex AI uses GCS or direct uploads. For small files, we can use Part.from_data, 
@@ -882,9 +897,9 @@ Return a valid JSON object with this structure:
                 # IF genai is available, we use it for upload.
                 if not GEMINI_AVAILABLE:
                     raise ImportError("google-generativeai required for video upload")
-                video_file = genai.upload_file(path=str(video_path_obj))
+                video_file = genai.upload_file(path=str(upload_path))
             else:
-                video_file = genai.upload_file(path=str(video_path_obj))
+                video_file = genai.upload_file(path=str(upload_path))
 
             # Wait for processing
             while video_file.state.name == "PROCESSING":
@@ -960,6 +975,7 @@ Return a valid JSON object with this structure:
             # Parse response
             analysis_text = response.text
             result = self._parse_video_analysis(analysis_text, video_path_obj)
+            result['sampled'] = sampled
 
             # Clean up uploaded file
             if not self.use_vertex:
@@ -969,7 +985,7 @@ Return a valid JSON object with this structure:
             self._update_vision_patterns(result)
 
             # Cache the result
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_key, result, "video")
 
             return result
 
@@ -1008,35 +1024,16 @@ Return a valid JSON object with this structure:
                 'confidence_score': 0.0
             }
 
-    def _load_image(self, image_path: Path) -> Any:
-        """Load and validate image file"""
+    def _load_image(self, image_path: Path, purpose: str = "vision") -> Any:
+        """
+        Load an image downscaled for the model: "vision" for scene analysis,
+        "ocr" keeps more resolution for text extraction.
+        """
         if PIL_AVAILABLE:
-            # Use PIL to validate and potentially resize large images
+            # Decoded with draft mode/embedded thumbnails in a worker process
+            # and cached by content, so big originals are decoded once
             try:
-                img = Image.open(image_path)
-
-                # Convert RGBA to RGB (Gemini doesn't handle alpha channel well)
-                if img.mode == 'RGBA':
-                    # Create white background and composite the image onto it
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[3])  # 3 is the alpha channel
-                    img = background
-                    self.logger.info(f"Converted RGBA to RGB for {image_path.name}")
-                elif img.mode not in ('RGB', 'L'):
-                    # Convert other modes (P, LA, etc.) to RGB
-                    img = img.convert('RGB')
-                    self.logger.info(f"Converted {img.mode} to RGB for {image_path.name}")
-
-                # Resize if too large (Gemini has size limits)
-                max_dimension = 3072  # Gemini's max dimension
-                if max(img.size) > max_dimension:
-                    ratio = max_dimension / max(img.size)
-                    new_size = tuple(int(dim * ratio) for dim in img.size)
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    self.logger.info(f"Resized image to {new_size}")
-
-                return img
-
+                return self.image_preprocessor.load(image_path, purpose)
             except Exception as e:
                 self.logger.warning(f"PIL processing failed, using direct upload: {e}")
 
@@ -1669,6 +1666,7 @@ Format your response clearly with these categories."""
             'cache_hits': self.cache_hits,
             'cache_misses': self.cache_misses,
             'cache_hit_rate': f"{cache_hit_rate:.1f}%",
+            'near_duplicate_hits': self.near_duplicate_hits,
             'api_initialized': self.api_initialized,
             'category_frequencies': dict(self.vision_patterns['category_frequencies']),
             'most_common_category': max(
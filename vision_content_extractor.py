@@ -11,10 +11,12 @@ import base64
 import json
 import sqlite3
 from gdrive_integration import get_metadata_root
+from analysis_cache import get_analysis_cache
+from video_sampling import get_video_sampler
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 import mimetypes
 
 # Add project directory to path
@@ -49,9 +51,12 @@ class GeminiVisionExtractor:
         self.vision_dir = get_metadata_root() / "vision_analysis"
         self.vision_dir.mkdir(parents=True, exist_ok=True)
         
-        # Cache directory for vision results
+        # Scratch directory (video samples); analysis results go to the shared analysis cache
         self.cache_dir = self.vision_dir / "vision_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.analysis_cache = get_analysis_cache()
+        # Samples of long videos (cached by content in the derivative cache)
+        self.video_sampler = get_video_sampler()
         
         # Supported file types
         self.supported_image_types = {
@@ -176,7 +181,7 @@ Perfect for organizing Papers That Dream podcast content and other creative work
         
         # Check cache first
         if self.enable_caching:
-            cached_result = self._get_cached_analysis(file_path)
+            cached_result = self._get_cached_analysis(file_path, context)
             if cached_result:
                 if self.detailed_logging:
                     print(f"📋 Using cached vision analysis for {file_path.name}")
@@ -191,7 +196,7 @@ Perfect for organizing Papers That Dream podcast content and other creative work
             
             # Cache the result
             if self.enable_caching and analysis_result.success:
-                self._cache_analysis_result(file_path, analysis_result)
+                self._cache_analysis_result(file_path, analysis_result, context)
             
             return analysis_result
             
@@ -294,82 +299,20 @@ Focus on details that would help with project categorization and file organizati
             ])
             
             analysis_text = response.text
-            result = self._parse_analysis_response(analysis_text, file_path, 'video')
-            
-            # Clean up temporary sample file if created
-            if video_to_analyze != file_path and video_to_analyze.exists():
-                video_to_analyze.unlink()
-            
-            return result
+            # Samples stay in the derivative cache for the next analysis
+            return self._parse_analysis_response(analysis_text, file_path, 'video')
             
         except Exception as e:
             raise Exception(f"Video analysis failed: {e}")
     
     def _prepare_video_for_analysis(self, file_path: Path) -> Path:
-        """Prepare video for analysis - create sample if too long"""
+        """Prepare video for analysis - a ~2 minute sample if it is longer"""
         
         try:
-            # Get video duration
-            import subprocess
-            cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', 
-                   '-of', 'csv=p=0', str(file_path.absolute())]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                # Can't get duration, use original
-                return file_path
-            
-            duration = float(result.stdout.strip())
-            max_duration = 120  # 2 minutes
-            
-            if duration <= max_duration:
-                # Video is short enough, use original
-                return file_path
-            
-            print(f"📹 Video is {duration:.1f}s, creating {max_duration}s sample...")
-            
-            # Create intelligent sample - take from multiple points
-            sample_path = self.cache_dir / f"sample_{file_path.stem}.mp4"
-            
-            # Create a 2-minute sample with clips from beginning, middle, and end
-            sample_duration = max_duration / 3  # 40 seconds each
-            
-            # Beginning: 0 to 40s
-            # Middle: middle-20s to middle+20s  
-            # End: last 40s
-            
-            middle_start = max(duration/2 - sample_duration/2, sample_duration)
-            end_start = max(duration - sample_duration, duration * 0.8)
-            
-            # Build ffmpeg command to concatenate clips
-            filter_complex = (
-                f"[0:v]trim=start=0:duration={sample_duration}[v1];"
-                f"[0:v]trim=start={middle_start}:duration={sample_duration}[v2];"
-                f"[0:v]trim=start={end_start}:duration={sample_duration}[v3];"
-                f"[0:a]atrim=start=0:duration={sample_duration}[a1];"
-                f"[0:a]atrim=start={middle_start}:duration={sample_duration}[a2];"
-                f"[0:a]atrim=start={end_start}:duration={sample_duration}[a3];"
-                f"[v1][a1][v2][a2][v3][a3]concat=n=3:v=1:a=1[outv][outa]"
-            )
-            
-            cmd = [
-                'ffmpeg', '-i', str(file_path.absolute()),
-                '-filter_complex', filter_complex,
-                '-map', '[outv]', '-map', '[outa]',
-                '-y',  # Overwrite output
-                str(sample_path.absolute())
-            ]
-            
-            # Run ffmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0 and sample_path.exists():
-                print(f"✅ Created intelligent video sample: {sample_path.name}")
-                return sample_path
-            else:
-                print(f"⚠️ Failed to create sample, using original video")
-                return file_path
-                
+            video_to_analyze = self.video_sampler.sample(file_path, max_duration=120)
+            if video_to_analyze != file_path:
+                print(f"✅ Using video sample: beginning, middle and end of {file_path.name}")
+            return video_to_analyze
         except Exception as e:
             print(f"⚠️ Error preparing video sample: {e}")
             return file_path
@@ -507,71 +450,32 @@ Focus on details that would help with project categorization and file organizati
         
         return results
     
-    def _get_cached_analysis(self, file_path: Path) -> Optional[VisionAnalysisResult]:
-        """Get cached analysis result if available and up-to-date"""
-        
-        cache_file = self.cache_dir / f"{file_path.name}.json"
+    # Bump when the prompts or response parsing change so cached analyses are redone
+    CACHE_VERSION = "1"
+
+    def _cache_key(self, file_path: Path, context: str) -> Optional[str]:
+        """Content-addressed key, so a moved or renamed file keeps its analysis"""
+        prompt = self.analysis_prompts.get(context, self.analysis_prompts['general'])
+        return self.analysis_cache.file_key(file_path, "gemini_vision_extractor", self.CACHE_VERSION, prompt)
+
+    def _get_cached_analysis(self, file_path: Path, context: str = 'general') -> Optional[VisionAnalysisResult]:
+        """Get cached analysis result for this file's content, if any"""
         
-        if not cache_file.exists():
+        cached_data = self.analysis_cache.get(self._cache_key(file_path, context))
+        if not cached_data:
             return None
         
         try:
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-            
-            # Check if file has been modified since cache
-            file_mtime = file_path.stat().st_mtime
-            cache_mtime = cached_data.get('file_mtime', 0)
-            
-            if file_mtime > cache_mtime:
-                return None  # File modified, cache invalid
-            
-            # Reconstruct VisionAnalysisResult
-            return VisionAnalysisResult(
-                success=cached_data['success'],
-                description=cached_data['description'],
-                content_type=cached_data['content_type'],
-                subjects=cached_data['subjects'],
-                context=cached_data['context'],
-                text_content=cached_data['text_content'],
-                confidence=cached_data['confidence'],
-                suggested_tags=cached_data['suggested_tags'],
-                suggested_category=cached_data['suggested_category'],
-                reasoning=cached_data['reasoning'],
-                technical_details=cached_data['technical_details']
-            )
-            
-        except Exception:
-            return None
+            return VisionAnalysisResult(**cached_data)
+        except TypeError:
+            return None  # Stored by an incompatible version
     
-    def _cache_analysis_result(self, file_path: Path, result: VisionAnalysisResult):
+    def _cache_analysis_result(self, file_path: Path, result: VisionAnalysisResult, context: str = 'general'):
         """Cache analysis result for future use"""
         
-        cache_file = self.cache_dir / f"{file_path.name}.json"
-        
-        try:
-            cache_data = {
-                'success': result.success,
-                'description': result.description,
-                'content_type': result.content_type,
-                'subjects': result.subjects,
-                'context': result.context,
-                'text_content': result.text_content,
-                'confidence': result.confidence,
-                'suggested_tags': result.suggested_tags,
-                'suggested_category': result.suggested_category,
-                'reasoning': result.reasoning,
-                'technical_details': result.technical_details,
-                'file_mtime': file_path.stat().st_mtime,
-                'cached_at': datetime.now().isoformat()
-            }
-            
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-                
-        except Exception as e:
+        if not self.analysis_cache.put(self._cache_key(file_path, context), "gemini_vision_extractor", asdict(result)):
             if self.detailed_logging:
-                print(f"⚠️ Could not cache analysis for {file_path.name}: {e}")
+                print(f"⚠️ Could not cache analysis for {file_path.name}")
 
 
 def test_vision_analysis():